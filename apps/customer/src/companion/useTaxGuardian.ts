@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback } from "react";
+import { useEffect, useRef, useState, useCallback } from "react";
 import { ensureCsrfToken, getCsrfToken } from "../utils/csrf";
 
 export type Severity = "high" | "medium" | "low";
@@ -101,6 +101,10 @@ export interface TaxAnomaly {
   difference?: number;
 }
 
+// A period without a snapshot returns 202 while a worker computes it.
+export const SNAPSHOT_POLL_INTERVAL_MS = 1500;
+export const SNAPSHOT_POLL_MAX_ATTEMPTS = 40;
+
 export function useTaxGuardian(initialPeriodKey?: string, initialSeverity?: Severity | "all") {
   const [periods, setPeriods] = useState<TaxPeriod[]>([]);
   const [snapshot, setSnapshot] = useState<TaxSnapshot | null>(null);
@@ -110,6 +114,7 @@ export function useTaxGuardian(initialPeriodKey?: string, initialSeverity?: Seve
   const [severityFilter, setSeverityFilter] = useState<Severity | "all">(initialSeverity || "all");
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const snapshotPeriodRef = useRef<string | null>(null);
 
   const apiFetch = useCallback(
     async (input: RequestInfo | URL, init: RequestInit = {}) => {
@@ -147,10 +152,24 @@ export function useTaxGuardian(initialPeriodKey?: string, initialSeverity?: Seve
 
   const fetchSnapshot = useCallback(
     async (period: string) => {
-      const res = await apiFetch(`/api/tax/periods/${period}/`);
-      if (!res.ok) throw new Error("Failed to load tax snapshot");
-      const data = await res.json();
-      setSnapshot(data);
+      snapshotPeriodRef.current = period;
+      for (let attempt = 1; ; attempt++) {
+        const res = await apiFetch(`/api/tax/periods/${period}/`);
+        if (res.status === 202) {
+          setSnapshot(null);
+          if (attempt >= SNAPSHOT_POLL_MAX_ATTEMPTS) {
+            throw new Error("Tax snapshot is still being computed. Try again shortly.");
+          }
+          await new Promise((resolve) => setTimeout(resolve, SNAPSHOT_POLL_INTERVAL_MS));
+          // Another period was selected meanwhile; its own fetch takes over.
+          if (snapshotPeriodRef.current !== period) return;
+          continue;
+        }
+        if (!res.ok) throw new Error("Failed to load tax snapshot");
+        const data = await res.json();
+        if (snapshotPeriodRef.current === period) setSnapshot(data);
+        return;
+      }
     },
     [apiFetch]
   );
@@ -14,6 +14,7 @@ from .config import (
 from .runner import (
     ExperimentRunner,
     ExperimentResult,
+    load_streamed_results,
     run_experiment,
 )
 
@@ -23,4 +24,5 @@ __all__ = [
     "ExperimentRunner",
     "ExperimentResult",
     "run_experiment",
+    "load_streamed_results",
 ]
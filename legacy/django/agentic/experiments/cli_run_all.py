@@ -2,9 +2,10 @@
 CLI - Run All Experiments
 
 Usage:
-    python -m agentic.experiments.cli_run_all
+    python -m agentic.experiments.cli_run_all [--workers N] [--seeds 1,2,3 | --seed-count N] [--resume]
 """
 
+import argparse
 import json
 from pathlib import Path
 from datetime import datetime
@@ -13,8 +14,28 @@ from .config import ExperimentConfig
 from .runner import run_experiment, run_all_baselines
 
 
-def main():
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run all baseline experiments.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Scenario worker processes (default 1 = sequential).")
+    parser.add_argument("--seeds", type=str, default=None,
+                        help="Comma-separated scenario seeds.")
+    parser.add_argument("--seed-count", type=int, default=None,
+                        help="Use seeds 0..N-1 instead of the config defaults.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse scenario results already streamed to the JSONL files.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Run all baseline experiments and save results."""
+    args = _parse_args(argv)
+    seeds = None
+    if args.seeds:
+        seeds = [int(s) for s in args.seeds.split(",") if s.strip()]
+    elif args.seed_count:
+        seeds = list(range(args.seed_count))
+    
     print("=" * 60)
     print("Agentic Accounting OS - Experiment Runner")
     print("=" * 60)
@@ -37,18 +58,30 @@ def main():
     ]
     
     for config in configs:
+        config.workers = args.workers
+        config.resume = args.resume
+        config.results_jsonl_path = str(output_dir / f"scenarios_{config.name}.jsonl")
+        if seeds is not None:
+            config.scenario_seeds = seeds
+        
         print(f"Running: {config.name}")
         print(f"  Mode: {config.mode.value}")
         print(f"  Description: {config.description}")
         
         result = run_experiment(config)
         all_results[config.name] = result
+        timing = result.timing_summary()
         
         print(f"  Composite Score: {result.aggregate_scores.composite_score:.4f}")
         print(f"  - Extraction: {result.aggregate_scores.extraction_accuracy:.4f}")
         print(f"  - Journal: {result.aggregate_scores.journal_correctness:.4f}")
         print(f"  - Compliance: {result.aggregate_scores.compliance_correctness:.4f}")
         print(f"  - Audit: {result.aggregate_scores.audit_correctness:.4f}")
+        print(
+            f"  Timing: {timing['scenarios']} scenarios in {timing['wall_time_ms'] / 1000:.2f}s "
+            f"({timing['throughput_per_s']:.2f}/s, {timing['workers']} workers)"
+        )
+        print(f"  - p50/p95/p99: {timing['p50_ms']:.1f} / {timing['p95_ms']:.1f} / {timing['p99_ms']:.1f} ms")
         print()
     
     # Save results
@@ -77,6 +110,14 @@ def main():
         s = result.aggregate_scores
         print(f"{name:<25} {s.extraction_accuracy:.4f}    {s.journal_correctness:.4f}    {s.compliance_correctness:.4f}   {s.audit_correctness:.4f}   {s.composite_score:.4f}")
     
+    print()
+    print(f"{'Mode':<25} {'Scen/s':<10} {'p50 ms':<10} {'p95 ms':<10} {'p99 ms':<10}")
+    print("-" * 65)
+    
+    for name, result in all_results.items():
+        t = result.timing_summary()
+        print(f"{name:<25} {t['throughput_per_s']:<10.2f} {t['p50_ms']:<10.1f} {t['p95_ms']:<10.1f} {t['p99_ms']:<10.1f}")
+    
     print()
     print("=" * 60)
     print("Experiments complete!")
@@ -46,6 +46,11 @@ class ExperimentConfig(BaseModel):
     evaluate_compliance: bool = True
     evaluate_audit: bool = True
     
+    # Execution options
+    workers: int = 1  # >1 runs scenarios in a process pool
+    results_jsonl_path: Optional[str] = None  # stream per-scenario results here
+    resume: bool = False  # skip seeds already present in results_jsonl_path
+    
     # Output options
     save_artifacts: bool = True
     verbose: bool = False
@@ -2,13 +2,24 @@
 Experiment Runner - Execute and Score Experiments
 
 Runs experiments across different modes and computes scores.
+
+Scenarios run sequentially by default. With `workers > 1` they are fanned out
+to a process pool; results are always returned in `scenario_seeds` order, and
+can be streamed to a JSONL file as they complete so partial sweeps survive a
+crash (`resume=True` picks up where the file left off).
 """
 
 from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from decimal import Decimal
 from datetime import datetime
+from pathlib import Path
 import json
+import math
+import os
+import random
+import time
 
 from .config import ExperimentConfig, ExperimentMode, ScoringWeights
 
@@ -63,6 +74,16 @@ class ScenarioResult:
             "duration_ms": round(self.duration_ms, 2),
             "errors": self.errors,
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScenarioResult":
+        return cls(
+            scenario_id=data["scenario_id"],
+            seed=int(data["seed"]),
+            scores=ScoreBreakdown(**data.get("scores", {})),
+            duration_ms=float(data.get("duration_ms", 0.0)),
+            errors=list(data.get("errors", [])),
+        )
 
 
 @dataclass
@@ -75,6 +96,26 @@ class ExperimentResult:
     finished_at: Optional[datetime] = None
     scenario_results: List[ScenarioResult] = field(default_factory=list)
     aggregate_scores: ScoreBreakdown = field(default_factory=ScoreBreakdown)
+    workers: int = 1
+    wall_time_ms: float = 0.0
+    resumed: int = 0  # scenarios reused from a previous stream, not re-run
+    
+    def timing_summary(self) -> dict:
+        """Throughput and per-scenario duration percentiles."""
+        durations = sorted(s.duration_ms for s in self.scenario_results)
+        executed = len(durations) - self.resumed
+        wall_s = self.wall_time_ms / 1000
+        return {
+            "scenarios": len(durations),
+            "resumed": self.resumed,
+            "workers": self.workers,
+            "wall_time_ms": round(self.wall_time_ms, 2),
+            "throughput_per_s": round(executed / wall_s, 2) if wall_s > 0 else 0.0,
+            "p50_ms": round(_percentile(durations, 50), 2),
+            "p95_ms": round(_percentile(durations, 95), 2),
+            "p99_ms": round(_percentile(durations, 99), 2),
+            "max_ms": round(durations[-1], 2) if durations else 0.0,
+        }
     
     def to_dict(self) -> dict:
         return {
@@ -84,9 +125,53 @@ class ExperimentResult:
             "finished_at": self.finished_at.isoformat() if self.finished_at else None,
             "scenario_results": [s.to_dict() for s in self.scenario_results],
             "aggregate_scores": self.aggregate_scores.to_dict(),
+            "timing": self.timing_summary(),
         }
 
 
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lo = math.floor(rank)
+    hi = math.ceil(rank)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (rank - lo)
+
+
+# =============================================================================
+# RESULT STREAMING
+# =============================================================================
+
+
+def load_streamed_results(path, config_name: str) -> Dict[int, ScenarioResult]:
+    """
+    Read scenario results for `config_name` from a JSONL stream.
+
+    A truncated trailing line (the process died mid-write) is ignored.
+    """
+    results: Dict[int, ScenarioResult] = {}
+    path = Path(path)
+    if not path.exists():
+        return results
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("config_name") != config_name:
+                continue
+            scenario = ScenarioResult.from_dict(row)
+            results[scenario.seed] = scenario
+    return results
+
+
 # =============================================================================
 # EXPERIMENT RUNNER
 # =============================================================================
@@ -104,24 +189,78 @@ class ExperimentRunner:
     
     def run(self) -> ExperimentResult:
         """Run the experiment across all scenarios."""
+        workers = max(1, int(self.config.workers or 1))
         result = ExperimentResult(
             config_name=self.config.name,
             mode=self.config.mode.value,
+            workers=workers,
         )
+        start = time.perf_counter()
+        
+        seeds = list(self.config.scenario_seeds)
+        done: Dict[int, ScenarioResult] = {}
+        stream_path = self.config.results_jsonl_path
+        if stream_path and self.config.resume:
+            done = load_streamed_results(stream_path, self.config.name)
+        pending = [seed for seed in dict.fromkeys(seeds) if seed not in done]
+        result.resumed = len(set(seeds) & set(done))
         
-        for seed in self.config.scenario_seeds:
-            scenario_result = self._run_scenario(seed)
-            result.scenario_results.append(scenario_result)
+        stream = None
+        if stream_path:
+            Path(stream_path).parent.mkdir(parents=True, exist_ok=True)
+            stream = open(stream_path, "a" if self.config.resume else "w", encoding="utf-8")
+            if stream.tell() and not Path(stream_path).read_bytes().endswith(b"\n"):
+                # Terminate a line cut short by a crash so the next row parses.
+                stream.write("\n")
+        try:
+            for scenario_result in self._iter_scenarios(pending, workers):
+                done[scenario_result.seed] = scenario_result
+                if stream is not None:
+                    self._write_stream_line(stream, scenario_result)
+        finally:
+            if stream is not None:
+                stream.close()
+        
+        # Deterministic ordering regardless of completion order
+        result.scenario_results = [done[seed] for seed in seeds]
         
         # Calculate aggregate scores
         result.aggregate_scores = self._aggregate_scores(result.scenario_results)
         result.finished_at = datetime.utcnow()
+        result.wall_time_ms = (time.perf_counter() - start) * 1000
         
         return result
     
+    def _iter_scenarios(self, seeds: List[int], workers: int):
+        """Yield scenario results as they complete."""
+        if workers == 1 or len(seeds) <= 1:
+            for seed in seeds:
+                yield self._run_scenario(seed)
+            return
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(seeds)),
+            initializer=_init_worker,
+            initargs=(self.config,),
+        ) as pool:
+            futures = [pool.submit(_run_scenario_in_worker, seed) for seed in seeds]
+            for future in as_completed(futures):
+                yield future.result()
+    
+    def _write_stream_line(self, stream, scenario_result: ScenarioResult) -> None:
+        row = {
+            "config_name": self.config.name,
+            "mode": self.config.mode.value,
+            **scenario_result.to_dict(),
+        }
+        stream.write(json.dumps(row) + "\n")
+        stream.flush()
+    
     def _run_scenario(self, seed: int) -> ScenarioResult:
         """Run a single scenario."""
-        import time
+        # Reseed per scenario so results do not depend on which worker (or in
+        # which order) the scenario runs.
+        random.seed(seed)
         start = time.perf_counter()
         
         scenario_result = ScenarioResult(
@@ -277,6 +416,29 @@ class ExperimentRunner:
         )
 
 
+# =============================================================================
+# PROCESS POOL WORKERS
+# =============================================================================
+
+
+_worker_runner: Optional[ExperimentRunner] = None
+
+
+def _init_worker(config: ExperimentConfig) -> None:
+    """Build one runner per worker process (spawned workers need Django set up)."""
+    global _worker_runner
+    if os.environ.get("DJANGO_SETTINGS_MODULE"):
+        import django
+        from django.apps import apps
+        if not apps.ready:
+            django.setup()
+    _worker_runner = ExperimentRunner(config)
+
+
+def _run_scenario_in_worker(seed: int) -> ScenarioResult:
+    return _worker_runner._run_scenario(seed)
+
+
 # =============================================================================
 # CONVENIENCE FUNCTIONS
 # =============================================================================
@@ -0,0 +1,3 @@
+"""
+Experiment runner tests package.
+"""
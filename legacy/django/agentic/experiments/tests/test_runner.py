@@ -0,0 +1,85 @@
+"""
+Tests for the Experiment Runner
+
+Covers:
+- Process-pool runs return results in scenario_seeds order
+- Resume reuses scenarios already streamed to the JSONL file
+- cli_run_all defaults to a single worker
+"""
+
+import json
+import time
+
+import pytest
+
+from agentic.experiments.cli_run_all import _parse_args
+from agentic.experiments.config import ExperimentConfig
+from agentic.experiments.runner import (
+    ExperimentRunner,
+    ScenarioResult,
+    ScoreBreakdown,
+    load_streamed_results,
+)
+
+
+def _fake_scenario(self, seed):
+    """Stand-in for the workflow run; higher seeds take longer to finish."""
+    time.sleep(0.05 * seed)
+    return ScenarioResult(
+        scenario_id=f"ran-{seed}",
+        seed=seed,
+        scores=ScoreBreakdown(composite_score=seed / 10),
+        duration_ms=50.0 * seed,
+    )
+
+
+@pytest.fixture
+def fake_scenarios(monkeypatch):
+    # Pool workers are forked, so they inherit the patched method.
+    monkeypatch.setattr(ExperimentRunner, "_run_scenario", _fake_scenario)
+
+
+def _config(tmp_path, seeds, **extra):
+    config = ExperimentConfig.baseline_heuristic()
+    config.scenario_seeds = seeds
+    config.results_jsonl_path = str(tmp_path / "scenarios.jsonl")
+    for key, value in extra.items():
+        setattr(config, key, value)
+    return config
+
+
+class TestProcessPoolRunner:
+    """Tests for running scenarios across worker processes."""
+
+    def test_results_follow_seed_order_not_completion_order(self, tmp_path, fake_scenarios):
+        config = _config(tmp_path, [5, 1, 3], workers=3)
+
+        result = ExperimentRunner(config).run()
+
+        assert [s.seed for s in result.scenario_results] == [5, 1, 3]
+        assert [s.scenario_id for s in result.scenario_results] == ["ran-5", "ran-1", "ran-3"]
+        assert result.workers == 3
+        assert result.aggregate_scores.composite_score == pytest.approx(0.3)
+        # The stream is written in completion order.
+        with open(config.results_jsonl_path) as fh:
+            assert [json.loads(line)["seed"] for line in fh] == [1, 3, 5]
+
+    def test_resume_skips_streamed_scenarios(self, tmp_path, fake_scenarios):
+        config = _config(tmp_path, [1, 2, 3], workers=2, resume=True)
+        streamed = ScenarioResult(scenario_id="streamed-2", seed=2)
+        with open(config.results_jsonl_path, "w") as fh:
+            fh.write(json.dumps({"config_name": config.name, **streamed.to_dict()}) + "\n")
+            fh.write('{"config_name": "baseline_heur')  # died mid-write
+
+        result = ExperimentRunner(config).run()
+
+        assert result.resumed == 1
+        assert [s.scenario_id for s in result.scenario_results] == ["ran-1", "streamed-2", "ran-3"]
+        assert set(load_streamed_results(config.results_jsonl_path, config.name)) == {1, 2, 3}
+
+
+class TestCliRunAll:
+    """Tests for the cli_run_all argument defaults."""
+
+    def test_workers_default_to_sequential(self):
+        assert _parse_args([]).workers == 1
@@ -0,0 +1,123 @@
+"""
+Tests for the agentic tracer
+
+Covers:
+- Span timing and parent/child ids
+- Trace id adoption by enclosing spans
+- Ring buffer overflow and per-trace sampling
+- Disabled tracer does no work
+- JSONL and SQLite exporters
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from agentic.logging.tracing import (
+    InMemoryExporter,
+    JsonlFileExporter,
+    SqliteExporter,
+    Tracer,
+    configure_tracer,
+    trace_event,
+    trace_span,
+    traced,
+)
+
+
+@pytest.fixture
+def memory_tracer():
+    exporter = InMemoryExporter()
+    tracer = Tracer([exporter], flush_interval_s=60)
+    previous = configure_tracer(tracer)
+    yield tracer, exporter
+    configure_tracer(previous)
+
+
+class TestSpans:
+
+    def test_nested_spans_record_parent_and_duration(self, memory_tracer):
+        tracer, exporter = memory_tracer
+        with trace_span("wf", "run", trace_id="t1") as outer:
+            with trace_span("wf", "step") as inner:
+                trace_event("wf", "inside")
+        tracer.flush()
+
+        by_event = {r["event"]: r for r in exporter.records}
+        assert by_event["step"]["parent_id"] == outer.span_id
+        assert by_event["inside"]["parent_id"] == inner.span_id
+        assert {r["trace_id"] for r in exporter.records} == {"t1"}
+        assert by_event["run"]["duration_ms"] >= by_event["step"]["duration_ms"] >= 0
+
+    def test_span_adopts_trace_id_reported_inside_it(self, memory_tracer):
+        tracer, exporter = memory_tracer
+
+        @traced("wf", "run")
+        def run():
+            trace_event("wf", "doc", metadata={"trace_id": "receipt-trace-abc"})
+
+        run()
+        tracer.flush()
+        assert {r["trace_id"] for r in exporter.records} == {"receipt-trace-abc"}
+
+    def test_exception_marks_span_as_error(self, memory_tracer):
+        tracer, exporter = memory_tracer
+        with pytest.raises(ValueError):
+            with trace_span("wf", "boom"):
+                raise ValueError("bad")
+        tracer.flush()
+        assert exporter.records[0]["level"] == "error"
+        assert exporter.records[0]["metadata"]["error"] == "bad"
+
+
+class TestBufferingAndSampling:
+
+    def test_ring_buffer_drops_oldest(self):
+        exporter = InMemoryExporter()
+        tracer = Tracer([exporter], buffer_size=3, batch_size=100, flush_interval_s=60)
+        for i in range(5):
+            tracer.emit({"event": str(i), "level": "info", "agent": "a", "timestamp": ""})
+        tracer.flush()
+        assert [r["event"] for r in exporter.records] == ["2", "3", "4"]
+        assert tracer.dropped == 2
+
+    def test_sampling_is_per_trace_and_keeps_errors(self):
+        tracer = Tracer([InMemoryExporter()], sample_rate=0.5)
+        decisions = {tracer.sampled(f"trace-{i}") for i in range(50)}
+        assert decisions == {True, False}
+        assert all(tracer.sampled("trace-7") == tracer.sampled("trace-7") for _ in range(5))
+        assert Tracer([InMemoryExporter()], sample_rate=0.0).sampled("x", level="error")
+
+    def test_disabled_tracer_is_a_no_op(self):
+        exporter = InMemoryExporter()
+        tracer = Tracer([exporter], enabled=False)
+        previous = configure_tracer(tracer)
+        try:
+            record = trace_event("wf", "evt", metadata={"k": 1})
+            with trace_span("wf", "run") as span:
+                pass
+        finally:
+            configure_tracer(previous)
+        assert record["metadata"] == {"k": 1}
+        assert span is None
+        assert tracer._thread is None
+        assert tracer.flush() == 0
+
+
+class TestExporters:
+
+    def test_jsonl_and_sqlite_exporters(self, tmp_path):
+        jsonl = JsonlFileExporter(tmp_path / "traces.jsonl")
+        db = SqliteExporter(tmp_path / "traces.sqlite3")
+        tracer = Tracer([jsonl, db], flush_interval_s=60)
+        with tracer.span("wf", "run", trace_id="t9", documents=2):
+            pass
+        tracer.shutdown()
+
+        lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+        assert json.loads(lines[0])["metadata"] == {"documents": 2}
+        rows = sqlite3.connect(tmp_path / "traces.sqlite3").execute(
+            "SELECT kind, event, trace_id FROM trace_records"
+        ).fetchall()
+        assert rows == [("span", "run", "t9")]
@@ -1,21 +1,480 @@
 """
-Scaffolding placeholder — real logic to be implemented.
-Safe to import. No side effects.
-
 Tracing module for execution observability.
 
-Future Implementation:
-- OpenTelemetry integration
-- Distributed tracing support
-- LLM call tracing
-- Performance metrics
+`trace_event()` / `trace_llm_call()` / `trace_workflow_step()` build a trace
+record and return it (workflows keep the records in their run metrics). When
+tracing is enabled the record is also handed to the process-wide `Tracer`,
+which buffers it in a bounded ring buffer and ships it to exporters from a
+background thread, so the calling workflow never waits on I/O.
+
+Spans:
+    with trace_span("receipts.ocr", "extract", trace_id=trace_id, documents=7):
+        ...
+or `@traced("receipts.workflow", "run")` record start/end timestamps,
+duration and the parent span id (taken from the enclosing span in the same
+thread/task).
+
+Exporters (AGENTIC_TRACE_EXPORTERS): "stdout", "jsonl", "sqlite", "channels".
+Sampling (AGENTIC_TRACE_SAMPLE_RATE) is decided per trace id, so a sampled
+trace is exported whole; error-level records are always exported.
+
+When AGENTIC_TRACING_ENABLED is false, nothing is buffered or serialised.
 """
 
-from datetime import datetime
-from typing import Any, Optional
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
 import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 10_000
+DEFAULT_FLUSH_INTERVAL_S = 0.5
+DEFAULT_BATCH_SIZE = 500
+
+
+# =============================================================================
+# EXPORTERS
+# =============================================================================
+
+class TraceExporter:
+    """Receives batches of trace records on the tracer's background thread."""
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class StdoutExporter(TraceExporter):
+    """The original `[TRACE]` console line, one per record."""
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        lines = []
+        for record in records:
+            meta = record.get("metadata") or {}
+            if record.get("kind") == "span":
+                meta = {**meta, "duration_ms": record.get("duration_ms")}
+            lines.append(
+                f"[TRACE] [{record['level'].upper()}] {record['timestamp']} | "
+                f"{record['agent']}: {record['event']} | {json.dumps(meta, default=str)}"
+            )
+        print("\n".join(lines), flush=True)
+
+
+class JsonlFileExporter(TraceExporter):
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        self._fh.write("".join(json.dumps(r, default=str) + "\n" for r in records))
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class SqliteExporter(TraceExporter):
+    """Queryable local store: one row per record, indexed by trace id."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Only ever used from the exporter thread.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS trace_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                trace_id TEXT,
+                span_id TEXT,
+                parent_id TEXT,
+                kind TEXT NOT NULL,
+                agent TEXT NOT NULL,
+                event TEXT NOT NULL,
+                level TEXT NOT NULL,
+                duration_ms REAL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS trace_records_trace_id ON trace_records (trace_id);
+            CREATE INDEX IF NOT EXISTS trace_records_agent_event ON trace_records (agent, event);
+            """
+        )
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        rows = [
+            (
+                r["timestamp"],
+                r.get("trace_id"),
+                r.get("span_id"),
+                r.get("parent_id"),
+                r.get("kind", "event"),
+                r["agent"],
+                r["event"],
+                r["level"],
+                r.get("duration_ms"),
+                json.dumps(r.get("metadata") or {}, default=str),
+            )
+            for r in records
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO trace_records (timestamp, trace_id, span_id, parent_id, kind, agent, event, level, "
+                "duration_ms, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ChannelsExporter(TraceExporter):
+    """Pushes records to the `trace_<trace_id>` group served by AgentTraceConsumer."""
+
+    def __init__(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        self._layer = get_channel_layer()
+        self._group_send = async_to_sync(self._layer.group_send) if self._layer else None
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        if self._group_send is None:
+            return
+        for record in records:
+            trace_id = record.get("trace_id")
+            if not trace_id:
+                continue
+            message = json.loads(json.dumps(record, default=str))
+            message["step"] = record["event"]
+            message["type"] = "agent_step"
+            self._group_send(f"trace_{trace_id}", message)
+
+
+class InMemoryExporter(TraceExporter):
+    """Keeps exported records in a list; for tests and ad-hoc inspection."""
+
+    def __init__(self):
+        self.records: list[dict[str, Any]] = []
+
+    def export(self, records: list[dict[str, Any]]) -> None:
+        self.records.extend(records)
+
+
+# =============================================================================
+# TRACER
+# =============================================================================
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("agentic_trace_span", default=None)
+
+
+class Span:
+    __slots__ = (
+        "agent", "name", "trace_id", "span_id", "parent_id", "attributes", "level",
+        "_parent", "_implicit_trace_id", "_start_ns", "_started_at", "_token",
+    )
+
+    def __init__(self, agent: str, name: str, trace_id: Optional[str], parent: Optional["Span"], attributes: dict):
+        self.agent = agent
+        self.name = name
+        self._parent = parent
+        if trace_id:
+            self.trace_id = trace_id
+            self._implicit_trace_id = False
+            if parent is not None:
+                parent.adopt_trace_id(trace_id)
+        elif parent is not None:
+            self.trace_id = parent.trace_id
+            self._implicit_trace_id = parent._implicit_trace_id
+        else:
+            self.trace_id = uuid.uuid4().hex
+            self._implicit_trace_id = True
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.level = "info"
+        self._token = None
+        self._started_at = datetime.now(timezone.utc)
+        self._start_ns = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def adopt_trace_id(self, trace_id: str) -> None:
+        """
+        Spans opened before the workflow minted its trace id join that trace
+        once a child span or event reports it.
+        """
+        span: Optional[Span] = self
+        while span is not None and span._implicit_trace_id:
+            span.trace_id = trace_id
+            span._implicit_trace_id = False
+            span = span._parent
+
+
+class Tracer:
+    """
+    Ring-buffered, asynchronously exported tracer.
+
+    `emit()` is an append to a bounded deque; a daemon thread drains it every
+    `flush_interval_s` (or sooner once `batch_size` records are waiting) and
+    hands batches to every exporter. On overflow the oldest records are
+    dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        exporters: Optional[list[TraceExporter]] = None,
+        *,
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.exporters = list(exporters or [])
+        self.enabled = enabled and bool(self.exporters)
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- sampling -------------------------------------------------------------
+
+    def sampled(self, trace_id: Optional[str], level: str = "info") -> bool:
+        if not self.enabled:
+            return False
+        if self.sample_rate >= 1.0 or level == "error":
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        if not trace_id:
+            return (uuid.uuid4().int % 10_000) < self.sample_rate * 10_000
+        return (zlib.crc32(trace_id.encode("utf-8")) % 10_000) < self.sample_rate * 10_000
+
+    # -- recording ------------------------------------------------------------
+
+    def emit(self, record: dict[str, Any]) -> None:
+        if not self.sampled(record.get("trace_id"), record.get("level", "info")):
+            return
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(record)
+            pending = len(self._buffer)
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def start_span(self, agent: str, name: str, *, trace_id: Optional[str] = None, **attributes) -> Optional[Span]:
+        """Open a span and make it the current parent; close it with end_span()."""
+        if not self.enabled:
+            return None
+        span = Span(agent, name, trace_id, _current_span.get(), attributes)
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], *, error: Optional[BaseException] = None) -> None:
+        if span is None:
+            return
+        if span._token is not None:
+            try:
+                _current_span.reset(span._token)
+            except ValueError:  # ended from a different context
+                pass
+            span._token = None
+        if error is not None:
+            span.level = "error"
+            span.attributes.setdefault("error", str(error))
+        duration_ms = (time.perf_counter_ns() - span._start_ns) / 1_000_000
+        self.emit({
+            "kind": "span",
+            "timestamp": span._started_at.isoformat(),
+            "end_timestamp": datetime.now(timezone.utc).isoformat(),
+            "agent": span.agent,
+            "event": span.name,
+            "level": span.level,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "duration_ms": round(duration_ms, 3),
+            "metadata": span.attributes,
+        })
+
+    @contextmanager
+    def span(self, agent: str, name: str, *, trace_id: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        span = self.start_span(agent, name, trace_id=trace_id, **attributes)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end_span(span, error=exc)
+            raise
+        self.end_span(span)
+
+    # -- export ---------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="agentic-tracer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def _drain(self) -> list[dict[str, Any]]:
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        return batch
+
+    def flush(self) -> int:
+        """Export everything buffered so far; returns the number of records."""
+        batch = self._drain()
+        if not batch:
+            return 0
+        for exporter in self.exporters:
+            for start in range(0, len(batch), self.batch_size):
+                try:
+                    exporter.export(batch[start:start + self.batch_size])
+                except Exception as exc:  # a broken exporter must not kill the others
+                    logger.warning("Trace exporter %s failed: %s", type(exporter).__name__, exc)
+        return len(batch)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.flush()
+        for exporter in self.exporters:
+            try:
+                exporter.close()
+            except Exception:
+                pass
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def _setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
+
+
+def _build_exporter(name: str) -> Optional[TraceExporter]:
+    logs_dir = Path(__file__).resolve().parent / "logs"
+    if name == "stdout":
+        return StdoutExporter()
+    if name == "jsonl":
+        return JsonlFileExporter(_setting("AGENTIC_TRACE_JSONL_PATH", logs_dir / "traces.jsonl"))
+    if name == "sqlite":
+        return SqliteExporter(_setting("AGENTIC_TRACE_SQLITE_PATH", logs_dir / "traces.sqlite3"))
+    if name == "channels":
+        try:
+            return ChannelsExporter()
+        except Exception as exc:
+            logger.warning("Channels trace exporter unavailable: %s", exc)
+            return None
+    logger.warning("Unknown trace exporter '%s'", name)
+    return None
+
+
+def _tracer_from_settings() -> Tracer:
+    enabled = bool(_setting("AGENTIC_TRACING_ENABLED", True))
+    names = list(_setting("AGENTIC_TRACE_EXPORTERS", ["stdout"])) if enabled else []
+    exporters = [e for e in (_build_exporter(n) for n in names) if e is not None]
+    return Tracer(
+        exporters,
+        enabled=enabled,
+        sample_rate=float(_setting("AGENTIC_TRACE_SAMPLE_RATE", 1.0)),
+        buffer_size=int(_setting("AGENTIC_TRACE_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)),
+    )
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _tracer_from_settings()
+                atexit.register(_tracer.shutdown)
+    return _tracer
+
+
+def configure_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """Install `tracer` process-wide (None rebuilds from settings on next use); returns the previous one."""
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+    if tracer is not None:
+        atexit.register(tracer.shutdown)
+    return previous
+
+
+def trace_span(agent: str, name: str, *, trace_id: Optional[str] = None, **attributes):
+    """Time a block as a span on the process-wide tracer (see Tracer.span)."""
+    return get_tracer().span(agent, name, trace_id=trace_id, **attributes)
+
+
+def traced(agent: str, name: str):
+    """
+    Decorator: run the function inside a span. A `trace_id` keyword argument,
+    when the function takes one, becomes the span's trace id.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(agent, name, trace_id=kwargs.get("trace_id")):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
 
 
+# =============================================================================
+# EVENT HELPERS
+# =============================================================================
+
 def trace_event(
     agent: str,
     event: str,
@@ -24,21 +483,22 @@ def trace_event(
 ) -> dict[str, Any]:
     """
     Trace an event in the agentic system.
-    
-    This is a placeholder that prints to stdout.
-    Will be replaced with proper tracing integration (OpenTelemetry, etc.)
-    
+
+    The record is returned to the caller and, when tracing is enabled and the
+    trace is sampled, queued for the exporters. A `trace_id` in metadata (or
+    the enclosing span) ties the event to its trace.
+
     Args:
         agent: Name of the agent or component.
         event: Description of the event.
         metadata: Additional context.
         level: Trace level (info, debug, warning, error).
-    
+
     Returns:
         The trace record that was created.
     """
     timestamp = datetime.utcnow().isoformat()
-    
+
     trace_record = {
         "timestamp": timestamp,
         "agent": agent,
@@ -46,11 +506,23 @@ def trace_event(
         "level": level,
         "metadata": metadata or {},
     }
-    
-    # Placeholder: Print to stdout
-    meta_str = json.dumps(metadata) if metadata else "{}"
-    print(f"[TRACE] [{level.upper()}] {timestamp} | {agent}: {event} | {meta_str}")
-    
+
+    tracer = get_tracer()
+    if tracer.enabled:
+        span = _current_span.get()
+        trace_id = (metadata or {}).get("trace_id")
+        if span is not None:
+            if trace_id:
+                span.adopt_trace_id(trace_id)
+            else:
+                trace_id = span.trace_id
+        tracer.emit({
+            **trace_record,
+            "kind": "event",
+            "trace_id": trace_id,
+            "parent_id": span.span_id if span else None,
+        })
+
     return trace_record
 
 
@@ -65,7 +537,7 @@ def trace_llm_call(
 ) -> dict[str, Any]:
     """
     Trace an LLM API call.
-    
+
     Args:
         agent: Name of the agent making the call.
         model: LLM model used.
@@ -74,7 +546,7 @@ def trace_llm_call(
         latency_ms: API call latency in milliseconds.
         success: Whether the call succeeded.
         error: Error message if failed.
-    
+
     Returns:
         The trace record.
     """
@@ -103,14 +575,14 @@ def trace_workflow_step(
 ) -> dict[str, Any]:
     """
     Trace a workflow step execution.
-    
+
     Args:
         workflow: Name of the workflow.
         step: Name of the step.
         status: Step status (started, completed, failed, skipped).
         duration_ms: Step duration in milliseconds.
         result: Step result or output.
-    
+
     Returns:
         The trace record.
     """
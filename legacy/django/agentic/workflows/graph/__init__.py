@@ -5,6 +5,7 @@ Exports:
 - WorkflowGraph: DAG-based workflow orchestration
 - WorkflowStepResult: Result of a single step
 - WorkflowRunResult: Result of complete workflow run
+- DEFAULT_PARALLEL_WORKERS: Thread count for pipelines with parallel branches
 """
 
 from agentic.workflows.graph.workflow_graph import (
@@ -13,6 +14,7 @@ from agentic.workflows.graph.workflow_graph import (
     WorkflowRunResult,
     StepStatus,
     WorkflowStatus,
+    DEFAULT_PARALLEL_WORKERS,
 )
 
 __all__ = [
@@ -21,4 +23,5 @@ __all__ = [
     "WorkflowRunResult",
     "StepStatus",
     "WorkflowStatus",
+    "DEFAULT_PARALLEL_WORKERS",
 ]
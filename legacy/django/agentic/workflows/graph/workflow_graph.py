@@ -5,11 +5,23 @@ Provides:
 - WorkflowStepResult: Result of a single step execution
 - WorkflowRunResult: Result of complete workflow run
 - WorkflowGraph: DAG-based workflow orchestration with run()
+
+Steps are scheduled level by level: every step whose dependencies have all
+finished runs in the same level, concurrently on a thread pool when
+`max_workers > 1`. Each step receives its own deep copy of the context as it
+stood at the start of the level, so mutating a nested list or dict in place
+cannot leak into a sibling step. The keys it assigns or changes are merged
+back in step-name order once the level completes, so results do not depend
+on thread timing.
 """
 
 from __future__ import annotations
 
+import copy
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+import time
 from typing import Any, Callable, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
@@ -19,6 +31,9 @@ from pydantic import BaseModel, Field
 # RESULT MODELS
 # =============================================================================
 
+# Thread count used by built-in pipelines that have independent branches.
+DEFAULT_PARALLEL_WORKERS = 4
+
 StepStatus = Literal["pending", "running", "success", "failed", "skipped"]
 WorkflowStatus = Literal["success", "partial", "failed"]
 
@@ -34,6 +49,8 @@ class WorkflowStepResult(BaseModel):
     output_summary: Optional[str] = None
     error_message: Optional[str] = None
     duration_ms: float = 0.0
+    level: int = 0
+    slack_ms: float = 0.0  # how much longer this step could take without extending the run
 
     class Config:
         json_encoders = {datetime: lambda v: v.isoformat()}
@@ -50,10 +67,32 @@ class WorkflowRunResult(BaseModel):
     artifacts: Dict[str, Any] = Field(default_factory=dict)
     error_message: Optional[str] = None
     duration_ms: float = 0.0
+    critical_path: List[str] = Field(default_factory=list)
+    critical_path_ms: float = 0.0
 
     class Config:
         json_encoders = {datetime: lambda v: v.isoformat()}
 
+    def timing_report(self) -> Dict[str, Any]:
+        """Critical path and per-step slack for the run."""
+        total_step_ms = sum(s.duration_ms for s in self.steps)
+        return {
+            "duration_ms": round(self.duration_ms, 2),
+            "total_step_ms": round(total_step_ms, 2),
+            "critical_path": list(self.critical_path),
+            "critical_path_ms": round(self.critical_path_ms, 2),
+            "parallelism": round(total_step_ms / self.duration_ms, 2) if self.duration_ms else 0.0,
+            "steps": [
+                {
+                    "step_name": s.step_name,
+                    "level": s.level,
+                    "duration_ms": round(s.duration_ms, 2),
+                    "slack_ms": round(s.slack_ms, 2),
+                }
+                for s in self.steps
+            ],
+        }
+
     @property
     def success_count(self) -> int:
         """Count of successful steps."""
@@ -70,21 +109,99 @@ class WorkflowRunResult(BaseModel):
 # =============================================================================
 
 
+@dataclass
+class _StepOutcome:
+    """Outcome of one isolated step execution, merged by the scheduler."""
+
+    step_name: str
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: float
+    error_message: Optional[str] = None
+    writes: Dict[str, Any] = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+
+
+def _changed(value: Any, original: Any) -> bool:
+    try:
+        return bool(value != original)
+    except Exception:
+        return True
+
+
+def _execute_isolated(
+    step_name: str,
+    fn: Callable[[Dict[str, Any]], None],
+    snapshot: Dict[str, Any],
+) -> _StepOutcome:
+    """Run a step against a private copy of the context and diff its writes.
+
+    A key counts as written when the step added it, assigned it a new object,
+    or changed its copy in place (it no longer compares equal to the
+    snapshot value).
+    """
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    error_message: Optional[str] = None
+    local: Dict[str, Any] = {}
+    baseline: Dict[str, Any] = {}
+    try:
+        local = copy.deepcopy(snapshot)
+        baseline = dict(local)
+        fn(local)
+    except Exception as e:
+        error_message = str(e)
+    duration_ms = (time.perf_counter() - start) * 1000
+    outcome = _StepOutcome(
+        step_name=step_name,
+        started_at=started_at,
+        finished_at=datetime.now(timezone.utc),
+        duration_ms=duration_ms,
+        error_message=error_message,
+    )
+    if error_message is None:
+        outcome.writes = {
+            key: value
+            for key, value in local.items()
+            if key not in snapshot
+            or baseline[key] is not value
+            or _changed(value, snapshot[key])
+        }
+        outcome.removed = [key for key in snapshot if key not in local]
+    return outcome
+
+
 class WorkflowGraph:
     """
     Directed acyclic graph for workflow orchestration with execution support.
 
     Provides:
-    - Step registration with callables
+    - Step registration with callables and optional per-step timeouts
     - Edge-based dependency definition
-    - Topological execution via run()
-    - Result collection with artifacts
+    - Level-parallel execution via run()
+    - Result collection with artifacts and a critical-path report
     """
 
-    def __init__(self, name: str = "unnamed_workflow"):
-        """Initialize the workflow graph."""
+    def __init__(
+        self,
+        name: str = "unnamed_workflow",
+        max_workers: int = 1,
+        default_step_timeout_s: Optional[float] = None,
+    ):
+        """
+        Initialize the workflow graph.
+
+        Args:
+            name: Workflow name used in results and broadcasts.
+            max_workers: Threads used to run independent steps concurrently.
+                1 runs every level sequentially.
+            default_step_timeout_s: Timeout applied to steps registered without one.
+        """
         self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.default_step_timeout_s = default_step_timeout_s
         self._steps: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._timeouts: Dict[str, Optional[float]] = {}
         self._edges: Dict[str, List[str]] = {}  # from_step -> [to_steps]
         self._reverse_edges: Dict[str, List[str]] = {}  # to_step -> [from_steps]
 
@@ -92,6 +209,7 @@ class WorkflowGraph:
         self,
         name: str,
         fn: Callable[[Dict[str, Any]], None],
+        timeout_s: Optional[float] = None,
     ) -> None:
         """
         Add a step to the workflow.
@@ -99,10 +217,14 @@ class WorkflowGraph:
         Args:
             name: Unique name for the step.
             fn: Callable that receives context dict and mutates it.
+            timeout_s: Fail the step if it has not finished this many seconds
+                after its level was dispatched. The step's thread cannot be
+                interrupted; its context writes are discarded instead.
         """
         if name in self._steps:
             raise ValueError(f"Step '{name}' already exists")
         self._steps[name] = fn
+        self._timeouts[name] = timeout_s
         if name not in self._edges:
             self._edges[name] = []
         if name not in self._reverse_edges:
@@ -134,7 +256,15 @@ class WorkflowGraph:
         """
         Return steps in topological order (dependencies first).
 
-        Uses Kahn's algorithm.
+        Flattened execution levels; see _execution_levels().
+        """
+        return [step for level in self._execution_levels() for step in level]
+
+    def _execution_levels(self) -> List[List[str]]:
+        """
+        Group steps into levels whose members only depend on earlier levels.
+
+        Uses Kahn's algorithm, one frontier at a time.
         """
         # Calculate in-degree for each node
         in_degree: Dict[str, int] = {step: 0 for step in self._steps}
@@ -143,43 +273,175 @@ class WorkflowGraph:
                 in_degree[next_step] = in_degree.get(next_step, 0) + 1
 
         # Start with nodes that have no dependencies
-        queue = [step for step, degree in in_degree.items() if degree == 0]
-        result: List[str] = []
-
-        while queue:
+        frontier = sorted(step for step, degree in in_degree.items() if degree == 0)
+        levels: List[List[str]] = []
+        seen = 0
+
+        while frontier:
+            levels.append(frontier)
+            seen += len(frontier)
+            next_frontier: List[str] = []
+            for current in frontier:
+                for next_step in self._edges.get(current, []):
+                    in_degree[next_step] -= 1
+                    if in_degree[next_step] == 0:
+                        next_frontier.append(next_step)
             # Sort for deterministic order
-            queue.sort()
-            current = queue.pop(0)
-            result.append(current)
-
-            for next_step in self._edges.get(current, []):
-                in_degree[next_step] -= 1
-                if in_degree[next_step] == 0:
-                    queue.append(next_step)
+            frontier = sorted(next_frontier)
 
-        if len(result) != len(self._steps):
+        if seen != len(self._steps):
             raise RuntimeError("Cycle detected in workflow graph")
 
-        return result
+        return levels
+
+    def _broadcast_step_status(self, step_name: str, status: str, timestamp: datetime) -> None:
+        """Real-time streaming of step status to the agent broadcast group."""
+        try:
+            import asyncio
+            from asgiref.sync import async_to_sync
+            from channels.layers import get_channel_layer
+            channel_layer = get_channel_layer()
+            if channel_layer:
+                message = {
+                    "type": "broadcast_message",
+                    "workflow": self.name,
+                    "step": step_name,
+                    "status": status,
+                    "timestamp": timestamp.isoformat()
+                }
+                try:
+                    loop = asyncio.get_running_loop()
+                    loop.create_task(channel_layer.group_send("agent_broadcast", message))
+                except RuntimeError:
+                    async_to_sync(channel_layer.group_send)("agent_broadcast", message)
+        except ImportError:
+            pass
+
+    def _run_level(
+        self,
+        steps: List[str],
+        snapshot: Dict[str, Any],
+        executor: Optional[ThreadPoolExecutor],
+    ) -> tuple:
+        """
+        Run one level of independent steps.
+
+        Returns (outcomes keyed by step name, executor or None). The executor
+        is dropped when a step timed out, since its worker thread may still be
+        busy; the next level gets a fresh pool.
+        """
+        timeouts = {
+            name: self._timeouts.get(name) or self.default_step_timeout_s
+            for name in steps
+        }
+        use_pool = any(timeouts.values()) or (self.max_workers > 1 and len(steps) > 1)
+
+        if not use_pool:
+            return {
+                name: _execute_isolated(name, self._steps[name], snapshot)
+                for name in steps
+            }, executor
+
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"wf-{self.name}",
+            )
+
+        dispatched_at = datetime.now(timezone.utc)
+        dispatched = time.perf_counter()
+        futures = {
+            name: executor.submit(_execute_isolated, name, self._steps[name], snapshot)
+            for name in steps
+        }
+
+        outcomes: Dict[str, _StepOutcome] = {}
+        timed_out = False
+        for name in steps:
+            future = futures[name]
+            timeout_s = timeouts[name]
+            remaining = None
+            if timeout_s:
+                remaining = max(0.0, timeout_s - (time.perf_counter() - dispatched))
+            try:
+                outcomes[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                timed_out = True
+                outcomes[name] = _StepOutcome(
+                    step_name=name,
+                    started_at=dispatched_at,
+                    finished_at=datetime.now(timezone.utc),
+                    duration_ms=(time.perf_counter() - dispatched) * 1000,
+                    error_message=f"Step timed out after {timeout_s}s",
+                )
+
+        if timed_out:
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+        return outcomes, executor
+
+    def _critical_path(
+        self,
+        levels: List[List[str]],
+        durations: Dict[str, float],
+    ) -> tuple:
+        """
+        Longest duration-weighted path through the graph.
+
+        Returns (path, path_ms, slack_ms per step).
+        """
+        order = [step for level in levels for step in level]
+        to_end: Dict[str, float] = {}  # longest path ending at step (inclusive)
+        best_dep: Dict[str, Optional[str]] = {}
+        for step in order:
+            deps = self._reverse_edges.get(step, [])
+            prev = max(deps, key=lambda d: (to_end[d], d), default=None)
+            best_dep[step] = prev
+            to_end[step] = durations.get(step, 0.0) + (to_end[prev] if prev else 0.0)
+
+        from_start: Dict[str, float] = {}  # longest path starting at step (inclusive)
+        for step in reversed(order):
+            nexts = self._edges.get(step, [])
+            tail = max((from_start[n] for n in nexts), default=0.0)
+            from_start[step] = durations.get(step, 0.0) + tail
+
+        if not order:
+            return [], 0.0, {}
+
+        end = max(order, key=lambda s: (to_end[s], s))
+        path_ms = to_end[end]
+        path: List[str] = []
+        current: Optional[str] = end
+        while current is not None:
+            path.append(current)
+            current = best_dep[current]
+        path.reverse()
+
+        slack = {
+            step: max(0.0, path_ms - (to_end[step] + from_start[step] - durations.get(step, 0.0)))
+            for step in order
+        }
+        return path, path_ms, slack
 
     def run(self, initial_context: Dict[str, Any]) -> WorkflowRunResult:
         """
-        Execute the workflow steps in topological order.
+        Execute the workflow level by level.
 
         Args:
             initial_context: Initial data passed to first steps.
 
         Returns:
-            WorkflowRunResult with per-step details and artifacts.
+            WorkflowRunResult with per-step details, artifacts and the
+            critical path.
         """
         workflow_started = datetime.now(timezone.utc)
         context = dict(initial_context)  # Copy to avoid mutating input
         step_results: List[WorkflowStepResult] = []
         overall_status: WorkflowStatus = "success"
-        workflow_error: Optional[str] = None
 
         try:
-            execution_order = self._topological_sort()
+            levels = self._execution_levels()
         except RuntimeError as e:
             return WorkflowRunResult(
                 workflow_name=self.name,
@@ -190,84 +452,71 @@ class WorkflowGraph:
             )
 
         failed_steps: set = set()
+        durations: Dict[str, float] = {}
+        executor: Optional[ThreadPoolExecutor] = None
 
-        for step_name in execution_order:
-            step_fn = self._steps[step_name]
-
-            # Check if dependencies failed
-            dependencies = self._reverse_edges.get(step_name, [])
-            deps_failed = any(dep in failed_steps for dep in dependencies)
-
-            if deps_failed:
-                # Skip step if dependencies failed
-                step_results.append(
-                    WorkflowStepResult(
-                        step_name=step_name,
-                        status="skipped",
-                        started_at=datetime.now(timezone.utc),
-                        finished_at=datetime.now(timezone.utc),
-                        error_message="Skipped due to failed dependency",
-                    )
-                )
-                failed_steps.add(step_name)
-                continue
-
-            # Execute step
-            step_started = datetime.now(timezone.utc)
-            
-            # Real-time streaming
-            try:
-                import asyncio
-                from asgiref.sync import async_to_sync
-                from channels.layers import get_channel_layer
-                channel_layer = get_channel_layer()
-                if channel_layer:
-                    message = {
-                        "type": "broadcast_message",
-                        "workflow": self.name,
-                        "step": step_name,
-                        "status": "running",
-                        "timestamp": step_started.isoformat()
-                    }
-                    try:
-                        loop = asyncio.get_running_loop()
-                        loop.create_task(channel_layer.group_send("agent_broadcast", message))
-                    except RuntimeError:
-                        async_to_sync(channel_layer.group_send)("agent_broadcast", message)
-            except ImportError:
-                pass
-
-            try:
-                step_fn(context)
-                step_finished = datetime.now(timezone.utc)
-
-                step_results.append(
-                    WorkflowStepResult(
+        try:
+            for level_index, level in enumerate(levels):
+                runnable: List[str] = []
+                level_results: Dict[str, WorkflowStepResult] = {}
+
+                for step_name in level:
+                    # Check if dependencies failed
+                    dependencies = self._reverse_edges.get(step_name, [])
+                    if any(dep in failed_steps for dep in dependencies):
+                        # Skip step if dependencies failed
+                        skipped_at = datetime.now(timezone.utc)
+                        level_results[step_name] = WorkflowStepResult(
+                            step_name=step_name,
+                            status="skipped",
+                            started_at=skipped_at,
+                            finished_at=skipped_at,
+                            error_message="Skipped due to failed dependency",
+                            level=level_index,
+                        )
+                        failed_steps.add(step_name)
+                    else:
+                        runnable.append(step_name)
+
+                now = datetime.now(timezone.utc)
+                for step_name in runnable:
+                    self._broadcast_step_status(step_name, "running", now)
+
+                outcomes, executor = self._run_level(runnable, context, executor)
+
+                # Merge isolated writes in deterministic (step name) order
+                for step_name in runnable:
+                    outcome = outcomes[step_name]
+                    durations[step_name] = outcome.duration_ms
+                    if outcome.error_message is None:
+                        for key in outcome.removed:
+                            context.pop(key, None)
+                        context.update(outcome.writes)
+                        status: StepStatus = "success"
+                    else:
+                        failed_steps.add(step_name)
+                        status = "failed"
+                    level_results[step_name] = WorkflowStepResult(
                         step_name=step_name,
-                        status="success",
-                        started_at=step_started,
-                        finished_at=step_finished,
-                        duration_ms=(step_finished - step_started).total_seconds() * 1000,
+                        status=status,
+                        started_at=outcome.started_at,
+                        finished_at=outcome.finished_at,
+                        error_message=outcome.error_message,
+                        duration_ms=outcome.duration_ms,
+                        level=level_index,
                     )
-                )
 
-            except Exception as e:
-                step_finished = datetime.now(timezone.utc)
-                failed_steps.add(step_name)
-
-                step_results.append(
-                    WorkflowStepResult(
-                        step_name=step_name,
-                        status="failed",
-                        started_at=step_started,
-                        finished_at=step_finished,
-                        error_message=str(e),
-                        duration_ms=(step_finished - step_started).total_seconds() * 1000,
-                    )
-                )
+                step_results.extend(level_results[name] for name in level)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
 
         workflow_finished = datetime.now(timezone.utc)
 
+        critical_path, critical_path_ms, slack = self._critical_path(levels, durations)
+        for step_result in step_results:
+            step_result.slack_ms = slack.get(step_result.step_name, 0.0)
+
         # Determine overall status
         success_count = sum(1 for r in step_results if r.status == "success")
         failed_count = sum(1 for r in step_results if r.status == "failed")
@@ -311,6 +560,8 @@ class WorkflowGraph:
             steps=step_results,
             artifacts=artifacts,
             duration_ms=(workflow_finished - workflow_started).total_seconds() * 1000,
+            critical_path=critical_path,
+            critical_path_ms=critical_path_ms,
         )
 
     def get_step_names(self) -> List[str]:
@@ -20,7 +20,7 @@ from datetime import date, datetime, timedelta
 from uuid import uuid4
 import hashlib
 
-from agentic.workflows.graph import WorkflowGraph
+from agentic.workflows.graph import DEFAULT_PARALLEL_WORKERS, WorkflowGraph
 from agentic.engine.compliance import run_basic_compliance_checks
 from agentic.engine.audit import run_basic_audit_checks
 
@@ -644,13 +644,13 @@ def build_bank_statement_workflow() -> WorkflowGraph:
     6. reconcile: deduplicated_statements → reconciliation_reports
     7. flag_suspense: deduplicated_statements → suspense_flags
     8. generate_entries: deduplicated_statements → journal_entries
-    9. compliance: Run compliance checks
-    10. audit: Run audit checks
+    9. compliance: (parallel) Run compliance checks
+    10. audit: (parallel) Run audit checks
     
     Returns:
         Configured WorkflowGraph ready to run.
     """
-    wf = WorkflowGraph("bank_statement_processing")
+    wf = WorkflowGraph("bank_statement_processing", max_workers=DEFAULT_PARALLEL_WORKERS)
     
     # Register steps
     wf.add_step("ingest", ingest_statement_step)
@@ -673,6 +673,6 @@ def build_bank_statement_workflow() -> WorkflowGraph:
     wf.add_edge("deduplicate", "flag_suspense")
     wf.add_edge("deduplicate", "generate_entries")
     wf.add_edge("generate_entries", "compliance")
-    wf.add_edge("compliance", "audit")
+    wf.add_edge("generate_entries", "audit")  # audit does not read compliance_result
     
     return wf
@@ -18,7 +18,7 @@ from decimal import Decimal
 from datetime import date, datetime
 from uuid import uuid4
 
-from agentic.workflows.graph import WorkflowGraph
+from agentic.workflows.graph import DEFAULT_PARALLEL_WORKERS, WorkflowGraph
 from agentic.engine.compliance import run_basic_compliance_checks
 from agentic.engine.audit import run_basic_audit_checks
 
@@ -604,13 +604,13 @@ def build_invoice_workflow() -> WorkflowGraph:
     6. normalize: vendor_matched_invoices → invoice_transactions
     7. generate_entries: invoice_transactions → journal_entries
     8. match_payments: vendor_matched_invoices → payment_matches
-    9. compliance: Run compliance checks
-    10. audit: Run audit checks
+    9. compliance: (parallel) Run compliance checks
+    10. audit: (parallel) Run audit checks
     
     Returns:
         Configured WorkflowGraph ready to run.
     """
-    wf = WorkflowGraph("invoice_processing")
+    wf = WorkflowGraph("invoice_processing", max_workers=DEFAULT_PARALLEL_WORKERS)
     
     # Register steps
     wf.add_step("ingest", ingest_invoice_step)
@@ -633,6 +633,6 @@ def build_invoice_workflow() -> WorkflowGraph:
     wf.add_edge("normalize", "generate_entries")
     wf.add_edge("match_vendor", "match_payments")
     wf.add_edge("generate_entries", "compliance")
-    wf.add_edge("compliance", "audit")
+    wf.add_edge("generate_entries", "audit")  # audit does not read compliance_result
     
     return wf
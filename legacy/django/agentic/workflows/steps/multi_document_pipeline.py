@@ -16,7 +16,7 @@ from decimal import Decimal
 from datetime import datetime
 from enum import Enum
 
-from agentic.workflows.graph import WorkflowGraph
+from agentic.workflows.graph import DEFAULT_PARALLEL_WORKERS, WorkflowGraph
 from agentic.workflows.steps.receipts_pipeline import build_receipts_workflow
 from agentic.workflows.steps.invoice_pipeline import build_invoice_workflow
 from agentic.workflows.steps.bank_statement_pipeline import build_bank_statement_workflow
@@ -441,13 +441,13 @@ def build_multi_document_workflow() -> WorkflowGraph:
     5. process_invoices: (parallel) routed_documents → invoice_results
     6. process_statements: (parallel) routed_documents → statement_results
     7. aggregate: all results → aggregated_results
-    8. compliance: Run compliance checks
-    9. audit: Run audit checks
+    8. compliance: (parallel) Run compliance checks
+    9. audit: (parallel) Run audit checks
     
     Returns:
         Configured WorkflowGraph ready to run.
     """
-    wf = WorkflowGraph("multi_document_processing")
+    wf = WorkflowGraph("multi_document_processing", max_workers=DEFAULT_PARALLEL_WORKERS)
     
     # Register steps
     wf.add_step("ingest", ingest_multi_step)
@@ -470,6 +470,6 @@ def build_multi_document_workflow() -> WorkflowGraph:
     wf.add_edge("process_invoices", "aggregate")
     wf.add_edge("process_statements", "aggregate")
     wf.add_edge("aggregate", "compliance")
-    wf.add_edge("compliance", "audit")
+    wf.add_edge("aggregate", "audit")  # audit does not read compliance_result
     
     return wf
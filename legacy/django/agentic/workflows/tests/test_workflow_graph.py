@@ -0,0 +1,144 @@
+"""
+Tests for WorkflowGraph scheduling
+
+Covers:
+- Independent steps in a level run concurrently
+- Isolated context writes merge deterministically
+- In-place mutations stay private to the step that made them
+- Per-step timeouts
+- Critical-path report
+"""
+
+import threading
+import time
+
+from agentic.workflows.graph import WorkflowGraph
+from agentic.workflows.steps.bank_statement_pipeline import build_bank_statement_workflow
+
+
+def _diamond(max_workers: int, barrier=None) -> WorkflowGraph:
+    wf = WorkflowGraph("diamond", max_workers=max_workers)
+
+    def start(ctx):
+        ctx["seen"] = ["start"]
+
+    def branch(name, delay):
+        def fn(ctx):
+            if barrier is not None:
+                barrier.wait(timeout=2)
+            time.sleep(delay)
+            ctx[f"{name}_out"] = len(ctx["seen"])
+            ctx["winner"] = name
+        return fn
+
+    def join(ctx):
+        ctx["joined"] = (ctx["left_out"], ctx["right_out"], ctx["winner"])
+
+    wf.add_step("start", start)
+    wf.add_step("left", branch("left", 0.05))
+    wf.add_step("right", branch("right", 0.0))
+    wf.add_step("join", join)
+    wf.add_edge("start", "left")
+    wf.add_edge("start", "right")
+    wf.add_edge("left", "join")
+    wf.add_edge("right", "join")
+    return wf
+
+
+class TestLevelParallelScheduling:
+
+    def test_independent_steps_run_concurrently(self):
+        """Both branches must be inside the barrier at the same time."""
+        barrier = threading.Barrier(2)
+        result = _diamond(max_workers=2, barrier=barrier).run({})
+
+        assert result.status == "success"
+        assert [s.step_name for s in result.steps] == ["start", "left", "right", "join"]
+        assert [s.level for s in result.steps] == [0, 1, 1, 2]
+
+    def test_context_merge_is_deterministic(self):
+        """Conflicting writes resolve in step-name order, not finish order."""
+        captured = {}
+        wf = _diamond(max_workers=2)
+        wf.add_step("capture", lambda ctx: captured.update(ctx))
+        wf.add_edge("join", "capture")
+
+        wf.run({})
+
+        # "right" finishes first but sorts after "left", so it wins the merge.
+        assert captured["joined"] == (1, 1, "right")
+
+    def test_in_place_mutation_does_not_leak_into_siblings(self):
+        """A step appending to a shared list only changes its own copy."""
+        barrier = threading.Barrier(2)
+        wf = WorkflowGraph("mutation", max_workers=2)
+        initial = {"items": ["a"]}
+
+        def appender(ctx):
+            barrier.wait(timeout=2)
+            ctx["items"].append("b")
+            barrier.wait(timeout=2)
+
+        def reader(ctx):
+            barrier.wait(timeout=2)
+            barrier.wait(timeout=2)
+            ctx["reader_saw"] = list(ctx["items"])
+
+        captured = {}
+        wf.add_step("appender", appender)
+        wf.add_step("reader", reader)
+        wf.add_step("capture", lambda ctx: captured.update(ctx))
+        wf.add_edge("appender", "capture")
+        wf.add_edge("reader", "capture")
+
+        result = wf.run(initial)
+
+        assert result.status == "success"
+        assert captured["reader_saw"] == ["a"]
+        assert captured["items"] == ["a", "b"]
+        assert initial["items"] == ["a"]
+
+    def test_sequential_and_parallel_agree(self):
+        sequential = build_bank_statement_workflow()
+        sequential.max_workers = 1
+        parallel = build_bank_statement_workflow()
+        files = [{"filename": "statement.csv", "content": "x"}]
+
+        seq_result = sequential.run({"uploaded_files": files})
+        par_result = parallel.run({"uploaded_files": files})
+
+        assert [s.step_name for s in seq_result.steps] == [s.step_name for s in par_result.steps]
+        assert len(seq_result.artifacts["journal_entries"]) == len(par_result.artifacts["journal_entries"])
+        assert seq_result.status == par_result.status == "success"
+
+
+class TestStepTimeouts:
+
+    def test_timed_out_step_fails_and_skips_dependents(self):
+        wf = WorkflowGraph("timeouts")
+        wf.add_step("slow", lambda ctx: time.sleep(0.5) or ctx.update(slow=True), timeout_s=0.05)
+        wf.add_step("after", lambda ctx: ctx.update(after=True))
+        wf.add_edge("slow", "after")
+
+        result = wf.run({})
+
+        steps = {s.step_name: s for s in result.steps}
+        assert steps["slow"].status == "failed"
+        assert "timed out" in steps["slow"].error_message
+        assert steps["after"].status == "skipped"
+        assert result.status == "failed"
+
+
+class TestCriticalPath:
+
+    def test_critical_path_follows_slowest_branch(self):
+        result = _diamond(max_workers=2).run({})
+
+        assert result.critical_path == ["start", "left", "join"]
+        steps = {s.step_name: s for s in result.steps}
+        assert steps["left"].slack_ms == 0.0
+        assert steps["right"].slack_ms > 0.0
+
+        report = result.timing_report()
+        assert report["critical_path"] == ["start", "left", "join"]
+        assert report["critical_path_ms"] >= steps["left"].duration_ms
@@ -1,39 +1,38 @@
 from django.core.management.base import BaseCommand
 
-from core.models import Business
-from companion.models import WorkspaceCompanionProfile
-from companion.services import create_health_snapshot, refresh_suggested_actions_for_workspace
+from core.fleet_refresh import Outcome, run_fleet_refresh
 
 
 class Command(BaseCommand):
     help = "Refresh Companion health index for all active workspaces."
 
-    def handle(self, *args, **options):
-        processed = 0
-        snapshots = 0
-        created_profiles = 0
-        errors = 0
-
-        workspaces = Business.objects.filter(status="active", is_deleted=False)
-        for workspace in workspaces:
-            processed += 1
-            profile, created = WorkspaceCompanionProfile.objects.get_or_create(workspace=workspace)
-            if created:
-                created_profiles += 1
-
-            if not profile.is_enabled or not profile.enable_health_index:
-                continue
-
-            try:
-                snapshot = create_health_snapshot(workspace)
-                snapshots += 1
-                refresh_suggested_actions_for_workspace(workspace, snapshot=snapshot)
-            except Exception as exc:  # pragma: no cover - logged for operational visibility
-                errors += 1
-                self.stderr.write(f"[companion] Failed snapshot for workspace {workspace.id}: {exc}")
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default FLEET_REFRESH_MAX_WORKERS).")
+        parser.add_argument("--run-id", default=None, help="Resume an interrupted run; finished workspaces are skipped.")
+        parser.add_argument("--force", action="store_true", help="Refresh even when workspace data is unchanged.")
+        parser.add_argument("--business-id", action="append", dest="business_ids", type=int, help="Limit to these workspaces.")
 
+    def handle(self, *args, **options):
+        def on_result(result):
+            if result.outcome == Outcome.ERROR:
+                self.stderr.write(f"[companion] Failed snapshot for workspace {result.business_id}: {result.error}")
+            elif options["verbosity"] >= 2:
+                self.stdout.write(f"workspace={result.business_id} {result.outcome} {result.duration_ms}ms")
+
+        report = run_fleet_refresh(
+            "companion_health",
+            business_ids=options["business_ids"],
+            workers=options["workers"],
+            run_id=options["run_id"],
+            force=options["force"],
+            on_result=on_result,
+        )
+        slowest = ", ".join(f"{r.business_id}={r.duration_ms}ms" for r in report.slowest(3))
         self.stdout.write(
             self.style.SUCCESS(
-                f"Processed {processed} workspaces | snapshots={snapshots} | new_profiles={created_profiles} | errors={errors}"
+                f"Processed {len(report.results)} workspaces | snapshots={report.count(Outcome.REFRESHED)} "
+                f"| unchanged={report.count(Outcome.SKIPPED)} | resumed={report.resumed} "
+                f"| errors={report.count(Outcome.ERROR)} | {report.duration_ms}ms | run_id={report.run_id}"
+                + (f" | slowest: {slowest}" if slowest else "")
             )
         )
@@ -1,4 +1,30 @@
+"""
+Default chart of accounts and the per-business account-resolution cache.
+
+Posting paths resolve accounts by code on every document. Instead of a
+`get_or_create` per default account plus a `get` per code, they read one
+cached snapshot of the business's coded accounts:
+
+- the snapshot (field values of every account with a code) lives in the
+  Django cache under a per-business version counter; only when that cache is
+  shared by all processes, since another worker's per-process local-memory
+  cache would keep serving a renamed or deleted account. Without one, every
+  lookup reads the accounts with a single query,
+- `Account` post_save/post_delete (core.signals) bump the version, so the next
+  read reloads it with one query; bulk `update()`/`delete()` bypass signals and
+  must call `invalidate_account_cache()` themselves,
+- accounts written inside an open transaction are not cached until it commits,
+  so a rollback can never leave a cached id that does not exist.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
 from core.models import Account
+from core.utils import shared_cache_configured
 
 DEFAULT_ACCOUNTS = [
     ("1010", "Cash at Bank", Account.AccountType.ASSET),
@@ -21,11 +47,99 @@ DEFAULT_ACCOUNTS = [
     ("5040", "Inventory Variance", Account.AccountType.EXPENSE),
 ]
 
+_FIELDS = tuple(f.attname for f in Account._meta.concrete_fields)
+_VERSION_KEY = "coa:version:{business_id}"
+# created_at guards against a reused business id (e.g. a reset database)
+# reading another business's snapshot.
+_SNAPSHOT_KEY = "coa:accounts:{business_id}:{created}:{version}"
+
+# Businesses whose accounts changed in this thread's open transaction.
+_uncommitted = threading.local()
+
+
+def _uncommitted_business_ids() -> set:
+    ids = getattr(_uncommitted, "business_ids", None)
+    if ids is None:
+        ids = _uncommitted.business_ids = set()
+    if not connection.in_atomic_block:
+        # The transaction that wrote them has committed or rolled back.
+        ids.clear()
+    return ids
+
+
+def _cache_version(business_id) -> int:
+    key = _VERSION_KEY.format(business_id=business_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, not 1: if the counter is evicted, a restart at
+        # 1 could reach a snapshot stored under an older version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_account_cache(business_id) -> None:
+    key = _VERSION_KEY.format(business_id=business_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def account_changed(business_id) -> None:
+    """Called from Account post_save/post_delete."""
+    invalidate_account_cache(business_id)
+    if connection.in_atomic_block:
+        _uncommitted_business_ids().add(business_id)
+
+        def committed():
+            _uncommitted_business_ids().discard(business_id)
+            invalidate_account_cache(business_id)
+
+        transaction.on_commit(committed)
+
+
+def _account_rows(business):
+    business_id = business.pk
+    if business_id in _uncommitted_business_ids() or not shared_cache_configured():
+        return list(Account.objects.filter(business_id=business_id).exclude(code="").values_list(*_FIELDS))
+
+    key = _SNAPSHOT_KEY.format(
+        business_id=business_id,
+        created=business.created_at.timestamp() if business.created_at else "",
+        version=_cache_version(business_id),
+    )
+    cached = cache.get(key)
+    if cached is not None and cached[0] == _FIELDS:
+        return cached[1]
+    rows = list(Account.objects.filter(business_id=business_id).exclude(code="").values_list(*_FIELDS))
+    cache.set(key, (_FIELDS, rows), timeout=getattr(settings, "ACCOUNT_CACHE_TIMEOUT", 3600))
+    return rows
+
+
+def get_accounts_by_code(business) -> dict:
+    """Map code -> Account for every coded account of the business (cached)."""
+    db = Account.objects.db
+    accounts = {}
+    for row in _account_rows(business):
+        account = Account.from_db(db, _FIELDS, row)
+        accounts[account.code] = account
+    return accounts
+
+
+def get_account_by_code(business, code) -> Account:
+    """Cached equivalent of `Account.objects.get(business=business, code=code)`."""
+    account = get_accounts_by_code(business).get(code)
+    if account is None:
+        raise Account.DoesNotExist(f"No account with code {code!r} for business {business.pk}")
+    return account
+
 
 def ensure_default_accounts(business):
     """Ensure baseline accounts exist for the given business and return a mapping."""
-    accounts = {}
-    for code, name, type_ in DEFAULT_ACCOUNTS:
+    accounts = get_accounts_by_code(business)
+    missing = [(code, name, type_) for code, name, type_ in DEFAULT_ACCOUNTS if code not in accounts]
+    for code, name, type_ in missing:
         acc, _ = Account.objects.get_or_create(
             business=business,
             code=code,
@@ -34,25 +148,22 @@ def ensure_default_accounts(business):
                 "type": type_,
             },
         )
-        accounts[(code, type_)] = acc
+        accounts[code] = acc
     return {
-        "cash": accounts.get(("1010", Account.AccountType.ASSET)),
-        "ar": accounts.get(("1200", Account.AccountType.ASSET)),
-        "tax_recoverable": accounts.get(("1400", Account.AccountType.ASSET))
-        or accounts.get(("1300", Account.AccountType.ASSET)),
-        "inventory_asset": accounts.get(("1500", Account.AccountType.ASSET)),
-        "stock_in_transit": accounts.get(("1510", Account.AccountType.ASSET)),
-        "ap": accounts.get(("2000", Account.AccountType.LIABILITY)),
-        "landed_cost_clearing": accounts.get(("2060", Account.AccountType.LIABILITY)),
-        "grni": accounts.get(("2050", Account.AccountType.LIABILITY)),
-        "customer_deposits": accounts.get(("2100", Account.AccountType.LIABILITY)),
-        "tax": accounts.get(("2300", Account.AccountType.LIABILITY))
-        or accounts.get(("2200", Account.AccountType.LIABILITY)),
-        "sales": accounts.get(("4010", Account.AccountType.INCOME)),
-        "sales_returns": accounts.get(("4020", Account.AccountType.INCOME))
-        or accounts.get(("4010", Account.AccountType.INCOME)),
-        "opex": accounts.get(("5010", Account.AccountType.EXPENSE)),
-        "cogs": accounts.get(("5020", Account.AccountType.EXPENSE)),
-        "inventory_shrinkage": accounts.get(("5030", Account.AccountType.EXPENSE)),
-        "inventory_variance": accounts.get(("5040", Account.AccountType.EXPENSE)),
+        "cash": accounts.get("1010"),
+        "ar": accounts.get("1200"),
+        "tax_recoverable": accounts.get("1400") or accounts.get("1300"),
+        "inventory_asset": accounts.get("1500"),
+        "stock_in_transit": accounts.get("1510"),
+        "ap": accounts.get("2000"),
+        "landed_cost_clearing": accounts.get("2060"),
+        "grni": accounts.get("2050"),
+        "customer_deposits": accounts.get("2100"),
+        "tax": accounts.get("2300") or accounts.get("2200"),
+        "sales": accounts.get("4010"),
+        "sales_returns": accounts.get("4020") or accounts.get("4010"),
+        "opex": accounts.get("5010"),
+        "cogs": accounts.get("5020"),
+        "inventory_shrinkage": accounts.get("5030"),
+        "inventory_variance": accounts.get("5040"),
     }
@@ -3,8 +3,8 @@ from decimal import Decimal
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
-from core.models import Account, JournalEntry, JournalLine, Invoice, Expense
-from core.accounting_defaults import ensure_default_accounts
+from core.models import JournalEntry, JournalLine, Invoice, Expense
+from core.accounting_defaults import ensure_default_accounts, get_account_by_code
 from taxes.models import TransactionLineTaxDetail
 from taxes.postings import add_sales_tax_lines
 from .accounting_posting_expenses import (
@@ -18,7 +18,7 @@ class MissingAccount(Exception):
 
 
 def _get_account(business, code):
-    return Account.objects.get(business=business, code=code)
+    return get_account_by_code(business, code)
 
 
 def _create_entry(business, source, date, description):
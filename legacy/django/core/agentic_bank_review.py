@@ -9,7 +9,7 @@ from uuid import uuid4
 
 from django.db.models import Sum
 
-from agentic.logging.tracing import trace_event
+from agentic.logging.tracing import trace_event, traced
 
 from .llm_reasoning import BankReviewLLMResult, reason_about_bank_review
 from .models import Business, JournalEntry
@@ -50,6 +50,7 @@ class BankReconciliationResult:
     llm_suggested_followups: list
 
 
+@traced("bank_review.workflow", "run")
 def run_bank_reconciliation_workflow(
     *,
     business_id: int,
@@ -8,8 +8,9 @@ from uuid import uuid4
 
 from django.db.models import Sum
 
-from agentic.logging.tracing import trace_event
+from agentic.logging.tracing import trace_event, traced
 
+from .anomaly_detection import run_anomaly_detectors
 from .llm_reasoning import BooksReviewLLMResult, reason_about_books_review
 from .models import Business, JournalEntry, JournalLine, Account
 
@@ -29,6 +30,7 @@ class BooksReviewResult:
     llm_suggested_checks: list
 
 
+@traced("books_review.workflow", "run")
 def run_books_review_workflow(
     *,
     business_id: int,
@@ -120,6 +122,13 @@ def run_books_review_workflow(
                 {"journal_entry_ids": ids},
             )
 
+    # Ledger-level checks (suspense, unbalanced entries, retained earnings)
+    # come from the same detectors as the Companion anomalies.
+    ledger = run_anomaly_detectors(business, period_start=period_start, period_end=period_end, surfaces=["books"])
+    for anomaly in ledger.anomalies:
+        add_finding(anomaly.code, anomaly.severity, anomaly.explanation, {"task_code": anomaly.task_code})
+    suspense_balance = sum((a.closing for a in ledger.facts.suspense_accounts()), Decimal("0.00"))
+
     agent_retries = 0
 
     if ai_companion_enabled:
@@ -161,6 +170,7 @@ def run_books_review_workflow(
         "journals_high_risk": len(high_risk),
         "journals_with_warnings": len(warnings),
         "accounts_touched": accounts_touched,
+        "suspense_balance": float(suspense_balance),
         "agent_retries": agent_retries,
         "trace_events": trace_events,
     }
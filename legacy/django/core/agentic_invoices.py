@@ -5,16 +5,17 @@ import re
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Optional
+from typing import Callable, List, Optional
 from uuid import uuid4
 
 from django.conf import settings
 from django.utils import timezone
 
-from agentic.logging.tracing import trace_event
+from agentic.logging.tracing import trace_event, trace_span, traced
 
 from .accounting_defaults import ensure_default_accounts
-from .invoice_ocr import extract_invoice_data, validate_extracted_amount
+from .invoice_ocr import extract_invoice_data_from_bytes, validate_extracted_amount
+from .ocr_pipeline import OcrDocument, extract_documents_concurrently
 from .llm_reasoning import InvoicesRunLLMResult, reason_about_invoices_run
 from .models import Business
 
@@ -64,6 +65,7 @@ class InvoicesWorkflowResult:
     llm_suggested_followups: list
 
 
+@traced("invoices.workflow", "run")
 def run_invoices_workflow(
     *,
     business_id: int,
@@ -75,10 +77,12 @@ def run_invoices_workflow(
     default_vendor: str | None = None,
     triggered_by_user_id: int,
     ai_companion_enabled: bool | None = None,
+    on_document_result: Callable[[InvoiceDocumentResult], None] | None = None,
 ) -> InvoicesWorkflowResult:
     """
     Synchronous entry point that wraps the Invoice agentic workflow.
     Mirrors receipts companion behaviour with invoice-specific fields.
+    `on_document_result` is called with each document's result as soon as it is ready.
     """
     business = Business.objects.get(pk=business_id)
     defaults = ensure_default_accounts(business)
@@ -216,10 +220,32 @@ def run_invoices_workflow(
 
     agent_retry_total = 0
 
+    def _emit_result(doc_result: InvoiceDocumentResult) -> None:
+        results.append(doc_result)
+        if on_document_result is not None:
+            on_document_result(doc_result)
+
     # Determine if OCR is available (requires OPENAI_API_KEY)
     use_ocr = bool(getattr(settings, "OPENAI_API_KEY", ""))
 
-    for doc in documents:
+    def _is_intake_failure(filename: str) -> bool:
+        filename_lower = (filename or "").lower()
+        return any(term in filename_lower for term in ["error", "fail", "corrupt"])
+
+    # OCR every salvageable document up front on a bounded pool; the loop
+    # below consumes the outcomes in input order.
+    ocr_outcomes = {}
+    if use_ocr:
+        ocr_indexes = [i for i, doc in enumerate(documents) if not _is_intake_failure(doc.original_filename)]
+        with trace_span("invoices.ocr", "extract", trace_id=trace_id, documents=len(ocr_indexes)):
+            outcomes = extract_documents_concurrently(
+                [OcrDocument(documents[i].storage_key, documents[i].original_filename) for i in ocr_indexes],
+                extract_invoice_data_from_bytes,
+                kind="invoice",
+            )
+        ocr_outcomes = dict(zip(ocr_indexes, outcomes))
+
+    for index, doc in enumerate(documents):
         # Initialize OCR tracking
         ocr_used = False
         ocr_status = "disabled_missing_api_key" if not use_ocr else "unavailable"
@@ -246,9 +272,8 @@ def run_invoices_workflow(
             "invoice_number_hint": doc.invoice_number_hint,
         }
 
-        filename_lower = (doc.original_filename or "").lower()
-        if any(term in filename_lower for term in ["error", "fail", "corrupt"]):
-            results.append(
+        if _is_intake_failure(doc.original_filename):
+            _emit_result(
                 InvoiceDocumentResult(
                     document_id=doc.document_id,
                     storage_key=doc.storage_key,
@@ -274,9 +299,19 @@ def run_invoices_workflow(
             continue
 
         # Try OCR extraction first
-        if use_ocr:
+        outcome = ocr_outcomes.get(index)
+        if outcome is not None and outcome.error:
+            trace_events.append(
+                trace_event(
+                    agent="invoices.ocr",
+                    event="ocr_failed",
+                    metadata={"trace_id": trace_id, "error": outcome.error},
+                    level="warning",
+                )
+            )
+        if outcome is not None and outcome.data:
             try:
-                ocr_data = extract_invoice_data(doc.storage_key, doc.original_filename)
+                ocr_data = outcome.data
                 if ocr_data and ocr_data.get("vendor"):
                     # OCR succeeded - use extracted data
                     ocr_used = True
@@ -388,7 +423,7 @@ def run_invoices_workflow(
             )
         )
         status = "PROCESSED" if audit_status != "error" else "ERROR"
-        results.append(
+        _emit_result(
             InvoiceDocumentResult(
                 document_id=doc.document_id,
                 storage_key=doc.storage_key,
@@ -415,6 +450,7 @@ def run_invoices_workflow(
         "documents_with_errors": len(errors),
         "documents_high_risk": len(high_risk),
         "agent_retries": agent_retry_total,
+        "ocr_cache_hits": sum(1 for o in ocr_outcomes.values() if o.cache_hit),
         "trace_events": trace_events,
     }
 
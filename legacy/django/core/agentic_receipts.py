@@ -5,18 +5,19 @@ import re
 from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Optional
+from typing import Callable, List, Optional
 from uuid import uuid4
 
 from django.conf import settings
 from django.utils import timezone
 
-from agentic.logging.tracing import trace_event
+from agentic.logging.tracing import trace_event, trace_span, traced
 
 from .accounting_defaults import ensure_default_accounts
 from .llm_reasoning import ReceiptsRunLLMResult, reason_about_receipts_run
 from .models import Business
-from .receipt_ocr import extract_receipt_data, validate_extracted_amount
+from .ocr_pipeline import OcrDocument, extract_documents_concurrently
+from .receipt_ocr import extract_receipt_data_from_bytes, validate_extracted_amount
 
 AUDIT_WARNING_THRESHOLD = Decimal("40.0")
 AUDIT_HIGH_RISK_THRESHOLD = Decimal("60.0")
@@ -86,6 +87,11 @@ def _infer_amount_from_filename(filename: str) -> Optional[Decimal]:
     return inferred
 
 
+def _is_intake_failure(filename: str) -> bool:
+    filename_lower = (filename or "").lower()
+    return any(term in filename_lower for term in ["error", "fail", "corrupt"])
+
+
 def _is_generic_camera_name(name: str) -> bool:
     lowered = name.lower()
     prefixes = ("img_", "img-", "dsc", "pxl_", "pxl-", "screenshot", "whatsapp", "signal")
@@ -112,6 +118,7 @@ def _normalize_currency_hint(raw: str | None) -> Optional[str]:
     return cleaned or None
 
 
+@traced("receipts.audit", "audit_document")
 def _audit_document(
     extracted: dict,
     normalized: dict,
@@ -211,6 +218,7 @@ def _audit_document(
     return flags, score, explanations, audit_status, retries
 
 
+@traced("receipts.workflow", "run")
 def run_receipts_workflow(
     *,
     business_id: int,
@@ -221,10 +229,12 @@ def run_receipts_workflow(
     default_vendor: str | None = None,
     triggered_by_user_id: int,
     ai_companion_enabled: bool | None = None,
+    on_document_result: Callable[[ReceiptDocumentResult], None] | None = None,
 ) -> ReceiptsWorkflowResult:
     """
     Synchronous entry point that wraps the Receipts agentic workflow.
     Design B baseline: files are ingested, hints are optional, extraction is primary, and a result is always returned.
+    `on_document_result` is called with each document's result as soon as it is ready.
     """
     business = Business.objects.get(pk=business_id)
     defaults = ensure_default_accounts(business)
@@ -245,16 +255,34 @@ def run_receipts_workflow(
     llm_suggested_classifications: list[dict] = []
     llm_suggested_followups: list[str] = []
     agent_retry_total = 0
+
+    def _emit_result(doc_result: ReceiptDocumentResult) -> None:
+        results.append(doc_result)
+        if on_document_result is not None:
+            on_document_result(doc_result)
+
     # Enable OCR when we have OpenAI key (for gpt-4o-mini vision) or any Companion LLM configured
     use_ocr = bool(getattr(settings, "OPENAI_API_KEY", None)) or bool(getattr(settings, "COMPANION_LLM_API_KEY", None)) or bool(ai_companion_enabled)
 
-    for doc in documents:
-        filename_lower = (doc.original_filename or "").lower()
-        if any(term in filename_lower for term in ["error", "fail", "corrupt"]):
+    # OCR every salvageable document up front on a bounded pool; the loop
+    # below consumes the outcomes in input order.
+    ocr_outcomes = {}
+    if use_ocr:
+        ocr_indexes = [i for i, doc in enumerate(documents) if not _is_intake_failure(doc.original_filename)]
+        with trace_span("receipts.ocr", "extract", trace_id=trace_id, documents=len(ocr_indexes)):
+            outcomes = extract_documents_concurrently(
+                [OcrDocument(documents[i].storage_key, documents[i].original_filename) for i in ocr_indexes],
+                extract_receipt_data_from_bytes,
+                kind="receipt",
+            )
+        ocr_outcomes = dict(zip(ocr_indexes, outcomes))
+
+    for index, doc in enumerate(documents):
+        if _is_intake_failure(doc.original_filename):
             error_flags = [
                 {"code": "INTAKE_FAILURE", "severity": "high", "message": "Document could not be auto-processed."}
             ]
-            results.append(
+            _emit_result(
                 ReceiptDocumentResult(
                     document_id=doc.document_id,
                     storage_key=doc.storage_key,
@@ -299,13 +327,10 @@ def run_receipts_workflow(
 
         mismatch_flags: list[dict] = []
         ocr_data = None
-        if use_ocr:
-            try:
-                ocr_data = extract_receipt_data(
-                    storage_key=doc.storage_key,
-                    original_filename=doc.original_filename,
-                )
-            except Exception as ocr_exc:
+        outcome = ocr_outcomes.get(index)
+        if outcome is not None:
+            ocr_data = outcome.data
+            if outcome.error:
                 trace_events.append(
                     trace_event(
                         agent="receipts.ocr",
@@ -313,7 +338,7 @@ def run_receipts_workflow(
                         metadata={
                             "trace_id": trace_id,
                             "storage_key": doc.storage_key,
-                            "error": str(ocr_exc),
+                            "error": outcome.error,
                         },
                         level="warning",
                     )
@@ -433,7 +458,7 @@ def run_receipts_workflow(
             )
         )
         status = "PROCESSED" if audit_status != "error" else "ERROR"
-        results.append(
+        _emit_result(
             ReceiptDocumentResult(
                 document_id=doc.document_id,
                 storage_key=doc.storage_key,
@@ -461,6 +486,7 @@ def run_receipts_workflow(
         "documents_with_errors": len(errors),
         "documents_high_risk": len(high_risk),
         "agent_retries": agent_retry_total,
+        "ocr_cache_hits": sum(1 for o in ocr_outcomes.values() if o.cache_hit),
         "trace_events": trace_events,
     }
 
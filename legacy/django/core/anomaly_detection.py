@@ -3,15 +3,30 @@ Deterministic anomaly detection helpers for Companion v3.
 
 Focus: reconciliation, P&L, AR, and tax surfaces for micro-SMBs.
 LLM overlays are optional and token-light; deterministic anomalies remain the source of truth.
+
+Detection runs in two steps:
+
+- `LedgerFacts` gathers what the detectors look at for one business/period
+  (account balances at period start and end, unbalanced entry counts, bank and
+  AR aging) with one grouped query per fact, loaded on first use;
+- detectors registered with `@register_detector` turn those facts into
+  `Anomaly` rows. `run_anomaly_detectors()` loads the facts the selected
+  detectors declare and times every fact load and detector.
+
+Besides the `generate_*` wrappers, the Companion close-readiness check
+(core.companion_issues) and the books review (core.agentic_books_review)
+read their ledger-level checks from the same run.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Iterable, List, Literal, Optional
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Literal, Optional
 
-from django.db.models import F, Q, Sum
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
 
 from .models import Account, BankTransaction, Invoice, JournalEntry, JournalLine
@@ -21,6 +36,10 @@ import json
 
 Severity = Literal["low", "medium", "high"]
 
+ZERO = Decimal("0.00")
+SUSPENSE_FALLBACK_CODES = ("9999", "2999", "3999")
+RETAINED_EARNINGS_CODES = ("3000", "3200")
+
 
 @dataclass
 class Anomaly:
@@ -34,48 +53,220 @@ class Anomaly:
     linked_issue_id: Optional[int] = None
 
 
-def _balance_as_of(account: Account, as_of: date) -> Decimal:
-    lines = JournalLine.objects.filter(account=account, journal_entry__date__lte=as_of)
-    totals = lines.aggregate(total_debit=Sum("debit"), total_credit=Sum("credit"))
-    debit = totals.get("total_debit") or Decimal("0.00")
-    credit = totals.get("total_credit") or Decimal("0.00")
-    return Decimal(debit) - Decimal(credit)
+# ─────────────────────────────────────────────────────────────────────────────
+#    Facts
+# ─────────────────────────────────────────────────────────────────────────────
 
 
-def generate_bank_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
-    anomalies: List[Anomaly] = []
-    aging_threshold = period_end - timedelta(days=14)
-    unreconciled_qs = BankTransaction.objects.filter(
-        bank_account__business=business,
-        status=BankTransaction.TransactionStatus.NEW,
-        date__lte=aging_threshold,
-        date__gte=period_start,
-    )
-    unreconciled_count = unreconciled_qs.count()
-    if unreconciled_count > 0:
-        severity: Severity = "high" if unreconciled_count >= 10 else "medium"
-        anomalies.append(
-            Anomaly(
-                code="BANK_UNRECONCILED_AGING",
-                surface="bank",
-                impact_area="reconciliation",
-                severity=severity,
-                explanation=f"{unreconciled_count} unreconciled bank transactions older than 14 days; closing cash may be off.",
-                task_code="B1",
+@dataclass
+class AccountFacts:
+    id: int
+    code: str
+    name: str
+    type: str
+    is_suspense: bool
+    # Debit-positive balances before period_start and at period_end.
+    opening: Decimal = ZERO
+    closing: Decimal = ZERO
+
+    @property
+    def movement(self) -> Decimal:
+        return self.closing - self.opening
+
+
+class LedgerFacts:
+    """Per-period facts for one business; each fact is one query, loaded once."""
+
+    def __init__(self, business, period_start: date, period_end: date, as_of: date | None = None):
+        self.business = business
+        self.period_start = period_start
+        self.period_end = period_end
+        self.as_of = as_of or period_end
+
+    @cached_property
+    def accounts(self) -> Dict[int, AccountFacts]:
+        """Every account of the business (chart ordering) with start/end balances."""
+        accounts = {
+            row["id"]: AccountFacts(**row)
+            for row in Account.objects.filter(business=self.business).values(
+                "id", "code", "name", "type", "is_suspense"
+            )
+        }
+        before_start = Q(journal_entry__date__lt=self.period_start)
+        rows = (
+            JournalLine.objects.filter(account__business=self.business, journal_entry__date__lte=self.period_end)
+            .values("account_id")
+            .annotate(
+                opening_debit=Sum("debit", filter=before_start),
+                opening_credit=Sum("credit", filter=before_start),
+                closing_debit=Sum("debit"),
+                closing_credit=Sum("credit"),
             )
+            .order_by()
+        )
+        for row in rows:
+            acct = accounts.get(row["account_id"])
+            if acct is None:
+                continue
+            acct.opening = (row["opening_debit"] or ZERO) - (row["opening_credit"] or ZERO)
+            acct.closing = (row["closing_debit"] or ZERO) - (row["closing_credit"] or ZERO)
+        return accounts
+
+    @cached_property
+    def unbalanced_entries(self) -> int:
+        return (
+            JournalEntry.objects.filter(
+                business=self.business, date__gte=self.period_start, date__lte=self.period_end
+            )
+            .annotate(total_debit=Sum("lines__debit"), total_credit=Sum("lines__credit"))
+            .filter(~Q(total_debit=F("total_credit")))
+            .count()
         )
-    return anomalies
 
+    @cached_property
+    def bank_unreconciled_aging(self) -> int:
+        """NEW bank transactions in the period that are older than 14 days at period end."""
+        return BankTransaction.objects.filter(
+            bank_account__business=self.business,
+            status=BankTransaction.TransactionStatus.NEW,
+            date__lte=self.period_end - timedelta(days=14),
+            date__gte=self.period_start,
+        ).count()
 
-def generate_books_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
-    anomalies: List[Anomaly] = []
+    @cached_property
+    def ar_aging(self) -> Dict[str, int]:
+        """Open invoices past due at `as_of`, bucketed by days overdue."""
+        as_of = self.as_of
+        return Invoice.objects.filter(
+            business=self.business,
+            status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL],
+            due_date__lt=as_of,
+        ).aggregate(
+            overdue=Count("id"),
+            days_1_30=Count("id", filter=Q(due_date__gte=as_of - timedelta(days=30))),
+            days_31_60=Count(
+                "id", filter=Q(due_date__lt=as_of - timedelta(days=30), due_date__gte=as_of - timedelta(days=60))
+            ),
+            days_61_90=Count(
+                "id", filter=Q(due_date__lt=as_of - timedelta(days=60), due_date__gte=as_of - timedelta(days=90))
+            ),
+            over_90=Count("id", filter=Q(due_date__lt=as_of - timedelta(days=90))),
+        )
+
+    def suspense_accounts(self) -> List[AccountFacts]:
+        flagged = [a for a in self.accounts.values() if a.is_suspense]
+        return flagged or [a for a in self.accounts.values() if a.code in SUSPENSE_FALLBACK_CODES]
+
+    def accounts_of_type(self, *types: str) -> List[AccountFacts]:
+        return [a for a in self.accounts.values() if a.type in types]
 
-    # Suspense/clearing balances
-    suspense_accounts = Account.objects.filter(business=business, is_suspense=True)
-    if not suspense_accounts.exists():
-        suspense_accounts = Account.objects.filter(business=business, code__in=["9999", "2999", "3999"])
-    for acct in suspense_accounts:
-        bal = _balance_as_of(acct, period_end)
+    def net_income(self) -> Decimal:
+        # Income is credit-normal and expenses debit-normal: net income is the
+        # negated period movement of both.
+        return -sum(
+            (a.movement for a in self.accounts_of_type(Account.AccountType.INCOME, Account.AccountType.EXPENSE)),
+            ZERO,
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#    Detector registry
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class Detector:
+    name: str
+    surface: str
+    facts: tuple
+    func: Callable[[LedgerFacts], List[Anomaly]]
+
+
+# name -> Detector, in registration (= output) order.
+DETECTORS: Dict[str, Detector] = {}
+
+
+def register_detector(name: str, *, surface: str, facts: Iterable[str] = ()):
+    """
+    Register `func(facts) -> list[Anomaly]` as a detector.
+
+    `facts` names the `LedgerFacts` attributes it reads so runs can load them
+    up front; other apps register their detectors from AppConfig.ready().
+    """
+
+    def decorator(func):
+        DETECTORS[name] = Detector(name=name, surface=surface, facts=tuple(facts), func=func)
+        return func
+
+    return decorator
+
+
+@dataclass
+class AnomalyRun:
+    facts: LedgerFacts
+    anomalies: List[Anomaly] = field(default_factory=list)
+    # "facts.<name>" / "<detector name>" -> milliseconds
+    timings_ms: Dict[str, int] = field(default_factory=dict)
+
+
+def run_anomaly_detectors(
+    business,
+    *,
+    period_start: date,
+    period_end: date,
+    as_of: date | None = None,
+    surfaces: Iterable[str] | None = None,
+    detectors: Iterable[str] | None = None,
+) -> AnomalyRun:
+    """Run registered detectors (optionally filtered by surface or name) over one fact set."""
+    selected = list(DETECTORS.values())
+    if surfaces is not None:
+        surfaces = set(surfaces)
+        selected = [d for d in selected if d.surface in surfaces]
+    if detectors is not None:
+        names = set(detectors)
+        selected = [d for d in selected if d.name in names]
+
+    run = AnomalyRun(facts=LedgerFacts(business, period_start, period_end, as_of))
+    for fact in dict.fromkeys(f for d in selected for f in d.facts):
+        started = time.monotonic()
+        getattr(run.facts, fact)
+        run.timings_ms[f"facts.{fact}"] = int((time.monotonic() - started) * 1000)
+    for detector in selected:
+        started = time.monotonic()
+        run.anomalies.extend(detector.func(run.facts))
+        run.timings_ms[detector.name] = int((time.monotonic() - started) * 1000)
+    return run
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#    Built-in detectors
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+@register_detector("bank_unreconciled_aging", surface="bank", facts=("bank_unreconciled_aging",))
+def detect_bank_unreconciled_aging(facts: LedgerFacts) -> List[Anomaly]:
+    unreconciled_count = facts.bank_unreconciled_aging
+    if unreconciled_count <= 0:
+        return []
+    severity: Severity = "high" if unreconciled_count >= 10 else "medium"
+    return [
+        Anomaly(
+            code="BANK_UNRECONCILED_AGING",
+            surface="bank",
+            impact_area="reconciliation",
+            severity=severity,
+            explanation=f"{unreconciled_count} unreconciled bank transactions older than 14 days; closing cash may be off.",
+            task_code="B1",
+        )
+    ]
+
+
+@register_detector("gl_suspense_balance", surface="books", facts=("accounts",))
+def detect_suspense_balances(facts: LedgerFacts) -> List[Anomaly]:
+    anomalies: List[Anomaly] = []
+    for acct in facts.suspense_accounts():
+        bal = acct.closing
         if abs(bal) > Decimal("1.00"):
             severity: Severity = "high" if abs(bal) >= Decimal("500") else "medium"
             anomalies.append(
@@ -88,104 +279,85 @@ def generate_books_anomalies(business, period_start: date, period_end: date) ->
                     task_code="G1",
                 )
             )
+    return anomalies
 
-    # Unbalanced entries within period
-    unbalanced_qs = (
-        JournalEntry.objects.filter(business=business, date__gte=period_start, date__lte=period_end)
-        .annotate(total_debit=Sum("lines__debit"), total_credit=Sum("lines__credit"))
-        .filter(~Q(total_debit=F("total_credit")))
-    )
-    if unbalanced_qs.exists():
-        count = unbalanced_qs.count()
-        anomalies.append(
-            Anomaly(
-                code="GL_UNBALANCED",
-                surface="books",
-                impact_area="pnl",
-                severity="high",
-                explanation=f"{count} journal entries are unbalanced; fix debits/credits before close.",
-                task_code="G2",
-            )
+
+@register_detector("gl_unbalanced", surface="books", facts=("unbalanced_entries",))
+def detect_unbalanced_entries(facts: LedgerFacts) -> List[Anomaly]:
+    count = facts.unbalanced_entries
+    if not count:
+        return []
+    return [
+        Anomaly(
+            code="GL_UNBALANCED",
+            surface="books",
+            impact_area="pnl",
+            severity="high",
+            explanation=f"{count} journal entries are unbalanced; fix debits/credits before close.",
+            task_code="G2",
         )
+    ]
 
-    # Retained earnings rollforward check (rough)
-    retained = Account.objects.filter(
-        Q(name__icontains="retained") | Q(code__in=["3000", "3200"]),
-        business=business,
-        type=Account.AccountType.EQUITY,
-    ).first()
-    if retained:
-        start_bal = _balance_as_of(retained, period_start - timedelta(days=1))
-        end_bal = _balance_as_of(retained, period_end)
-        movement = end_bal - start_bal
-        # Net income for the period = income - expense debits/credits
-        income_ids = Account.objects.filter(business=business, type=Account.AccountType.INCOME).values_list("id", flat=True)
-        expense_ids = Account.objects.filter(business=business, type=Account.AccountType.EXPENSE).values_list("id", flat=True)
-        income_lines = JournalLine.objects.filter(
-            journal_entry__business=business,
-            journal_entry__date__gte=period_start,
-            journal_entry__date__lte=period_end,
-            account_id__in=income_ids,
-        ).aggregate(total_debit=Sum("debit"), total_credit=Sum("credit"))
-        expense_lines = JournalLine.objects.filter(
-            journal_entry__business=business,
-            journal_entry__date__gte=period_start,
-            journal_entry__date__lte=period_end,
-            account_id__in=expense_ids,
-        ).aggregate(total_debit=Sum("debit"), total_credit=Sum("credit"))
-        income = (income_lines.get("total_credit") or Decimal("0")) - (income_lines.get("total_debit") or Decimal("0"))
-        expenses = (expense_lines.get("total_debit") or Decimal("0")) - (expense_lines.get("total_credit") or Decimal("0"))
-        net_income = income - expenses
-        delta = movement - net_income
-        if abs(delta) > Decimal("1.00"):
-            anomalies.append(
-                Anomaly(
-                    code="GL_RETAINED_EARNINGS_ROLLFORWARD",
-                    surface="books",
-                    impact_area="pnl",
-                    severity="medium",
-                    explanation=f"Retained earnings movement {movement:,.2f} does not match net income {net_income:,.2f} (diff {delta:,.2f}).",
-                    task_code="G2B",
-                )
-            )
 
-    return anomalies
+@register_detector("gl_retained_earnings_rollforward", surface="books", facts=("accounts",))
+def detect_retained_earnings_rollforward(facts: LedgerFacts) -> List[Anomaly]:
+    # Rough check: retained earnings should move by the period's net income.
+    retained = next(
+        (
+            a
+            for a in facts.accounts_of_type(Account.AccountType.EQUITY)
+            if "retained" in (a.name or "").lower() or a.code in RETAINED_EARNINGS_CODES
+        ),
+        None,
+    )
+    if retained is None:
+        return []
+    movement = retained.movement
+    net_income = facts.net_income()
+    delta = movement - net_income
+    if abs(delta) <= Decimal("1.00"):
+        return []
+    return [
+        Anomaly(
+            code="GL_RETAINED_EARNINGS_ROLLFORWARD",
+            surface="books",
+            impact_area="pnl",
+            severity="medium",
+            explanation=f"Retained earnings movement {movement:,.2f} does not match net income {net_income:,.2f} (diff {delta:,.2f}).",
+            task_code="G2B",
+        )
+    ]
 
 
-def generate_ar_anomalies(business, as_of: date) -> List[Anomaly]:
-    anomalies: List[Anomaly] = []
-    overdue = Invoice.objects.filter(
-        business=business,
-        status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL],
-        due_date__lt=as_of,
-    )
-    overdue_count = overdue.count()
-    if overdue_count:
-        over_90 = overdue.filter(due_date__lt=as_of - timedelta(days=90)).count()
-        severity: Severity = "high" if over_90 >= 3 or overdue_count >= 10 else "medium"
-        anomalies.append(
-            Anomaly(
-                code="AR_OVERDUE_AGING",
-                surface="invoices",
-                impact_area="ar",
-                severity=severity,
-                explanation=f"{overdue_count} overdue invoices; {over_90} are 90+ days past due.",
-                task_code="I1B",
-            )
+@register_detector("ar_overdue_aging", surface="invoices", facts=("ar_aging",))
+def detect_ar_overdue_aging(facts: LedgerFacts) -> List[Anomaly]:
+    overdue_count = facts.ar_aging["overdue"]
+    if not overdue_count:
+        return []
+    over_90 = facts.ar_aging["over_90"]
+    severity: Severity = "high" if over_90 >= 3 or overdue_count >= 10 else "medium"
+    return [
+        Anomaly(
+            code="AR_OVERDUE_AGING",
+            surface="invoices",
+            impact_area="ar",
+            severity=severity,
+            explanation=f"{overdue_count} overdue invoices; {over_90} are 90+ days past due.",
+            task_code="I1B",
         )
-    return anomalies
+    ]
 
 
-def generate_tax_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
+@register_detector("tax_negative_balances", surface="tax", facts=("accounts",))
+def detect_negative_tax_balances(facts: LedgerFacts) -> List[Anomaly]:
     anomalies: List[Anomaly] = []
-    # Negative tax payable / receivable
-    tax_accounts = Account.objects.filter(
-        Q(name__icontains="tax") | Q(code__icontains="tax"),
-        business=business,
-        type__in=[Account.AccountType.LIABILITY, Account.AccountType.ASSET],
-    )
+    tax_accounts = [
+        a
+        for a in facts.accounts_of_type(Account.AccountType.LIABILITY, Account.AccountType.ASSET)
+        if "tax" in (a.name or "").lower() or "tax" in (a.code or "").lower()
+    ]
     for acct in tax_accounts:
-        bal = _balance_as_of(acct, period_end)
+        bal = acct.closing
         if acct.type == Account.AccountType.LIABILITY and bal < Decimal("0"):
             anomalies.append(
                 Anomaly(
@@ -208,10 +380,25 @@ def generate_tax_anomalies(business, period_start: date, period_end: date) -> Li
                     task_code="T2",
                 )
             )
-
     return anomalies
 
 
+def generate_bank_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
+    return run_anomaly_detectors(business, period_start=period_start, period_end=period_end, surfaces=["bank"]).anomalies
+
+
+def generate_books_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
+    return run_anomaly_detectors(business, period_start=period_start, period_end=period_end, surfaces=["books"]).anomalies
+
+
+def generate_ar_anomalies(business, as_of: date) -> List[Anomaly]:
+    return run_anomaly_detectors(business, period_start=as_of, period_end=as_of, surfaces=["invoices"]).anomalies
+
+
+def generate_tax_anomalies(business, period_start: date, period_end: date) -> List[Anomaly]:
+    return run_anomaly_detectors(business, period_start=period_start, period_end=period_end, surfaces=["tax"]).anomalies
+
+
 def apply_llm_explanations(
     anomalies: List[Anomaly],
     *,
@@ -292,10 +479,4 @@ def bundle_anomalies(
     """
     Helper to generate all deterministic anomalies for a period.
     """
-    as_of = as_of or period_end
-    anomalies: List[Anomaly] = []
-    anomalies.extend(generate_bank_anomalies(business, period_start, period_end))
-    anomalies.extend(generate_books_anomalies(business, period_start, period_end))
-    anomalies.extend(generate_ar_anomalies(business, as_of))
-    anomalies.extend(generate_tax_anomalies(business, period_start, period_end))
-    return anomalies
+    return run_anomaly_detectors(business, period_start=period_start, period_end=period_end, as_of=as_of).anomalies
@@ -7,6 +7,7 @@ from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
 
+from .anomaly_detection import run_anomaly_detectors
 from .llm_reasoning import refine_companion_issues
 from .companion_tasks import CompanionTask, first_task_for_surface, get_task, valid_task_code
 from .models import (
@@ -550,51 +551,14 @@ def evaluate_period_close_readiness(business) -> CloseReadinessResult:
             blocking_reasons.append(reason)
             blocking_items.append({"reason": reason, "task_code": "B1", "surface": "bank"})
     
-    # Check 2: Suspense/clearing account balance
-    # Priority 1: Look for accounts with is_suspense=True (business-scoped)
-    # Priority 2: Fall back to common suspense codes if none marked
-    suspense_accounts = Account.objects.filter(
-        business=business,
-        is_suspense=True,
-    )
-    if not suspense_accounts.exists():
-        # Fallback: use heuristic codes (9999, 2999, 3999) if no accounts are marked as suspense
-        suspense_accounts = Account.objects.filter(
-            business=business,
-            code__in=["9999", "2999", "3999"],
-        )
-    
-    # Avoid N+1 queries: compute all suspense balances in a single query
-    # by annotating with the sum of journal line debits - credits
-    if suspense_accounts.exists():
-        from decimal import Decimal as D
-        from django.db.models import Sum, F, Value, DecimalField
-        from django.db.models.functions import Coalesce
-        
-        # Get balances via annotation to avoid N+1 .balance() calls
-        # JournalLine has debit/credit fields, not amount - balance = debits - credits
-        # Use DecimalField output_field to avoid mixed type errors
-        suspense_with_balance = suspense_accounts.annotate(
-            total_debits=Coalesce(
-                Sum('journal_lines__debit'),
-                Value(D('0')),
-                output_field=DecimalField()
-            ),
-            total_credits=Coalesce(
-                Sum('journal_lines__credit'),
-                Value(D('0')),
-                output_field=DecimalField()
-            ),
-        ).annotate(
-            computed_balance=F('total_debits') - F('total_credits')
-        ).exclude(computed_balance=0)  # Only accounts with non-zero balance
-        
-        for acct in suspense_with_balance:
-            bal = float(acct.computed_balance or 0)
-            if abs(bal) > 0.01:
-                reason = f"G1 – {acct.name} has a balance of ${bal:,.2f}."
-                blocking_reasons.append(reason)
-                blocking_items.append({"reason": reason, "task_code": "G1", "surface": "books"})
+    # Check 2: Suspense/clearing account balance, via the shared G1 detector
+    # (accounts flagged is_suspense, else the fallback suspense codes).
+    today = timezone.localdate()
+    ledger = run_anomaly_detectors(business, period_start=today, period_end=today, detectors=["gl_suspense_balance"])
+    for anomaly in ledger.anomalies:
+        reason = f"G1 – {anomaly.explanation}"
+        blocking_reasons.append(reason)
+        blocking_items.append({"reason": reason, "task_code": anomaly.task_code, "surface": anomaly.surface})
     
     # Check 3: High/Critical CompanionIssues in books or bank
     critical_issues = CompanionIssue.objects.filter(
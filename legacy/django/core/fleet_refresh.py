@@ -0,0 +1,388 @@
+"""
+Fleet-wide refresh runner for per-business maintenance tasks.
+
+Nightly jobs such as the Companion health index and the tax watchdog used to
+walk every business one after another. `run_fleet_refresh()`:
+
+- shards business ids round-robin across a process pool; each worker opens its
+  own DB connection (the parent closes its connections before forking),
+- skips businesses whose data fingerprint matches the one recorded at their
+  last successful refresh,
+- checkpoints every business in `TenantRefreshState` under the run id, so a
+  run interrupted half-way can be resumed by passing the same `run_id`,
+- reports a per-business outcome and wall time.
+
+Tasks register with `@register_fleet_task("<name>")` and provide an optional
+eligibility check, a fingerprint and the refresh itself. A fingerprint is a
+handful of aggregate queries over the data the refresh reads, which is much
+cheaper than the refresh. None of the ledger models carry an `updated_at`, so
+besides counts and sums a fingerprint includes id-weighted sums over
+integer-keyed tables (`_checksum`), which move when a value is edited or moved
+between rows even if the plain sum stays the same. UUID-keyed tables (the tax
+details and payments) are fingerprinted by count, sums and latest created_at.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BigIntegerField, Count, DecimalField, F, Max, Min, Q, Sum, UUIDField
+from django.utils import timezone
+
+from .models import BankTransaction, Business, Expense, Invoice, JournalEntry, JournalLine, TenantRefreshState
+
+logger = logging.getLogger(__name__)
+
+Outcome = TenantRefreshState.Outcome
+
+# Thresholds the health metrics, severities and reminder suggestions age
+# rows against (companion.services).
+AGING_BOUNDARY_DAYS = (1, 7, 15, 30, 45, 60, 90)
+
+
+@dataclass(frozen=True)
+class FleetTask:
+    name: str
+    refresh: Callable[[Business, dict], None]
+    fingerprint: Callable[[Business, dict], str]
+    # Returns False for businesses the task does not apply to (e.g. feature off).
+    is_eligible: Callable[[Business, dict], bool] | None = None
+
+
+@dataclass
+class TenantResult:
+    business_id: int
+    outcome: str
+    duration_ms: int = 0
+    error: str = ""
+    # Already completed earlier in the same run (resumed).
+    checkpointed: bool = False
+
+
+@dataclass
+class FleetReport:
+    task: str
+    run_id: str
+    results: list[TenantResult] = field(default_factory=list)
+    duration_ms: int = 0
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for r in self.results if r.outcome == outcome and not r.checkpointed)
+
+    @property
+    def resumed(self) -> int:
+        return sum(1 for r in self.results if r.checkpointed)
+
+    def slowest(self, n: int = 5) -> list[TenantResult]:
+        ran = [r for r in self.results if not r.checkpointed]
+        return sorted(ran, key=lambda r: r.duration_ms, reverse=True)[:n]
+
+
+_TASKS: dict[str, FleetTask] = {}
+
+
+def register_fleet_task(name: str, *, fingerprint, is_eligible=None):
+    def decorator(fn):
+        _TASKS[name] = FleetTask(name=name, refresh=fn, fingerprint=fingerprint, is_eligible=is_eligible)
+        return fn
+    return decorator
+
+
+def get_fleet_task(name: str) -> FleetTask:
+    try:
+        return _TASKS[name]
+    except KeyError:
+        raise LookupError(f"Unknown fleet task '{name}'") from None
+
+
+def _digest(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _signature(qs, *, latest: str = "id", **aggregates) -> dict:
+    """
+    Row count plus the max of an orderable column. UUID-keyed tables must pass
+    a timestamp as `latest`: there is no max(uuid) on Postgres.
+    """
+    if latest == "id" and isinstance(qs.model._meta.pk, UUIDField):
+        raise ValueError(f"{qs.model.__name__} has a UUID primary key; pass an orderable `latest` column")
+    key = "max_id" if latest == "id" else f"max_{latest}"
+    return qs.aggregate(rows=Count("pk"), **{key: Max(latest)}, **aggregates)
+
+
+def _checksum(field: str, *, amount: bool = False) -> Sum:
+    """Sum of id * field: changes when a value moves between rows."""
+    output_field = DecimalField(max_digits=38, decimal_places=4) if amount else BigIntegerField()
+    return Sum(F("id") * F(field), output_field=output_field)
+
+
+def _aged(field: str, today, **extra) -> dict:
+    """Count rows whose `field` is on or before each aging boundary."""
+    return {
+        f"{field}_{days}d": Count("id", filter=Q(**{f"{field}__lte": today - timedelta(days=days)}, **extra))
+        for days in AGING_BOUNDARY_DAYS
+    }
+
+
+
+def business_data_fingerprint(business: Business) -> str:
+    """
+    Fingerprint of the ledger data behind the health metrics.
+
+    Aging metrics move with the calendar even when no row changes, so rather
+    than today's date (which would never let a refresh be skipped) this counts
+    the rows past each aging boundary: the fingerprint moves on the day an
+    unreconciled transaction or open invoice crosses one. The current month is
+    included for the month-over-month revenue windows. Day counts shown in
+    reasons ("oldest 17 days") are therefore only refreshed with the next
+    boundary crossing or data change.
+    """
+    today = timezone.localdate()
+    open_invoice = Q(status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL])
+    unreconciled = Q(reconciliation_status=BankTransaction.RECO_STATUS_UNRECONCILED)
+    bank = _signature(
+        BankTransaction.objects.filter(bank_account__business=business),
+        total=Sum("amount"),
+        total_checksum=_checksum("amount", amount=True),
+        unreconciled=Count("id", filter=unreconciled),
+        oldest_unreconciled=Min("date", filter=unreconciled),
+        recent_60d=Count("id", filter=Q(date__gte=today - timedelta(days=60))),
+        matched_invoices=_checksum("matched_invoice_id"),
+        matched_expenses=_checksum("matched_expense_id"),
+        **_aged("date", today, reconciliation_status=BankTransaction.RECO_STATUS_UNRECONCILED),
+    )
+    journal = _signature(
+        JournalEntry.objects.filter(business=business),
+        void=Count("id", filter=Q(is_void=True)),
+        max_date=Max("date"),
+        future_dated=Count("id", filter=Q(date__gt=today)),
+    )
+    lines = _signature(
+        JournalLine.objects.filter(journal_entry__business=business),
+        total_debit=Sum("debit"),
+        total_credit=Sum("credit"),
+        debit_checksum=_checksum("debit", amount=True),
+        credit_checksum=_checksum("credit", amount=True),
+        accounts=_checksum("account_id"),
+    )
+    invoices = _signature(
+        Invoice.objects.filter(business=business),
+        total=Sum("grand_total"),
+        total_checksum=_checksum("grand_total", amount=True),
+        tax=Sum("tax_amount"),
+        open=Count("id", filter=open_invoice),
+        paid=Count("id", filter=Q(status=Invoice.Status.PAID)),
+        oldest_open_due=Min("due_date", filter=open_invoice),
+        customers=_checksum("customer_id"),
+        with_tax_group=Count("tax_group"),
+        with_tax_rate=Count("tax_rate"),
+        **_aged("due_date", today, status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL]),
+    )
+    expenses = _signature(
+        Expense.objects.filter(business=business),
+        total=Sum("amount"),
+        total_checksum=_checksum("amount", amount=True),
+        categories=_checksum("category_id"),
+        suppliers=_checksum("supplier_id"),
+        recent_30d=Count("id", filter=Q(date__gte=today - timedelta(days=30))),
+    )
+    return _digest(today.replace(day=1), bank, journal, lines, invoices, expenses)
+
+
+def _record(state: TenantRefreshState, run_id: str, outcome: str, duration_ms: int, *, fingerprint=None, error=""):
+    state.last_run_id = run_id
+    state.last_outcome = outcome
+    state.last_duration_ms = duration_ms
+    state.last_error = error
+    update_fields = ["last_run_id", "last_outcome", "last_duration_ms", "last_error", "updated_at"]
+    if fingerprint is not None:
+        state.fingerprint = fingerprint
+        state.refreshed_at = timezone.now()
+        update_fields += ["fingerprint", "refreshed_at"]
+    state.save(update_fields=update_fields)
+
+
+def refresh_business(task: FleetTask, business: Business, *, run_id: str, force: bool = False, options=None) -> TenantResult:
+    """Refresh one business unless it is already done for this run or unchanged."""
+    options = options or {}
+    started = time.monotonic()
+    state, _ = TenantRefreshState.objects.get_or_create(task=task.name, business=business)
+    if state.last_run_id == run_id and state.last_outcome != Outcome.ERROR:
+        return TenantResult(business.id, state.last_outcome, state.last_duration_ms, checkpointed=True)
+
+    def elapsed() -> int:
+        return int((time.monotonic() - started) * 1000)
+
+    try:
+        if task.is_eligible is not None and not task.is_eligible(business, options):
+            _record(state, run_id, Outcome.INELIGIBLE, elapsed())
+            return TenantResult(business.id, Outcome.INELIGIBLE, elapsed())
+
+        fingerprint = task.fingerprint(business, options)
+        if not force and state.last_outcome in {Outcome.REFRESHED, Outcome.SKIPPED} and state.fingerprint == fingerprint:
+            _record(state, run_id, Outcome.SKIPPED, elapsed())
+            return TenantResult(business.id, Outcome.SKIPPED, elapsed())
+
+        task.refresh(business, options)
+    except Exception as exc:
+        logger.exception("Fleet task %s failed for business %s", task.name, business.id)
+        _record(state, run_id, Outcome.ERROR, elapsed(), error=str(exc))
+        return TenantResult(business.id, Outcome.ERROR, elapsed(), error=str(exc))
+
+    _record(state, run_id, Outcome.REFRESHED, elapsed(), fingerprint=fingerprint)
+    return TenantResult(business.id, Outcome.REFRESHED, elapsed())
+
+
+def _run_shard(task_name: str, business_ids: list[int], run_id: str, force: bool, options: dict) -> list[TenantResult]:
+    task = get_fleet_task(task_name)
+    businesses = Business.objects.in_bulk(business_ids)
+    results = []
+    for business_id in business_ids:
+        business = businesses.get(business_id)
+        if business is not None:
+            results.append(refresh_business(task, business, run_id=run_id, force=force, options=options))
+    return results
+
+
+def _init_worker() -> None:
+    # No-op under fork; under spawn the worker starts without an app registry.
+    import django
+
+    django.setup()
+
+
+def active_business_ids() -> list[int]:
+    return list(
+        Business.objects.filter(status="active", is_deleted=False).order_by("id").values_list("id", flat=True)
+    )
+
+
+def run_fleet_refresh(
+    task_name: str,
+    *,
+    business_ids: Iterable[int] | None = None,
+    workers: int | None = None,
+    run_id: str | None = None,
+    force: bool = False,
+    options: dict | None = None,
+    on_result: Callable[[TenantResult], None] | None = None,
+) -> FleetReport:
+    """
+    Run a registered task over `business_ids` (default: all active businesses).
+
+    Pass the `run_id` of an interrupted run to resume it: businesses already
+    checkpointed under that id are not refreshed again.
+    """
+    task = get_fleet_task(task_name)
+    options = options or {}
+    ids = list(business_ids) if business_ids is not None else active_business_ids()
+    report = FleetReport(task=task.name, run_id=run_id or uuid.uuid4().hex)
+    workers = workers or int(getattr(settings, "FLEET_REFRESH_MAX_WORKERS", 1))
+    workers = max(1, min(workers, len(ids) or 1))
+    started = time.monotonic()
+
+    def collect(results: list[TenantResult]) -> None:
+        for result in results:
+            report.results.append(result)
+            if on_result:
+                on_result(result)
+
+    if workers == 1:
+        for business_id in ids:
+            collect(_run_shard(task.name, [business_id], report.run_id, force, options))
+    else:
+        shards = [ids[i::workers] for i in range(workers)]
+        # Each worker opens its own connection; forked children must not
+        # inherit (and share) the parent's sockets.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_run_shard, task.name, shard, report.run_id, force, options) for shard in shards if shard
+            ]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    report.duration_ms = int((time.monotonic() - started) * 1000)
+    return report
+
+
+# --- Tasks -------------------------------------------------------------------
+
+
+def _companion_health_eligible(business: Business, options: dict) -> bool:
+    from companion.models import WorkspaceCompanionProfile
+
+    profile, _ = WorkspaceCompanionProfile.objects.get_or_create(workspace=business)
+    return bool(profile.is_enabled and profile.enable_health_index)
+
+
+@register_fleet_task(
+    "companion_health",
+    fingerprint=lambda business, options: business_data_fingerprint(business),
+    is_eligible=_companion_health_eligible,
+)
+def refresh_companion_health(business: Business, options: dict) -> None:
+    from companion.services import create_health_snapshot, refresh_suggested_actions_for_workspace
+
+    snapshot = create_health_snapshot(business)
+    refresh_suggested_actions_for_workspace(business, snapshot=snapshot)
+
+
+def _tax_period_key(options: dict) -> str:
+    from taxes.services import _current_tax_period_key
+
+    return options.get("period") or _current_tax_period_key()
+
+
+def _tax_watchdog_fingerprint(business: Business, options: dict) -> str:
+    from taxes.models import TaxPayment, TransactionLineTaxDetail
+    from taxes.services import _period_range_from_key
+
+    period_key = _tax_period_key(options)
+    start_date, end_date = _period_range_from_key(period_key)
+    details = _signature(
+        TransactionLineTaxDetail.objects.filter(
+            business=business, transaction_date__gte=start_date, transaction_date__lte=end_date
+        ),
+        latest="created_at",
+        taxable=Sum("taxable_amount_txn_currency"),
+        tax=Sum("tax_amount_txn_currency"),
+    )
+    invoices = _signature(
+        Invoice.objects.filter(business=business, issue_date__gte=start_date, issue_date__lte=end_date),
+        total=Sum("grand_total"),
+        tax=Sum("tax_amount"),
+        tax_checksum=_checksum("tax_amount", amount=True),
+    )
+    expenses = _signature(
+        Expense.objects.filter(business=business, date__gte=start_date, date__lte=end_date),
+        total=Sum("amount"),
+        tax=Sum("tax_amount"),
+        tax_checksum=_checksum("tax_amount", amount=True),
+    )
+    payments = _signature(
+        TaxPayment.objects.filter(business=business, period_key=period_key),
+        latest="created_at",
+        total=Sum("amount"),
+    )
+    settings_part = [business.tax_country, business.tax_region, business.currency]
+    return _digest(period_key, settings_part, details, invoices, expenses, payments)
+
+
+@register_fleet_task("tax_watchdog", fingerprint=_tax_watchdog_fingerprint)
+def refresh_tax_watchdog(business: Business, options: dict) -> None:
+    from taxes.services import compute_tax_anomalies, compute_tax_period_snapshot
+
+    period_key = _tax_period_key(options)
+    compute_tax_period_snapshot(business, period_key)
+    compute_tax_anomalies(business, period_key)
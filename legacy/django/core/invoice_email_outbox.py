@@ -0,0 +1,359 @@
+"""
+Outbound invoice email pipeline.
+
+Sending is split from rendering:
+
+- `queue_invoice_email()` renders subject/bodies once and stores them on an
+  `InvoiceEmailLog` row in QUEUED state (the log is the outbox).
+- `dispatch_invoice_emails()` claims a batch of queued rows, attaches the
+  (cached) invoice PDF, sends every message over one backend connection via
+  `send_messages`, and writes log/invoice status back with `bulk_update`.
+
+Transient failures (dropped connections, timeouts, SMTP 4xx) are re-queued
+with exponential backoff until INVOICE_EMAIL_MAX_ATTEMPTS; anything else is
+recorded as an error immediately.
+
+A dispatcher that dies between claiming and writing back leaves rows in
+SENDING. `recover_stale_invoice_emails()` releases claims older than
+INVOICE_EMAIL_SENDING_TIMEOUT_SECONDS (every drain runs it first, and a failed
+dispatch job releases its own rows right away).
+
+The backend defaults to EMAIL_BACKEND; INVOICE_EMAIL_BACKEND can point at
+the file or console backend to measure throughput without a mail server.
+"""
+from __future__ import annotations
+
+import logging
+import smtplib
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Invoice, InvoiceEmailLog
+from .pdf_cache import get_invoice_pdf_bytes
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CANDIDATES = 200
+
+
+@dataclass
+class DispatchResult:
+    sent: list[int] = field(default_factory=list)
+    retrying: list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+    # log id -> exception raised by the backend, for callers that map errors
+    errors: dict[int, Exception] = field(default_factory=dict)
+    # earliest retry time among `retrying`
+    next_attempt_at: datetime | None = None
+
+
+def render_invoice_email(invoice, *, public_url: str) -> tuple[str, str, str]:
+    """Return (subject, text_body, html_body) using the business template when set."""
+    business_name = getattr(invoice.business, "name", "Our Company")
+    customer_name = getattr(invoice.customer, "name", "")
+    amount = (
+        getattr(invoice, "grand_total", None)
+        or getattr(invoice, "net_total", None)
+        or getattr(invoice, "total_amount", None)
+        or getattr(invoice, "total", None)
+    )
+
+    default_subject = f"Invoice {getattr(invoice, 'invoice_number', None) or invoice.pk} from {business_name}"
+    default_body_text = (
+        f"Hi {customer_name},\n\n"
+        f"You have a new invoice from {business_name}.\n"
+        f"Total: {amount}\n\n"
+        f"You can view it here: {public_url}\n\n"
+        f"Thank you."
+    )
+    default_body_html = f"""
+        <p>Hi {customer_name},</p>
+        <p>You have a new invoice from <strong>{business_name}</strong>.</p>
+        <p><strong>Total:</strong> {amount}</p>
+        <p><a href="{public_url}">View your invoice</a></p>
+        <p>Thank you.</p>
+    """
+
+    ctx = {
+        "invoice": invoice,
+        "business": invoice.business,
+        "customer": invoice.customer,
+        "public_url": public_url,
+    }
+    template = getattr(invoice.business, "invoice_email_template", None)
+    if template:
+        return (
+            template.render_subject(ctx, default_subject),
+            template.render_body(ctx, default_body_text),
+            template.render_body(ctx, default_body_html),
+        )
+    return default_subject, default_body_text, default_body_html
+
+
+def queue_invoice_email(
+    invoice,
+    *,
+    to_email: str,
+    public_url: str,
+    tracking_url_for,
+    cc_me: bool = False,
+) -> InvoiceEmailLog:
+    """
+    Render and queue one invoice email. `tracking_url_for(open_token)` builds
+    the absolute URL of the open-tracking pixel for the new log row.
+    """
+    business = invoice.business
+    subject, text_body, html_body = render_invoice_email(invoice, public_url=public_url)
+    from_email = business.email_from
+    reply_to_email = business.reply_to_email or from_email
+    owner = getattr(business, "owner_user", None)
+
+    log = InvoiceEmailLog(
+        invoice=invoice,
+        to_email=to_email,
+        subject=subject,
+        status=InvoiceEmailLog.STATUS_QUEUED,
+        message_preview=text_body[:500],
+        cc_me=bool(cc_me),
+    )
+    tracking_img = (
+        f'<img src="{tracking_url_for(log.open_token)}" alt="" width="1" height="1" style="display:none;border:0;" />'
+    )
+    log.payload = {
+        "from_email": from_email,
+        "reply_to": [reply_to_email] if reply_to_email else [],
+        "cc": [owner.email] if cc_me and owner is not None and owner.email else [],
+        "text_body": text_body,
+        "html_body": html_body + tracking_img,
+    }
+    log.save()
+    return log
+
+
+def is_transient_email_error(exc: Exception) -> bool:
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(
+        exc,
+        (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.timeout, TimeoutError, ConnectionError),
+    )
+
+
+def _claim(log_ids: Iterable[int] | None, batch_size: int) -> list[InvoiceEmailLog]:
+    """Move up to `batch_size` due QUEUED logs to SENDING and return them."""
+    now = timezone.now()
+    qs = InvoiceEmailLog.objects.filter(status=InvoiceEmailLog.STATUS_QUEUED).filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    )
+    if log_ids is not None:
+        qs = qs.filter(pk__in=list(log_ids))
+    qs = qs.order_by("created_at", "id")
+
+    if db_connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(qs.select_for_update(skip_locked=True).values_list("id", flat=True)[:batch_size])
+            InvoiceEmailLog.objects.filter(pk__in=ids).update(
+                status=InvoiceEmailLog.STATUS_SENDING, attempts=F("attempts") + 1, claimed_at=now
+            )
+    else:
+        ids = []
+        for log_id in qs.values_list("id", flat=True)[:CLAIM_CANDIDATES]:
+            if len(ids) >= batch_size:
+                break
+            if InvoiceEmailLog.objects.filter(pk=log_id, status=InvoiceEmailLog.STATUS_QUEUED).update(
+                status=InvoiceEmailLog.STATUS_SENDING, attempts=F("attempts") + 1, claimed_at=now
+            ):
+                ids.append(log_id)
+
+    return list(
+        InvoiceEmailLog.objects.filter(pk__in=ids)
+        .select_related("invoice__business", "invoice__customer")
+        .order_by("created_at", "id")
+    )
+
+
+def recover_stale_invoice_emails(
+    log_ids: Iterable[int] | None = None,
+    *,
+    stale_after_seconds: int | None = None,
+) -> tuple[int, int]:
+    """
+    Release SENDING rows claimed more than `stale_after_seconds` ago: requeue
+    them while attempts remain, otherwise record an error. Returns
+    (requeued, failed).
+
+    The dispatcher may have handed a message to the mail server before it
+    died, so a requeued email can go out twice; that beats never sending it.
+    """
+    if stale_after_seconds is None:
+        stale_after_seconds = int(getattr(settings, "INVOICE_EMAIL_SENDING_TIMEOUT_SECONDS", 600))
+    max_attempts = int(getattr(settings, "INVOICE_EMAIL_MAX_ATTEMPTS", 3))
+    now = timezone.now()
+    stale = InvoiceEmailLog.objects.filter(status=InvoiceEmailLog.STATUS_SENDING).filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lte=now - timedelta(seconds=stale_after_seconds))
+    )
+    if log_ids is not None:
+        stale = stale.filter(pk__in=list(log_ids))
+    error = "Dispatcher stopped before the send was confirmed"
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=InvoiceEmailLog.STATUS_QUEUED, next_attempt_at=now, claimed_at=None, error_message=error
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=InvoiceEmailLog.STATUS_ERROR, next_attempt_at=None, claimed_at=None, error_message=error
+    )
+    if requeued or failed:
+        logger.warning("Released stale invoice email claims: %s requeued, %s failed", requeued, failed)
+    return requeued, failed
+
+
+def _build_message(log: InvoiceEmailLog, pdf_cache: dict[int, bytes | None]) -> EmailMultiAlternatives:
+    payload = log.payload or {}
+    invoice = log.invoice
+    msg = EmailMultiAlternatives(
+        subject=log.subject,
+        body=payload.get("text_body", ""),
+        from_email=payload.get("from_email") or invoice.business.email_from,
+        to=[log.to_email],
+        cc=payload.get("cc") or None,
+        reply_to=payload.get("reply_to") or None,
+    )
+    if invoice.pk not in pdf_cache:
+        try:
+            pdf_cache[invoice.pk] = get_invoice_pdf_bytes(invoice)
+        except Exception as exc:  # never block a send on PDF errors
+            logger.info("Skipping invoice PDF attachment because rendering failed: %s", exc)
+            pdf_cache[invoice.pk] = None
+    pdf_content = pdf_cache[invoice.pk]
+    if pdf_content:
+        msg.attach(
+            filename=f"Invoice-{getattr(invoice, 'invoice_number', None) or invoice.pk}.pdf",
+            content=pdf_content,
+            mimetype="application/pdf",
+        )
+    if payload.get("html_body"):
+        msg.attach_alternative(payload["html_body"], "text/html")
+    return msg
+
+
+def dispatch_invoice_emails(
+    log_ids: Iterable[int] | None = None,
+    *,
+    batch_size: int | None = None,
+    retry: bool = True,
+    backend: str | None = None,
+) -> DispatchResult:
+    """
+    Send one batch of queued invoice emails over a single backend connection.
+
+    `log_ids` restricts the batch (e.g. to the emails queued by one request).
+    With `retry=False` transient failures are recorded as errors instead of
+    being re-queued, which is what the synchronous send endpoint wants.
+    """
+    result = DispatchResult()
+    batch_size = batch_size or int(getattr(settings, "INVOICE_EMAIL_BATCH_SIZE", 50))
+    max_attempts = int(getattr(settings, "INVOICE_EMAIL_MAX_ATTEMPTS", 3))
+    base_delay = int(getattr(settings, "INVOICE_EMAIL_RETRY_BASE_SECONDS", 60))
+    logs = _claim(log_ids, batch_size)
+    if not logs:
+        return result
+
+    backend = backend or getattr(settings, "INVOICE_EMAIL_BACKEND", None) or None
+    mail_connection = get_connection(backend=backend, fail_silently=False)
+    pdf_cache: dict[int, bytes | None] = {}
+    now = timezone.now()
+    try:
+        mail_connection.open()
+    except Exception as exc:
+        for log in logs:
+            result.errors[log.pk] = exc
+
+    for log in logs:
+        if log.pk in result.errors:
+            continue
+        try:
+            msg = _build_message(log, pdf_cache)
+            if not mail_connection.send_messages([msg]):
+                raise smtplib.SMTPRecipientsRefused({log.to_email: (550, b"Message was not accepted")})
+        except Exception as exc:
+            result.errors[log.pk] = exc
+            if isinstance(exc, smtplib.SMTPServerDisconnected):
+                # Reconnect so the rest of the batch is not lost with this message.
+                mail_connection.close()
+                try:
+                    mail_connection.open()
+                except Exception:
+                    pass
+        else:
+            result.sent.append(log.pk)
+    try:
+        mail_connection.close()
+    except Exception:  # pragma: no cover - closing a dead connection
+        pass
+
+    invoices: dict[int, Invoice] = {}
+    for log in logs:
+        invoice = log.invoice
+        invoices[invoice.pk] = invoice
+        exc = result.errors.get(log.pk)
+        if exc is None:
+            log.status = InvoiceEmailLog.STATUS_SENT
+            log.sent_at = now
+            log.error_message = ""
+            log.next_attempt_at = None
+            invoice.email_to = log.to_email
+            invoice.email_sent_at = now
+            invoice.email_last_error = None
+            continue
+        log.error_message = str(exc)
+        invoice.email_last_error = str(exc)
+        if retry and is_transient_email_error(exc) and log.attempts < max_attempts:
+            log.status = InvoiceEmailLog.STATUS_QUEUED
+            log.next_attempt_at = now + timedelta(seconds=base_delay * (2 ** (log.attempts - 1)))
+            result.retrying.append(log.pk)
+            if result.next_attempt_at is None or log.next_attempt_at < result.next_attempt_at:
+                result.next_attempt_at = log.next_attempt_at
+        else:
+            log.status = InvoiceEmailLog.STATUS_ERROR
+            log.next_attempt_at = None
+            result.failed.append(log.pk)
+
+    for log in logs:
+        log.claimed_at = None
+    InvoiceEmailLog.objects.bulk_update(logs, ["status", "sent_at", "error_message", "next_attempt_at", "claimed_at"])
+    # Email bookkeeping only: bypass Invoice.save() and its ledger posting hooks.
+    Invoice.objects.bulk_update(list(invoices.values()), ["email_to", "email_sent_at", "email_last_error"])
+    logger.info(
+        "Invoice email batch: %s sent, %s retrying, %s failed",
+        len(result.sent), len(result.retrying), len(result.failed),
+    )
+    return result
+
+
+def drain_invoice_email_outbox(
+    log_ids: Iterable[int] | None = None,
+    *,
+    batch_size: int | None = None,
+    backend: str | None = None,
+) -> DispatchResult:
+    """Dispatch batches until no queued email is due; returns the merged result."""
+    log_ids = list(log_ids) if log_ids is not None else None
+    recover_stale_invoice_emails(log_ids)
+    total = DispatchResult()
+    while True:
+        batch = dispatch_invoice_emails(log_ids, batch_size=batch_size, backend=backend)
+        if not (batch.sent or batch.retrying or batch.failed):
+            return total
+        total.sent.extend(batch.sent)
+        total.retrying.extend(batch.retrying)
+        total.failed.extend(batch.failed)
+        total.errors.update(batch.errors)
+        if batch.next_attempt_at and (total.next_attempt_at is None or batch.next_attempt_at < total.next_attempt_at):
+            total.next_attempt_at = batch.next_attempt_at
@@ -20,6 +20,8 @@ from django.core.files.storage import default_storage
 
 from companion.llm import call_openai_vision
 
+from .ocr_pipeline import call_vision_with_retry
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,17 +84,14 @@ def _get_image_mime_type(filename: str) -> str:
     }.get(ext, "image/jpeg")
 
 
-def _read_file_as_base64(storage_key: str) -> tuple[str, str] | None:
+def _read_file_bytes(storage_key: str) -> bytes | None:
     """
-    Read a file from storage and return as (base64_data, mime_type).
+    Read a file from storage.
     Returns None if the file cannot be read.
     """
     try:
         with default_storage.open(storage_key, "rb") as f:
-            file_bytes = f.read()
-        base64_data = base64.b64encode(file_bytes).decode("utf-8")
-        mime_type = _get_image_mime_type(storage_key)
-        return base64_data, mime_type
+            return f.read()
     except Exception as exc:
         logger.warning("Failed to read file %s: %s", storage_key, exc)
         return None
@@ -169,19 +168,31 @@ def extract_invoice_data(
         Extracted invoice data, or None if extraction failed
     """
     # Read the file
-    file_result = _read_file_as_base64(storage_key)
-    if not file_result:
+    file_bytes = _read_file_bytes(storage_key)
+    if file_bytes is None:
         logger.warning("[invoice_ocr] Could not read invoice file: %s", storage_key)
         return None
+    return extract_invoice_data_from_bytes(file_bytes, original_filename, storage_key)
 
-    base64_data, mime_type = file_result
-    
+
+def extract_invoice_data_from_bytes(
+    file_bytes: bytes,
+    original_filename: str | None = None,
+    storage_key: str = "",
+) -> ExtractedInvoiceData | None:
+    """
+    Extract structured data from already-read invoice bytes.
+
+    Used by the concurrent OCR stage (core.ocr_pipeline), which reads and
+    hashes the file itself before deciding whether to call the LLM.
+    """
+    base64_data = base64.b64encode(file_bytes).decode("utf-8")
     # Use original filename for better MIME detection if available
-    if original_filename:
-        mime_type = _get_image_mime_type(original_filename)
+    mime_type = _get_image_mime_type(original_filename or storage_key)
 
-    # Call vision LLM
-    raw_response = call_openai_vision(
+    # Call vision LLM (rate limited, retried with backoff)
+    raw_response = call_vision_with_retry(
+        call_openai_vision,
         prompt=INVOICE_EXTRACTION_PROMPT,
         image_base64=base64_data,
         image_type=mime_type,
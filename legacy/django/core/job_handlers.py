@@ -0,0 +1,148 @@
+"""
+Handlers for BackgroundJob kinds (see core.jobs).
+
+Each run handler picks up a run created by its API endpoint in PENDING state,
+executes the workflow with the same code path as the synchronous endpoint,
+and publishes a progress event after every persisted document. Its failure
+handler marks the run FAILED once the job has failed for good (the handler
+raised on its last attempt, or its worker died).
+"""
+from __future__ import annotations
+
+from .jobs import (
+    ADMIN_OVERVIEW_REFRESH_JOB,
+    BANK_IMPORT_AUTO_APPLY_JOB,
+    INVOICE_EMAILS_JOB,
+    INVOICES_RUN_JOB,
+    RECEIPTS_RUN_JOB,
+    TAX_PERIOD_REFRESH_JOB,
+    enqueue_job,
+    publish_job_progress,
+    register_job_failure_handler,
+    register_job_handler,
+)
+from .models import BackgroundJob, InvoiceRun, ReceiptRun
+
+
+def _progress_publisher(job: BackgroundJob, run_id: int):
+    def _on_progress(completed: int, total: int, document) -> None:
+        publish_job_progress(
+            job,
+            "document_processed",
+            run_id=run_id,
+            document_id=document.id,
+            document_status=document.status,
+            completed=completed,
+            total=total,
+        )
+    return _on_progress
+
+
+def _execute_run(job: BackgroundJob, run, execute) -> None:
+    run.status = run.RunStatus.RUNNING
+    run.save(update_fields=["status"])
+    execute(
+        run,
+        hints=job.payload.get("hints") or {},
+        user_id=job.payload.get("user_id"),
+        on_progress=_progress_publisher(job, run.id),
+    )
+
+
+def _fail_run(run_model, job: BackgroundJob) -> None:
+    run = run_model.objects.filter(pk=job.payload.get("run_id")).first()
+    if run is None or run.status == run.RunStatus.COMPLETED:
+        return
+    run.status = run.RunStatus.FAILED
+    run.error_count = run.total_documents
+    run.save(update_fields=["status", "error_count"])
+
+
+@register_job_handler(RECEIPTS_RUN_JOB)
+def run_receipts_job(job: BackgroundJob) -> None:
+    from .views_receipts import execute_receipts_run
+
+    run = ReceiptRun.objects.select_related("business").get(pk=job.payload["run_id"])
+    _execute_run(job, run, execute_receipts_run)
+
+
+@register_job_failure_handler(RECEIPTS_RUN_JOB)
+def fail_receipts_run(job: BackgroundJob) -> None:
+    _fail_run(ReceiptRun, job)
+
+
+@register_job_handler(INVOICES_RUN_JOB)
+def run_invoices_job(job: BackgroundJob) -> None:
+    from .views_invoices import execute_invoices_run
+
+    run = InvoiceRun.objects.select_related("business").get(pk=job.payload["run_id"])
+    _execute_run(job, run, execute_invoices_run)
+
+
+@register_job_failure_handler(INVOICES_RUN_JOB)
+def fail_invoices_run(job: BackgroundJob) -> None:
+    _fail_run(InvoiceRun, job)
+
+
+@register_job_handler(INVOICE_EMAILS_JOB)
+def send_invoice_emails_job(job: BackgroundJob) -> None:
+    from .invoice_email_outbox import drain_invoice_email_outbox
+
+    log_ids = job.payload.get("log_ids")
+    result = drain_invoice_email_outbox(log_ids)
+    publish_job_progress(
+        job,
+        "emails_dispatched",
+        sent=len(result.sent),
+        retrying=len(result.retrying),
+        failed=len(result.failed),
+    )
+    if result.retrying:
+        enqueue_job(
+            INVOICE_EMAILS_JOB,
+            {"log_ids": result.retrying},
+            business=job.business,
+            trace_id=job.trace_id,
+            run_after=result.next_attempt_at,
+        )
+
+
+@register_job_failure_handler(INVOICE_EMAILS_JOB)
+def release_invoice_emails(job: BackgroundJob) -> None:
+    from .invoice_email_outbox import recover_stale_invoice_emails
+
+    # The dispatcher is gone: its claimed rows are stale now, whatever their age.
+    log_ids = job.payload.get("log_ids")
+    requeued, _ = recover_stale_invoice_emails(log_ids, stale_after_seconds=0)
+    if requeued:
+        enqueue_job(INVOICE_EMAILS_JOB, {"log_ids": log_ids}, business=job.business, trace_id=job.trace_id)
+
+
+@register_job_handler(TAX_PERIOD_REFRESH_JOB)
+def refresh_tax_period_job(job: BackgroundJob) -> None:
+    from taxes.services import compute_tax_anomalies, compute_tax_period_snapshot
+
+    period_key = job.payload["period_key"]
+    snapshot = compute_tax_period_snapshot(job.business, period_key)
+    compute_tax_anomalies(job.business, period_key)
+    publish_job_progress(job, "tax_period_refreshed", period_key=period_key, snapshot_id=str(snapshot.id))
+
+
+@register_job_handler(BANK_IMPORT_AUTO_APPLY_JOB)
+def auto_apply_bank_import_job(job: BackgroundJob) -> None:
+    from django.contrib.auth import get_user_model
+
+    from .services.import_matching import auto_apply_imported_transactions
+
+    user_id = job.payload.get("user_id")
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    result = auto_apply_imported_transactions(job.payload["transaction_ids"], user=user)
+    publish_job_progress(job, "bank_import_auto_applied", **result.as_dict())
+
+
+@register_job_handler(ADMIN_OVERVIEW_REFRESH_JOB)
+def refresh_admin_overview_job(job: BackgroundJob) -> None:
+    from internal_admin.services import refresh_overview_snapshot
+
+    snapshot = refresh_overview_snapshot()
+    publish_job_progress(job, "admin_overview_refreshed", snapshot_id=snapshot.pk)
@@ -0,0 +1,339 @@
+"""
+Database-backed background jobs for long agentic runs.
+
+No Redis/Celery: jobs are rows in `BackgroundJob`, and workers started with
+`manage.py run_jobs` poll the table.
+
+Claiming:
+- Postgres (and any backend with SKIP LOCKED): SELECT ... FOR UPDATE SKIP
+  LOCKED inside a transaction, so concurrent workers never block on or
+  double-claim the same row.
+- SQLite: a conditional UPDATE (status QUEUED -> RUNNING) per candidate row.
+  SQLite serialises writers, so exactly one worker's UPDATE matches.
+
+Handlers register with `@register_job_handler("<kind>")` in core.job_handlers
+and receive the claimed job. A kind may also register a failure hook with
+`@register_job_failure_handler("<kind>")`, called once a job has failed for
+good, whether its handler raised or its worker died (see
+`recover_stale_jobs()`, which workers run every STALE_CHECK_SECONDS). While a
+handler runs, a heartbeat thread refreshes the job's `locked_at` every
+HEARTBEAT_SECONDS, so only jobs whose worker stopped beating look stale, however
+long they legitimately run. Progress is published to the `trace_<trace_id>`
+channel group served by agentic.traces.consumers.AgentTraceConsumer.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[BackgroundJob], None]
+
+# Job kinds (handlers live in core.job_handlers)
+RECEIPTS_RUN_JOB = "receipts.run"
+INVOICES_RUN_JOB = "invoices.run"
+INVOICE_EMAILS_JOB = "invoice_emails.dispatch"
+TAX_PERIOD_REFRESH_JOB = "tax.refresh_period"
+BANK_IMPORT_AUTO_APPLY_JOB = "bank_import.auto_apply"
+ADMIN_OVERVIEW_REFRESH_JOB = "internal_admin.refresh_overview"
+
+_HANDLERS: dict[str, JobHandler] = {}
+_FAILURE_HANDLERS: dict[str, JobHandler] = {}
+_HANDLERS_LOADED = False
+
+# Delay before a failed job with attempts left is retried: base * 2**(attempt-1).
+RETRY_BASE_DELAY_SECONDS = 30
+# How often a running job's worker refreshes its lock.
+HEARTBEAT_SECONDS = 60
+# RUNNING jobs whose lock is older than this (several missed heartbeats) are
+# assumed orphaned by a dead worker.
+STALE_LOCK_SECONDS = 10 * 60
+# How often a polling worker looks for such jobs.
+STALE_CHECK_SECONDS = 5 * 60
+
+
+def register_job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def decorator(fn: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def register_job_failure_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def decorator(fn: JobHandler) -> JobHandler:
+        _FAILURE_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def _load_handlers() -> None:
+    global _HANDLERS_LOADED
+    if not _HANDLERS_LOADED:
+        from . import job_handlers  # noqa: F401  (registers handlers)
+        _HANDLERS_LOADED = True
+
+
+def get_job_handler(kind: str) -> JobHandler | None:
+    _load_handlers()
+    return _HANDLERS.get(kind)
+
+
+def background_runs_requested(request) -> bool:
+    """Whether a run endpoint should enqueue instead of running in-request."""
+    raw = (request.POST.get("background") or request.GET.get("background") or "").strip().lower()
+    if raw:
+        return raw in {"1", "true", "yes"}
+    return bool(getattr(settings, "AGENTIC_RUNS_IN_BACKGROUND", False))
+
+
+def enqueue_job(
+    kind: str,
+    payload: dict,
+    *,
+    business=None,
+    max_attempts: int = 1,
+    trace_id: str | None = None,
+    run_after=None,
+) -> BackgroundJob:
+    job = BackgroundJob.objects.create(
+        kind=kind,
+        business=business,
+        payload=payload,
+        max_attempts=max(1, max_attempts),
+        trace_id=trace_id or uuid.uuid4().hex,
+        run_after=run_after or timezone.now(),
+    )
+    publish_job_progress(job, "queued")
+    return job
+
+
+def publish_job_progress(job: BackgroundJob, step: str, **data) -> None:
+    """Best-effort push of a progress event to the job's trace group."""
+    if not job.trace_id:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+    except ImportError:
+        return
+    try:
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+        message = {
+            "type": "agent_step",
+            "agent": f"jobs.{job.kind}",
+            "step": step,
+            "job_id": job.pk,
+            "timestamp": timezone.now().isoformat(),
+            **data,
+        }
+        async_to_sync(channel_layer.group_send)(f"trace_{job.trace_id}", message)
+    except Exception as exc:  # progress must never break the job
+        logger.debug("Could not publish progress for job %s: %s", job.pk, exc)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _ready_jobs(kinds: Iterable[str] | None):
+    qs = BackgroundJob.objects.filter(
+        status=BackgroundJob.Status.QUEUED,
+        run_after__lte=timezone.now(),
+    )
+    if kinds:
+        qs = qs.filter(kind__in=list(kinds))
+    return qs.order_by("run_after", "id")
+
+
+def claim_next_job(worker_id: str, kinds: Iterable[str] | None = None) -> BackgroundJob | None:
+    """Atomically move the oldest ready job to RUNNING and return it."""
+    now = timezone.now()
+    claim = {
+        "status": BackgroundJob.Status.RUNNING,
+        "locked_by": worker_id,
+        "locked_at": now,
+        "started_at": now,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _ready_jobs(kinds).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            for field, value in claim.items():
+                setattr(job, field, value)
+            job.attempts += 1
+            job.save(update_fields=[*claim.keys(), "attempts"])
+            return job
+
+    # Fallback for SQLite: optimistic conditional UPDATE.
+    for job_id in _ready_jobs(kinds).values_list("id", flat=True)[:20]:
+        claimed = BackgroundJob.objects.filter(
+            pk=job_id,
+            status=BackgroundJob.Status.QUEUED,
+        ).update(attempts=F("attempts") + 1, **claim)
+        if claimed:
+            return BackgroundJob.objects.get(pk=job_id)
+    return None
+
+
+@contextmanager
+def _heartbeat(job: BackgroundJob):
+    """Refresh the job's lock from a side thread while the body runs."""
+    stop = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stop.wait(HEARTBEAT_SECONDS):
+                try:
+                    # Scoped to our lock: a job recovered meanwhile is not revived.
+                    BackgroundJob.objects.filter(
+                        pk=job.pk, status=BackgroundJob.Status.RUNNING, locked_by=job.locked_by
+                    ).update(locked_at=timezone.now())
+                except Exception:
+                    logger.exception("Heartbeat for background job %s failed", job.pk)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: BackgroundJob) -> None:
+    """Execute a claimed job and record the outcome."""
+    handler = get_job_handler(job.kind)
+    publish_job_progress(job, "started", attempt=job.attempts)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        with _heartbeat(job):
+            handler(job)
+    except Exception as exc:
+        logger.exception("Background job %s (%s) failed", job.pk, job.kind)
+        job.last_error = str(exc)
+        job.locked_by = ""
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = BackgroundJob.Status.QUEUED
+            job.run_after = timezone.now() + timedelta(
+                seconds=RETRY_BASE_DELAY_SECONDS * (2 ** (job.attempts - 1))
+            )
+        else:
+            job.status = BackgroundJob.Status.FAILED
+            job.finished_at = timezone.now()
+        job.save(update_fields=["status", "last_error", "locked_by", "locked_at", "run_after", "finished_at"])
+        publish_job_progress(job, "failed", error=job.last_error, will_retry=job.status == BackgroundJob.Status.QUEUED)
+        if job.status == BackgroundJob.Status.FAILED:
+            _job_failed(job)
+        return
+
+    job.status = BackgroundJob.Status.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(update_fields=["status", "finished_at", "locked_by", "locked_at"])
+    publish_job_progress(job, "succeeded")
+
+
+def _job_failed(job: BackgroundJob) -> None:
+    """Run the kind's failure hook for a job that has failed for good."""
+    _load_handlers()
+    hook = _FAILURE_HANDLERS.get(job.kind)
+    if hook is None:
+        return
+    try:
+        hook(job)
+    except Exception:
+        logger.exception("Failure handler for background job %s (%s) failed", job.pk, job.kind)
+
+
+def recover_stale_jobs(stale_after_seconds: int = STALE_LOCK_SECONDS) -> tuple[int, int]:
+    """
+    Recover RUNNING jobs abandoned by a crashed worker: requeue those with
+    attempts left, fail the others as if their handler had raised.
+
+    Returns (requeued, failed).
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after_seconds)
+    stale = BackgroundJob.objects.filter(status=BackgroundJob.Status.RUNNING, locked_at__lt=cutoff)
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(
+        status=BackgroundJob.Status.QUEUED, locked_by="", locked_at=None
+    )
+    failed = 0
+    for job in stale.filter(attempts__gte=F("max_attempts")):
+        error = f"Worker {job.locked_by or '?'} stopped while running this job"
+        now = timezone.now()
+        # Conditional on the lock we read, so concurrent sweeps fail a job once.
+        if not BackgroundJob.objects.filter(
+            pk=job.pk, status=BackgroundJob.Status.RUNNING, locked_at=job.locked_at
+        ).update(status=BackgroundJob.Status.FAILED, last_error=error, locked_by="", locked_at=None, finished_at=now):
+            continue
+        job.status = BackgroundJob.Status.FAILED
+        job.last_error = error
+        job.locked_by = ""
+        job.locked_at = None
+        job.finished_at = now
+        logger.warning("Background job %s (%s) abandoned by its worker; marked failed", job.pk, job.kind)
+        publish_job_progress(job, "failed", error=error, will_retry=False)
+        _job_failed(job)
+        failed += 1
+    return requeued, failed
+
+
+def run_worker(
+    *,
+    worker_id: str | None = None,
+    kinds: Iterable[str] | None = None,
+    once: bool = False,
+    max_jobs: int | None = None,
+    poll_interval: float = 1.0,
+    stale_check_interval: float = STALE_CHECK_SECONDS,
+) -> int:
+    """
+    Claim and run jobs until the queue is drained (`once`) or `max_jobs` ran,
+    recovering jobs of dead workers on start and every `stale_check_interval`
+    seconds.
+
+    Returns the number of jobs executed.
+    """
+    worker_id = worker_id or default_worker_id()
+    kinds = list(kinds) if kinds else None
+    executed = 0
+    next_stale_check = 0.0
+    while max_jobs is None or executed < max_jobs:
+        if time.monotonic() >= next_stale_check:
+            requeued, failed = recover_stale_jobs()
+            if requeued or failed:
+                logger.info("Worker %s recovered stale jobs: %s requeued, %s failed", worker_id, requeued, failed)
+            next_stale_check = time.monotonic() + stale_check_interval
+        job = claim_next_job(worker_id, kinds)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        executed += 1
+    return executed
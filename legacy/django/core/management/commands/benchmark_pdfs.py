@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from core.pdf_cache import INVOICE_PDF, PdfJob, pdf_version, render_pdf_jobs, stream_pdf_zip
+
+
+def _synthetic_invoice_context(i: int) -> dict:
+    return {
+        "invoice_number": f"INV-{i:05d}",
+        "business_name": "Benchmark Co",
+        "customer_name": f"Customer {i % 50}",
+        "customer_email": f"customer{i % 50}@example.com",
+        "issue_date": "Jan 15, 2025",
+        "due_date": "Feb 14, 2025",
+        "status": "Sent",
+        "description": "Consulting services " * 8,
+        "amounts": [
+            ["Subtotal", f"{100 + i:.2f} USD"],
+            ["Tax", f"{(100 + i) * 0.13:.2f} USD"],
+            ["Total", f"{(100 + i) * 1.13:.2f} USD"],
+        ],
+        "notes": "Thank you for your business.",
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure invoice PDFs/second: sequential render, process-pool render, and cache hits"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200, help="Number of invoices to render")
+        parser.add_argument("--workers", type=int, default=4, help="Process pool size for the parallel pass")
+
+    def _timed(self, label, count, fn):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else float("inf")
+        self.stdout.write(f"{label:<28} {elapsed:8.2f}s  {rate:8.1f} PDFs/s")
+        return rate
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        contexts = [_synthetic_invoice_context(i) for i in range(count)]
+        cache_dir = tempfile.mkdtemp(prefix="pdf-bench-")
+        storage = FileSystemStorage(location=cache_dir)
+
+        def jobs():
+            return [
+                PdfJob(
+                    filename=f"{ctx['invoice_number']}.pdf",
+                    context=ctx,
+                    storage_key=f"invoices/{pdf_version(INVOICE_PDF, ctx)}.pdf",
+                )
+                for ctx in contexts
+            ]
+
+        def drain_zip():
+            for _ in stream_pdf_zip(render_pdf_jobs(INVOICE_PDF, jobs(), storage=storage, max_workers=options["workers"])):
+                pass
+
+        try:
+            self.stdout.write(f"[*] Rendering {count} invoices (synthetic data)")
+            sequential = self._timed("sequential render", count, lambda: [INVOICE_PDF.render(c) for c in contexts])
+            parallel = self._timed(f"pool render + zip (x{options['workers']})", count, drain_zip)
+            cached = self._timed("cached + zip", count, drain_zip)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[*] Pool speed-up {parallel / sequential:.1f}x, cache speed-up {cached / sequential:.1f}x"
+            )
+        )
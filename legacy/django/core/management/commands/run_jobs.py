@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import default_worker_id, run_worker
+
+
+class Command(BaseCommand):
+    help = "Run a background job worker that polls the BackgroundJob table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever",
+        )
+        parser.add_argument("--max-jobs", type=int, default=None, help="Exit after running this many jobs")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle")
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            default=None,
+            help="Only run jobs of this kind (repeatable)",
+        )
+        parser.add_argument("--worker-id", default=None, help="Identifier recorded on claimed jobs")
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or default_worker_id()
+        self.stdout.write(f"[*] Worker {worker_id} started")
+        executed = run_worker(
+            worker_id=worker_id,
+            kinds=options["kinds"],
+            once=options["once"],
+            max_jobs=options["max_jobs"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"[*] Worker {worker_id} ran {executed} job(s)"))
@@ -12,6 +12,38 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+MONITORING_SYSTEM_PROMPT = (
+    "You are the Central-Books monitoring agent.\n"
+    "You receive a JSON metrics payload with 7 domains:\n"
+    "- meta\n"
+    "- product_engineering\n"
+    "- ledger_accounting\n"
+    "- banking_reconciliation\n"
+    "- tax_fx\n"
+    "- business_revenue\n"
+    "- marketing_traffic\n"
+    "- support_feedback\n\n"
+    "The figures are totals across all meta.business_count businesses (the first few\n"
+    "are named in meta.businesses_included). Lists are the top entries only, each row with a business_id:\n"
+    "banking_reconciliation.bank_accounts (most unreconciled first, totals in\n"
+    "bank_accounts_summary), ledger_accounting.accounts.balances (largest first) and\n"
+    "tax_fx.tax_rates.by_code (most used codes, with the businesses using each).\n\n"
+    "Task:\n"
+    "1. Analyze the metrics.\n"
+    "2. Produce a concise status report in plain ASCII text.\n"
+    "3. Use headings like:\n"
+    "   OVERVIEW\n"
+    "   PRODUCT AND ENGINEERING\n"
+    "   LEDGER AND ACCOUNTING\n"
+    "   BANKING AND RECONCILIATION\n"
+    "   TAX AND FX\n"
+    "   BUSINESS AND REVENUE\n"
+    "   MARKETING AND TRAFFIC\n"
+    "   SUPPORT AND FEEDBACK\n"
+    "4. Do NOT use emojis or any non-ASCII characters.\n"
+    "5. Do NOT give recommendations, only observations."
+)
+
 
 def send_to_slack(report: str) -> None:
     """
@@ -70,30 +102,7 @@ class Command(BaseCommand):
             monitoring_env = os.getenv("MONITORING_ENV", "production")
 
             prompt = (
-                "You are the Central-Books monitoring agent.\n"
-                "You receive a JSON metrics payload with 7 domains:\n"
-                "- meta\n"
-                "- product_engineering\n"
-                "- ledger_accounting\n"
-                "- banking_reconciliation\n"
-                "- tax_fx\n"
-                "- business_revenue\n"
-                "- marketing_traffic\n"
-                "- support_feedback\n\n"
-                "Task:\n"
-                "1. Analyze the metrics.\n"
-                "2. Produce a concise status report in plain ASCII text.\n"
-                "3. Use headings like:\n"
-                "   OVERVIEW\n"
-                "   PRODUCT AND ENGINEERING\n"
-                "   LEDGER AND ACCOUNTING\n"
-                "   BANKING AND RECONCILIATION\n"
-                "   TAX AND FX\n"
-                "   BUSINESS AND REVENUE\n"
-                "   MARKETING AND TRAFFIC\n"
-                "   SUPPORT AND FEEDBACK\n"
-                "4. Do NOT use emojis or any non-ASCII characters.\n"
-                "5. Do NOT give recommendations, only observations.\n\n"
+                f"{MONITORING_SYSTEM_PROMPT}\n\n"
                 f"Environment: {monitoring_env}\n\n"
                 "Here is the metrics JSON:\n"
                 f"{metrics_json}\n"
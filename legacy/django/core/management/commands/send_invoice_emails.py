@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.invoice_email_outbox import drain_invoice_email_outbox
+
+
+class Command(BaseCommand):
+    help = "Send all due queued invoice emails in batches and report throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per connection (default: setting)")
+        parser.add_argument(
+            "--backend",
+            default=None,
+            help="Email backend path, e.g. django.core.mail.backends.filebased.EmailBackend",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = drain_invoice_email_outbox(batch_size=options["batch_size"], backend=options["backend"])
+        elapsed = time.perf_counter() - started
+        total = len(result.sent) + len(result.retrying) + len(result.failed)
+        rate = len(result.sent) / elapsed if elapsed and result.sent else 0.0
+        self.stdout.write(
+            f"[*] {total} email(s): {len(result.sent)} sent, {len(result.retrying)} retrying, "
+            f"{len(result.failed)} failed in {elapsed:.2f}s ({rate:.1f} msgs/s)"
+        )
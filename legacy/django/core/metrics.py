@@ -1,498 +1,733 @@
 """
 Central-Books Comprehensive Monitoring Metrics Collection
 
-Collects real metrics across 7 business domains for AI-powered monitoring.
+Collects real metrics across 7 business domains for AI-powered monitoring,
+for every business at once.
+
+Each domain collector runs a handful of grouped queries over all requested
+businesses (GROUP BY business, never one query per business or per bank
+account) and returns a `DomainMetrics`: fleet-wide totals plus a per-business
+breakdown. Collectors are independent of each other, so `collect_metrics()`
+runs them concurrently on a thread pool of METRICS_COLLECTOR_WORKERS threads;
+each pool thread uses and closes its own DB connection. Wall time per
+collector is reported in `meta.collector_timings_ms`.
+
+- `build_central_books_metrics()` returns the fleet view read by the
+  monitoring agent.
+- `iter_metrics_ndjson()` yields one JSON line for the meta block, one for the
+  fleet totals and one per business; `export_metrics` streams it.
 """
+import json
 import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from decimal import Decimal
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, F, Max, Q, Sum, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
-from django.db.models import Count, Sum, Q, Avg, F, Max, Min
-from django.contrib.auth.models import User
 
 from .models import (
-    Business, Invoice, Expense, Customer, Supplier,
+    Business, Invoice, Expense, Customer,
     JournalEntry, JournalLine, Account,
     BankAccount, BankTransaction, BankReconciliationMatch,
     ReconciliationSession, TaxRate
 )
+from .request_metrics import summarize_request_metrics
+
+UNBALANCED_TOLERANCE = Decimal("0.01")
+INVOICE_TOTAL_TOLERANCE = Decimal("0.02")
+OPEN_BANK_STATUSES = ["NEW", "SUGGESTED", "PARTIAL"]
+CLOSED_BANK_STATUSES = ["RECONCILED", "EXCLUDED"]
+# Longest list in the fleet view, which goes into the monitoring prompt; the
+# full per-business lists are in the NDJSON export.
+FLEET_TOP_N = 10
+
+
+@dataclass
+class MetricsScope:
+    """Businesses and time window shared by every collector."""
+    businesses: Any  # Business queryset, used as a subquery in filters
+    business_ids: List[int]
+    now: datetime
+    window_start: datetime
+    window_end: datetime
+
+
+@dataclass
+class DomainMetrics:
+    fleet: Dict[str, Any]
+    businesses: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
 
+@dataclass
+class MetricsRun:
+    meta: Dict[str, Any]
+    domains: Dict[str, DomainMetrics]
+    business_names: Dict[int, str]
 
-def build_central_books_metrics() -> Dict[str, Any]:
+
+def build_central_books_metrics(
+    business_ids: Optional[Iterable[int]] = None,
+    *,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     Build comprehensive metrics for Central-Books monitoring across 7 domains.
-    
-    Returns a dict matching the strict monitoring schema with:
-    - meta: Metadata and time windows
-    - product_engineering: Feature usage, deployments (placeholder)
-    - ledger_accounting: Journal entries, accounts, balances
-    - banking_reconciliation: Bank transactions, reconciliation status
-    - tax_fx: Tax rates, invoice/expense line checks
+
+    Returns a dict matching the strict monitoring schema with fleet-wide totals
+    over every business (or `business_ids`):
+    - meta: Metadata, time windows and per-collector timings
+    - product_engineering: Requests, feature usage, deployments (placeholder)
+    - ledger_accounting: Journal entries, accounts, key account balances
+    - banking_reconciliation: Per-account reconciliation status, bank transactions
+    - tax_fx: Tax rates by code, invoice/expense line checks
     - business_revenue: MRR, customers, payments
     - marketing_traffic: Website analytics (placeholder)
     - support_feedback: Tickets and NPS (placeholder)
+
+    List rows (bank accounts, key account balances, tax codes) are capped at
+    the FLEET_TOP_N that most need attention, and meta.businesses_included at
+    the first FLEET_TOP_N names, so the payload does not grow with the number
+    of tenants; rows carry a `business_id`.
     """
+    run = collect_metrics(business_ids, workers=workers)
+    if not run.business_names:
+        return _empty_metrics(run.meta)
+    meta = {**run.meta, "businesses_included": run.meta["businesses_included"][:FLEET_TOP_N]}
+    return {"meta": meta, **{name: domain.fleet for name, domain in run.domains.items()}}
+
+
+def collect_metrics(
+    business_ids: Optional[Iterable[int]] = None,
+    *,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    environment: Optional[str] = None,
+) -> MetricsRun:
+    """Run every domain collector (concurrently) over the selected businesses."""
     now = timezone.now()
-    window_start = now - timedelta(hours=24)  # Last 24 hours
-    window_end = now
-    
-    # Get business (single-tenant for now)
-    business = Business.objects.first()
-    
-    if not business:
-        return _empty_metrics(now, window_start, window_end)
-    
-    # === 1. META ===
-    meta = _collect_meta(business, now, window_start, window_end)
-    
-    # === 2. PRODUCT & ENGINEERING ===
-    product_engineering = _collect_product_engineering(business, window_start, window_end)
-    
-    # === 3. LEDGER & ACCOUNTING ===
-    ledger_accounting = _collect_ledger_accounting(business, now)
-    
-    # === 4. BANKING & RECONCILIATION ===
-    banking_reconciliation = _collect_banking_reconciliation(business, window_start, window_end)
-    
-    # === 5. TAX & FX ===
-    tax_fx = _collect_tax_fx(business, window_start)
-    
-    # === 6. BUSINESS & REVENUE ===
-    business_revenue = _collect_business_revenue(business, window_start, window_end)
-    
-    # === 7. MARKETING & TRAFFIC ===
-    marketing_traffic = _collect_marketing_traffic(window_start, window_end)
-    
-    # === 8. SUPPORT & FEEDBACK ===
-    support_feedback = _collect_support_feedback(window_start)
-    
-    return {
-        "meta": meta,
-        "product_engineering": product_engineering,
-        "ledger_accounting": ledger_accounting,
-        "banking_reconciliation": banking_reconciliation,
-        "tax_fx": tax_fx,
-        "business_revenue": business_revenue,
-        "marketing_traffic": marketing_traffic,
-        "support_feedback": support_feedback,
-    }
+    window_end = window_end or now
+    window_start = window_start or window_end - timedelta(hours=24)  # Last 24 hours
 
+    businesses = Business.objects.filter(is_deleted=False)
+    if business_ids is not None:
+        businesses = businesses.filter(pk__in=list(business_ids))
+    business_names = dict(businesses.order_by("id").values_list("id", "name"))
+    scope = MetricsScope(
+        businesses=businesses,
+        business_ids=list(business_names),
+        now=now,
+        window_start=window_start,
+        window_end=window_end,
+    )
 
-def _collect_meta(business: Business, now: datetime, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+    workers = workers or int(getattr(settings, "METRICS_COLLECTOR_WORKERS", 4))
+    workers = max(1, min(workers, len(COLLECTORS)))
+    started = time.monotonic()
+    timings: Dict[str, int] = {}
+    domains: Dict[str, DomainMetrics] = {}
+    if workers == 1:
+        for name, collector in COLLECTORS.items():
+            domains[name], timings[name] = _timed(collector, scope, own_connection=False)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metrics") as pool:
+            futures = {
+                name: pool.submit(_timed, collector, scope, own_connection=True)
+                for name, collector in COLLECTORS.items()
+            }
+            for name, future in futures.items():
+                domains[name], timings[name] = future.result()
+
+    meta = _collect_meta(scope, business_names, environment)
+    meta["collector_workers"] = workers
+    meta["collector_timings_ms"] = timings
+    meta["duration_ms"] = int((time.monotonic() - started) * 1000)
+    return MetricsRun(meta=meta, domains=domains, business_names=business_names)
+
+
+def iter_metrics_ndjson(run: MetricsRun) -> Iterator[str]:
+    """One JSON document per line: meta, fleet totals, then each business."""
+    def dumps(payload):
+        return json.dumps(payload, sort_keys=True, default=str)
+
+    yield dumps({"type": "meta", **run.meta})
+    yield dumps({"type": "fleet", **{name: domain.fleet for name, domain in run.domains.items()}})
+    for business_id, name in run.business_names.items():
+        row = {"type": "business", "business_id": business_id, "business_name": name}
+        for domain_name, domain in run.domains.items():
+            if business_id in domain.businesses:
+                row[domain_name] = domain.businesses[business_id]
+        yield dumps(row)
+
+
+def _timed(collector, scope: MetricsScope, *, own_connection: bool):
+    started = time.monotonic()
+    try:
+        return collector(scope), int((time.monotonic() - started) * 1000)
+    finally:
+        if own_connection:
+            # Pool threads get their own connections; don't leak them.
+            connections.close_all()
+
+
+def _grouped(qs, *keys: str, **aggregates) -> Dict[Any, Dict[str, Any]]:
+    """Aggregate `qs` grouped by `keys`; maps key (or key tuple) -> row."""
+    # order_by() drops model default ordering, which would leak into GROUP BY.
+    rows = qs.values(*keys).annotate(**aggregates).order_by()
+    if len(keys) == 1:
+        return {row[keys[0]]: row for row in rows}
+    return {tuple(row[key] for key in keys): row for row in rows}
+
+
+def _sum_sections(sections: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add up numeric leaves of same-shaped dicts (nested dicts are merged)."""
+    total: Dict[str, Any] = {}
+    for section in sections:
+        for key, value in section.items():
+            if isinstance(value, dict):
+                total[key] = _sum_sections([total.get(key, {}), value])
+            elif isinstance(value, (int, float, Decimal)):
+                total[key] = total.get(key, 0) + value
+    return total
+
+
+def _collect_meta(scope: MetricsScope, business_names: Dict[int, str], environment: Optional[str]) -> Dict[str, Any]:
     """Collect metadata about the monitoring run."""
-    env = os.getenv('MONITORING_ENV', 'local')
-    
-    # Get all businesses to list
-    all_businesses = Business.objects.all()
-    businesses_included = [b.name for b in all_businesses] if all_businesses.exists() else ["central-books-main"]
-    
     return {
-        "generated_at": now.isoformat(),
-        "environment": env,
-        "businesses_included": businesses_included,
-        "window_start": window_start.isoformat(),
-        "window_end": window_end.isoformat(),
-        "primary_business": {
-            "id": business.id,
-            "name": business.name,
-            "currency": business.currency,
-            "created_at": business.created_at.isoformat() if business.created_at else None,
-        }
+        "generated_at": scope.now.isoformat(),
+        "environment": environment or os.getenv('MONITORING_ENV', 'local'),
+        "businesses_included": list(business_names.values()),
+        "business_count": len(business_names),
+        "window_start": scope.window_start.isoformat(),
+        "window_end": scope.window_end.isoformat(),
     }
 
 
-def _collect_product_engineering(business: Business, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+def _collect_product_engineering(scope: MetricsScope) -> DomainMetrics:
     """Collect product engineering metrics."""
-    # TODO: Implement request logging model for real HTTP request tracking
-    
-    # Feature usage based on real model activity
-    total_businesses = Business.objects.count()
-    businesses_with_customers = Business.objects.annotate(
-        customer_count=Count('customers')
-    ).filter(customer_count__gt=0).count()
-    
-    businesses_with_invoices = Business.objects.annotate(
-        invoice_count=Count('invoices')
-    ).filter(invoice_count__gt=0).count()
-    
-    # Onboarding completion = has both customers and invoices
-    onboarding_completed = Business.objects.annotate(
-        customer_count=Count('customers'),
-        invoice_count=Count('invoices')
-    ).filter(customer_count__gt=0, invoice_count__gt=0).count()
-    
-    # Activity in window
-    invoices_created_in_window = Invoice.objects.filter(
-        business=business,
-        created_at__gte=window_start,
-        created_at__lte=window_end
-    ).count()
-    
-    expenses_created_in_window = Expense.objects.filter(
-        business=business,
-        created_at__gte=window_start,
-        created_at__lte=window_end
-    ).count()
-    
+    created_in_window = Q(created_at__gte=scope.window_start, created_at__lte=scope.window_end)
+    invoices = _grouped(
+        Invoice.objects.filter(business__in=scope.businesses), "business_id",
+        total=Count("id"), created=Count("id", filter=created_in_window),
+    )
+    expenses = _grouped(
+        Expense.objects.filter(business__in=scope.businesses), "business_id",
+        created=Count("id", filter=created_in_window),
+    )
+    customers = _grouped(Customer.objects.filter(business__in=scope.businesses), "business_id", total=Count("id"))
     # TODO: Track bank feed imports with a dedicated import tracking field
     # For now, count bank accounts with any transactions (no created_at field on BankTransaction)
-    bank_feeds_imports = BankAccount.objects.filter(
-        business=business,
-        bank_transactions__isnull=False
-    ).distinct().count()
-    
-    # Reconciliation activity
-    # ReconciliationSession doesn't have created_at, use statement dates
-    reconciliations_started = ReconciliationSession.objects.filter(
-        business=business,
-        statement_end_date__gte=window_start.date(),
-        statement_end_date__lte=window_end.date()
-    ).count()
-    
-    reconciliations_completed = ReconciliationSession.objects.filter(
-        business=business,
-        status='COMPLETED',
-        completed_at__gte=window_start,
-        completed_at__lte=window_end
-    ).count()
-    
-    return {
-        "requests": {
-            "total": 0,  # TODO: Implement request logging
-            "by_status": {
-                "2xx": 0,
-                "4xx": 0,
-                "5xx": 0
+    bank_feeds = _grouped(
+        BankAccount.objects.filter(business__in=scope.businesses, bank_transactions__isnull=False), "business_id",
+        total=Count("id", distinct=True),
+    )
+    # ReconciliationSession started = statement end date in window
+    reconciliations = _grouped(
+        ReconciliationSession.objects.filter(business__in=scope.businesses), "business_id",
+        started=Count("id", filter=Q(
+            statement_end_date__gte=scope.window_start.date(),
+            statement_end_date__lte=scope.window_end.date(),
+        )),
+        completed=Count("id", filter=Q(
+            status='COMPLETED',
+            completed_at__gte=scope.window_start,
+            completed_at__lte=scope.window_end,
+        )),
+    )
+
+    by_business = {}
+    for business_id in scope.business_ids:
+        recs = reconciliations.get(business_id, {})
+        by_business[business_id] = {
+            "feature_usage": {
+                # Onboarding completion = has both customers and invoices
+                "onboarding_completed": bool(customers.get(business_id) and invoices.get(business_id)),
+                "invoices_created": invoices.get(business_id, {}).get("created", 0),
+                "expenses_created": expenses.get(business_id, {}).get("created", 0),
+                "bank_feeds_imports": bank_feeds.get(business_id, {}).get("total", 0),
+                "reconciliations_started": recs.get("started", 0),
+                "reconciliations_completed": recs.get("completed", 0),
+            }
+        }
+
+    usage = _sum_sections(b["feature_usage"] for b in by_business.values())
+    requests = summarize_request_metrics(since=scope.window_start, until=scope.window_end)
+
+    return DomainMetrics(
+        fleet={
+            "requests": {
+                "total": requests["total"],
+                "by_status": {
+                    "2xx": requests["by_status"]["2xx"],
+                    "4xx": requests["by_status"]["4xx"],
+                    "5xx": requests["by_status"]["5xx"]
+                },
+                "avg_response_ms": requests["avg_response_ms"],
+                "p50_ms": requests["p50_ms"],
+                "p95_ms": requests["p95_ms"],
+                "p99_ms": requests["p99_ms"],
+                "error_rate_pct": requests["error_rate_pct"],
+                "avg_queries": requests["avg_queries"]
             },
-            "avg_response_ms": 0.0
-        },
-        "endpoints": [],  # TODO: Add endpoint performance tracking
-        "feature_usage": {
-            "onboarding_started": total_businesses,
-            "onboarding_completed": onboarding_completed,
-            "dashboard_views": 0,  # TODO: Track page views
-            "invoices_created": invoices_created_in_window,
-            "expenses_created": expenses_created_in_window,
-            "bank_feeds_imports": bank_feeds_imports,
-            "reconciliations_started": reconciliations_started,
-            "reconciliations_completed": reconciliations_completed
+            "endpoints": requests["endpoints"],
+            "feature_usage": {
+                "onboarding_started": len(scope.business_ids),
+                "onboarding_completed": int(usage.get("onboarding_completed", 0)),
+                "dashboard_views": 0,  # TODO: Track page views
+                "invoices_created": usage.get("invoices_created", 0),
+                "expenses_created": usage.get("expenses_created", 0),
+                "bank_feeds_imports": usage.get("bank_feeds_imports", 0),
+                "reconciliations_started": usage.get("reconciliations_started", 0),
+                "reconciliations_completed": usage.get("reconciliations_completed", 0)
+            },
+            "deployments": {
+                "last_deploy_at": None,  # TODO: Track deployments via Git or Render API
+                "deploy_count_7d": 0,
+                "last_deploy_status": None
+            }
         },
-        "deployments": {
-            "last_deploy_at": None,  # TODO: Track deployments via Git or Render API
-            "deploy_count_7d": 0,
-            "last_deploy_status": None
-        }
-    }
+        businesses=by_business,
+    )
 
 
-def _collect_ledger_accounting(business: Business, now: datetime) -> Dict[str, Any]:
+def _collect_ledger_accounting(scope: MetricsScope) -> DomainMetrics:
     """Collect ledger and accounting metrics with real data."""
-    today = now.date()
-    
-    # Journal entries
-    all_entries = JournalEntry.objects.filter(business=business)
-    total_entries = all_entries.count()
-    
-    # Find unbalanced entries
-    unbalanced_entries = []
-    for entry in all_entries[:500]:  # Limit to 500 for performance
-        lines = entry.lines.all()
-        total_debits = sum(line.debit for line in lines)
-        total_credits = sum(line.credit for line in lines)
-        if abs(total_debits - total_credits) > Decimal('0.01'):
-            unbalanced_entries.append(entry.id)
-    
-    # Future-dated entries
-    future_entries = all_entries.filter(date__gt=today)
-    future_dated_examples = [
-        {"id": e.id, "date": e.date.isoformat()}
-        for e in future_entries[:5]
-    ]
-    
-    # Accounts
-    all_accounts = Account.objects.filter(business=business)
-    total_accounts = all_accounts.count()
-    
-    # Accounts by type
-    accounts_by_type = all_accounts.values('type').annotate(count=Count('id'))
-    by_type = {
-        "ASSET": 0,
-        "LIABILITY": 0,
-        "EQUITY": 0,
-        "INCOME": 0,
-        "EXPENSE": 0
-    }
-    for item in accounts_by_type:
-        by_type[item['type']] = item['count']
-    
-    # Get balances for key accounts (simplified - actual balance calc is complex)
-    balances = []
-    key_accounts = all_accounts.filter(
-        Q(type='ASSET') | Q(code__in=['1200', '2000'])  # AR and AP
-    )[:10]
-    
+    today = scope.now.date()
+
+    entries = _grouped(
+        JournalEntry.objects.filter(business__in=scope.businesses), "business_id",
+        total=Count("id"), future=Count("id", filter=Q(date__gt=today)),
+    )
+
+    # Unbalanced entries: debit/credit difference per entry, grouped in SQL
+    unbalanced = Counter(
+        row["journal_entry__business_id"]
+        for row in JournalLine.objects.filter(journal_entry__business__in=scope.businesses)
+        .values("journal_entry_id", "journal_entry__business_id")
+        .annotate(diff=Sum("debit") - Sum("credit"))
+        .filter(Q(diff__gt=UNBALANCED_TOLERANCE) | Q(diff__lt=-UNBALANCED_TOLERANCE))
+        .order_by()
+    )
+
+    # First 5 future-dated entries of each business
+    future_examples = defaultdict(list)
+    for row in (
+        JournalEntry.objects.filter(business__in=scope.businesses, date__gt=today)
+        .annotate(rank=Window(RowNumber(), partition_by=F("business_id"), order_by=[F("date").asc(), F("id").asc()]))
+        .filter(rank__lte=5)
+        .order_by("business_id", "date", "id")
+        .values("business_id", "id", "date")
+    ):
+        future_examples[row["business_id"]].append({"id": row["id"], "date": row["date"].isoformat()})
+
+    accounts_by_type = _grouped(
+        Account.objects.filter(business__in=scope.businesses), "business_id", "type", count=Count("id")
+    )
+
+    # Balances for key accounts (assets, AR and AP), first 10 per business
+    key_accounts = list(
+        Account.objects.filter(business__in=scope.businesses)
+        .filter(Q(type='ASSET') | Q(code__in=['1200', '2000']))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F("business_id"),
+            order_by=[F("type").asc(), F("code").asc(), F("name").asc()],
+        ))
+        .filter(rank__lte=10)
+        .order_by("business_id", "type", "code", "name")
+        .values("id", "business_id", "code", "name", "type")
+    )
+    line_sums = _grouped(
+        JournalLine.objects.filter(account_id__in=[a["id"] for a in key_accounts]), "account_id",
+        total_debits=Sum('debit'), total_credits=Sum('credit'),
+    )
+    balances = defaultdict(list)
     for account in key_accounts:
-        # Sum journal line debits/credits for this account
-        balance_data = JournalLine.objects.filter(account=account).aggregate(
-            total_debits=Sum('debit'),
-            total_credits=Sum('credit')
-        )
-        debits = balance_data['total_debits'] or Decimal('0')
-        credits = balance_data['total_credits'] or Decimal('0')
-        balance = debits - credits
-        
-        balances.append({
-            "account_code": account.code or "",
-            "account_name": account.name,
-            "type": account.type,
+        sums = line_sums.get(account["id"], {})
+        balance = (sums.get("total_debits") or Decimal('0')) - (sums.get("total_credits") or Decimal('0'))
+        balances[account["business_id"]].append({
+            "business_id": account["business_id"],
+            "account_code": account["code"] or "",
+            "account_name": account["name"],
+            "type": account["type"],
             "current_balance": float(balance)
         })
-    
+
     # Unlinked bank transactions (those without posted_journal_entry_id)
-    unlinked_count = BankTransaction.objects.filter(
-        bank_account__business=business,
-        posted_journal_entry__isnull=True,
-        status__in=['NEW', 'SUGGESTED', 'PARTIAL']
-    ).count()
-    
-    return {
-        "journal_entries": {
-            "total": total_entries,
-            "unbalanced_count": len(unbalanced_entries),
-            "future_dated_count": future_entries.count(),
-            "future_dated_examples": future_dated_examples
-        },
-        "accounts": {
-            "total_accounts": total_accounts,
-            "by_type": by_type,
-            "balances": balances
+    unlinked = _grouped(
+        BankTransaction.objects.filter(
+            bank_account__business__in=scope.businesses,
+            posted_journal_entry__isnull=True,
+            status__in=OPEN_BANK_STATUSES,
+        ),
+        "bank_account__business_id",
+        total=Count("id"),
+    )
+
+    by_business = {}
+    for business_id in scope.business_ids:
+        by_type = {choice: 0 for choice, _ in Account.AccountType.choices}
+        for choice in by_type:
+            by_type[choice] = accounts_by_type.get((business_id, choice), {}).get("count", 0)
+        by_business[business_id] = {
+            "journal_entries": {
+                "total": entries.get(business_id, {}).get("total", 0),
+                "unbalanced_count": unbalanced.get(business_id, 0),
+                "future_dated_count": entries.get(business_id, {}).get("future", 0),
+                "future_dated_examples": future_examples.get(business_id, []),
+            },
+            "accounts": {
+                "total_accounts": sum(by_type.values()),
+                "by_type": by_type,
+                "balances": balances.get(business_id, []),
+            },
+            "unlinked_bank_transactions_count": unlinked.get(business_id, {}).get("total", 0),
+        }
+
+    totals = _sum_sections(by_business.values())
+    examples = sorted(
+        (example for examples in future_examples.values() for example in examples),
+        key=lambda e: (e["date"], e["id"]),
+    )
+    return DomainMetrics(
+        fleet={
+            "journal_entries": {
+                "total": totals.get("journal_entries", {}).get("total", 0),
+                "unbalanced_count": totals.get("journal_entries", {}).get("unbalanced_count", 0),
+                "future_dated_count": totals.get("journal_entries", {}).get("future_dated_count", 0),
+                "future_dated_examples": examples[:5],
+            },
+            "accounts": {
+                "total_accounts": totals.get("accounts", {}).get("total_accounts", 0),
+                "by_type": {
+                    choice: totals.get("accounts", {}).get("by_type", {}).get(choice, 0)
+                    for choice, _ in Account.AccountType.choices
+                },
+                # Largest balances first
+                "balances": sorted(
+                    (row for rows in balances.values() for row in rows),
+                    key=lambda row: (-abs(row["current_balance"]), row["business_id"], row["account_code"]),
+                )[:FLEET_TOP_N],
+            },
+            "unlinked_bank_transactions_count": totals.get("unlinked_bank_transactions_count", 0),
         },
-        "unlinked_bank_transactions_count": unlinked_count
-    }
+        businesses=by_business,
+    )
 
 
-def _collect_banking_reconciliation(business: Business, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+def _collect_banking_reconciliation(scope: MetricsScope) -> DomainMetrics:
     """Collect banking and reconciliation metrics."""
-    bank_accounts = BankAccount.objects.filter(business=business)
-    
-    # Per-account reconciliation status
-    bank_account_status = []
+    today = scope.now.date()
+    bank_accounts = list(
+        BankAccount.objects.filter(business__in=scope.businesses)
+        .order_by("business_id", "id")
+        .values("id", "business_id", "name", "account_id")
+    )
+    business_txns = BankTransaction.objects.filter(bank_account__business__in=scope.businesses)
+
+    # Per-account bank feed balance, unreconciled counts and age buckets
+    open_q = ~Q(status__in=CLOSED_BANK_STATUSES)
+    txn_stats = _grouped(
+        business_txns, "bank_account_id",
+        balance=Sum("amount"),
+        unreconciled=Count("id", filter=open_q),
+        older_30d=Count("id", filter=open_q & Q(date__lt=today - timedelta(days=30))),
+        older_60d=Count("id", filter=open_q & Q(date__lt=today - timedelta(days=60))),
+        older_90d=Count("id", filter=open_q & Q(date__lt=today - timedelta(days=90))),
+    )
+    unmatched = _grouped(
+        business_txns.filter(matches__isnull=True, status__in=['NEW', 'SUGGESTED']), "bank_account_id",
+        total=Count("id", distinct=True),
+    )
+    # Ledger balance from linked Account
+    ledger = _grouped(
+        JournalLine.objects.filter(
+            account_id__in=BankAccount.objects.filter(
+                business__in=scope.businesses, account__isnull=False
+            ).values("account_id")
+        ),
+        "account_id",
+        total_debits=Sum('debit'), total_credits=Sum('credit'),
+    )
+    last_reconciled = _grouped(
+        ReconciliationSession.objects.filter(business__in=scope.businesses, status='COMPLETED'), "bank_account_id",
+        last=Max("completed_at"),
+    )
+
+    accounts_by_business = defaultdict(list)
     for bank_account in bank_accounts:
-        # Bank feed balance = sum of all transactions
-        bank_transactions = BankTransaction.objects.filter(bank_account=bank_account)
-        bank_feed_balance = bank_transactions.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0')
-        
-        # Ledger balance from linked Account
-        ledger_balance = Decimal('0')
-        if bank_account.account:
-            ledger_data = JournalLine.objects.filter(account=bank_account.account).aggregate(
-                total_debits=Sum('debit'),
-                total_credits=Sum('credit')
-            )
-            debits = ledger_data['total_debits'] or Decimal('0')
-            credits = ledger_data['total_credits'] or Decimal('0')
-            ledger_balance = debits - credits
-        
-        # Unmatched and unreconciled
-        unmatched = bank_transactions.filter(
-            matches__isnull=True,
-            status__in=['NEW', 'SUGGESTED']
-        ).count()
-        
-        unreconciled = bank_transactions.exclude(
-            status__in=['RECONCILED', 'EXCLUDED']
-        ).count()
-        
-        # Age analysis
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        sixty_days_ago = timezone.now() - timedelta(days=60)
-        ninety_days_ago = timezone.now() - timedelta(days=90)
-        
-        unreconciled_qs = bank_transactions.exclude(status__in=['RECONCILED', 'EXCLUDED'])
-        unreconciled_older_than = {
-            "30d": unreconciled_qs.filter(date__lt=thirty_days_ago.date()).count(),
-            "60d": unreconciled_qs.filter(date__lt=sixty_days_ago.date()).count(),
-            "90d": unreconciled_qs.filter(date__lt=ninety_days_ago.date()).count()
-        }
-        
-        # Last reconciliation
-        last_session = ReconciliationSession.objects.filter(
-            bank_account=bank_account,
-            status='COMPLETED'
-        ).order_by('-completed_at').first()
-        
-        bank_account_status.append({
-            "account_id": bank_account.id,
-            "account_name": bank_account.name,
+        stats = txn_stats.get(bank_account["id"], {})
+        bank_feed_balance = stats.get("balance") or Decimal('0')
+        ledger_data = ledger.get(bank_account["account_id"], {}) if bank_account["account_id"] else {}
+        ledger_balance = (ledger_data.get("total_debits") or Decimal('0')) - (
+            ledger_data.get("total_credits") or Decimal('0')
+        )
+        last = last_reconciled.get(bank_account["id"], {}).get("last")
+        accounts_by_business[bank_account["business_id"]].append({
+            "business_id": bank_account["business_id"],
+            "account_id": bank_account["id"],
+            "account_name": bank_account["name"],
             "bank_feed_balance": float(bank_feed_balance),
             "ledger_balance": float(ledger_balance),
             "balance_difference": float(ledger_balance - bank_feed_balance),
-            "unmatched_transactions": unmatched,
-            "unreconciled_transactions": unreconciled,
-            "unreconciled_older_than_days": unreconciled_older_than,
-            "last_reconciled_at": last_session.completed_at.isoformat() if last_session and last_session.completed_at else None
+            "unmatched_transactions": unmatched.get(bank_account["id"], {}).get("total", 0),
+            "unreconciled_transactions": stats.get("unreconciled", 0),
+            "unreconciled_older_than_days": {
+                "30d": stats.get("older_30d", 0),
+                "60d": stats.get("older_60d", 0),
+                "90d": stats.get("older_90d", 0),
+            },
+            "last_reconciled_at": last.isoformat() if last else None
         })
-    
+
     # Overall bank transaction summary
-    all_bank_txs = BankTransaction.objects.filter(bank_account__business=business)
-    # BankTransaction doesn't have created_at, use date field
-    new_in_window = all_bank_txs.filter(
-        date__gte=window_start.date(),
-        date__lte=window_end.date()
-    ).count()
-    
-    # Matched/added/excluded in window
-    matched_in_window = BankReconciliationMatch.objects.filter(
-        bank_transaction__bank_account__business=business,
-        reconciled_at__gte=window_start,
-        reconciled_at__lte=window_end
-    ).values('bank_transaction').distinct().count()
-    
-    added_in_window = all_bank_txs.filter(
-        date__gte=window_start.date(),
-        date__lte=window_end.date(),
-        status='LEGACY_CREATED'
-    ).count()
-    
-    # BankTransaction doesn't have updated_at, just count excluded transactions in date range
-    excluded_in_window = all_bank_txs.filter(
-        date__gte=window_start.date(),
-        date__lte=window_end.date(),
-        status='EXCLUDED'
-    ).count()
-    
-    return {
-        "bank_accounts": bank_account_status,
-        "bank_transactions_summary": {
-            "total": all_bank_txs.count(),
-            "new_in_window": new_in_window,
-            "matched_in_window": matched_in_window,
-            "added_in_window": added_in_window,
-            "excluded_in_window": excluded_in_window
+    # BankTransaction doesn't have created_at/updated_at, use date field
+    in_window = Q(date__gte=scope.window_start.date(), date__lte=scope.window_end.date())
+    summary = _grouped(
+        business_txns, "bank_account__business_id",
+        total=Count("id"),
+        new_in_window=Count("id", filter=in_window),
+        added_in_window=Count("id", filter=in_window & Q(status='LEGACY_CREATED')),
+        excluded_in_window=Count("id", filter=in_window & Q(status='EXCLUDED')),
+    )
+    matched = _grouped(
+        BankReconciliationMatch.objects.filter(
+            bank_transaction__bank_account__business__in=scope.businesses,
+            reconciled_at__gte=scope.window_start,
+            reconciled_at__lte=scope.window_end,
+        ),
+        "bank_transaction__bank_account__business_id",
+        total=Count("bank_transaction", distinct=True),
+    )
+
+    by_business = {}
+    for business_id in scope.business_ids:
+        row = summary.get(business_id, {})
+        by_business[business_id] = {
+            "bank_accounts": accounts_by_business.get(business_id, []),
+            "bank_transactions_summary": {
+                "total": row.get("total", 0),
+                "new_in_window": row.get("new_in_window", 0),
+                "matched_in_window": matched.get(business_id, {}).get("total", 0),
+                "added_in_window": row.get("added_in_window", 0),
+                "excluded_in_window": row.get("excluded_in_window", 0)
+            },
         }
-    }
+
+    all_accounts = [account for accounts in accounts_by_business.values() for account in accounts]
+    account_totals = _sum_sections(
+        {
+            "unmatched_transactions": account["unmatched_transactions"],
+            "unreconciled_transactions": account["unreconciled_transactions"],
+            "unreconciled_older_than_days": account["unreconciled_older_than_days"],
+        }
+        for account in all_accounts
+    )
+    return DomainMetrics(
+        fleet={
+            # Accounts with the most unreconciled work, then the largest differences
+            "bank_accounts": sorted(
+                all_accounts,
+                key=lambda a: (-a["unreconciled_transactions"], -abs(a["balance_difference"]), a["account_id"]),
+            )[:FLEET_TOP_N],
+            "bank_accounts_summary": {
+                "total": len(all_accounts),
+                "with_balance_difference": sum(
+                    1 for account in all_accounts if abs(account["balance_difference"]) >= 0.01
+                ),
+                "unmatched_transactions": account_totals.get("unmatched_transactions", 0),
+                "unreconciled_transactions": account_totals.get("unreconciled_transactions", 0),
+                "unreconciled_older_than_days": {
+                    bucket: account_totals.get("unreconciled_older_than_days", {}).get(bucket, 0)
+                    for bucket in ("30d", "60d", "90d")
+                },
+            },
+            "bank_transactions_summary": _sum_sections(
+                b["bank_transactions_summary"] for b in by_business.values()
+            ) or {
+                "total": 0, "new_in_window": 0, "matched_in_window": 0, "added_in_window": 0, "excluded_in_window": 0
+            },
+        },
+        businesses=by_business,
+    )
 
 
-def _collect_tax_fx(business: Business, window_start: datetime) -> Dict[str, Any]:
+def _collect_tax_fx(scope: MetricsScope) -> DomainMetrics:
     """Collect tax and FX metrics."""
     # Tax rates
-    tax_rates = TaxRate.objects.filter(business=business, is_active=True)
-    active_count = tax_rates.count()
-    
-    by_code = {}
-    for rate in tax_rates:
-        by_code[rate.code] = {
-            "percentage": float(rate.percentage),
-            "is_recoverable": rate.is_recoverable
+    rates_by_business = defaultdict(dict)
+    for business_id, code, percentage, is_recoverable in TaxRate.objects.filter(
+        business__in=scope.businesses, is_active=True
+    ).order_by().values_list("business_id", "code", "percentage", "is_recoverable"):
+        rates_by_business[business_id][code] = {
+            "percentage": float(percentage),
+            "is_recoverable": is_recoverable
         }
-    
-    # Invoice line checks (sample recent invoices)
-    invoices = Invoice.objects.filter(business=business).order_by('-created_at')[:200]
-    total_lines_checked = len(invoices)
-    mismatched_net_tax_total_count = 0
-    tax_rate_set_but_zero_tax_amount_count = 0
-    
-    for invoice in invoices:
-        # Check if net + tax = grand_total
-        calculated_total = invoice.net_total + invoice.tax_total
-        if abs(calculated_total - invoice.grand_total) > Decimal('0.02'):
-            mismatched_net_tax_total_count += 1
-        
-        # Check if tax_rate is set but tax_amount is zero
-        if (invoice.tax_rate_id or invoice.tax_group_id) and invoice.tax_total == Decimal('0'):
-            tax_rate_set_but_zero_tax_amount_count += 1
-    
-    # FX documents (multi-currency) - TODO: implement when FX tracking added
-    # For now, check if business uses non-CAD currency
-    fx_enabled = business.currency != 'CAD'
-    
-    return {
-        "tax_rates": {
-            "active_count": active_count,
-            "by_code": by_code
-        },
-        "invoice_lines_checks": {
-            "total_lines_checked": total_lines_checked,
-            "mismatched_net_tax_total_count": mismatched_net_tax_total_count,
-            "tax_rate_set_but_zero_tax_amount_count": tax_rate_set_but_zero_tax_amount_count
-        },
-        "fx_documents_checks": {
-            "total_fx_documents": 0,  # TODO: Track FX invoices/expenses
-            "mismatched_fx_totals_count": 0,
-            "max_fx_deviation_pct": 0.0,
-            "fx_enabled": fx_enabled
+
+    # Invoice checks run in SQL over every invoice: net + tax = grand_total,
+    # and no tax rate/group set with a zero tax amount.
+    expected_total = F("net_total") + F("tax_total")
+    invoice_checks = _grouped(
+        Invoice.objects.filter(business__in=scope.businesses), "business_id",
+        checked=Count("id"),
+        mismatched=Count("id", filter=(
+            Q(grand_total__gt=expected_total + INVOICE_TOTAL_TOLERANCE)
+            | Q(grand_total__lt=expected_total - INVOICE_TOTAL_TOLERANCE)
+        )),
+        zero_tax=Count("id", filter=(
+            (Q(tax_rate__isnull=False) | Q(tax_group__isnull=False)) & Q(tax_total=Decimal('0'))
+        )),
+    )
+    currencies = dict(scope.businesses.order_by().values_list("id", "currency"))
+
+    by_business = {}
+    for business_id in scope.business_ids:
+        checks = invoice_checks.get(business_id, {})
+        by_business[business_id] = {
+            "tax_rates": {
+                "active_count": len(rates_by_business.get(business_id, {})),
+                "by_code": rates_by_business.get(business_id, {}),
+            },
+            "invoice_lines_checks": {
+                "total_lines_checked": checks.get("checked", 0),
+                "mismatched_net_tax_total_count": checks.get("mismatched", 0),
+                "tax_rate_set_but_zero_tax_amount_count": checks.get("zero_tax", 0),
+            },
+            "fx_documents_checks": {
+                "total_fx_documents": 0,  # TODO: Track FX invoices/expenses
+                "mismatched_fx_totals_count": 0,
+                "max_fx_deviation_pct": 0.0,
+                # FX documents (multi-currency) - TODO: implement when FX tracking added
+                "fx_enabled": currencies.get(business_id) != 'CAD',
+            },
         }
-    }
+
+    # Codes are per business; the fleet view keeps the lowest business id's
+    # settings for each code and counts the businesses using it.
+    fleet_by_code: Dict[str, Dict[str, Any]] = {}
+    for business_id in scope.business_ids:
+        for code, rate in rates_by_business.get(business_id, {}).items():
+            entry = fleet_by_code.setdefault(code, {**rate, "business_count": 0})
+            entry["business_count"] += 1
+
+    totals = _sum_sections(by_business.values())
+    return DomainMetrics(
+        fleet={
+            "tax_rates": {
+                "active_count": totals.get("tax_rates", {}).get("active_count", 0),
+                "businesses_with_active_rates": len(rates_by_business),
+                # Most widely used codes
+                "by_code": dict(
+                    sorted(fleet_by_code.items(), key=lambda item: (-item[1]["business_count"], item[0]))[:FLEET_TOP_N]
+                ),
+                "distinct_codes": len(fleet_by_code),
+            },
+            "invoice_lines_checks": {
+                key: totals.get("invoice_lines_checks", {}).get(key, 0)
+                for key in (
+                    "total_lines_checked",
+                    "mismatched_net_tax_total_count",
+                    "tax_rate_set_but_zero_tax_amount_count",
+                )
+            },
+            "fx_documents_checks": {
+                "total_fx_documents": 0,  # TODO: Track FX invoices/expenses
+                "mismatched_fx_totals_count": 0,
+                "max_fx_deviation_pct": 0.0,
+                "fx_enabled_businesses": int(totals.get("fx_documents_checks", {}).get("fx_enabled", 0)),
+            },
+        },
+        businesses=by_business,
+    )
 
 
-def _collect_business_revenue(business: Business, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+def _collect_business_revenue(scope: MetricsScope) -> DomainMetrics:
     """Collect business revenue and customer metrics."""
     # TODO: Implement subscription/MRR tracking
-    # For now, use recurring invoices as proxy
-    
-    # Customer metrics
-    total_customers = Customer.objects.filter(business=business).count()
-    new_customers = Customer.objects.filter(
-        business=business,
-        created_at__gte=window_start,
-        created_at__lte=window_end
-    ).count()
-    active_customers = Customer.objects.filter(business=business, is_active=True).count()
-    
-    # Payment metrics (invoices as proxy)
+    # For now, use paid invoices as proxy
+    created_in_window = Q(created_at__gte=scope.window_start, created_at__lte=scope.window_end)
+    customers = _grouped(
+        Customer.objects.filter(business__in=scope.businesses), "business_id",
+        total=Count("id"),
+        new=Count("id", filter=created_in_window),
+        active=Count("id", filter=Q(is_active=True)),
+    )
     # Invoice doesn't have updated_at, use created_at for paid invoices in window
-    successful_payments = Invoice.objects.filter(
-        business=business,
-        status='PAID',
-        created_at__gte=window_start,
-        created_at__lte=window_end
-    ).count()
-    
-    # Revenue calculation
-    paid_invoices = Invoice.objects.filter(
-        business=business,
-        status='PAID'
+    paid = _grouped(
+        Invoice.objects.filter(business__in=scope.businesses, status='PAID'), "business_id",
+        count=Count("id"),
+        revenue=Sum("grand_total"),
+        in_window=Count("id", filter=created_in_window),
     )
-    
-    # MRR approximation: average monthly revenue from paid invoices
-    # This is a simplification - proper MRR needs subscription tracking
-    total_revenue = paid_invoices.aggregate(total=Sum('grand_total'))['total'] or Decimal('0')
-    invoice_count = paid_invoices.count()
-    current_mrr = float(total_revenue / max(invoice_count, 1)) if invoice_count > 0 else 0.0
-    
-    return {
-        "mrr": {
-            "current_mrr": current_mrr,  # TODO: Implement proper MRR tracking
-            "delta_mrr": 0.0,
-            "delta_mrr_breakdown": {
-                "new": 0.0,
-                "expansion": 0.0,
-                "contraction": 0.0,
-                "churn": 0.0
-            }
-        },
-        "customers": {
-            "total_customers": total_customers,
-            "new_customers": new_customers,
-            "churned_customers": 0,  # TODO: Track customer churn
-            "active_customers": active_customers
-        },
-        "payments": {
-            "successful_payments": successful_payments,
-            "failed_payments": 0,  # TODO: Track payment failures
-            "refunds": 0  # TODO: Track refunds
+
+    def mrr(revenue, count) -> float:
+        # MRR approximation: average revenue per paid invoice
+        return float(revenue / count) if count else 0.0
+
+    by_business = {}
+    for business_id in scope.business_ids:
+        cust = customers.get(business_id, {})
+        paid_row = paid.get(business_id, {})
+        by_business[business_id] = {
+            "mrr": {
+                "current_mrr": mrr(paid_row.get("revenue") or Decimal('0'), paid_row.get("count", 0)),
+                "paid_revenue": float(paid_row.get("revenue") or 0),
+                "paid_invoices": paid_row.get("count", 0),
+            },
+            "customers": {
+                "total_customers": cust.get("total", 0),
+                "new_customers": cust.get("new", 0),
+                "churned_customers": 0,  # TODO: Track customer churn
+                "active_customers": cust.get("active", 0),
+            },
+            "payments": {
+                "successful_payments": paid_row.get("in_window", 0),
+                "failed_payments": 0,  # TODO: Track payment failures
+                "refunds": 0  # TODO: Track refunds
+            },
         }
-    }
 
+    totals = _sum_sections(by_business.values())
+    revenue = sum((row.get("revenue") or Decimal('0') for row in paid.values()), Decimal('0'))
+    paid_count = sum(row["count"] for row in paid.values())
+    return DomainMetrics(
+        fleet={
+            "mrr": {
+                "current_mrr": mrr(revenue, paid_count),  # TODO: Implement proper MRR tracking
+                "delta_mrr": 0.0,
+                "delta_mrr_breakdown": {
+                    "new": 0.0,
+                    "expansion": 0.0,
+                    "contraction": 0.0,
+                    "churn": 0.0
+                }
+            },
+            "customers": {
+                key: totals.get("customers", {}).get(key, 0)
+                for key in ("total_customers", "new_customers", "churned_customers", "active_customers")
+            },
+            "payments": {
+                key: totals.get("payments", {}).get(key, 0)
+                for key in ("successful_payments", "failed_payments", "refunds")
+            },
+        },
+        businesses=by_business,
+    )
 
-def _collect_marketing_traffic(window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+
+def _collect_marketing_traffic(scope: MetricsScope) -> DomainMetrics:
     """Collect marketing and traffic metrics (placeholder for analytics integration)."""
     # TODO: Integrate with Google Analytics, Plausible, or similar
-    
-    return {
+
+    return DomainMetrics(fleet={
         "website": {
             "visits": 0,
             "unique_visitors": 0,
@@ -501,14 +736,14 @@ def _collect_marketing_traffic(window_start: datetime, window_end: datetime) ->
             "top_sources": []
         },
         "campaigns": []
-    }
+    })
 
 
-def _collect_support_feedback(window_start: datetime) -> Dict[str, Any]:
+def _collect_support_feedback(scope: MetricsScope) -> DomainMetrics:
     """Collect support and feedback metrics (placeholder for ticketing integration)."""
     # TODO: Integrate with Zendesk, Intercom, or similar
-    
-    return {
+
+    return DomainMetrics(fleet={
         "tickets": {
             "open": 0,
             "new_in_window": 0,
@@ -523,25 +758,23 @@ def _collect_support_feedback(window_start: datetime) -> Dict[str, Any]:
             "detractors": 0
         },
         "notable_quotes": []
-    }
+    })
+
 
+COLLECTORS: Dict[str, Callable[[MetricsScope], DomainMetrics]] = {
+    "product_engineering": _collect_product_engineering,
+    "ledger_accounting": _collect_ledger_accounting,
+    "banking_reconciliation": _collect_banking_reconciliation,
+    "tax_fx": _collect_tax_fx,
+    "business_revenue": _collect_business_revenue,
+    "marketing_traffic": _collect_marketing_traffic,
+    "support_feedback": _collect_support_feedback,
+}
 
-def _empty_metrics(now: datetime, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+
+def _empty_metrics(meta: Dict[str, Any]) -> Dict[str, Any]:
     """Return empty metrics structure when no business exists."""
     return {
-        "meta": {
-            "generated_at": now.isoformat(),
-            "environment": os.getenv('MONITORING_ENV', 'local'),
-            "businesses_included": [],
-            "window_start": window_start.isoformat(),
-            "window_end": window_end.isoformat(),
-            "error": "No business found"
-        },
-        "product_engineering": {},
-        "ledger_accounting": {},
-        "banking_reconciliation": {},
-        "tax_fx": {},
-        "business_revenue": {},
-        "marketing_traffic": {},
-        "support_feedback": {},
+        "meta": {**meta, "error": "No business found"},
+        **{name: {} for name in COLLECTORS},
     }
@@ -1,12 +1,15 @@
 import logging
+import time
 import uuid
 from typing import Callable
 
 from django.conf import settings
+from django.db import connection
 from django.http import HttpRequest, HttpResponse
 from django.http import HttpResponseForbidden
 
 
+logger = logging.getLogger(__name__)
 oauth_logger = logging.getLogger("oauth.google")
 
 
@@ -35,6 +38,46 @@ class RequestIDMiddleware:
         return response
 
 
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class RequestTimingMiddleware:
+    """
+    Record latency, status code and DB query count for every request.
+
+    Timings go into in-process histograms keyed by URL route (see
+    core.request_metrics) and are flushed to the database by a background
+    thread, so the per-request cost is a dict update under a lock.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self.enabled = getattr(settings, "REQUEST_METRICS_ENABLED", True)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self.enabled:
+            return self.get_response(request)
+
+        from .request_metrics import record_request
+
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+        try:
+            record_request(request, response.status_code, duration_ms, counter.count)
+        except Exception:  # telemetry must never fail a request
+            logger.exception("Could not record request metrics")
+        return response
+
+
 class CorsMiddleware:
     """
     Minimal CORS handler for API endpoints.
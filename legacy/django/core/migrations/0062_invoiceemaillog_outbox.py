@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoiceemaillog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('error', 'Error')], max_length=16),
+        ),
+        migrations.AddField(
+            model_name='invoiceemaillog',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='invoiceemaillog',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='invoiceemaillog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoiceemaillog',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='invoiceemaillog',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='core_invoic_status_a75232_idx'),
+        ),
+    ]
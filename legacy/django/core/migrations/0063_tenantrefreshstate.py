@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0062_invoiceemaillog_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantRefreshState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=64)),
+                ('fingerprint', models.CharField(blank=True, max_length=64)),
+                ('last_run_id', models.CharField(blank=True, max_length=64)),
+                ('last_outcome', models.CharField(blank=True, choices=[('refreshed', 'Refreshed'), ('skipped', 'Skipped (unchanged)'), ('ineligible', 'Ineligible'), ('error', 'Error')], max_length=16)),
+                ('last_duration_ms', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_states', to='core.business')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('task', 'business'), name='uniq_refresh_state_per_task_business')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0063_tenantrefreshstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLatencySample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('route', models.CharField(max_length=255)),
+                ('method', models.CharField(max_length=8)),
+                ('worker', models.CharField(blank=True, max_length=128)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('status_2xx', models.PositiveIntegerField(default=0)),
+                ('status_3xx', models.PositiveIntegerField(default=0)),
+                ('status_4xx', models.PositiveIntegerField(default=0)),
+                ('status_5xx', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('histogram', models.JSONField(default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['minute'], name='core_reques_minute_c7c3bf_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0065_banktransaction_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceemaillog',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
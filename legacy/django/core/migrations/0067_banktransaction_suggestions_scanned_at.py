@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0066_invoiceemaillog_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banktransaction',
+            name='suggestions_scanned_at',
+            field=models.DateTimeField(blank=True, help_text='When the import auto-apply stage last ran over this row, matched or not', null=True),
+        ),
+    ]
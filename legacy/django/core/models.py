@@ -789,9 +789,17 @@ class InvoiceEmailTemplate(models.Model):
 
 
 class InvoiceEmailLog(models.Model):
+    """
+    One invoice email. Doubles as the outbox row: queued emails carry the
+    rendered message in `payload` until core.invoice_email_outbox sends them.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_SENDING = "sending"
     STATUS_SENT = "sent"
     STATUS_ERROR = "error"
     STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_SENDING, "Sending"),
         (STATUS_SENT, "Sent"),
         (STATUS_ERROR, "Error"),
     ]
@@ -812,9 +820,18 @@ class InvoiceEmailLog(models.Model):
     opened_at = models.DateTimeField(blank=True, null=True)
     opened_ip = models.GenericIPAddressField(blank=True, null=True)
     opened_user_agent = models.CharField(max_length=512, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    # When a dispatcher moved the row to SENDING; stale claims are released.
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
 
     def delete(self, *args, **kwargs):
         from .accounting_posting import remove_invoice_sent_entry, remove_invoice_paid_entry
@@ -1373,6 +1390,11 @@ class BankTransaction(models.Model):
         blank=True,
         help_text="Explanation for the suggestion",
     )
+    suggestions_scanned_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the import auto-apply stage last ran over this row, matched or not",
+    )
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -1435,6 +1457,10 @@ class BankTransaction(models.Model):
     class Meta:
         unique_together = ("bank_account", "external_id")
         ordering = ["-date", "-id"]
+        indexes = [
+            # Keyset pagination of an account's feed (newest first).
+            models.Index(fields=["bank_account", "-date", "-id"], name="core_banktr_bank_ac_7038d6_idx"),
+        ]
 
     def __str__(self):
         return f"{self.date} – {self.description}"
@@ -1756,6 +1782,122 @@ class BankTransactionReview(models.Model):
     class Meta:
         ordering = ["-created_at"]
 
+class BackgroundJob(models.Model):
+    """
+    Row in the database-backed job queue used for long agentic runs.
+
+    Workers (`manage.py run_jobs`) claim rows with SELECT ... FOR UPDATE SKIP
+    LOCKED where the database supports it and with a conditional UPDATE
+    otherwise; see core.jobs.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        SUCCEEDED = "SUCCEEDED", "Succeeded"
+        FAILED = "FAILED", "Failed"
+
+    kind = models.CharField(max_length=64, db_index=True)
+    business = models.ForeignKey(
+        "core.Business",
+        on_delete=models.CASCADE,
+        related_name="background_jobs",
+        null=True,
+        blank=True,
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    trace_id = models.CharField(max_length=64, blank=True, help_text="Progress is published to ws/agent/traces/<trace_id>/.")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}#{self.pk} ({self.status})"
+
+
+class TenantRefreshState(models.Model):
+    """
+    Per-business bookkeeping for fleet refresh tasks (see core.fleet_refresh).
+
+    `fingerprint` is the data fingerprint seen at the last successful refresh,
+    so unchanged workspaces can be skipped; `last_run_id` marks the business as
+    done for that run, which is what lets an interrupted run resume.
+    """
+
+    class Outcome(models.TextChoices):
+        REFRESHED = "refreshed", "Refreshed"
+        SKIPPED = "skipped", "Skipped (unchanged)"
+        INELIGIBLE = "ineligible", "Ineligible"
+        ERROR = "error", "Error"
+
+    task = models.CharField(max_length=64)
+    business = models.ForeignKey(
+        "core.Business",
+        on_delete=models.CASCADE,
+        related_name="refresh_states",
+    )
+    fingerprint = models.CharField(max_length=64, blank=True)
+    last_run_id = models.CharField(max_length=64, blank=True)
+    last_outcome = models.CharField(max_length=16, choices=Outcome.choices, blank=True)
+    last_duration_ms = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task", "business"], name="uniq_refresh_state_per_task_business"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task} for {self.business_id}: {self.last_outcome or 'never run'}"
+
+
+class RequestLatencySample(models.Model):
+    """
+    One worker's request timings for one route during one minute.
+
+    Written in batches by core.request_metrics; `histogram` holds sparse
+    log-linear bucket counts ({bucket_index: count}) so percentiles can be
+    computed by merging rows across workers and minutes.
+    """
+
+    minute = models.DateTimeField()
+    route = models.CharField(max_length=255)
+    method = models.CharField(max_length=8)
+    worker = models.CharField(max_length=128, blank=True)
+    request_count = models.PositiveIntegerField(default=0)
+    status_2xx = models.PositiveIntegerField(default=0)
+    status_3xx = models.PositiveIntegerField(default=0)
+    status_4xx = models.PositiveIntegerField(default=0)
+    status_5xx = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    query_count = models.PositiveIntegerField(default=0)
+    histogram = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["minute"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.route} @ {self.minute:%Y-%m-%d %H:%M} ({self.request_count})"
+
+
 class ReconciliationSession(models.Model):
     class Status(models.TextChoices):
         DRAFT = "DRAFT", "Draft"
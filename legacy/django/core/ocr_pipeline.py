@@ -0,0 +1,205 @@
+"""
+Concurrent OCR extraction stage for the receipts and invoices workflows.
+
+Vision OCR is a slow network round-trip per document. This module runs the
+round-trips on a bounded thread pool and hands results back in input order,
+so the workflows can keep their per-document loops unchanged:
+
+- Per-provider rate limiting (token bucket shared by all threads).
+- Retry with exponential backoff and jitter around each vision call.
+- A content-hash cache: identical file bytes are OCR'd once, even when the
+  same file is uploaded twice in one batch or across batches.
+
+Tunables live in settings (OCR_MAX_CONCURRENCY, OCR_REQUESTS_PER_SECOND,
+OCR_MAX_ATTEMPTS, OCR_RETRY_BASE_DELAY_SECONDS, OCR_CACHE_TTL_SECONDS).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Setting that must be non-empty for a provider to be worth retrying against.
+_PROVIDER_KEY_SETTINGS = {
+    "openai": "OPENAI_API_KEY",
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_RATE_LIMITERS: dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Process-wide limiter for a provider, shared across workflow runs."""
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(getattr(settings, "OCR_REQUESTS_PER_SECOND", 5))
+            _RATE_LIMITERS[provider] = limiter
+        return limiter
+
+
+def call_vision_with_retry(call: Callable[..., str | None], *, provider: str = "openai", **kwargs) -> str | None:
+    """
+    Call a vision helper under the provider's rate limit, retrying failures.
+
+    The vision helpers log and return None on HTTP errors and timeouts, so an
+    empty response is treated as retryable. When the provider is not
+    configured at all there is nothing to retry, so only one attempt is made.
+    Exceptions are re-raised after the last attempt.
+    """
+    key_setting = _PROVIDER_KEY_SETTINGS.get(provider)
+    configured = not key_setting or bool(getattr(settings, key_setting, ""))
+    attempts = max(1, int(getattr(settings, "OCR_MAX_ATTEMPTS", 3))) if configured else 1
+    base_delay = float(getattr(settings, "OCR_RETRY_BASE_DELAY_SECONDS", 1.0))
+    limiter = get_rate_limiter(provider)
+
+    last_exc: Exception | None = None
+    for attempt in range(attempts):
+        limiter.acquire()
+        try:
+            response = call(**kwargs)
+            last_exc = None
+        except Exception as exc:
+            response = None
+            last_exc = exc
+        if response:
+            return response
+        if attempt + 1 < attempts:
+            delay = base_delay * (2 ** attempt)
+            time.sleep(delay + random.uniform(0, delay / 2))
+            logger.info("[ocr] Retrying %s vision call (attempt %s/%s)", provider, attempt + 2, attempts)
+    if last_exc is not None:
+        raise last_exc
+    return None
+
+
+@dataclass
+class OcrDocument:
+    storage_key: str
+    original_filename: str | None = None
+
+
+@dataclass
+class OcrOutcome:
+    data: dict | None = None
+    error: str | None = None
+    cache_hit: bool = False
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _read_bytes(storage_key: str) -> bytes | None:
+    try:
+        with default_storage.open(storage_key, "rb") as f:
+            return f.read()
+    except Exception as exc:
+        logger.warning("Failed to read file %s: %s", storage_key, exc)
+        return None
+
+
+class _InFlight:
+    """Lets concurrent tasks for identical bytes share one OCR call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+
+    def claim(self, key: str) -> tuple[Future, bool]:
+        """Return (future, owner). Only the owner performs the extraction."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._futures[key] = future
+            return future, True
+
+
+def extract_documents_concurrently(
+    documents: Sequence[OcrDocument],
+    extract_from_bytes: Callable[[bytes, str | None, str], dict | None],
+    *,
+    kind: str,
+    max_workers: int | None = None,
+) -> list[OcrOutcome]:
+    """
+    OCR `documents` on a bounded thread pool; outcomes are in input order.
+
+    `extract_from_bytes(file_bytes, original_filename, storage_key)` performs
+    one extraction. `kind` namespaces the content-hash cache so a receipt and
+    an invoice parse of the same bytes do not collide.
+    """
+    if not documents:
+        return []
+    workers = max_workers or int(getattr(settings, "OCR_MAX_CONCURRENCY", 4))
+    workers = max(1, min(workers, len(documents)))
+    ttl = int(getattr(settings, "OCR_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+    inflight = _InFlight()
+
+    def _extract_one(doc: OcrDocument) -> OcrOutcome:
+        file_bytes = _read_bytes(doc.storage_key)
+        if file_bytes is None:
+            return OcrOutcome()
+        cache_key = f"ocr:{kind}:{content_hash(file_bytes)}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return OcrOutcome(data=cached, cache_hit=True)
+
+        future, owner = inflight.claim(cache_key)
+        if not owner:
+            shared = future.result()
+            return OcrOutcome(data=shared.data, error=shared.error, cache_hit=shared.data is not None)
+
+        try:
+            data = extract_from_bytes(file_bytes, doc.original_filename, doc.storage_key)
+            outcome = OcrOutcome(data=data)
+            if data:
+                cache.set(cache_key, data, timeout=ttl)
+        except Exception as exc:
+            outcome = OcrOutcome(error=str(exc))
+        future.set_result(outcome)
+        return outcome
+
+    if workers == 1:
+        return [_extract_one(doc) for doc in documents]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ocr-{kind}") as pool:
+        return list(pool.map(_extract_one, documents))
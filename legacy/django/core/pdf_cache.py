@@ -0,0 +1,222 @@
+"""
+Content-addressed cache and batch export for invoice/expense PDFs.
+
+A PDF is stored in `default_storage` under a key that includes a version hash
+of its render context (every field the PDF shows, including business name and
+currency) plus the template version from core.pdf_utils. Any edit that changes
+the rendered output changes the hash, so there is no invalidation step. Each
+document has its own directory, and writing a new version deletes the
+document's other versions there, so storage holds one PDF per document.
+
+Batch exports render cache misses on a process pool (reportlab is CPU-bound
+and holds the GIL) and stream the results into a ZIP archive as they finish.
+
+Tunables live in settings (PDF_CACHE_PREFIX, PDF_EXPORT_MAX_WORKERS,
+PDF_EXPORT_MIN_PARALLEL).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Sequence
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .pdf_utils import (
+    EXPENSE_PDF_TEMPLATE_VERSION,
+    INVOICE_PDF_TEMPLATE_VERSION,
+    expense_pdf_context,
+    invoice_pdf_context,
+    render_expense_pdf,
+    render_invoice_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PdfKind:
+    name: str
+    template_version: int
+    build_context: Callable[[object], dict]
+    render: Callable[[dict], bytes]
+    filename: Callable[[object], str]
+
+
+INVOICE_PDF = PdfKind(
+    name="invoice",
+    template_version=INVOICE_PDF_TEMPLATE_VERSION,
+    build_context=invoice_pdf_context,
+    render=render_invoice_pdf,
+    filename=lambda invoice: f"Invoice-{getattr(invoice, 'invoice_number', None) or invoice.pk}.pdf",
+)
+
+EXPENSE_PDF = PdfKind(
+    name="expense",
+    template_version=EXPENSE_PDF_TEMPLATE_VERSION,
+    build_context=expense_pdf_context,
+    render=render_expense_pdf,
+    filename=lambda expense: f"Expense-{expense.pk}.pdf",
+)
+
+
+@dataclass
+class PdfJob:
+    """One document to render: its context, cache key and archive name."""
+    filename: str
+    context: dict
+    storage_key: str
+
+
+def pdf_version(kind: PdfKind, context: dict) -> str:
+    payload = json.dumps(context, sort_keys=True, default=str)
+    digest = hashlib.sha256(f"{kind.name}:{kind.template_version}:{payload}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _storage_key(kind: PdfKind, obj, context: dict) -> str:
+    prefix = getattr(settings, "PDF_CACHE_PREFIX", "pdf-cache")
+    return f"{prefix}/{kind.name}s/{obj.business_id}/{obj.pk}/{pdf_version(kind, context)}.pdf"
+
+
+def build_pdf_job(kind: PdfKind, obj) -> PdfJob:
+    context = kind.build_context(obj)
+    return PdfJob(filename=kind.filename(obj), context=context, storage_key=_storage_key(kind, obj, context))
+
+
+def _read_cached(storage_key: str, storage) -> bytes | None:
+    try:
+        if not storage.exists(storage_key):
+            return None
+        with storage.open(storage_key, "rb") as f:
+            return f.read()
+    except Exception as exc:
+        logger.warning("Could not read cached PDF %s: %s", storage_key, exc)
+        return None
+
+
+def _write_cached(storage_key: str, content: bytes, storage) -> None:
+    try:
+        if not storage.exists(storage_key):
+            storage.save(storage_key, ContentFile(content))
+            _evict_other_versions(storage_key, storage)
+    except Exception as exc:  # a cache write failure must not fail the download
+        logger.warning("Could not cache PDF %s: %s", storage_key, exc)
+
+
+def _evict_other_versions(storage_key: str, storage) -> None:
+    """Delete the document's previously cached versions (siblings of `storage_key`)."""
+    directory, current = posixpath.split(storage_key)
+    _, files = storage.listdir(directory)
+    for name in files:
+        if name != current:
+            storage.delete(posixpath.join(directory, name))
+
+
+def get_pdf_bytes(kind: PdfKind, obj, *, storage=None) -> bytes:
+    """Return the PDF for `obj`, rendering and caching it on a miss."""
+    storage = storage or default_storage
+    job = build_pdf_job(kind, obj)
+    cached = _read_cached(job.storage_key, storage)
+    if cached is not None:
+        return cached
+    content = kind.render(job.context)
+    _write_cached(job.storage_key, content, storage)
+    return content
+
+
+def get_invoice_pdf_bytes(invoice, *, storage=None) -> bytes:
+    return get_pdf_bytes(INVOICE_PDF, invoice, storage=storage)
+
+
+def get_expense_pdf_bytes(expense, *, storage=None) -> bytes:
+    return get_pdf_bytes(EXPENSE_PDF, expense, storage=storage)
+
+
+def render_pdf_jobs(
+    kind: PdfKind,
+    jobs: Sequence[PdfJob],
+    *,
+    storage=None,
+    max_workers: int | None = None,
+) -> Iterator[tuple[PdfJob, bytes]]:
+    """
+    Yield (job, pdf_bytes) in input order.
+
+    Cache hits are served from storage; misses are rendered on a process pool
+    when there are enough of them to amortise worker start-up, inline
+    otherwise. Rendered PDFs are written back to the cache.
+    """
+    storage = storage or default_storage
+    workers = max_workers or int(getattr(settings, "PDF_EXPORT_MAX_WORKERS", 4))
+    workers = min(workers, os.cpu_count() or 1)
+    min_parallel = int(getattr(settings, "PDF_EXPORT_MIN_PARALLEL", 4))
+
+    cached = [_read_cached(job.storage_key, storage) for job in jobs]
+    misses = [job for job, content in zip(jobs, cached) if content is None]
+
+    if workers > 1 and len(misses) >= min_parallel:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(misses)))
+        rendered = pool.map(kind.render, [job.context for job in misses], chunksize=4)
+    else:
+        pool = None
+        rendered = (kind.render(job.context) for job in misses)
+
+    try:
+        for job, content in zip(jobs, cached):
+            if content is None:
+                content = next(rendered)
+                _write_cached(job.storage_key, content, storage)
+            yield job, content
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _ChunkBuffer:
+    """Write-only file object that hands written bytes back in chunks."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_pdf_zip(entries: Iterable[tuple[PdfJob, bytes]]) -> Iterator[bytes]:
+    """Stream a ZIP archive of the given PDFs without buffering it whole."""
+    buffer = _ChunkBuffer()
+    seen: dict[str, int] = {}
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for job, content in entries:
+            name = job.filename
+            if name in seen:
+                seen[name] += 1
+                stem, _, ext = name.rpartition(".")
+                name = f"{stem}-{seen[name]}.{ext}"
+            else:
+                seen[name] = 0
+            archive.writestr(name, content)
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    tail = buffer.drain()
+    if tail:
+        yield tail
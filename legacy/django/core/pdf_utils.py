@@ -1,186 +1,218 @@
 """
 Pure-Python PDF generation using reportlab.
 Replaces WeasyPrint which requires system libraries.
+
+Rendering is split in two: `*_pdf_context()` reads a model into a plain dict
+of display strings, and `render_*_pdf()` turns that dict into PDF bytes. The
+context is what core.pdf_cache hashes for its cache key, and being plain data
+it can be shipped to worker processes for batch exports.
 """
 import io
 from decimal import Decimal
+from functools import lru_cache
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
+# Bump when the layout of a document changes so cached PDFs are re-rendered.
+INVOICE_PDF_TEMPLATE_VERSION = 1
+EXPENSE_PDF_TEMPLATE_VERSION = 1
 
-def generate_invoice_pdf(invoice) -> io.BytesIO:
-    """Generate PDF for an invoice using reportlab."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+DATE_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#64748b')),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+])
+
+AMOUNT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('LINEABOVE', (0, -1), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('TOPPADDING', (0, -1), (-1, -1), 8),
+])
+
+
+@lru_cache(maxsize=None)
+def _paragraph_styles(title_color: str) -> tuple:
+    """(title, header, value) styles; built once per process per title colour."""
     styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#0f172a'))
+    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor(title_color))
     header_style = ParagraphStyle('Header', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#64748b'))
     value_style = ParagraphStyle('Value', parent=styles['Normal'], fontSize=12, textColor=colors.HexColor('#0f172a'))
-    
+    return title_style, header_style, value_style
+
+
+def _fmt_date(value) -> str:
+    return value.strftime('%b %d, %Y') if value else '-'
+
+
+def invoice_pdf_context(invoice) -> dict:
+    """Everything generate_invoice_pdf renders, as plain strings."""
+    business = invoice.business
+    customer = invoice.customer
+    currency = getattr(business, 'currency', 'CAD') or 'CAD'
+    amounts = [
+        ['Subtotal', f"{invoice.net_total or invoice.total_amount:.2f} {currency}"],
+        ['Tax', f"{invoice.tax_total or Decimal('0.00'):.2f} {currency}"],
+        ['Total', f"{invoice.grand_total or invoice.total_amount:.2f} {currency}"],
+    ]
+    if invoice.status == 'PAID':
+        amounts.append(['Amount Paid', f"{invoice.amount_paid:.2f} {currency}"])
+        amounts.append(['Balance Due', f"{invoice.balance:.2f} {currency}"])
+    return {
+        "invoice_number": str(invoice.invoice_number),
+        "business_name": business.name,
+        "customer_name": customer.name,
+        "customer_email": customer.email or "",
+        "issue_date": _fmt_date(invoice.issue_date),
+        "due_date": _fmt_date(invoice.due_date),
+        "status": str(invoice.get_status_display()),
+        "description": invoice.description or "",
+        "amounts": amounts,
+        "notes": invoice.notes or "",
+    }
+
+
+def render_invoice_pdf(ctx: dict) -> bytes:
+    """Render an invoice context (see invoice_pdf_context) to PDF bytes."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    title_style, header_style, value_style = _paragraph_styles('#0f172a')
+
     elements = []
-    
+
     # Header
-    business = invoice.business
-    elements.append(Paragraph(f"INVOICE", title_style))
+    elements.append(Paragraph("INVOICE", title_style))
     elements.append(Spacer(1, 6))
-    elements.append(Paragraph(f"#{invoice.invoice_number}", header_style))
+    elements.append(Paragraph(f"#{ctx['invoice_number']}", header_style))
     elements.append(Spacer(1, 20))
-    
+
     # Business info
-    elements.append(Paragraph(f"<b>From:</b> {business.name}", value_style))
+    elements.append(Paragraph(f"<b>From:</b> {ctx['business_name']}", value_style))
     elements.append(Spacer(1, 12))
-    
+
     # Customer info
-    customer = invoice.customer
-    elements.append(Paragraph(f"<b>Bill To:</b>", header_style))
-    elements.append(Paragraph(f"{customer.name}", value_style))
-    if customer.email:
-        elements.append(Paragraph(f"{customer.email}", header_style))
+    elements.append(Paragraph("<b>Bill To:</b>", header_style))
+    elements.append(Paragraph(ctx['customer_name'], value_style))
+    if ctx['customer_email']:
+        elements.append(Paragraph(ctx['customer_email'], header_style))
     elements.append(Spacer(1, 20))
-    
+
     # Dates table
     date_data = [
         ['Issue Date', 'Due Date', 'Status'],
-        [
-            invoice.issue_date.strftime('%b %d, %Y') if invoice.issue_date else '-',
-            invoice.due_date.strftime('%b %d, %Y') if invoice.due_date else '-',
-            invoice.get_status_display()
-        ]
+        [ctx['issue_date'], ctx['due_date'], ctx['status']],
     ]
     date_table = Table(date_data, colWidths=[2*inch, 2*inch, 2*inch])
-    date_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#64748b')),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ]))
+    date_table.setStyle(DATE_TABLE_STYLE)
     elements.append(date_table)
     elements.append(Spacer(1, 20))
-    
+
     # Description
-    if invoice.description:
-        elements.append(Paragraph(f"<b>Description:</b>", header_style))
-        elements.append(Paragraph(invoice.description, value_style))
+    if ctx['description']:
+        elements.append(Paragraph("<b>Description:</b>", header_style))
+        elements.append(Paragraph(ctx['description'], value_style))
         elements.append(Spacer(1, 20))
-    
+
     # Amounts
-    currency = getattr(business, 'currency', 'CAD') or 'CAD'
-    amounts = [
-        ['Subtotal', f"{invoice.net_total or invoice.total_amount:.2f} {currency}"],
-        ['Tax', f"{invoice.tax_total or Decimal('0.00'):.2f} {currency}"],
-        ['Total', f"{invoice.grand_total or invoice.total_amount:.2f} {currency}"],
-    ]
-    
-    if invoice.status == 'PAID':
-        amounts.append(['Amount Paid', f"{invoice.amount_paid:.2f} {currency}"])
-        amounts.append(['Balance Due', f"{invoice.balance:.2f} {currency}"])
-    
-    amount_table = Table(amounts, colWidths=[4*inch, 2*inch])
-    amount_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-        ('TOPPADDING', (0, -1), (-1, -1), 8),
-    ]))
+    amount_table = Table(ctx['amounts'], colWidths=[4*inch, 2*inch])
+    amount_table.setStyle(AMOUNT_TABLE_STYLE)
     elements.append(amount_table)
-    
+
     # Notes
-    if invoice.notes:
+    if ctx['notes']:
         elements.append(Spacer(1, 30))
-        elements.append(Paragraph(f"<b>Notes:</b>", header_style))
-        elements.append(Paragraph(invoice.notes, value_style))
-    
+        elements.append(Paragraph("<b>Notes:</b>", header_style))
+        elements.append(Paragraph(ctx['notes'], value_style))
+
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
 
 
-def generate_expense_pdf(expense) -> io.BytesIO:
-    """Generate PDF for an expense using reportlab."""
+def generate_invoice_pdf(invoice) -> io.BytesIO:
+    """Generate PDF for an invoice using reportlab."""
+    return io.BytesIO(render_invoice_pdf(invoice_pdf_context(invoice)))
+
+
+def expense_pdf_context(expense) -> dict:
+    """Everything generate_expense_pdf renders, as plain strings."""
+    business = expense.business
+    currency = getattr(business, 'currency', 'CAD') or 'CAD'
+    return {
+        "expense_id": expense.pk,
+        "business_name": business.name,
+        "supplier_name": expense.supplier.name if expense.supplier else "",
+        "category_name": expense.category.name if expense.category else "",
+        "date": _fmt_date(expense.date),
+        "status": str(expense.get_status_display()),
+        "description": expense.description or "",
+        "amounts": [
+            ['Amount', f"{expense.amount:.2f} {currency}"],
+            ['Tax', f"{expense.tax_amount or Decimal('0.00'):.2f} {currency}"],
+            ['Total', f"{expense.grand_total or expense.amount:.2f} {currency}"],
+        ],
+    }
+
+
+def render_expense_pdf(ctx: dict) -> bytes:
+    """Render an expense context (see expense_pdf_context) to PDF bytes."""
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#dc2626'))
-    header_style = ParagraphStyle('Header', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#64748b'))
-    value_style = ParagraphStyle('Value', parent=styles['Normal'], fontSize=12, textColor=colors.HexColor('#0f172a'))
-    
+    title_style, header_style, value_style = _paragraph_styles('#dc2626')
+
     elements = []
-    
+
     # Header
-    business = expense.business
-    elements.append(Paragraph(f"EXPENSE", title_style))
+    elements.append(Paragraph("EXPENSE", title_style))
     elements.append(Spacer(1, 6))
-    elements.append(Paragraph(f"#{expense.pk}", header_style))
+    elements.append(Paragraph(f"#{ctx['expense_id']}", header_style))
     elements.append(Spacer(1, 20))
-    
+
     # Business info
-    elements.append(Paragraph(f"<b>Business:</b> {business.name}", value_style))
+    elements.append(Paragraph(f"<b>Business:</b> {ctx['business_name']}", value_style))
     elements.append(Spacer(1, 12))
-    
+
     # Supplier info
-    if expense.supplier:
-        elements.append(Paragraph(f"<b>Supplier:</b> {expense.supplier.name}", value_style))
+    if ctx['supplier_name']:
+        elements.append(Paragraph(f"<b>Supplier:</b> {ctx['supplier_name']}", value_style))
         elements.append(Spacer(1, 12))
-    
+
     # Category
-    if expense.category:
-        elements.append(Paragraph(f"<b>Category:</b> {expense.category.name}", value_style))
+    if ctx['category_name']:
+        elements.append(Paragraph(f"<b>Category:</b> {ctx['category_name']}", value_style))
         elements.append(Spacer(1, 12))
-    
+
     # Date and Status
     date_data = [
         ['Date', 'Status'],
-        [
-            expense.date.strftime('%b %d, %Y') if expense.date else '-',
-            expense.get_status_display()
-        ]
+        [ctx['date'], ctx['status']],
     ]
     date_table = Table(date_data, colWidths=[3*inch, 3*inch])
-    date_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#64748b')),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ]))
+    date_table.setStyle(DATE_TABLE_STYLE)
     elements.append(date_table)
     elements.append(Spacer(1, 20))
-    
+
     # Description
-    if expense.description:
-        elements.append(Paragraph(f"<b>Description:</b>", header_style))
-        elements.append(Paragraph(expense.description, value_style))
+    if ctx['description']:
+        elements.append(Paragraph("<b>Description:</b>", header_style))
+        elements.append(Paragraph(ctx['description'], value_style))
         elements.append(Spacer(1, 20))
-    
+
     # Amounts
-    currency = getattr(business, 'currency', 'CAD') or 'CAD'
-    amounts = [
-        ['Amount', f"{expense.amount:.2f} {currency}"],
-        ['Tax', f"{expense.tax_amount or Decimal('0.00'):.2f} {currency}"],
-        ['Total', f"{expense.grand_total or expense.amount:.2f} {currency}"],
-    ]
-    
-    amount_table = Table(amounts, colWidths=[4*inch, 2*inch])
-    amount_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-        ('TOPPADDING', (0, -1), (-1, -1), 8),
-    ]))
+    amount_table = Table(ctx['amounts'], colWidths=[4*inch, 2*inch])
+    amount_table.setStyle(AMOUNT_TABLE_STYLE)
     elements.append(amount_table)
-    
+
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
+
+
+def generate_expense_pdf(expense) -> io.BytesIO:
+    """Generate PDF for an expense using reportlab."""
+    return io.BytesIO(render_expense_pdf(expense_pdf_context(expense)))
@@ -230,6 +230,9 @@ PERMISSIONS: dict[str, Set[Role]] = {
 #    Permission Utilities
 # ─────────────────────────────────────────────────────────────────────────────
 
+_UNSET = object()
+
+
 def get_membership(request: "HttpRequest") -> Optional["WorkspaceMembership"]:
     """
     Get the current user's workspace membership.
@@ -241,11 +244,16 @@ def get_membership(request: "HttpRequest") -> Optional["WorkspaceMembership"]:
     
     from .models import WorkspaceMembership
     
+    # Memoized for the request: views and decorators ask repeatedly.
+    cached = getattr(request, "_workspace_membership", _UNSET)
+    if cached is not _UNSET:
+        return cached
+
     # Get the user's active membership (for now, first one)
     # Future: support switching workspaces
     # Wrapped in try/except for resilience during migration rollout
     try:
-        return (
+        membership = (
             WorkspaceMembership.objects
             .filter(user=user, is_active=True)
             .select_related("business")
@@ -253,6 +261,8 @@ def get_membership(request: "HttpRequest") -> Optional["WorkspaceMembership"]:
         )
     except Exception:
         return None
+    request._workspace_membership = membership
+    return membership
 
 
 def get_user_role(request: "HttpRequest") -> Optional[Role]:
@@ -1,12 +1,40 @@
+"""
+RBAC v2 permission evaluation.
+
+Every check resolves a `PermissionPolicy`: the user's effective membership,
+role permissions and overrides for one business. Policies are built with a few
+queries and then reused:
+
+- per request, memoized on the user object (request.user lives for one request),
+- across requests, in the Django cache under a per-business policy version that
+  `WorkspaceMembership`, `RoleDefinition` and `UserPermissionOverride`
+  post_save/post_delete bump (core.signals); queryset `update()` bypasses
+  signals and must call `invalidate_permission_cache()` itself. Only when the
+  default cache is shared by all processes: with the per-process local-memory
+  cache a revoked membership or new DENY override would keep being applied by
+  every other worker, so policies are then reloaded on each request,
+- businesses with RBAC writes in the current, uncommitted transaction are
+  always read from the database and never cached.
+
+With a policy in hand, `evaluate_permission()` / `can()` are dictionary lookups.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
 from functools import wraps
 from typing import Any, Literal, Optional
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.http import JsonResponse
+from django.utils import timezone
 
 from .permissions_registry import equivalent_actions, is_sensitive_action
+from .utils import shared_cache_configured
 
 PermissionLevel = Literal["none", "view", "edit", "approve"]
 
@@ -81,10 +109,9 @@ def _resolve_role_definition(membership):
     return RoleDefinition.objects.filter(business_id=membership.business_id, key=membership.role).first()
 
 
-def _get_role_entry(role_def, action: str) -> tuple[PermissionLevel, dict[str, Any]]:
-    if not role_def:
+def _get_role_entry(permissions: Optional[dict], action: str) -> tuple[PermissionLevel, dict[str, Any]]:
+    if permissions is None:
         return "none", {"type": "all"}
-    permissions = role_def.permissions or {}
     for candidate in equivalent_actions(action):
         entry = permissions.get(candidate)
         if isinstance(entry, dict):
@@ -94,16 +121,177 @@ def _get_role_entry(role_def, action: str) -> tuple[PermissionLevel, dict[str, A
     return "none", {"type": "all"}
 
 
-def _get_override_entry(membership, action: str):
-    if not membership:
-        return None
-    from .models import UserPermissionOverride
+@dataclass(frozen=True)
+class MembershipScope:
+    """The membership attributes scope checks read (see `_scope_allows`)."""
 
-    return (
-        UserPermissionOverride.objects.filter(membership=membership, action__in=equivalent_actions(action))
-        .order_by("id")
-        .first()
-    )
+    user_id: int
+    attributes: Any
+    department: str
+
+
+@dataclass(frozen=True)
+class OverrideEntry:
+    id: int
+    action: str
+    effect: str
+    level_override: Optional[str]
+    scope_override: Any
+
+
+@dataclass(frozen=True)
+class PermissionPolicy:
+    """Effective RBAC inputs of one user in one business."""
+
+    membership: Optional[MembershipScope] = None
+    role: str = ""
+    expires_at: Optional[datetime] = None
+    # None when the membership has no role definition (RBAC v1 fallback).
+    role_permissions: Optional[dict] = None
+    # action -> overrides for that action, oldest first.
+    overrides: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, user, business) -> "PermissionPolicy":
+        from .models import UserPermissionOverride
+
+        membership = _resolve_membership(user, business)
+        if membership is None:
+            return NO_ACCESS
+        role_def = _resolve_role_definition(membership)
+        overrides: dict[str, list[OverrideEntry]] = {}
+        rows = UserPermissionOverride.objects.filter(membership=membership).order_by("id").values_list(
+            "id", "action", "effect", "level_override", "scope_override"
+        )
+        for row in rows:
+            entry = OverrideEntry(*row)
+            overrides.setdefault(entry.action, []).append(entry)
+        return cls(
+            membership=MembershipScope(
+                user_id=membership.user_id,
+                attributes=membership.attributes,
+                department=membership.department,
+            ),
+            role=membership.role,
+            expires_at=membership.expires_at,
+            role_permissions=dict(role_def.permissions or {}) if role_def else None,
+            overrides={action: tuple(entries) for action, entries in overrides.items()},
+        )
+
+    @property
+    def is_effective(self) -> bool:
+        if self.membership is None:
+            return False
+        return self.expires_at is None or timezone.now() <= self.expires_at
+
+    def _override_for(self, action: str) -> Optional[OverrideEntry]:
+        candidates = [self.overrides[a][0] for a in equivalent_actions(action) if a in self.overrides]
+        return min(candidates, key=lambda o: o.id) if candidates else None
+
+    def decide(
+        self,
+        action: str,
+        required_level: PermissionLevel = "view",
+        context: Optional[dict[str, Any]] = None,
+    ) -> PermissionDecision:
+        required_level = _normalize_level(required_level)
+        if not self.is_effective:
+            return PermissionDecision(
+                allowed=_level_gte("none", required_level),
+                level="none",
+                mask_sensitive=is_sensitive_action(action),
+            )
+        membership = self.membership
+
+        base_level, base_scope = _get_role_entry(self.role_permissions, action)
+        if self.role_permissions is None:
+            # Backwards-compatible fallback to RBAC v1 mapping when role definitions
+            # have not been created yet for a business.
+            try:
+                from .permissions import PERMISSIONS, Role
+                from .rbac_seeding import ACTION_CANONICAL, guess_level
+
+                user_role = Role(self.role)
+                for candidate in equivalent_actions(action):
+                    allowed_roles = PERMISSIONS.get(candidate)
+                    if allowed_roles and user_role in allowed_roles:
+                        canonical_action = ACTION_CANONICAL.get(candidate, candidate)
+                        base_level = _normalize_level(guess_level(canonical_action))
+                        base_scope = {"type": "all"}
+                        break
+            except Exception:
+                pass
+
+        override = self._override_for(action)
+        if override and override.effect == "DENY":
+            allowed = False
+            level: PermissionLevel = "none"
+            mask_sensitive = is_sensitive_action(action)
+            return PermissionDecision(allowed=allowed, level=level, mask_sensitive=mask_sensitive)
+
+        level = base_level
+        scope = base_scope
+        if override and override.effect == "ALLOW":
+            if override.level_override:
+                level = _normalize_level(override.level_override)
+            elif level == "none":
+                level = "view"
+            if override.scope_override is not None:
+                scope = _as_scope(override.scope_override)
+
+        allowed = _level_gte(level, required_level) and _scope_allows(scope, membership, context)
+        mask_sensitive = is_sensitive_action(action) and not _level_gte(level, "view")
+        return PermissionDecision(allowed=allowed, level=level, mask_sensitive=mask_sensitive)
+
+    def matrix(self) -> dict[str, dict[str, Any]]:
+        if not self.is_effective:
+            return {}
+        permissions = dict(self.role_permissions or {})
+
+        if not permissions:
+            # Backwards-compatible fallback to RBAC v1 mapping.
+            try:
+                from .permissions import PERMISSIONS, Role
+                from .rbac_seeding import ACTION_CANONICAL, guess_level
+
+                user_role = Role(self.role)
+                for action, roles in (PERMISSIONS or {}).items():
+                    if user_role not in roles:
+                        continue
+                    canonical_action = ACTION_CANONICAL.get(action, action)
+                    permissions[canonical_action] = {"level": guess_level(canonical_action), "scope": {"type": "all"}}
+            except Exception:
+                pass
+
+        out: dict[str, dict[str, Any]] = {}
+        for action, entry in permissions.items():
+            if not isinstance(entry, dict):
+                continue
+            level = _normalize_level(entry.get("level"))
+            scope = _as_scope(entry.get("scope"))
+            out[action] = {
+                "level": level,
+                "scope": scope,
+                "allowed_unscoped": _level_gte(level, "view"),
+            }
+
+        # Apply overrides (DENY first, then ALLOW)
+        overrides = sorted((o for entries in self.overrides.values() for o in entries), key=lambda o: o.id)
+        for override in overrides:
+            if override.effect != "DENY":
+                continue
+            out[override.action] = {"level": "none", "scope": {"type": "all"}, "allowed_unscoped": False}
+        for override in overrides:
+            if override.effect != "ALLOW":
+                continue
+            level = _normalize_level(override.level_override) if override.level_override else "view"
+            scope = _as_scope(override.scope_override) if override.scope_override is not None else {"type": "all"}
+            out[override.action] = {"level": level, "scope": scope, "allowed_unscoped": _level_gte(level, "view")}
+
+        return out
+
+
+NO_ACCESS = PermissionPolicy()
 
 
 def _scope_allows(scope: dict[str, Any], membership, context: Optional[dict[str, Any]]) -> bool:
@@ -142,6 +330,97 @@ def _scope_allows(scope: dict[str, Any], membership, context: Optional[dict[str,
     return False
 
 
+_VERSION_KEY = "rbac:version:{business_id}"
+# created_at guards against a reused business id reading another business's policies.
+_POLICY_KEY = "rbac:policy:{business_id}:{created}:{user_id}:{version}"
+_MEMO_ATTR = "_permission_policies"
+
+# Bumped on every RBAC write in this process; request memos from an older
+# generation are discarded.
+_generation = 0
+# Businesses whose RBAC rows changed in this thread's open transaction.
+_uncommitted = threading.local()
+
+
+def _uncommitted_business_ids() -> set:
+    ids = getattr(_uncommitted, "business_ids", None)
+    if ids is None:
+        ids = _uncommitted.business_ids = set()
+    if not connection.in_atomic_block:
+        # The transaction that wrote them has committed or rolled back.
+        ids.clear()
+    return ids
+
+
+def _policy_version(business_id) -> int:
+    key = _VERSION_KEY.format(business_id=business_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_permission_cache(business_id) -> None:
+    global _generation
+    _generation += 1
+    key = _VERSION_KEY.format(business_id=business_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def permissions_changed(business_id) -> None:
+    """Called from membership/role/override post_save and post_delete."""
+    invalidate_permission_cache(business_id)
+    if connection.in_atomic_block:
+        _uncommitted_business_ids().add(business_id)
+
+        def committed():
+            _uncommitted_business_ids().discard(business_id)
+            invalidate_permission_cache(business_id)
+
+        transaction.on_commit(committed)
+
+
+def get_permission_policy(user, business) -> PermissionPolicy:
+    """Return the user's `PermissionPolicy` for the business (memoized and cached)."""
+    if not user or not getattr(user, "is_authenticated", False) or not business:
+        return NO_ACCESS
+    business_id = business.pk
+    if business_id in _uncommitted_business_ids():
+        return PermissionPolicy.load(user, business)
+
+    memo = getattr(user, _MEMO_ATTR, None)
+    if memo is None or memo[0] != _generation:
+        memo = (_generation, {})
+        setattr(user, _MEMO_ATTR, memo)
+    policy = memo[1].get(business_id)
+    if policy is not None:
+        return policy
+    if not shared_cache_configured():
+        policy = memo[1][business_id] = PermissionPolicy.load(user, business)
+        return policy
+
+    created_at = getattr(business, "created_at", None)
+    key = _POLICY_KEY.format(
+        business_id=business_id,
+        created=created_at.timestamp() if created_at else "",
+        user_id=user.pk,
+        version=_policy_version(business_id),
+    )
+    policy = cache.get(key)
+    if not isinstance(policy, PermissionPolicy):
+        policy = PermissionPolicy.load(user, business)
+        if business_id in _uncommitted_business_ids():
+            # Loading seeded role definitions inside an open transaction.
+            return policy
+        cache.set(key, policy, timeout=getattr(settings, "PERMISSION_CACHE_TIMEOUT", 3600))
+    memo[1][business_id] = policy
+    return policy
+
+
 def evaluate_permission(
     user,
     business,
@@ -152,49 +431,7 @@ def evaluate_permission(
     """
     Central RBAC v2 evaluation (role definition + overrides + scope).
     """
-    required_level = _normalize_level(required_level)
-    membership = _resolve_membership(user, business)
-    role_def = _resolve_role_definition(membership)
-
-    base_level, base_scope = _get_role_entry(role_def, action)
-    if role_def is None and membership:
-        # Backwards-compatible fallback to RBAC v1 mapping when role definitions
-        # have not been created yet for a business.
-        try:
-            from .permissions import PERMISSIONS, Role
-            from .rbac_seeding import ACTION_CANONICAL, guess_level
-
-            user_role = Role(membership.role)
-            for candidate in equivalent_actions(action):
-                allowed_roles = PERMISSIONS.get(candidate)
-                if allowed_roles and user_role in allowed_roles:
-                    canonical_action = ACTION_CANONICAL.get(candidate, candidate)
-                    base_level = _normalize_level(guess_level(canonical_action))
-                    base_scope = {"type": "all"}
-                    break
-        except Exception:
-            pass
-
-    override = _get_override_entry(membership, action)
-    if override and override.effect == "DENY":
-        allowed = False
-        level: PermissionLevel = "none"
-        mask_sensitive = is_sensitive_action(action)
-        return PermissionDecision(allowed=allowed, level=level, mask_sensitive=mask_sensitive)
-
-    level = base_level
-    scope = base_scope
-    if override and override.effect == "ALLOW":
-        if override.level_override:
-            level = _normalize_level(override.level_override)
-        elif level == "none":
-            level = "view"
-        if override.scope_override is not None:
-            scope = _as_scope(override.scope_override)
-
-    allowed = _level_gte(level, required_level) and _scope_allows(scope, membership, context)
-    mask_sensitive = is_sensitive_action(action) and not _level_gte(level, "view")
-    return PermissionDecision(allowed=allowed, level=level, mask_sensitive=mask_sensitive)
+    return get_permission_policy(user, business).decide(action, required_level, context)
 
 
 def can(user, business, action: str, context: Optional[dict[str, Any]] = None, level: PermissionLevel = "view") -> bool:
@@ -208,54 +445,7 @@ def get_effective_permission_matrix(user, business) -> dict[str, dict[str, Any]]
     This is intended for frontend gating and settings UI; scope enforcement
     still happens per request with context.
     """
-    membership = _resolve_membership(user, business)
-    role_def = _resolve_role_definition(membership)
-    permissions = dict(role_def.permissions or {}) if role_def else {}
-
-    if not permissions and membership:
-        # Backwards-compatible fallback to RBAC v1 mapping.
-        try:
-            from .permissions import PERMISSIONS, Role
-            from .rbac_seeding import ACTION_CANONICAL, guess_level
-
-            user_role = Role(membership.role)
-            for action, roles in (PERMISSIONS or {}).items():
-                if user_role not in roles:
-                    continue
-                canonical_action = ACTION_CANONICAL.get(action, action)
-                permissions[canonical_action] = {"level": guess_level(canonical_action), "scope": {"type": "all"}}
-        except Exception:
-            pass
-
-    out: dict[str, dict[str, Any]] = {}
-    for action, entry in permissions.items():
-        if not isinstance(entry, dict):
-            continue
-        level = _normalize_level(entry.get("level"))
-        scope = _as_scope(entry.get("scope"))
-        out[action] = {
-            "level": level,
-            "scope": scope,
-            "allowed_unscoped": _level_gte(level, "view"),
-        }
-
-    # Apply overrides (DENY first, then ALLOW)
-    if membership:
-        from .models import UserPermissionOverride
-
-        overrides = list(UserPermissionOverride.objects.filter(membership=membership).order_by("id"))
-        for override in overrides:
-            if override.effect != "DENY":
-                continue
-            out[override.action] = {"level": "none", "scope": {"type": "all"}, "allowed_unscoped": False}
-        for override in overrides:
-            if override.effect != "ALLOW":
-                continue
-            level = _normalize_level(override.level_override) if override.level_override else "view"
-            scope = _as_scope(override.scope_override) if override.scope_override is not None else {"type": "all"}
-            out[override.action] = {"level": level, "scope": scope, "allowed_unscoped": _level_gte(level, "view")}
-
-    return out
+    return get_permission_policy(user, business).matrix()
 
 
 def require_permission(action: str, level: PermissionLevel = "view"):
@@ -72,6 +72,7 @@ def ensure_builtin_role_definitions(business) -> None:
     """
     from .models import RoleDefinition
     from .permissions import PERMISSIONS
+    from .permissions_engine import permissions_changed
 
     role_defs_by_key: dict[str, Any] = {}
     for key, label in BUILTIN_ROLE_LABELS.items():
@@ -95,3 +96,4 @@ def ensure_builtin_role_definitions(business) -> None:
                     continue
                 permissions[canonical_action] = {"level": guess_level(canonical_action), "scope": {"type": "all"}}
         RoleDefinition.objects.filter(id=role_def.id).update(permissions=permissions)
+        permissions_changed(business.id)
@@ -0,0 +1,319 @@
+"""
+Request latency and error-rate telemetry.
+
+`RequestTimingMiddleware` (core.middleware) calls `record_request()` for every
+request. Timings are aggregated in-process per (minute, route, method) into
+fixed-size log-linear histograms, HDR style: exact 1 ms buckets below 16 ms,
+then 8 sub-buckets per power of two, so a bucket is never wider than 12.5% of
+its value and a histogram has at most ~150 buckets whatever the traffic.
+
+Every REQUEST_METRICS_FLUSH_SECONDS a background thread per worker process
+writes the pending windows to the rolling `RequestLatencySample` table in one
+bulk insert and, once an hour, prunes rows older than
+REQUEST_METRICS_RETENTION_HOURS, so requests themselves never touch the table. Readers merge rows across workers
+and minutes with `summarize_request_metrics()`, which is what the internal
+admin overview and core.metrics report.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import RequestLatencySample
+
+logger = logging.getLogger(__name__)
+
+SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKETS * 2
+# Anything slower than 10 minutes lands in the last bucket.
+MAX_TRACKED_MS = 10 * 60 * 1000
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def bucket_index(ms: float) -> int:
+    value = min(max(int(ms), 0), MAX_TRACKED_MS)
+    if value < _LINEAR_LIMIT:
+        return value
+    exponent = value.bit_length() - 1
+    sub = (value >> (exponent - SUB_BUCKET_BITS)) & (_SUB_BUCKETS - 1)
+    return _LINEAR_LIMIT + (exponent - SUB_BUCKET_BITS - 1) * _SUB_BUCKETS + sub
+
+
+def bucket_bounds(index: int) -> tuple[int, int]:
+    """[low, high) range of millisecond values counted in `index`."""
+    if index < _LINEAR_LIMIT:
+        return index, index + 1
+    offset = index - _LINEAR_LIMIT
+    exponent = offset // _SUB_BUCKETS + SUB_BUCKET_BITS + 1
+    width = 1 << (exponent - SUB_BUCKET_BITS)
+    low = (1 << exponent) + (offset % _SUB_BUCKETS) * width
+    return low, low + width
+
+
+class LatencyHistogram:
+    """Sparse log-linear histogram of request durations in milliseconds."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.total = 0
+
+    def record(self, ms: float) -> None:
+        index = bucket_index(ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+
+    def merge(self, counts: dict) -> None:
+        """Add bucket counts, e.g. a stored `histogram` JSON (string keys)."""
+        for index, count in counts.items():
+            index = int(index)
+            self.counts[index] = self.counts.get(index, 0) + int(count)
+            self.total += int(count)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile (0 when empty)."""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return float(bucket_bounds(index)[1])
+        return float(bucket_bounds(max(self.counts))[1])
+
+    def to_json(self) -> dict[str, int]:
+        return {str(index): count for index, count in self.counts.items()}
+
+
+@dataclass
+class _Window:
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    request_count: int = 0
+    # 2xx, 3xx, 4xx, 5xx (1xx is counted as 2xx)
+    statuses: list[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    query_count: int = 0
+
+
+class RequestMetricsRecorder:
+    """Per-process accumulator, flushed to RequestLatencySample in batches."""
+
+    def __init__(self, *, flush_seconds: float, retention_hours: int) -> None:
+        self.pid = os.getpid()
+        self.worker = f"{socket.gethostname()}:{self.pid}"[:128]
+        self.flush_seconds = flush_seconds
+        self.retention_hours = retention_hours
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[datetime, str, str], _Window] = {}
+        self._last_prune = time.monotonic()
+        self._flusher: threading.Thread | None = None
+
+    def record(self, route: str, method: str, status_code: int, duration_ms: float, query_count: int = 0) -> None:
+        minute = timezone.now().replace(second=0, microsecond=0)
+        status_slot = min(max(status_code // 100 - 2, 0), 3)
+        with self._lock:
+            window = self._pending.get((minute, route, method))
+            if window is None:
+                window = self._pending[(minute, route, method)] = _Window()
+            window.histogram.record(duration_ms)
+            window.request_count += 1
+            window.statuses[status_slot] += 1
+            window.total_ms += duration_ms
+            window.max_ms = max(window.max_ms, duration_ms)
+            window.query_count += query_count
+
+    def start_flusher(self) -> None:
+        """Start the background flush thread (once per process)."""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, name="request-metrics", daemon=True)
+                self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush request metrics")
+            finally:
+                # Do not hold this thread's connection open between flushes.
+                connection.close()
+
+    def flush(self) -> int:
+        """Write pending windows; returns the number of rows inserted."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        rows = [
+            RequestLatencySample(
+                minute=minute,
+                route=route[:255],
+                method=method[:8],
+                worker=self.worker,
+                request_count=w.request_count,
+                status_2xx=w.statuses[0],
+                status_3xx=w.statuses[1],
+                status_4xx=w.statuses[2],
+                status_5xx=w.statuses[3],
+                total_ms=round(w.total_ms, 3),
+                max_ms=round(w.max_ms, 3),
+                query_count=w.query_count,
+                histogram=w.histogram.to_json(),
+            )
+            for (minute, route, method), w in pending.items()
+        ]
+        if rows:
+            RequestLatencySample.objects.bulk_create(rows, batch_size=500)
+        if time.monotonic() - self._last_prune >= 3600:
+            self._last_prune = time.monotonic()
+            prune_request_metrics(timezone.now() - timedelta(hours=self.retention_hours))
+        return len(rows)
+
+
+_recorder: RequestMetricsRecorder | None = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> RequestMetricsRecorder:
+    global _recorder
+    # A recorder inherited across fork() belongs to the parent process.
+    if _recorder is None or _recorder.pid != os.getpid():
+        with _recorder_lock:
+            if _recorder is None or _recorder.pid != os.getpid():
+                _recorder = RequestMetricsRecorder(
+                    flush_seconds=float(getattr(settings, "REQUEST_METRICS_FLUSH_SECONDS", 30)),
+                    retention_hours=int(getattr(settings, "REQUEST_METRICS_RETENTION_HOURS", 48)),
+                )
+    return _recorder
+
+
+def route_for_request(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    route = getattr(match, "route", None) if match is not None else None
+    # Raw paths of unmatched requests (404 probes) would explode cardinality.
+    return f"/{route}" if route else UNMATCHED_ROUTE
+
+
+def record_request(request, status_code: int, duration_ms: float, query_count: int = 0) -> None:
+    recorder = get_recorder()
+    recorder.record(route_for_request(request), request.method or "", status_code, duration_ms, query_count)
+    recorder.start_flusher()
+
+
+def prune_request_metrics(older_than: datetime) -> int:
+    deleted, _ = RequestLatencySample.objects.filter(minute__lt=older_than).delete()
+    return deleted
+
+
+@dataclass
+class _RouteSummary:
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    queries: int = 0
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole * 100, 2) if whole else 0.0
+
+
+def summarize_request_metrics(
+    since: datetime,
+    until: datetime | None = None,
+    *,
+    top_routes: int = 10,
+) -> dict:
+    """
+    Merge stored samples (plus this process's unflushed ones) since `since`.
+
+    Error rate counts 5xx responses only; 4xx are client errors and reported
+    separately in `by_status`.
+    """
+    try:
+        get_recorder().flush()
+    except Exception as exc:
+        logger.warning("Could not flush request metrics: %s", exc)
+
+    qs = RequestLatencySample.objects.filter(minute__gte=since.replace(second=0, microsecond=0))
+    if until is not None:
+        qs = qs.filter(minute__lte=until)
+
+    totals = qs.aggregate(
+        requests=Sum("request_count"),
+        s2xx=Sum("status_2xx"),
+        s3xx=Sum("status_3xx"),
+        s4xx=Sum("status_4xx"),
+        s5xx=Sum("status_5xx"),
+        total_ms=Sum("total_ms"),
+        queries=Sum("query_count"),
+        max_ms=Max("max_ms"),
+    )
+    total = totals["requests"] or 0
+
+    overall = LatencyHistogram()
+    by_route: dict[tuple[str, str], _RouteSummary] = {}
+    for route, method, histogram, count, errors, total_ms, queries in qs.values_list(
+        "route", "method", "histogram", "request_count", "status_5xx", "total_ms", "query_count"
+    ).iterator():
+        overall.merge(histogram)
+        summary = by_route.get((route, method))
+        if summary is None:
+            summary = by_route[(route, method)] = _RouteSummary()
+        summary.histogram.merge(histogram)
+        summary.requests += count
+        summary.errors += errors
+        summary.total_ms += total_ms
+        summary.queries += queries
+
+    endpoints = [
+        {
+            "route": route,
+            "method": method,
+            "requests": s.requests,
+            "error_rate_pct": _rate(s.errors, s.requests),
+            "avg_response_ms": round(s.total_ms / s.requests, 1) if s.requests else 0.0,
+            "p50_ms": s.histogram.percentile(50),
+            "p95_ms": s.histogram.percentile(95),
+            "p99_ms": s.histogram.percentile(99),
+            "avg_queries": round(s.queries / s.requests, 1) if s.requests else 0.0,
+        }
+        for (route, method), s in by_route.items()
+    ]
+    endpoints.sort(key=lambda e: (e["p95_ms"], e["requests"]), reverse=True)
+
+    return {
+        "total": total,
+        "by_status": {
+            "2xx": totals["s2xx"] or 0,
+            "3xx": totals["s3xx"] or 0,
+            "4xx": totals["s4xx"] or 0,
+            "5xx": totals["s5xx"] or 0,
+        },
+        "error_rate_pct": _rate(totals["s5xx"] or 0, total),
+        "avg_response_ms": round((totals["total_ms"] or 0) / total, 1) if total else 0.0,
+        "max_response_ms": round(totals["max_ms"] or 0, 1),
+        "p50_ms": overall.percentile(50),
+        "p95_ms": overall.percentile(95),
+        "p99_ms": overall.percentile(99),
+        "avg_queries": round((totals["queries"] or 0) / total, 1) if total else 0.0,
+        "endpoints": endpoints[:top_routes],
+    }
@@ -37,7 +37,16 @@ RECONCILED_STATUSES = {
 }
 
 
-def set_reconciled_state(
+RECONCILED_STATE_FIELDS = [
+    "status",
+    "is_reconciled",
+    "reconciliation_status",
+    "reconciled_at",
+    "reconciliation_session",
+]
+
+
+def assign_reconciled_state(
     bank_transaction: BankTransaction,
     *,
     reconciled: bool,
@@ -46,12 +55,10 @@ def set_reconciled_state(
     reconciled_at=None,
 ) -> BankTransaction:
     """
-    Canonical helper to keep reconciliation flags in sync.
+    Apply the set_reconciled_state() rules to the instance without saving it.
 
-    Rules:
-    - A transaction is reconciled only when it belongs to a session AND its status
-      is one of the reconciled statuses.
-    - Switching a transaction between sessions without clearing first is forbidden.
+    Callers that bulk-update many transactions save RECONCILED_STATE_FIELDS
+    themselves.
     """
     if session and bank_transaction.reconciliation_session and bank_transaction.reconciliation_session_id != session.id:
         raise ValidationError("Cannot move a reconciled transaction to a different session without unmatching it first.")
@@ -77,16 +84,33 @@ def set_reconciled_state(
         bank_transaction.is_reconciled = False
         bank_transaction.reconciliation_status = BankTransaction.RECO_STATUS_UNRECONCILED
         bank_transaction.reconciled_at = None
+    return bank_transaction
+
+
+def set_reconciled_state(
+    bank_transaction: BankTransaction,
+    *,
+    reconciled: bool,
+    session: ReconciliationSession | None,
+    status: str | None = None,
+    reconciled_at=None,
+) -> BankTransaction:
+    """
+    Canonical helper to keep reconciliation flags in sync.
 
-    bank_transaction.save(
-        update_fields=[
-            "status",
-            "is_reconciled",
-            "reconciliation_status",
-            "reconciled_at",
-            "reconciliation_session",
-        ]
+    Rules:
+    - A transaction is reconciled only when it belongs to a session AND its status
+      is one of the reconciled statuses.
+    - Switching a transaction between sessions without clearing first is forbidden.
+    """
+    assign_reconciled_state(
+        bank_transaction,
+        reconciled=reconciled,
+        session=session,
+        status=status,
+        reconciled_at=reconciled_at,
     )
+    bank_transaction.save(update_fields=RECONCILED_STATE_FIELDS)
     return bank_transaction
 
 
@@ -463,27 +487,16 @@ class BankReconciliationService:
                 - total_reconciled_amount: Decimal
                 - total_unreconciled_amount: Decimal
         """
-        transactions = BankTransaction.objects.filter(bank_account=bank_account)
-
-        total = transactions.count()
-        reconciled = transactions.exclude(status=BankTransaction.TransactionStatus.NEW).count()
-        unreconciled = total - reconciled
-
-        reconciled_amount = sum(
-            tx.amount
-            for tx in transactions.exclude(status=BankTransaction.TransactionStatus.NEW)
-        )
-        unreconciled_amount = sum(
-            tx.amount for tx in transactions.filter(status=BankTransaction.TransactionStatus.NEW)
-        )
+        from core.services.reconciliation_summary import transaction_totals
 
+        totals = transaction_totals([bank_account.pk])[bank_account.pk]
         return {
-            "total_transactions": total,
-            "reconciled": reconciled,
-            "unreconciled": unreconciled,
-            "total_reconciled_amount": Decimal(str(reconciled_amount)),
-            "total_unreconciled_amount": Decimal(str(unreconciled_amount)),
-            "progress_percent": round((reconciled / total * 100) if total > 0 else 0, 1),
+            "total_transactions": totals.total_count,
+            "reconciled": totals.reconciled_count,
+            "unreconciled": totals.unreconciled_count,
+            "total_reconciled_amount": totals.reconciled_sum,
+            "total_unreconciled_amount": totals.unreconciled_sum,
+            "progress_percent": totals.progress_percent,
         }
 
     @staticmethod
@@ -494,23 +507,13 @@ class BankReconciliationService:
         Returns:
             Dict with session details, matched transactions, adjustments, and discrepancies.
         """
-        from core.models import BankReconciliationMatch
-        
-        # Get all matches in this session
+        from core.services.reconciliation_summary import summarize_sessions
+
         matches = BankReconciliationMatch.objects.filter(
             bank_transaction__reconciliation_session=session
         ).select_related('bank_transaction', 'journal_entry')
-        
-        # Get all transactions in this session
-        transactions = BankTransaction.objects.filter(reconciliation_session=session)
-        
-        # Calculate totals
-        total_matched = transactions.filter(status__in=RECONCILED_STATUSES).count()
-        total_excluded = transactions.filter(status=BankTransaction.TransactionStatus.EXCLUDED).count()
-        
-        deposits = transactions.filter(amount__gt=0)
-        withdrawals = transactions.filter(amount__lt=0)
-        
+        summary = summarize_sessions([session])[session.id]
+
         return {
             "session_id": session.id,
             "account_name": session.bank_account.name,
@@ -520,13 +523,13 @@ class BankReconciliationService:
             "created_at": session.created_at,
             "completed_at": getattr(session, 'completed_at', None),
             "summary": {
-                "total_transactions": transactions.count(),
-                "matched": total_matched,
-                "excluded": total_excluded,
-                "deposit_count": deposits.count(),
-                "withdrawal_count": withdrawals.count(),
-                "total_deposits": sum(tx.amount for tx in deposits),
-                "total_withdrawals": sum(tx.amount for tx in withdrawals),
+                "total_transactions": summary.total_count,
+                "matched": summary.reconciled_count,
+                "excluded": summary.excluded_count,
+                "deposit_count": summary.deposit_count,
+                "withdrawal_count": summary.withdrawal_count,
+                "total_deposits": summary.total_deposits,
+                "total_withdrawals": summary.total_withdrawals,
             },
             "opening_balance": session.opening_balance,
             "ending_balance": session.ending_balance,
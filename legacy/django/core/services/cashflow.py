@@ -0,0 +1,206 @@
+"""
+Cashflow report engine.
+
+Monthly inflows/outflows and top drivers come from grouped SQL over
+BankTransaction (TruncMonth x sign, and category), opening and current cash
+from one aggregate, so a report costs the same handful of queries whatever the
+period length or transaction volume.
+
+Reports are cached per (business, period, comparison period) under a
+per-business version that BankTransaction, BankAccount and Category
+post_save/post_delete bump (core.signals), and only when the default cache
+is shared by all processes: with the per-process local-memory cache other
+workers would keep serving reports that miss new transactions. Writes inside
+an open transaction skip the cache until it commits.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from core.models import BankTransaction
+from core.utils import shared_cache_configured
+
+ZERO = Decimal("0.00")
+TOP_DRIVERS = 5
+
+_VERSION_KEY = "cashflow:version:{business_id}"
+_REPORT_KEY = "cashflow:report:{business_id}:{version}:{start}:{end}:{compare_start}:{compare_end}"
+
+# Businesses whose cash data changed in this thread's open transaction.
+_uncommitted = threading.local()
+
+
+@dataclass
+class CashflowMonth:
+    month: date
+    inflows: Decimal = ZERO
+    outflows: Decimal = ZERO
+
+    @property
+    def net(self) -> Decimal:
+        return self.inflows - self.outflows
+
+
+@dataclass
+class CashflowDriver:
+    label: Optional[str]
+    amount: Decimal
+
+
+@dataclass
+class CashflowPeriod:
+    start: date
+    end: date
+    months: List[CashflowMonth] = field(default_factory=list)
+    drivers: List[CashflowDriver] = field(default_factory=list)
+
+    @property
+    def total_inflows(self) -> Decimal:
+        return sum((m.inflows for m in self.months), ZERO)
+
+    @property
+    def total_outflows(self) -> Decimal:
+        return sum((m.outflows for m in self.months), ZERO)
+
+    @property
+    def net_change(self) -> Decimal:
+        return self.total_inflows - self.total_outflows
+
+
+@dataclass
+class CashflowReport:
+    current: CashflowPeriod
+    comparison: Optional[CashflowPeriod]
+    # Sum of all bank transactions before the period starts, and ever.
+    opening_balance: Decimal
+    current_cash: Decimal
+
+
+def _month_starts(start: date, end: date) -> List[date]:
+    months = []
+    cursor = start.replace(day=1)
+    while cursor <= end:
+        months.append(cursor)
+        cursor = date(cursor.year + cursor.month // 12, cursor.month % 12 + 1, 1)
+    return months
+
+
+def _as_date(value) -> date:
+    # TruncMonth yields a datetime on some backends.
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _period(business, start: date, end: date) -> CashflowPeriod:
+    qs = BankTransaction.objects.filter(bank_account__business=business, date__gte=start, date__lte=end)
+    months = {m: CashflowMonth(month=m) for m in _month_starts(start, end)}
+    rows = (
+        qs.annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(
+            inflows=Sum("amount", filter=Q(amount__gte=0)),
+            outflows=Sum("amount", filter=Q(amount__lt=0)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        bucket = months.get(_as_date(row["month"]))
+        if bucket is None:
+            continue
+        bucket.inflows = row["inflows"] or ZERO
+        bucket.outflows = abs(row["outflows"] or ZERO)
+
+    drivers = [
+        CashflowDriver(label=row["category__name"], amount=row["net"] or ZERO)
+        for row in qs.values("category__name").annotate(net=Sum("amount")).order_by("-net")[:TOP_DRIVERS]
+    ]
+    return CashflowPeriod(start=start, end=end, months=list(months.values()), drivers=drivers)
+
+
+def _uncommitted_business_ids() -> set:
+    ids = getattr(_uncommitted, "business_ids", None)
+    if ids is None:
+        ids = _uncommitted.business_ids = set()
+    if not connection.in_atomic_block:
+        # The transaction that wrote them has committed or rolled back.
+        ids.clear()
+    return ids
+
+
+def _cache_version(business_id) -> int:
+    key = _VERSION_KEY.format(business_id=business_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cashflow_cache(business_id) -> None:
+    key = _VERSION_KEY.format(business_id=business_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def cashflow_changed(business_id) -> None:
+    """Called from BankTransaction/BankAccount/Category post_save and post_delete."""
+    invalidate_cashflow_cache(business_id)
+    if connection.in_atomic_block:
+        _uncommitted_business_ids().add(business_id)
+
+        def committed():
+            _uncommitted_business_ids().discard(business_id)
+            invalidate_cashflow_cache(business_id)
+
+        transaction.on_commit(committed)
+
+
+def compute_cashflow(
+    business,
+    start: date,
+    end: date,
+    *,
+    compare_start: date | None = None,
+    compare_end: date | None = None,
+) -> CashflowReport:
+    """Return the (cached) cashflow report for a period and optional comparison period."""
+    business_id = business.pk
+    use_cache = shared_cache_configured() and business_id not in _uncommitted_business_ids()
+    if use_cache:
+        key = _REPORT_KEY.format(
+            business_id=business_id,
+            version=_cache_version(business_id),
+            start=start.isoformat(),
+            end=end.isoformat(),
+            compare_start=compare_start.isoformat() if compare_start else "",
+            compare_end=compare_end.isoformat() if compare_end else "",
+        )
+        cached = cache.get(key)
+        if isinstance(cached, CashflowReport):
+            return cached
+
+    balances = BankTransaction.objects.filter(bank_account__business=business).aggregate(
+        opening=Sum("amount", filter=Q(date__lt=start)),
+        current=Sum("amount"),
+    )
+    report = CashflowReport(
+        current=_period(business, start, end),
+        comparison=_period(business, compare_start, compare_end) if compare_start and compare_end else None,
+        opening_balance=balances["opening"] or ZERO,
+        current_cash=balances["current"] or ZERO,
+    )
+    if use_cache:
+        cache.set(key, report, timeout=getattr(settings, "CASHFLOW_CACHE_TIMEOUT", 900))
+    return report
@@ -0,0 +1,457 @@
+"""
+Post-import auto-apply stage for bank transactions.
+
+`auto_apply_imported_transactions()` runs the BankMatchingEngine tiers over a
+whole batch of freshly imported (status NEW) transactions instead of calling
+`BankMatchingEngine.apply_suggestions()` row by row:
+
+- rules: every BankRule of the business, patterns compiled once;
+- id match: external ids looked up as invoice numbers / expense ids in bulk;
+- reference: INV/EXP references parsed from descriptions, resolved with one
+  invoice query per chunk of referenced numbers;
+- amount: one query of journal entry debit totals over the batch's date
+  window, bucketed by amount.
+
+The best candidate of each row is chosen as `find_matches(limit=1)` would
+(cross-account transfer detection is left to the interactive feed) and the
+suggestion fields are written with one `bulk_update`. Rows matched by an
+`auto_confirm` rule that names an account (directly or through its category)
+are then confirmed with `BankReconciliationService.create_split_entry`.
+
+`schedule_auto_apply()` is called by the import endpoints. By default it
+enqueues a `bank_import.auto_apply` job once the import commits;
+BANK_IMPORT_AUTO_APPLY_ASYNC=False runs the stage in-request instead.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from core.models import BankAccount, BankRule, BankTransaction, Expense, Invoice, JournalEntry
+from core.services.bank_matching import MatchingConfig
+from core.services.bank_reconciliation import BankReconciliationService
+
+logger = logging.getLogger(__name__)
+
+TIER_RULE = "rule"
+TIER_ID = "id"
+TIER_REFERENCE = "reference"
+TIER_AMOUNT = "amount"
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+# Referenced invoice numbers OR'd into one icontains query.
+REFERENCE_CHUNK_SIZE = 200
+BULK_UPDATE_BATCH_SIZE = 500
+# Largest id the database accepts; longer digit-only external ids are not expense ids.
+_MAX_ID = 2**63 - 1
+
+INVOICE_REFERENCE_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE) for p in (r"INV[- ]?(\d+)", r"#INV(\d+)", r"[Ii]nvoice[#\s-]*(\d+)")
+)
+EXPENSE_REFERENCE_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE) for p in (r"EXP[- ]?(\d+)", r"#EXP(\d+)", r"[Ee]xpense[#\s-]*(\d+)")
+)
+
+# (tier, confidence, reason)
+Suggestion = Tuple[str, Decimal, str]
+
+
+@dataclass
+class AutoApplyResult:
+    scanned: int = 0
+    # Rows suggested by each tier (auto-confirmed rule rows included in `rule`).
+    rule: int = 0
+    id: int = 0
+    reference: int = 0
+    amount: int = 0
+    unmatched: int = 0
+    auto_confirmed: int = 0
+    # auto_confirm rule rows left as suggestions (no offset or bank ledger account, or the entry was rejected).
+    confirm_skipped: int = 0
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def suggested(self) -> int:
+        return self.rule + self.id + self.reference + self.amount
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "suggested": self.suggested}
+
+
+@contextmanager
+def _timed(result: AutoApplyResult, tier: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        result.timings_ms[tier] = round(result.timings_ms.get(tier, 0.0) + elapsed, 3)
+
+
+def _compile(rule: BankRule, pattern: str):
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        logger.warning("Skipping invalid pattern %r on bank rule %s", pattern, rule.pk)
+        return None
+
+
+def _rule_matchers(business) -> list:
+    rules = BankRule.objects.filter(business=business).select_related("account", "category__account")
+    return [
+        (
+            rule,
+            _compile(rule, rule.bank_text_pattern),
+            _compile(rule, rule.description_pattern),
+            _compile(rule, rule.pattern),
+            rule.merchant_name.lower(),
+        )
+        for rule in rules
+    ]
+
+
+def _match_rule(matchers, tx: BankTransaction) -> Optional[Tuple[BankRule, Decimal, str]]:
+    """First matching rule, checked in the same priority order as `_tier0_rule_match`."""
+    description = tx.description or ""
+    raw_bank_text = getattr(tx, "raw_bank_text", description) or description
+    lowered = description.lower()
+    for rule, bank_text, description_re, legacy, merchant in matchers:
+        if bank_text and bank_text.search(raw_bank_text):
+            return rule, Decimal("1.00"), f"Rule: {rule.merchant_name} (Bank text match)"
+        if description_re and description_re.search(description):
+            return rule, Decimal("0.98"), f"Rule: {rule.merchant_name} (Description match)"
+        if legacy and legacy.search(description):
+            return rule, Decimal("1.00"), f"Rule: {rule.merchant_name}"
+        if merchant in lowered:
+            return rule, Decimal("0.90"), f"Rule: {rule.merchant_name} (Name match)"
+    return None
+
+
+def _sourced_ids(model, ids: Iterable[int]) -> set:
+    """Ids of `model` rows that have a journal entry."""
+    ids = set(ids)
+    if not ids:
+        return set()
+    ct = ContentType.objects.get_for_model(model)
+    return set(
+        JournalEntry.objects.filter(source_content_type=ct, source_object_id__in=ids).values_list(
+            "source_object_id", flat=True
+        )
+    )
+
+
+def _id_matches(business, txs: List[BankTransaction]) -> Dict[int, Suggestion]:
+    external_ids = {tx.external_id for tx in txs if tx.external_id}
+    if not external_ids:
+        return {}
+    invoices: Dict[str, int] = {}
+    for invoice_id, number in Invoice.objects.filter(
+        business=business, invoice_number__in=external_ids
+    ).values_list("id", "invoice_number"):
+        invoices.setdefault(number, invoice_id)
+    expense_ids = set(
+        Expense.objects.filter(
+            business=business,
+            id__in={int(e) for e in external_ids if e.isdigit() and int(e) <= _MAX_ID},
+        ).values_list("id", flat=True)
+    )
+    invoices_with_entry = _sourced_ids(Invoice, invoices.values())
+    expenses_with_entry = _sourced_ids(Expense, expense_ids)
+
+    matches = {}
+    for tx in txs:
+        if not tx.external_id:
+            continue
+        if invoices.get(tx.external_id) in invoices_with_entry:
+            reason = f"Matched invoice #{tx.external_id} by external_id"
+        elif tx.external_id.isdigit() and int(tx.external_id) in expenses_with_entry:
+            reason = f"Matched expense #{int(tx.external_id)} by external_id"
+        else:
+            continue
+        matches[tx.pk] = (TIER_ID, MatchingConfig.CONFIDENCE_TIER1, reason)
+    return matches
+
+
+def _references(description: str, patterns) -> List[str]:
+    found = []
+    for pattern in patterns:
+        match = pattern.search(description)
+        if match:
+            found.append(match.group(1))
+    return found
+
+
+def _reference_matches(business, txs: List[BankTransaction]) -> Dict[int, Suggestion]:
+    invoice_refs = {tx.pk: _references(tx.description or "", INVOICE_REFERENCE_PATTERNS) for tx in txs}
+    expense_refs = {
+        tx.pk: [int(n) for n in _references(tx.description or "", EXPENSE_REFERENCE_PATTERNS) if int(n) <= _MAX_ID]
+        for tx in txs
+    }
+    numbers = sorted({n for refs in invoice_refs.values() for n in refs})
+    invoices = {}
+    for i in range(0, len(numbers), REFERENCE_CHUNK_SIZE):
+        contains = Q()
+        for number in numbers[i : i + REFERENCE_CHUNK_SIZE]:
+            contains |= Q(invoice_number__icontains=number)
+        for row in Invoice.objects.filter(contains, business=business).values_list("id", "invoice_number", "issue_date"):
+            invoices[row[0]] = row
+    # Invoice ordering (-issue_date), as the per-row lookup returns them.
+    ordered = sorted(invoices.values(), key=lambda row: (row[2] or date.min, -row[0]), reverse=True)
+    invoices_with_entry = _sourced_ids(Invoice, invoices)
+    ordered = [(number.lower(), number) for pk, number, _ in ordered if pk in invoices_with_entry]
+
+    expense_ids = {pk for refs in expense_refs.values() for pk in refs}
+    if expense_ids:
+        expense_ids = Expense.objects.filter(business=business, id__in=expense_ids).values_list("id", flat=True)
+    expenses_with_entry = _sourced_ids(Expense, expense_ids)
+
+    matches = {}
+    for tx in txs:
+        reason = None
+        for ref in invoice_refs[tx.pk]:
+            number = next((number for lowered, number in ordered if ref.lower() in lowered), None)
+            if number is not None:
+                reason = f"Invoice {number} referenced in description"
+                break
+        if reason is None:
+            expense_id = next((pk for pk in expense_refs[tx.pk] if pk in expenses_with_entry), None)
+            if expense_id is not None:
+                reason = f"Expense #{expense_id} referenced in description"
+        if reason is not None:
+            matches[tx.pk] = (TIER_REFERENCE, MatchingConfig.CONFIDENCE_TIER2, reason)
+    return matches
+
+
+def _cents(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _amount_matches(business, txs: List[BankTransaction]) -> Dict[int, Suggestion]:
+    if not txs:
+        return {}
+    lookback = timedelta(days=MatchingConfig.DATE_LOOKBACK_DAYS)
+    lookahead = timedelta(days=MatchingConfig.DATE_LOOKAHEAD_DAYS)
+    entries = (
+        JournalEntry.objects.filter(
+            business=business,
+            date__gte=min(tx.date for tx in txs) - lookback,
+            date__lte=max(tx.date for tx in txs) + lookahead,
+        )
+        .annotate(total_debit=Sum("lines__debit"))
+        .values_list("date", "total_debit")
+        .order_by()
+    )
+    # Cent bucket -> entries sorted by date; any total within tolerance of an
+    # amount falls in the amount's bucket or a neighbouring one.
+    buckets: Dict[Decimal, List[Tuple[date, Decimal]]] = defaultdict(list)
+    for entry_date, total in entries:
+        total = total or ZERO
+        buckets[_cents(total)].append((entry_date, total))
+    bucket_dates = {}
+    for key, rows in buckets.items():
+        rows.sort(key=lambda row: row[0])
+        bucket_dates[key] = [row[0] for row in rows]
+
+    matches = {}
+    for tx in txs:
+        amount_abs = abs(tx.amount)
+        start, end = tx.date - lookback, tx.date + lookahead
+        count = 0
+        cents = _cents(amount_abs)
+        for key in (cents - CENT, cents, cents + CENT):
+            rows = buckets.get(key)
+            if not rows:
+                continue
+            dates = bucket_dates[key]
+            for _, total in rows[bisect_left(dates, start) : bisect_right(dates, end)]:
+                if abs(total - amount_abs) < MatchingConfig.AMOUNT_TOLERANCE:
+                    count += 1
+        if count == 1:
+            matches[tx.pk] = (
+                TIER_AMOUNT,
+                MatchingConfig.CONFIDENCE_TIER3_SINGLE,
+                f"Amount {amount_abs} matches (lookback: {MatchingConfig.DATE_LOOKBACK_DAYS}d, "
+                f"lookahead: {MatchingConfig.DATE_LOOKAHEAD_DAYS}d)",
+            )
+        elif count > 1:
+            matches[tx.pk] = (
+                TIER_AMOUNT,
+                MatchingConfig.CONFIDENCE_TIER3_AMBIGUOUS,
+                f"Amount match (ambiguous: {count} candidates)",
+            )
+    return matches
+
+
+def _confirm_rule_matches(rule_hits, result: AutoApplyResult, user) -> None:
+    """Post and confirm an entry for rows matched by auto_confirm rules."""
+    applied = defaultdict(int)
+    categorized = []
+    for tx, rule in rule_hits:
+        account = rule.account or (rule.category.account if rule.category else None)
+        if account is None or not tx.bank_account.account_id:
+            result.confirm_skipped += 1
+            continue
+        try:
+            BankReconciliationService.create_split_entry(
+                tx,
+                [{"account_id": account.pk, "amount": abs(tx.amount), "description": tx.description}],
+                user=user,
+                description=f"Auto-applied rule: {rule.merchant_name}",
+            )
+        except (ValidationError, ValueError) as exc:
+            logger.info("Rule %s not auto-confirmed for bank transaction %s: %s", rule.pk, tx.pk, exc)
+            result.confirm_skipped += 1
+            continue
+        result.auto_confirmed += 1
+        applied[rule.pk] += 1
+        if rule.category_id and not tx.category_id:
+            tx.category = rule.category
+            categorized.append(tx)
+    if categorized:
+        BankTransaction.objects.bulk_update(categorized, ["category"], batch_size=BULK_UPDATE_BATCH_SIZE)
+    now = timezone.now()
+    for rule_id, count in applied.items():
+        BankRule.objects.filter(pk=rule_id).update(last_applied_count=F("last_applied_count") + count, updated_at=now)
+
+
+def _apply_for_business(business, txs: List[BankTransaction], result: AutoApplyResult, user, auto_confirm: bool) -> None:
+    suggestions: Dict[int, Suggestion] = {}
+    rule_hits = []
+
+    with _timed(result, TIER_RULE):
+        matchers = _rule_matchers(business)
+        if matchers:
+            for tx in txs:
+                hit = _match_rule(matchers, tx)
+                if hit:
+                    rule, confidence, reason = hit
+                    suggestions[tx.pk] = (TIER_RULE, confidence, reason)
+                    if rule.auto_confirm:
+                        rule_hits.append((tx, rule))
+
+    # Each later tier only sees the rows the earlier tiers left unmatched.
+    for tier, find in ((TIER_ID, _id_matches), (TIER_REFERENCE, _reference_matches), (TIER_AMOUNT, _amount_matches)):
+        pending = [tx for tx in txs if tx.pk not in suggestions]
+        if not pending:
+            break
+        with _timed(result, tier):
+            suggestions.update(find(business, pending))
+
+    # Unmatched rows are marked too, so the reconciliation feed's lazy pass
+    # does not rescan them on every page load.
+    BankTransaction.objects.filter(pk__in=[tx.pk for tx in txs]).update(suggestions_scanned_at=timezone.now())
+    updated = []
+    for tx in txs:
+        suggestion = suggestions.get(tx.pk)
+        if suggestion is None:
+            result.unmatched += 1
+            continue
+        tier, confidence, reason = suggestion
+        setattr(result, tier, getattr(result, tier) + 1)
+        tx.suggestion_confidence = int(confidence * 100)
+        tx.suggestion_reason = reason
+        tx.status = BankTransaction.TransactionStatus.SUGGESTED
+        updated.append(tx)
+    if not updated:
+        return
+    BankTransaction.objects.bulk_update(
+        updated, ["suggestion_confidence", "suggestion_reason", "status"], batch_size=BULK_UPDATE_BATCH_SIZE
+    )
+    if auto_confirm and rule_hits:
+        with _timed(result, "auto_confirm"):
+            _confirm_rule_matches(rule_hits, result, user)
+
+    # bulk_update skips post_save, which refreshes the story and cashflow caches.
+    from core.companion_story import mark_story_dirty
+    from core.services.cashflow import cashflow_changed
+
+    mark_story_dirty(business)
+    cashflow_changed(business.id)
+
+
+def auto_apply_imported_transactions(
+    transaction_ids: Iterable[int],
+    *,
+    user=None,
+    auto_confirm: bool = True,
+) -> AutoApplyResult:
+    """
+    Suggest matches for the given transactions that are still NEW and, unless
+    `auto_confirm` is False, confirm the ones matched by auto_confirm rules.
+    Query count depends on the number of businesses and auto-confirmed rows,
+    not on the batch size.
+    """
+    result = AutoApplyResult()
+    ids = sorted(set(transaction_ids))
+    if not ids:
+        return result
+    with transaction.atomic():
+        txs = list(
+            BankTransaction.objects.select_for_update()
+            .filter(pk__in=ids, status=BankTransaction.TransactionStatus.NEW)
+            .order_by("id")
+        )
+        if not txs:
+            return result
+        bank_accounts = BankAccount.objects.select_related("business", "account").in_bulk(
+            {tx.bank_account_id for tx in txs}
+        )
+        by_business = defaultdict(list)
+        for tx in txs:
+            tx.bank_account = bank_accounts[tx.bank_account_id]
+            by_business[tx.bank_account.business_id].append(tx)
+        result.scanned = len(txs)
+        for batch in by_business.values():
+            _apply_for_business(batch[0].bank_account.business, batch, result, user, auto_confirm)
+    logger.info("Auto-applied %s imported bank transactions: %s", result.scanned, result.as_dict())
+    return result
+
+
+def schedule_auto_apply(business, transaction_ids: Iterable[int], *, user=None):
+    """
+    Run the auto-apply stage for freshly imported transactions.
+
+    With BANK_IMPORT_AUTO_APPLY_ASYNC (the default) the stage is queued as a
+    background job once the current transaction commits, so a worker never
+    picks up ids of rows that are not visible yet. The job is returned, or
+    None while the enqueue waits for an open transaction. Otherwise the stage
+    runs now and its result is returned.
+    """
+    ids = sorted(set(transaction_ids))
+    if not ids:
+        return None
+    if not getattr(settings, "BANK_IMPORT_AUTO_APPLY_ASYNC", True):
+        return auto_apply_imported_transactions(ids, user=user)
+
+    from core.jobs import BANK_IMPORT_AUTO_APPLY_JOB, enqueue_job
+
+    queued = []
+    transaction.on_commit(
+        lambda: queued.append(
+            enqueue_job(
+                BANK_IMPORT_AUTO_APPLY_JOB,
+                {"transaction_ids": ids, "user_id": user.pk if user else None},
+                business=business,
+            )
+        )
+    )
+    # Outside a transaction on_commit runs the callback immediately.
+    return queued[0] if queued else None
@@ -0,0 +1,227 @@
+"""
+Column-oriented P&L report engine.
+
+`build_pl_report()` returns an account x period matrix for a current period
+and any number of comparison periods, from one grouped JournalLine query
+(conditional sums per period). Each row carries its INCOME / COGS / EXPENSE
+group, classified once per (code, name). The JSON API, the print payload and
+the CSV export all render from the same `PLReport`.
+"""
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Count, Q, Sum
+
+from core.models import Account, JournalLine
+
+ZERO = Decimal("0")
+
+INCOME = "INCOME"
+COGS = "COGS"
+EXPENSE = "EXPENSE"
+GROUPS = (INCOME, COGS, EXPENSE)
+
+_COGS_KEYWORDS = ("cost of goods", "cogs", "cost of sales", "direct cost")
+
+
+@lru_cache(maxsize=4096)
+def is_cogs_account(code: str | None, name: str | None) -> bool:
+    """
+    Determine if an expense account should be classified as COGS.
+    Convention: accounts with code 50xx-59xx or name containing 'cost of goods'.
+    """
+    code = code or ""
+    if len(code) >= 2 and code[0] == "5" and code[1].isdigit():
+        return True
+    name = (name or "").lower()
+    return any(kw in name for kw in _COGS_KEYWORDS)
+
+
+def pct_change(current: Decimal, previous: Decimal) -> float | None:
+    """Calculate percentage change, handling divide-by-zero safely."""
+    if previous == ZERO:
+        return None
+    return float(((current - previous) / abs(previous)) * Decimal("100"))
+
+
+@dataclass(frozen=True)
+class PLColumn:
+    label: Optional[str]
+    start: date
+    end: date
+
+
+@dataclass(frozen=True)
+class PLRow:
+    account_id: int
+    code: str
+    name: str
+    group: str
+    # One entry per report column (current period first).
+    amounts: Tuple[Decimal, ...]
+    # Whether the account has ledger lines in each column's period.
+    active: Tuple[bool, ...]
+
+    def variance(self, column: int) -> Decimal:
+        """Current amount minus the amount in comparison `column`."""
+        return self.amounts[0] - self.amounts[column]
+
+
+@dataclass(frozen=True)
+class PLReport:
+    columns: Tuple[PLColumn, ...]
+    rows: Tuple[PLRow, ...]
+
+    @property
+    def comparisons(self) -> range:
+        return range(1, len(self.columns))
+
+    def rows_for(self, group: str, column: int = 0) -> List[PLRow]:
+        """Rows of a group with activity in `column`, in chart (code, name) order."""
+        return [r for r in self.rows if r.group == group and r.active[column]]
+
+    def total(self, group: str, column: int = 0) -> Decimal:
+        return sum((r.amounts[column] for r in self.rows if r.group == group), ZERO)
+
+    def gross_profit(self, column: int = 0) -> Decimal:
+        return self.total(INCOME, column) - self.total(COGS, column)
+
+    def net_income(self, column: int = 0) -> Decimal:
+        return self.gross_profit(column) - self.total(EXPENSE, column)
+
+    def kpi(self, column: int = 0) -> dict:
+        income = self.total(INCOME, column)
+        gross_profit = self.gross_profit(column)
+        net_income = self.net_income(column)
+        kpi = {
+            "income": float(income),
+            "cogs": float(self.total(COGS, column)),
+            "gross_profit": float(gross_profit),
+            "expenses": float(self.total(EXPENSE, column)),
+            "net_income": float(net_income),
+            "gross_margin_pct": None,
+            "net_margin_pct": None,
+        }
+        if income > ZERO:
+            kpi["gross_margin_pct"] = float((gross_profit / income) * Decimal("100"))
+            kpi["net_margin_pct"] = float((net_income / income) * Decimal("100"))
+        return kpi
+
+    def change_pct(self, column: int) -> dict:
+        """Percentage change of the current period's totals against comparison `column`."""
+        return {
+            "change_income_pct": pct_change(self.total(INCOME), self.total(INCOME, column)),
+            "change_cogs_pct": pct_change(self.total(COGS), self.total(COGS, column)),
+            "change_gross_profit_pct": pct_change(self.gross_profit(), self.gross_profit(column)),
+            "change_expenses_pct": pct_change(self.total(EXPENSE), self.total(EXPENSE, column)),
+            "change_net_income_pct": pct_change(self.net_income(), self.net_income(column)),
+        }
+
+    def write_csv(self, out) -> None:
+        """Account x period CSV with a variance column per comparison period."""
+        writer = csv.writer(out)
+        labels = [c.label or f"{c.start:%Y-%m-%d} – {c.end:%Y-%m-%d}" for c in self.columns]
+        writer.writerow(
+            ["Group", "Code", "Account", *labels, *[f"Variance vs {labels[i]}" for i in self.comparisons]]
+        )
+        for group in GROUPS:
+            for row in self.rows:
+                if row.group != group or not any(row.active):
+                    continue
+                writer.writerow(
+                    [
+                        group,
+                        row.code,
+                        row.name,
+                        *[f"{amount:.2f}" for amount in row.amounts],
+                        *[f"{row.variance(i):.2f}" for i in self.comparisons],
+                    ]
+                )
+        summary = (
+            ("Total income", lambda c: self.total(INCOME, c)),
+            ("Total COGS", lambda c: self.total(COGS, c)),
+            ("Gross profit", self.gross_profit),
+            ("Total expenses", lambda c: self.total(EXPENSE, c)),
+            ("Net income", self.net_income),
+        )
+        for label, value in summary:
+            values = [value(c) for c in range(len(self.columns))]
+            writer.writerow(
+                [
+                    "TOTAL",
+                    "",
+                    label,
+                    *[f"{v:.2f}" for v in values],
+                    *[f"{values[0] - values[i]:.2f}" for i in self.comparisons],
+                ]
+            )
+
+
+def build_pl_report(
+    business,
+    start: date,
+    end: date,
+    comparisons: Iterable[Tuple[Optional[str], date, date]] = (),
+    *,
+    label: Optional[str] = None,
+) -> PLReport:
+    """
+    Build the P&L matrix for [start, end] and each (label, start, end) comparison.
+
+    Income is credit - debit, expenses debit - credit; voided entries are
+    excluded, as in `ledger_services.compute_ledger_pl`.
+    """
+    columns: Sequence[PLColumn] = (PLColumn(label, start, end),) + tuple(
+        PLColumn(c_label, c_start, c_end) for c_label, c_start, c_end in comparisons
+    )
+    in_column = [Q(journal_entry__date__range=(c.start, c.end)) for c in columns]
+    aggregates = {}
+    for i, q in enumerate(in_column):
+        aggregates[f"debit_{i}"] = Sum("debit", filter=q)
+        aggregates[f"credit_{i}"] = Sum("credit", filter=q)
+        aggregates[f"lines_{i}"] = Count("id", filter=q)
+
+    any_column = Q()
+    for q in in_column:
+        any_column |= q
+    rows = (
+        JournalLine.objects.filter(
+            any_column,
+            journal_entry__business=business,
+            journal_entry__is_void=False,
+            account__type__in=[Account.AccountType.INCOME, Account.AccountType.EXPENSE],
+        )
+        .values("account_id", "account__code", "account__name", "account__type")
+        .annotate(**aggregates)
+        .order_by("account__code", "account__name")
+    )
+
+    report_rows = []
+    for row in rows:
+        is_income = row["account__type"] == Account.AccountType.INCOME
+        amounts = []
+        for i in range(len(columns)):
+            debit = row[f"debit_{i}"] or ZERO
+            credit = row[f"credit_{i}"] or ZERO
+            amounts.append(credit - debit if is_income else debit - credit)
+        if is_income:
+            group = INCOME
+        else:
+            group = COGS if is_cogs_account(row["account__code"], row["account__name"]) else EXPENSE
+        report_rows.append(
+            PLRow(
+                account_id=row["account_id"],
+                code=row["account__code"] or "",
+                name=row["account__name"] or "",
+                group=group,
+                amounts=tuple(amounts),
+                active=tuple(bool(row[f"lines_{i}"]) for i in range(len(columns))),
+            )
+        )
+    return PLReport(columns=tuple(columns), rows=tuple(report_rows))
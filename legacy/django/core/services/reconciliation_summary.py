@@ -0,0 +1,292 @@
+"""
+Batched reconciliation summaries.
+
+Counts, cleared/uncleared sums and ledger (book) balances for reconciliation
+sessions and bank accounts are computed with grouped queries over the whole
+batch instead of one query per status, session or account:
+
+- `transaction_totals()`: per bank account, reconciled (status != NEW) vs.
+  unreconciled counts and sums;
+- `ledger_balances()`: balance of any number of (account id, as-of date) pairs;
+- `summarize_sessions()`: per session, counts, cleared sum (PARTIAL lines
+  count their allocated amount, EXCLUDED lines count zero), book balance at
+  statement end and difference;
+- `summarize_bank_accounts()`: all of the above for every bank account of a
+  business, with the latest session of each account.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from core.models import Account, BankAccount, BankTransaction, JournalLine, ReconciliationSession
+from core.services.bank_reconciliation import RECONCILED_STATUSES
+
+ZERO = Decimal("0.00")
+
+_MONEY = DecimalField(max_digits=19, decimal_places=4)
+
+
+def _quantize(value: Decimal | None) -> Decimal:
+    return (value or ZERO).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+@dataclass(frozen=True)
+class TransactionTotals:
+    total_count: int = 0
+    reconciled_count: int = 0
+    reconciled_sum: Decimal = ZERO
+    unreconciled_sum: Decimal = ZERO
+
+    @property
+    def unreconciled_count(self) -> int:
+        return self.total_count - self.reconciled_count
+
+    @property
+    def progress_percent(self) -> float:
+        return round((self.reconciled_count / self.total_count * 100) if self.total_count else 0, 1)
+
+
+@dataclass(frozen=True)
+class SessionSummary:
+    session_id: int
+    bank_account_id: int
+    status: str
+    period_start: date
+    period_end: date
+    opening_balance: Decimal
+    statement_balance: Decimal
+    # Book balance of the bank's ledger account at statement end.
+    ledger_balance: Decimal
+    total_count: int = 0
+    # Status in RECONCILED_STATUSES (EXCLUDED included).
+    reconciled_count: int = 0
+    excluded_count: int = 0
+    cleared_sum: Decimal = ZERO
+    uncleared_sum: Decimal = ZERO
+    deposit_count: int = 0
+    withdrawal_count: int = 0
+    total_deposits: Decimal = ZERO
+    total_withdrawals: Decimal = ZERO
+
+    @property
+    def unreconciled_count(self) -> int:
+        return self.total_count - self.reconciled_count
+
+    @property
+    def cleared_balance(self) -> Decimal:
+        return _quantize(self.opening_balance + self.cleared_sum)
+
+    @property
+    def difference(self) -> Decimal:
+        return _quantize(self.statement_balance - self.cleared_balance)
+
+    @property
+    def reconciled_percent(self) -> float:
+        return float(round((self.reconciled_count / self.total_count * 100), 2)) if self.total_count else 0.0
+
+
+@dataclass(frozen=True)
+class BankAccountSummary:
+    bank_account_id: int
+    ledger_account_id: Optional[int]
+    as_of: date
+    book_balance: Decimal
+    totals: TransactionTotals
+    latest_session: Optional[SessionSummary]
+
+
+def ledger_balances(pairs: Iterable[Tuple[Optional[int], date]]) -> Dict[Tuple[int, date], Decimal]:
+    """
+    Balance of each (account_id, as_of) pair including entries dated on as_of,
+    keyed by the pair. Assets/expenses are debit - credit, other types
+    credit - debit; voided entries are ignored. One query for all pairs.
+    """
+    wanted = {(account_id, as_of) for account_id, as_of in pairs if account_id and as_of}
+    if not wanted:
+        return {}
+    dates = sorted({as_of for _, as_of in wanted})
+    aggregates = {}
+    for i, as_of in enumerate(dates):
+        on_or_before = Q(journal_entry__date__lte=as_of)
+        aggregates[f"debit_{i}"] = Sum("debit", filter=on_or_before)
+        aggregates[f"credit_{i}"] = Sum("credit", filter=on_or_before)
+    rows = (
+        JournalLine.objects.filter(
+            account_id__in={account_id for account_id, _ in wanted},
+            journal_entry__business_id=F("account__business_id"),
+            journal_entry__is_void=False,
+            journal_entry__date__lte=dates[-1],
+        )
+        .values("account_id", "account__type")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    balances = {key: ZERO for key in wanted}
+    for row in rows:
+        debit_normal = row["account__type"] in (Account.AccountType.ASSET, Account.AccountType.EXPENSE)
+        for i, as_of in enumerate(dates):
+            key = (row["account_id"], as_of)
+            if key not in balances:
+                continue
+            debit = row[f"debit_{i}"] or ZERO
+            credit = row[f"credit_{i}"] or ZERO
+            balances[key] = debit - credit if debit_normal else credit - debit
+    return balances
+
+
+def transaction_totals(bank_account_ids: Iterable[int]) -> Dict[int, TransactionTotals]:
+    """Reconciled (status != NEW) vs. unreconciled counts and sums per bank account."""
+    ids = set(bank_account_ids)
+    totals = {pk: TransactionTotals() for pk in ids}
+    if not ids:
+        return totals
+    reconciled = ~Q(status=BankTransaction.TransactionStatus.NEW)
+    rows = (
+        BankTransaction.objects.filter(bank_account_id__in=ids)
+        .values("bank_account_id")
+        .annotate(
+            total_count=Count("id"),
+            reconciled_count=Count("id", filter=reconciled),
+            reconciled_sum=Sum("amount", filter=reconciled),
+            unreconciled_sum=Sum("amount", filter=Q(status=BankTransaction.TransactionStatus.NEW)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        totals[row["bank_account_id"]] = TransactionTotals(
+            total_count=row["total_count"],
+            reconciled_count=row["reconciled_count"],
+            reconciled_sum=row["reconciled_sum"] or ZERO,
+            unreconciled_sum=row["unreconciled_sum"] or ZERO,
+        )
+    return totals
+
+
+def _cleared_amount():
+    partial = Q(status=BankTransaction.TransactionStatus.PARTIAL, allocated_amount__isnull=False)
+    return Case(
+        When(partial & Q(amount__lt=0), then=-F("allocated_amount")),
+        When(partial, then=F("allocated_amount")),
+        When(status=BankTransaction.TransactionStatus.EXCLUDED, then=Value(ZERO)),
+        default=F("amount"),
+        output_field=_MONEY,
+    )
+
+
+def _session_rows(session_ids) -> Dict[int, dict]:
+    reconciled = Q(status__in=RECONCILED_STATUSES)
+    rows = (
+        BankTransaction.objects.filter(reconciliation_session_id__in=session_ids)
+        .values("reconciliation_session_id")
+        .annotate(
+            total_count=Count("id"),
+            reconciled_count=Count("id", filter=reconciled),
+            excluded_count=Count("id", filter=Q(status=BankTransaction.TransactionStatus.EXCLUDED)),
+            cleared_sum=Sum(_cleared_amount(), filter=reconciled),
+            uncleared_sum=Sum("amount", filter=~reconciled),
+            deposit_count=Count("id", filter=Q(amount__gt=0)),
+            withdrawal_count=Count("id", filter=Q(amount__lt=0)),
+            total_deposits=Sum("amount", filter=Q(amount__gt=0)),
+            total_withdrawals=Sum("amount", filter=Q(amount__lt=0)),
+        )
+        .order_by()
+    )
+    return {row.pop("reconciliation_session_id"): row for row in rows}
+
+
+def _build_session_summaries(sessions, rows, balances) -> Dict[int, SessionSummary]:
+    summaries = {}
+    for session in sessions:
+        row = rows.get(session.pk, {})
+        account_id = session.bank_account.account_id
+        summaries[session.pk] = SessionSummary(
+            session_id=session.pk,
+            bank_account_id=session.bank_account_id,
+            status=session.status,
+            period_start=session.statement_start_date,
+            period_end=session.statement_end_date,
+            opening_balance=session.opening_balance or ZERO,
+            statement_balance=session.closing_balance or ZERO,
+            ledger_balance=balances.get((account_id, session.statement_end_date), ZERO),
+            total_count=row.get("total_count", 0),
+            reconciled_count=row.get("reconciled_count", 0),
+            excluded_count=row.get("excluded_count", 0),
+            cleared_sum=_quantize(row.get("cleared_sum")),
+            uncleared_sum=row.get("uncleared_sum") or ZERO,
+            deposit_count=row.get("deposit_count", 0),
+            withdrawal_count=row.get("withdrawal_count", 0),
+            total_deposits=row.get("total_deposits") or ZERO,
+            total_withdrawals=row.get("total_withdrawals") or ZERO,
+        )
+    return summaries
+
+
+def summarize_sessions(sessions: Iterable[ReconciliationSession]) -> Dict[int, SessionSummary]:
+    """
+    Summaries of the given sessions keyed by session id, counting the
+    transactions linked to each session. Two queries whatever the batch size
+    (sessions should come with bank_account selected).
+    """
+    sessions = list(sessions)
+    if not sessions:
+        return {}
+    rows = _session_rows([s.pk for s in sessions])
+    balances = ledger_balances((s.bank_account.account_id, s.statement_end_date) for s in sessions)
+    return _build_session_summaries(sessions, rows, balances)
+
+
+def summarize_bank_accounts(
+    business,
+    *,
+    as_of: date | None = None,
+    bank_accounts: Iterable[BankAccount] | None = None,
+) -> Dict[int, BankAccountSummary]:
+    """
+    Summaries for the business's active bank accounts (or `bank_accounts`),
+    keyed by bank account id: transaction totals, book balance as of `as_of`
+    (default today) and the latest reconciliation session.
+    """
+    as_of = as_of or timezone.localdate()
+    if bank_accounts is None:
+        bank_accounts = BankAccount.objects.filter(business=business, is_active=True).select_related("account")
+    bank_accounts = list(bank_accounts)
+    if not bank_accounts:
+        return {}
+    ids = [ba.pk for ba in bank_accounts]
+
+    latest_id = (
+        ReconciliationSession.objects.filter(bank_account_id=OuterRef("bank_account_id"))
+        .order_by("-statement_end_date", "-id")
+        .values("id")[:1]
+    )
+    latest_sessions = list(
+        ReconciliationSession.objects.filter(bank_account_id__in=ids, id=Subquery(latest_id)).select_related(
+            "bank_account"
+        )
+    )
+    totals = transaction_totals(ids)
+    session_rows = _session_rows([s.pk for s in latest_sessions]) if latest_sessions else {}
+    balances = ledger_balances(
+        [(ba.account_id, as_of) for ba in bank_accounts]
+        + [(s.bank_account.account_id, s.statement_end_date) for s in latest_sessions]
+    )
+    session_summaries = _build_session_summaries(latest_sessions, session_rows, balances)
+    latest_by_account = {s.bank_account_id: session_summaries[s.pk] for s in latest_sessions}
+
+    return {
+        ba.pk: BankAccountSummary(
+            bank_account_id=ba.pk,
+            ledger_account_id=ba.account_id,
+            as_of=as_of,
+            book_balance=balances.get((ba.account_id, as_of), ZERO),
+            totals=totals[ba.pk],
+            latest_session=latest_by_account.get(ba.pk),
+        )
+        for ba in bank_accounts
+    }
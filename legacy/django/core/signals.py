@@ -5,7 +5,20 @@ import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from core.models import BankTransaction, Business, Expense, Invoice, ReceiptDocument, ReceiptRun, WorkspaceMembership
+from core.models import (
+    Account,
+    BankAccount,
+    BankTransaction,
+    Business,
+    Category,
+    Expense,
+    Invoice,
+    ReceiptDocument,
+    ReceiptRun,
+    RoleDefinition,
+    UserPermissionOverride,
+    WorkspaceMembership,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +83,61 @@ def bank_transaction_deleted(sender, instance, **kwargs):
     _mark_dirty(instance)
 
 
+# Cash movements, bank accounts and categories invalidate cached cashflow reports
+@receiver(post_save, sender=BankTransaction)
+@receiver(post_delete, sender=BankTransaction)
+def bank_transaction_cash_changed(sender, instance, **kwargs):
+    from core.services.cashflow import cashflow_changed
+
+    try:
+        business_id = instance.bank_account.business_id
+    except BankAccount.DoesNotExist:
+        return  # Deleted with its bank account, which invalidates on its own.
+    cashflow_changed(business_id)
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def cash_dimension_changed(sender, instance, **kwargs):
+    from core.services.cashflow import cashflow_changed
+
+    cashflow_changed(instance.business_id)
+
+
+# Chart of accounts changes invalidate the account-resolution cache
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def account_changed(sender, instance, **kwargs):
+    from core.accounting_defaults import account_changed as invalidate
+
+    invalidate(instance.business_id)
+
+
+# Memberships, role definitions and overrides invalidate cached permission policies
+@receiver(post_save, sender=WorkspaceMembership)
+@receiver(post_delete, sender=WorkspaceMembership)
+@receiver(post_save, sender=RoleDefinition)
+@receiver(post_delete, sender=RoleDefinition)
+def rbac_changed(sender, instance, **kwargs):
+    from core.permissions_engine import permissions_changed
+
+    permissions_changed(instance.business_id)
+
+
+@receiver(post_save, sender=UserPermissionOverride)
+@receiver(post_delete, sender=UserPermissionOverride)
+def permission_override_changed(sender, instance, **kwargs):
+    from core.permissions_engine import permissions_changed
+
+    business_id = (
+        WorkspaceMembership.objects.filter(id=instance.membership_id).values_list("business_id", flat=True).first()
+    )
+    if business_id is not None:
+        permissions_changed(business_id)
+
+
 @receiver(post_save, sender=Business)
 def ensure_owner_membership(sender, instance: Business, created: bool, **kwargs):
     """
@@ -92,3 +160,6 @@ def ensure_owner_membership(sender, instance: Business, created: bool, **kwargs)
             role=WorkspaceMembership.RoleChoices.OWNER,
             is_active=True,
         )
+        from core.permissions_engine import permissions_changed
+
+        permissions_changed(instance.id)
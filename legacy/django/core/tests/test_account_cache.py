@@ -0,0 +1,99 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+
+from core.accounting_defaults import (
+    DEFAULT_ACCOUNTS,
+    ensure_default_accounts,
+    get_account_by_code,
+    get_accounts_by_code,
+)
+from core.models import Account, Business
+
+User = get_user_model()
+
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "minibooks-test-account-cache"),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class AccountResolutionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="coacache", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business = Business.objects.create(name="COA Cache Co", currency="CAD", owner_user=user)
+            self.defaults = ensure_default_accounts(self.business)
+
+    def test_warm_cache_resolves_defaults_without_queries(self):
+        ensure_default_accounts(self.business)  # seed
+        with self.assertNumQueries(0):
+            defaults = ensure_default_accounts(self.business)
+            ar = get_account_by_code(self.business, "1200")
+        self.assertEqual(defaults["ar"].pk, self.defaults["ar"].pk)
+        self.assertEqual(ar.pk, self.defaults["ar"].pk)
+        self.assertFalse(ar._state.adding)
+        self.assertEqual(len(get_accounts_by_code(self.business)), len(DEFAULT_ACCOUNTS))
+
+    def test_account_save_and_delete_invalidate_cache(self):
+        get_accounts_by_code(self.business)
+        sales = self.defaults["sales"]
+        with self.captureOnCommitCallbacks(execute=True):
+            sales.name = "Product Sales"
+            sales.save()
+            Account.objects.create(business=self.business, code="4090", name="Other", type=Account.AccountType.INCOME)
+        self.assertEqual(get_account_by_code(self.business, "4010").name, "Product Sales")
+        self.assertEqual(get_account_by_code(self.business, "4090").name, "Other")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Account.objects.filter(business=self.business, code="4090").get().delete()
+        with self.assertRaises(Account.DoesNotExist):
+            get_account_by_code(self.business, "4090")
+
+    def test_uncommitted_accounts_are_read_from_db_not_cached(self):
+        get_accounts_by_code(self.business)
+        # No commit: the new account is visible in this transaction only.
+        Account.objects.create(business=self.business, code="6100", name="Temp", type=Account.AccountType.EXPENSE)
+        with self.assertNumQueries(1):
+            self.assertIn("6100", get_accounts_by_code(self.business))
+        with self.assertNumQueries(1):
+            get_accounts_by_code(self.business)
+
+    def test_missing_defaults_are_created(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.defaults["cogs"].delete()
+        defaults = ensure_default_accounts(self.business)
+        self.assertIsNotNone(defaults["cogs"].pk)
+        self.assertTrue(Account.objects.filter(business=self.business, code="5020").exists())
+
+
+class PerProcessCacheAccountTests(TestCase):
+    """With the default local-memory cache, accounts are read from the database."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="coalocal", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business = Business.objects.create(name="COA Local Co", currency="CAD", owner_user=user)
+            self.defaults = ensure_default_accounts(self.business)
+
+    def test_rename_made_by_another_process_is_seen(self):
+        # This worker's own cache never sees the version bump made by the writer.
+        this_worker = LocMemCache("account-test-worker", {})
+        with patch("core.accounting_defaults.cache", this_worker):
+            self.assertEqual(get_account_by_code(self.business, "4010").name, "Sales")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Account.objects.filter(pk=self.defaults["sales"].pk).update(name="Product Sales")
+
+        with patch("core.accounting_defaults.cache", this_worker):
+            with self.assertNumQueries(1):
+                self.assertEqual(get_account_by_code(self.business, "4010").name, "Product Sales")
@@ -2,11 +2,20 @@ from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from core.anomaly_detection import bundle_anomalies, apply_llm_explanations
-from core.models import Business, Account, BankAccount, BankTransaction, JournalEntry, JournalLine
+from core.anomaly_detection import (
+    DETECTORS,
+    Anomaly,
+    apply_llm_explanations,
+    bundle_anomalies,
+    register_detector,
+    run_anomaly_detectors,
+)
+from core.models import Business, Account, BankAccount, BankTransaction, Customer, Invoice, JournalEntry, JournalLine
 
 User = get_user_model()
 
@@ -45,3 +54,71 @@ class AnomalyDetectionTests(TestCase):
         anomalies = []
         enriched = apply_llm_explanations(anomalies, ai_enabled=True, user_name="Test", llm_client=lambda p: None)
         self.assertEqual(enriched, anomalies)
+
+    def _entry(self, day, *lines):
+        entry = JournalEntry.objects.create(business=self.business, date=day, description="Entry")
+        for account, debit, credit in lines:
+            JournalLine.objects.create(journal_entry=entry, account=account, debit=Decimal(debit), credit=Decimal(credit))
+        return entry
+
+    def test_detectors_share_one_fact_set_with_constant_queries(self):
+        today = timezone.localdate()
+        start = today - timedelta(days=30)
+        tax_payable = Account.objects.create(
+            business=self.business, code="2399", name="Sales Tax Payable", type=Account.AccountType.LIABILITY
+        )
+        self._entry(today - timedelta(days=5), (self.suspense, "600.00", "0"), (self.cash, "0", "600.00"))
+        self._entry(today - timedelta(days=4), (self.cash, "50.00", "0"), (tax_payable, "0", "50.00"))
+        self._entry(today - timedelta(days=3), (self.cash, "10.00", "0"))  # unbalanced
+
+        with CaptureQueriesContext(connection) as few:
+            run = run_anomaly_detectors(self.business, period_start=start, period_end=today)
+        codes = [a.code for a in run.anomalies]
+        self.assertEqual(codes, ["GL_SUSPENSE_BALANCE", "GL_UNBALANCED", "TAX_NEGATIVE_PAYABLE"])
+        self.assertEqual(run.anomalies[0].severity, "high")
+        self.assertEqual(run.facts.accounts[self.cash.id].closing, Decimal("-540.00"))
+        self.assertTrue(set(DETECTORS) <= set(run.timings_ms))
+        self.assertIn("facts.accounts", run.timings_ms)
+
+        for i in range(5):
+            extra = Account.objects.create(
+                business=self.business, code=f"23{i}9", name=f"Tax {i}", type=Account.AccountType.LIABILITY
+            )
+            self._entry(today - timedelta(days=2), (self.cash, "1.00", "0"), (extra, "0", "1.00"))
+        with CaptureQueriesContext(connection) as many:
+            run = run_anomaly_detectors(self.business, period_start=start, period_end=today)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual([a.code for a in run.anomalies].count("TAX_NEGATIVE_PAYABLE"), 6)
+
+    def test_registered_detector_runs_with_requested_facts(self):
+        @register_detector("test_ar_buckets", surface="test", facts=("ar_aging",))
+        def detect(facts):
+            return [
+                Anomaly(
+                    code="TEST_AR",
+                    surface="test",
+                    impact_area="ar",
+                    severity="low",
+                    explanation=str(facts.ar_aging["overdue"]),
+                    task_code="I1B",
+                )
+            ]
+
+        self.addCleanup(DETECTORS.pop, "test_ar_buckets")
+        customer = Customer.objects.create(business=self.business, name="Late payer")
+        today = timezone.localdate()
+        for days in (10, 45, 120):
+            Invoice.objects.create(
+                business=self.business,
+                customer=customer,
+                invoice_number=f"INV-{days}",
+                issue_date=today - timedelta(days=days + 30),
+                due_date=today - timedelta(days=days),
+                status=Invoice.Status.SENT,
+                total_amount=Decimal("100.00"),
+            )
+        run = run_anomaly_detectors(self.business, period_start=today, period_end=today, surfaces=["test"])
+        self.assertEqual([(a.code, a.explanation) for a in run.anomalies], [("TEST_AR", "3")])
+        self.assertEqual(run.facts.ar_aging["days_31_60"], 1)
+        self.assertEqual(run.facts.ar_aging["over_90"], 1)
+        self.assertEqual(set(run.timings_ms), {"facts.ar_aging", "test_ar_buckets"})
@@ -0,0 +1,178 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.accounting_defaults import ensure_default_accounts
+from core.jobs import (
+    RECEIPTS_RUN_JOB,
+    STALE_LOCK_SECONDS,
+    claim_next_job,
+    enqueue_job,
+    recover_stale_jobs,
+    run_job,
+    run_worker,
+)
+from core.models import BackgroundJob, Business, InvoiceRun, ReceiptDocument, ReceiptRun
+
+User = get_user_model()
+
+
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="jobs", password="pass")
+        self.business = Business.objects.create(name="Biz", currency="USD", owner_user=self.user)
+        ensure_default_accounts(self.business)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def _files(self, count=2):
+        return [
+            SimpleUploadedFile(f"receipt_{i}.pdf", b"fakecontent", content_type="application/pdf")
+            for i in range(count)
+        ]
+
+    def test_background_receipts_run_is_queued_then_processed(self):
+        resp = self.client.post(
+            "/api/agentic/receipts/run",
+            {"files": self._files(), "default_currency": "USD", "background": "1"},
+        )
+        self.assertEqual(resp.status_code, 202)
+        data = resp.json()
+        run = ReceiptRun.objects.get(pk=data["run_id"])
+        self.assertEqual(run.status, ReceiptRun.RunStatus.PENDING)
+        job = BackgroundJob.objects.get(pk=data["job_id"])
+        self.assertEqual(job.kind, RECEIPTS_RUN_JOB)
+        self.assertEqual(job.trace_id, data["progress_trace_id"])
+
+        with mock.patch("core.job_handlers.publish_job_progress") as publish:
+            self.assertEqual(run_worker(once=True), 1)
+
+        job.refresh_from_db()
+        run.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(run.status, ReceiptRun.RunStatus.COMPLETED)
+        self.assertEqual(run.success_count + run.error_count, 2)
+        self.assertFalse(run.documents.filter(status=ReceiptDocument.DocumentStatus.PENDING).exists())
+        progress = [c for c in publish.call_args_list if c.args[1] == "document_processed"]
+        self.assertEqual([c.kwargs["completed"] for c in progress], [1, 2])
+
+    @override_settings(AGENTIC_RUNS_IN_BACKGROUND=True)
+    def test_setting_enables_background_and_field_overrides_it(self):
+        queued = self.client.post("/api/agentic/receipts/run", {"files": self._files(1)})
+        self.assertEqual(queued.status_code, 202)
+
+        inline = self.client.post("/api/agentic/receipts/run", {"files": self._files(1), "background": "0"})
+        self.assertEqual(inline.status_code, 200)
+        self.assertEqual(inline.json()["status"], ReceiptRun.RunStatus.COMPLETED)
+
+    def test_background_invoices_run_completes(self):
+        files = [SimpleUploadedFile("invoice.pdf", b"fakecontent", content_type="application/pdf")]
+        resp = self.client.post(
+            "/api/agentic/invoices/run",
+            {"files": files, "default_issue_date": "2025-01-15", "background": "true"},
+        )
+        self.assertEqual(resp.status_code, 202)
+        run_worker(once=True)
+        run = InvoiceRun.objects.get(pk=resp.json()["run_id"])
+        self.assertEqual(run.status, InvoiceRun.RunStatus.COMPLETED)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        job = enqueue_job("noop", {})
+        self.assertEqual(claim_next_job("worker-a").pk, job.pk)
+        self.assertIsNone(claim_next_job("worker-b"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.RUNNING)
+        self.assertEqual(job.locked_by, "worker-a")
+        self.assertEqual(job.attempts, 1)
+
+    def test_unknown_kind_fails_and_handler_errors_retry(self):
+        job = enqueue_job("does.not.exist", {})
+        run_job(claim_next_job("w"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertIn("No handler", job.last_error)
+
+        retried = enqueue_job(RECEIPTS_RUN_JOB, {"run_id": 0}, max_attempts=2)
+        run_job(claim_next_job("w"))
+        retried.refresh_from_db()
+        self.assertEqual(retried.status, BackgroundJob.Status.QUEUED)
+        self.assertGreater(retried.run_after, retried.created_at)
+
+    def _abandon(self, job):
+        # Claimed by a worker that then died more than STALE_LOCK_SECONDS ago.
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=STALE_LOCK_SECONDS + 60)
+        )
+
+    def test_stale_job_out_of_attempts_fails_with_its_run(self):
+        resp = self.client.post("/api/agentic/receipts/run", {"files": self._files(1), "background": "1"})
+        job = claim_next_job("dead-worker")
+        self.assertEqual((job.attempts, job.max_attempts), (1, 1))
+        self._abandon(job)
+
+        self.assertEqual(run_worker(once=True), 0)
+
+        job.refresh_from_db()
+        run = ReceiptRun.objects.get(pk=resp.json()["run_id"])
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertIn("dead-worker", job.last_error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(run.status, ReceiptRun.RunStatus.FAILED)
+        self.assertEqual(recover_stale_jobs(), (0, 0))
+
+    def test_stale_job_with_attempts_left_is_requeued_and_run(self):
+        resp = self.client.post("/api/agentic/receipts/run", {"files": self._files(1), "background": "1"})
+        job = BackgroundJob.objects.get(pk=resp.json()["job_id"])
+        job.max_attempts = 2
+        job.save(update_fields=["max_attempts"])
+        self._abandon(claim_next_job("dead-worker"))
+
+        self.assertEqual(run_worker(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(ReceiptRun.objects.get(pk=resp.json()["run_id"]).status, ReceiptRun.RunStatus.COMPLETED)
+
+    def test_worker_checks_for_stale_jobs_periodically(self):
+        enqueue_job("noop", {})
+        enqueue_job("noop", {})
+        with mock.patch("core.jobs.recover_stale_jobs", return_value=(0, 0)) as recover:
+            run_worker(once=True, stale_check_interval=0)
+        self.assertEqual(recover.call_count, 3)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """The heartbeat writes from its own thread, so the job row must be committed."""
+
+    def test_long_running_job_is_not_reclaimed(self):
+        seen = {}
+
+        def slow_handler(job):
+            # The job has been running for longer than the stale cutoff...
+            BackgroundJob.objects.filter(pk=job.pk).update(
+                locked_at=timezone.now() - timedelta(seconds=STALE_LOCK_SECONDS + 60)
+            )
+            # ...but its worker is alive and keeps beating.
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                locked_at = BackgroundJob.objects.get(pk=job.pk).locked_at
+                if locked_at > timezone.now() - timedelta(seconds=STALE_LOCK_SECONDS):
+                    break
+                time.sleep(0.02)
+            seen["recovered"] = recover_stale_jobs()
+
+        job = enqueue_job("slow", {})
+        with mock.patch.object(jobs, "HEARTBEAT_SECONDS", 0.05), mock.patch.dict(jobs._HANDLERS, {"slow": slow_handler}):
+            self.assertEqual(run_worker(once=True), 1)
+
+        self.assertEqual(seen["recovered"], (0, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 1)
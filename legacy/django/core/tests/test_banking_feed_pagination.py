@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.accounting_defaults import ensure_default_accounts
+from core.models import BankAccount, BankTransaction, Business, Customer, Expense, Invoice
+
+User = get_user_model()
+
+
+class BankingFeedPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="feedpager", password="pass")
+        self.business = Business.objects.create(name="Feed Co", currency="CAD", owner_user=self.user)
+        defaults = ensure_default_accounts(self.business)
+        self.customer = Customer.objects.create(business=self.business, name="Cust")
+        self.bank_account = BankAccount.objects.create(
+            business=self.business,
+            name="Main",
+            usage_role=BankAccount.UsageRole.OPERATING,
+            account=defaults["cash"],
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse("api_banking_feed_transactions")
+
+    def _tx(self, days_ago, amount, **extra):
+        return BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=timezone.localdate() - timedelta(days=days_ago),
+            description=f"Tx {days_ago} {amount}",
+            amount=Decimal(amount),
+            **extra,
+        )
+
+    def _get(self, **params):
+        resp = self.client.get(self.url, {"account_id": self.bank_account.id, **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_keyset_pages_cover_every_transaction_once(self):
+        created = [self._tx(i // 2, "10.00") for i in range(7)]
+        seen = []
+        data = self._get(limit=3)
+        while True:
+            seen.extend(row["id"] for row in data["transactions"])
+            if not data["has_more"]:
+                self.assertIsNone(data["next_cursor"])
+                break
+            data = self._get(limit=3, cursor=data["next_cursor"])
+        expected = [tx.id for tx in sorted(created, key=lambda tx: (tx.date, tx.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_unpaged_request_returns_the_full_feed(self):
+        created = [self._tx(i, "10.00") for i in range(5)]
+        data = self._get()
+        self.assertEqual([row["id"] for row in data["transactions"]], [tx.id for tx in created])
+        self.assertFalse(data["has_more"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_status_filter_runs_in_sql_and_counts_cover_all_statuses(self):
+        self._tx(1, "10.00")
+        excluded = self._tx(2, "20.00", status=BankTransaction.TransactionStatus.EXCLUDED)
+        data = self._get(status=BankTransaction.TransactionStatus.EXCLUDED)
+        self.assertEqual([row["id"] for row in data["transactions"]], [excluded.id])
+        self.assertEqual(sum(data["status_counts"].values()), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        resp = self.client.get(self.url, {"account_id": self.bank_account.id, "cursor": "2024-13-01_5"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_suggestions_use_constant_queries_for_the_page(self):
+        for i in range(6):
+            Invoice.objects.create(
+                business=self.business,
+                customer=self.customer,
+                invoice_number=f"INV-{i}",
+                issue_date=timezone.localdate() - timedelta(days=i),
+                status=Invoice.Status.SENT,
+                total_amount=Decimal("100.00"),
+            )
+        expense = Expense.objects.create(
+            business=self.business,
+            date=timezone.localdate() - timedelta(days=200),
+            description="Old supplies",
+            amount=Decimal("42.00"),
+        )
+        deposit = self._tx(0, "100.00")
+        payment = self._tx(203, "-44.00")
+
+        self._get()  # warm-up: permission seeding
+        with CaptureQueriesContext(connection) as few:
+            self._get()
+        for i in range(10):
+            self._tx(i + 1, "100.00")
+            self._tx(i + 1, "-30.00")
+        with CaptureQueriesContext(connection) as many:
+            data = self._get()
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+        rows = {row["id"]: row for row in data["transactions"]}
+        invoice_numbers = [c["invoice_number"] for c in rows[deposit.id]["invoice_candidates"]]
+        self.assertEqual(invoice_numbers, ["INV-0", "INV-1", "INV-2", "INV-3", "INV-4"])
+        # Older than the previous 60-day candidate cutoff, but within tolerance and date window.
+        self.assertEqual([c["id"] for c in rows[payment.id]["expense_candidates"]], [expense.id])
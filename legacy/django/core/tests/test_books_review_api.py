@@ -48,6 +48,23 @@ class BooksReviewApiTests(TestCase):
         self.assertGreaterEqual(len(run.findings), 1)
         self.assertGreaterEqual(run.metrics.get("journals_total", 0), 2)
 
+    def test_ledger_detectors_feed_findings_and_suspense_metric(self):
+        suspense = Account.objects.create(
+            business=self.business, code="9999", name="Suspense", type=Account.AccountType.ASSET, is_suspense=True
+        )
+        cash = Account.objects.get(business=self.business, code="1010")
+        je = JournalEntry.objects.create(business=self.business, date=date(2025, 1, 15), description="Unsorted")
+        JournalLine.objects.create(journal_entry=je, account=suspense, debit=300, credit=0)
+        JournalLine.objects.create(journal_entry=je, account=cash, debit=0, credit=300)
+
+        data = self._run_review()
+
+        run = BooksReviewRun.objects.get(pk=data["run_id"])
+        self.assertEqual(run.metrics["suspense_balance"], 300.0)
+        suspense_findings = [f for f in run.findings if f["code"] == "GL_SUSPENSE_BALANCE"]
+        self.assertEqual(len(suspense_findings), 1)
+        self.assertEqual(suspense_findings[0]["references"], {"task_code": "G1"})
+
     def test_runs_listing_and_detail(self):
         data = self._run_review()
         run_id = data["run_id"]
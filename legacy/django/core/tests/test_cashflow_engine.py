@@ -0,0 +1,133 @@
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+
+from core.models import BankAccount, BankTransaction, Business, Category
+from core.services.cashflow import compute_cashflow
+from core.services.periods import resolve_comparison, resolve_period
+from core.views_reports import build_cashflow_payload
+
+User = get_user_model()
+
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "minibooks-test-cashflow-cache"),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CashflowEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="cf-engine", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business = Business.objects.create(owner_user=user, name="Cashflow Engine", currency="USD")
+            self.bank_account = BankAccount.objects.create(business=self.business, name="Operating")
+            self.sales = Category.objects.create(
+                business=self.business, name="Sales", type=Category.CategoryType.INCOME
+            )
+            self.rent = Category.objects.create(
+                business=self.business, name="Rent", type=Category.CategoryType.EXPENSE
+            )
+            self._tx(date(2023, 12, 20), "1000.00")
+            self._tx(date(2024, 1, 5), "500.00", self.sales)
+            self._tx(date(2024, 1, 9), "250.00", self.sales)
+            self._tx(date(2024, 1, 31), "-300.00", self.rent)
+            self._tx(date(2024, 3, 1), "-80.00")
+            self._tx(date(2023, 10, 15), "40.00", self.sales)  # comparison period
+
+    def _tx(self, day, amount, category=None):
+        return BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=day,
+            amount=Decimal(amount),
+            description=f"{day} {amount}",
+            category=category,
+        )
+
+    def _report(self):
+        return compute_cashflow(
+            self.business,
+            date(2024, 1, 1),
+            date(2024, 3, 31),
+            compare_start=date(2023, 10, 1),
+            compare_end=date(2023, 12, 31),
+        )
+
+    def test_monthly_buckets_drivers_and_balances(self):
+        with self.assertNumQueries(5):
+            report = self._report()
+        months = [(m.month, m.inflows, m.outflows) for m in report.current.months]
+        self.assertEqual(
+            months,
+            [
+                (date(2024, 1, 1), Decimal("750.00"), Decimal("300.00")),
+                (date(2024, 2, 1), Decimal("0.00"), Decimal("0.00")),
+                (date(2024, 3, 1), Decimal("0.00"), Decimal("80.00")),
+            ],
+        )
+        self.assertEqual(
+            [(d.label, d.amount) for d in report.current.drivers],
+            [("Sales", Decimal("750.00")), (None, Decimal("-80.00")), ("Rent", Decimal("-300.00"))],
+        )
+        self.assertEqual(report.opening_balance, Decimal("1040.00"))
+        self.assertEqual(report.current_cash, Decimal("1410.00"))
+        self.assertEqual(report.comparison.total_inflows, Decimal("1040.00"))
+        self.assertEqual(len(report.comparison.months), 3)
+
+    def test_report_is_cached_until_cash_data_changes(self):
+        self._report()
+        with self.assertNumQueries(0):
+            self._report()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tx = self._tx(date(2024, 2, 14), "60.00", self.sales)
+        self.assertEqual(self._report().current.months[1].inflows, Decimal("60.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sales.name = "Product sales"
+            self.sales.save()
+        self.assertEqual(self._report().current.drivers[0].label, "Product sales")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tx.delete()
+        self.assertEqual(self._report().current.months[1].inflows, Decimal("0.00"))
+
+    def test_uncommitted_transactions_are_not_cached(self):
+        self._report()
+        self._tx(date(2024, 2, 14), "60.00")  # no commit
+        self.assertEqual(self._report().current.months[1].inflows, Decimal("60.00"))
+        with self.assertNumQueries(5):
+            self._report()
+
+    def test_transaction_from_another_process_is_seen_without_a_shared_cache(self):
+        # This worker's own local-memory cache never sees the writer's version bump.
+        this_worker = LocMemCache("cashflow-test-worker", {})
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            with patch("core.services.cashflow.cache", this_worker):
+                self._report()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._tx(date(2024, 2, 14), "60.00", self.sales)
+            with patch("core.services.cashflow.cache", this_worker):
+                self.assertEqual(self._report().current.months[1].inflows, Decimal("60.00"))
+
+    def test_payload_reports_comparison_trend_and_opening_balance(self):
+        period = resolve_period("custom", date(2024, 1, 1), date(2024, 3, 31))
+        comparison = resolve_comparison(period["start"], period["end"], "previous_period")
+        payload = build_cashflow_payload(self.business, period, comparison)
+        self.assertEqual(payload["summary"]["totalInflows"], 750.0)
+        self.assertEqual(payload["summary"]["totalOutflows"], 380.0)
+        self.assertEqual(payload["summary"]["openingBalance"], 1040.0)
+        self.assertEqual([p["periodLabel"] for p in payload["trend"]], ["Jan 2024", "Feb 2024", "Mar 2024"])
+        self.assertEqual(payload["topDrivers"][0]["id"], "sales")
+        self.assertEqual(payload["comparison"]["totalInflows"], 1040.0)
+        self.assertEqual(len(payload["comparison"]["trend"]), 3)
@@ -8,6 +8,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from core.models import (
+    Account,
     Business,
     CompanionIssue,
     ReceiptRun,
@@ -15,6 +16,8 @@ from core.models import (
     Invoice,
     BankAccount,
     BankTransaction,
+    JournalEntry,
+    JournalLine,
 )
 from core.companion_issues import (
     build_companion_coverage,
@@ -159,6 +162,23 @@ class TestEvaluatePeriodCloseReadiness(TestCase):
         self.assertTrue(any("high-severity" in r.lower() for r in result["blocking_reasons"]))
         self.assertTrue(any(item.get("task_code") == "C1" for item in result.get("blocking_items", [])))
 
+    def test_suspense_balance_blocks_close(self):
+        """A balance left in a suspense account blocks close (G1 detector)."""
+        suspense = Account.objects.create(
+            business=self.business, code="9999", name="Suspense", type=Account.AccountType.ASSET, is_suspense=True
+        )
+        entry = JournalEntry.objects.create(business=self.business, date=timezone.localdate(), description="Unsorted")
+        JournalLine.objects.create(journal_entry=entry, account=suspense, debit=750, credit=0)
+        JournalLine.objects.create(journal_entry=entry, account=self.bank_account.account, debit=0, credit=750)
+
+        result = evaluate_period_close_readiness(self.business)
+
+        self.assertEqual(result["status"], "not_ready")
+        self.assertIn(
+            {"reason": "G1 – Suspense has a suspense balance of 750.00.", "task_code": "G1", "surface": "books"},
+            result["blocking_items"],
+        )
+
     def test_tax_anomaly_blocks_close(self):
         """High severity tax anomaly should block close readiness."""
         today = timezone.localdate()
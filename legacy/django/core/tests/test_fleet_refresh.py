@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from companion.models import HealthIndexSnapshot
+from core import fleet_refresh
+from core.fleet_refresh import Outcome, business_data_fingerprint, run_fleet_refresh
+from core.models import BankAccount, BankTransaction, Business, Expense, TenantRefreshState
+from taxes.models import TaxPayment, TaxPeriodSnapshot, TransactionLineTaxDetail
+
+User = get_user_model()
+
+
+def _refresh_noop(business, options):
+    pass
+
+
+class FleetRefreshTests(TestCase):
+    def setUp(self):
+        self.businesses = []
+        for i in range(2):
+            user = User.objects.create_user(username=f"fleet{i}", password="pass")
+            self.businesses.append(Business.objects.create(name=f"Fleet {i}", currency="CAD", owner_user=user))
+
+    def _ids(self):
+        return [b.id for b in self.businesses]
+
+    def test_unchanged_workspaces_are_skipped_until_data_changes(self):
+        first = run_fleet_refresh("companion_health", business_ids=self._ids())
+        self.assertEqual(first.count(Outcome.REFRESHED), 2)
+        self.assertEqual(HealthIndexSnapshot.objects.count(), 2)
+
+        second = run_fleet_refresh("companion_health", business_ids=self._ids())
+        self.assertEqual(second.count(Outcome.SKIPPED), 2)
+        self.assertEqual(HealthIndexSnapshot.objects.count(), 2)
+
+        Expense.objects.create(
+            business=self.businesses[0], date=date.today(), description="Paper", amount=Decimal("12.00")
+        )
+        third = run_fleet_refresh("companion_health", business_ids=self._ids())
+        outcomes = {r.business_id: r.outcome for r in third.results}
+        self.assertEqual(outcomes, {self.businesses[0].id: Outcome.REFRESHED, self.businesses[1].id: Outcome.SKIPPED})
+
+        forced = run_fleet_refresh("companion_health", business_ids=self._ids(), force=True)
+        self.assertEqual(forced.count(Outcome.REFRESHED), 2)
+
+    def _fingerprint_on(self, day):
+        with mock.patch("core.fleet_refresh.timezone.localdate", return_value=day):
+            return business_data_fingerprint(self.businesses[0])
+
+    def test_fingerprint_moves_only_when_rows_cross_an_aging_boundary(self):
+        today = date(2025, 6, 2)
+        bank_account = BankAccount.objects.create(business=self.businesses[0], name="Operating")
+        BankTransaction.objects.create(
+            bank_account=bank_account, date=today - timedelta(days=10), description="Deposit", amount=Decimal("50.00")
+        )
+        # 10 -> 14 days old: no threshold crossed, the nightly run can skip.
+        self.assertEqual(self._fingerprint_on(today), self._fingerprint_on(today + timedelta(days=4)))
+        # 15 days old crosses the first bank aging threshold.
+        self.assertNotEqual(self._fingerprint_on(today), self._fingerprint_on(today + timedelta(days=5)))
+
+    def test_fingerprint_sees_edits_that_keep_totals(self):
+        paper = Expense.objects.create(
+            business=self.businesses[0], date=date.today(), description="Paper", amount=Decimal("10.00")
+        )
+        ink = Expense.objects.create(
+            business=self.businesses[0], date=date.today(), description="Ink", amount=Decimal("20.00")
+        )
+        before = business_data_fingerprint(self.businesses[0])
+        Expense.objects.filter(pk=paper.pk).update(amount=Decimal("20.00"))
+        Expense.objects.filter(pk=ink.pk).update(amount=Decimal("10.00"))
+        self.assertNotEqual(business_data_fingerprint(self.businesses[0]), before)
+
+    def test_tax_fingerprint_does_not_take_max_of_uuid_keys(self):
+        business = self.businesses[0]
+        fingerprint = fleet_refresh.get_fleet_task("tax_watchdog").fingerprint
+        options = {"period": "2025-04"}
+        before = fingerprint(business, options)
+
+        TaxPayment.objects.create(
+            business=business, period_key="2025-04", amount=Decimal("40.00"), payment_date=date(2025, 5, 1)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            after = fingerprint(business, options)
+
+        self.assertNotEqual(after, before)
+        for table in (TaxPayment._meta.db_table, TransactionLineTaxDetail._meta.db_table):
+            self.assertFalse(any(f'MAX("{table}"."id")' in q["sql"] for q in ctx.captured_queries), table)
+        with self.assertRaises(ValueError):
+            fleet_refresh._signature(TaxPayment.objects.all())
+
+    def test_process_pool_runs_every_shard(self):
+        user = User.objects.create_user(username="fleet2", password="pass")
+        self.businesses.append(Business.objects.create(name="Fleet 2", currency="CAD", owner_user=user))
+        task = fleet_refresh.FleetTask(name="noop", refresh=_refresh_noop, fingerprint=lambda business, options: "")
+        seen = []
+        with mock.patch.dict(fleet_refresh._TASKS, {"noop": task}), mock.patch.object(
+            fleet_refresh.connections, "close_all", wraps=connections.close_all
+        ) as close_all:
+            report = run_fleet_refresh("noop", business_ids=self._ids(), workers=2, on_result=seen.append)
+
+        close_all.assert_called_once()
+        self.assertEqual(sorted(r.business_id for r in report.results), sorted(self._ids()))
+        self.assertEqual(report.count(Outcome.REFRESHED), 3)
+        self.assertEqual(len(seen), 3)
+        # The parent reconnects after handing its connections to the pool.
+        self.assertEqual(Business.objects.filter(pk__in=self._ids()).count(), 3)
+
+    def test_resuming_a_run_only_retries_unfinished_businesses(self):
+        task = fleet_refresh.get_fleet_task("tax_watchdog")
+        refresh = mock.Mock(side_effect=[None, RuntimeError("db went away"), None])
+        with mock.patch.dict(fleet_refresh._TASKS, {"tax_watchdog": fleet_refresh.FleetTask(
+            name=task.name, refresh=refresh, fingerprint=task.fingerprint,
+        )}):
+            report = run_fleet_refresh("tax_watchdog", business_ids=self._ids(), run_id="nightly-1")
+            self.assertEqual(report.count(Outcome.ERROR), 1)
+
+            resumed = run_fleet_refresh("tax_watchdog", business_ids=self._ids(), run_id="nightly-1")
+
+        self.assertEqual(refresh.call_count, 3)
+        self.assertEqual(resumed.resumed, 1)
+        self.assertEqual(resumed.count(Outcome.REFRESHED), 1)
+        state = TenantRefreshState.objects.get(task="tax_watchdog", business=self.businesses[1])
+        self.assertEqual((state.last_run_id, state.last_outcome, state.last_error), ("nightly-1", Outcome.REFRESHED, ""))
+
+    def test_tax_watchdog_command_runs_for_all_active_businesses(self):
+        out = StringIO()
+        call_command("tax_watchdog_period", period="2025-04", stdout=out)
+        self.assertIn("Watchdog complete for 2 businesses", out.getvalue())
+        self.assertEqual(TaxPeriodSnapshot.objects.filter(period_key="2025-04").count(), 2)
+
+    def test_companion_command_reports_timings(self):
+        out = StringIO()
+        call_command("refresh_companion_health", stdout=out, verbosity=2)
+        output = out.getvalue()
+        self.assertIn(f"workspace={self.businesses[0].id} refreshed", output)
+        self.assertIn("snapshots=2", output)
@@ -0,0 +1,242 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.accounting_defaults import ensure_default_accounts
+from core.jobs import BANK_IMPORT_AUTO_APPLY_JOB, run_worker
+from core.models import (
+    BackgroundJob,
+    BankAccount,
+    BankRule,
+    BankStatementImport,
+    BankTransaction,
+    Business,
+    Category,
+    Customer,
+    Invoice,
+    JournalEntry,
+    JournalLine,
+)
+from core.services.bank_matching import BankMatchingEngine
+from core.services.import_matching import auto_apply_imported_transactions
+
+User = get_user_model()
+
+
+class ImportAutoApplyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="pass")
+        self.business = Business.objects.create(name="Import Co", currency="USD", owner_user=self.user)
+        self.defaults = ensure_default_accounts(self.business)
+        self.bank_account = BankAccount.objects.create(
+            business=self.business,
+            name="Operating",
+            account=self.defaults["cash"],
+        )
+        self.customer = Customer.objects.create(business=self.business, name="Customer")
+        self.today = date.today()
+
+    def _entry(self, amount, entry_date=None, source=None):
+        je = JournalEntry.objects.create(
+            business=self.business,
+            date=entry_date or self.today,
+            description="Ledger entry",
+            source_object=source,
+        )
+        JournalLine.objects.create(journal_entry=je, account=self.defaults["cash"], debit=amount, credit=Decimal("0"))
+        JournalLine.objects.create(journal_entry=je, account=self.defaults["sales"], debit=Decimal("0"), credit=amount)
+        return je
+
+    def _tx(self, description, amount, **extra):
+        return BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=extra.pop("date", self.today),
+            description=description,
+            amount=Decimal(amount),
+            **extra,
+        )
+
+    def test_batch_suggestions_match_per_row_engine(self):
+        BankRule.objects.create(business=self.business, merchant_name="Shopify", pattern="")
+        invoice = Invoice.objects.create(
+            business=self.business, customer=self.customer, invoice_number="4521", total_amount=Decimal("750.00")
+        )
+        self._entry(Decimal("750.00"), source=invoice)
+        self._entry(Decimal("123.45"), entry_date=self.today - timedelta(days=10))
+        self._entry(Decimal("60.00"))
+        self._entry(Decimal("60.00"), entry_date=self.today - timedelta(days=30))
+        txs = [
+            self._tx("SHOPIFY PAYOUT", "310.00"),
+            self._tx("Payment for INV-4521", "750.00"),
+            self._tx("Card purchase", "-123.45"),
+            self._tx("Transfer", "60.00"),
+            self._tx("Unknown", "-9.99"),
+        ]
+        expected = {}
+        for tx in BankTransaction.objects.filter(pk__in=[t.pk for t in txs]).select_related("bank_account__business"):
+            matches = BankMatchingEngine.find_matches(tx, limit=1)
+            expected[tx.pk] = (int(matches[0]["confidence"] * 100), matches[0]["reason"]) if matches else None
+
+        result = auto_apply_imported_transactions([tx.pk for tx in txs])
+
+        self.assertEqual(
+            (result.scanned, result.rule, result.reference, result.amount, result.unmatched), (5, 1, 1, 2, 1)
+        )
+        self.assertEqual(set(result.timings_ms), {"rule", "id", "reference", "amount"})
+        for tx in BankTransaction.objects.filter(pk__in=[t.pk for t in txs]):
+            self.assertIsNotNone(tx.suggestions_scanned_at)
+            if expected[tx.pk] is None:
+                self.assertEqual(tx.status, BankTransaction.TransactionStatus.NEW)
+                self.assertIsNone(tx.suggestion_confidence)
+            else:
+                self.assertEqual(tx.status, BankTransaction.TransactionStatus.SUGGESTED)
+                self.assertEqual((tx.suggestion_confidence, tx.suggestion_reason), expected[tx.pk])
+
+    def test_auto_confirm_rule_posts_and_confirms_entry(self):
+        category = Category.objects.create(
+            business=self.business,
+            name="Software",
+            type=Category.CategoryType.EXPENSE,
+            account=self.defaults["opex"],
+        )
+        confirm_rule = BankRule.objects.create(
+            business=self.business, merchant_name="Github", category=category, auto_confirm=True
+        )
+        BankRule.objects.create(business=self.business, merchant_name="Zoom", auto_confirm=True)
+        confirmed = self._tx("GITHUB INC", "-21.00")
+        no_account = self._tx("ZOOM.US", "-15.00")
+
+        result = auto_apply_imported_transactions([confirmed.pk, no_account.pk], user=self.user)
+
+        self.assertEqual((result.rule, result.auto_confirmed, result.confirm_skipped), (2, 1, 1))
+        confirmed.refresh_from_db()
+        no_account.refresh_from_db()
+        self.assertEqual(confirmed.status, BankTransaction.TransactionStatus.MATCHED_SINGLE)
+        self.assertEqual(confirmed.category_id, category.pk)
+        self.assertEqual(confirmed.allocated_amount, Decimal("-21.00"))
+        lines = JournalLine.objects.filter(journal_entry=confirmed.posted_journal_entry)
+        self.assertEqual(
+            {(line.account_id, line.debit, line.credit) for line in lines},
+            {
+                (self.defaults["opex"].pk, Decimal("21.00"), Decimal("0")),
+                (self.defaults["cash"].pk, Decimal("0"), Decimal("21.00")),
+            },
+        )
+        self.assertTrue(confirmed.matches.exists())
+        self.assertEqual(no_account.status, BankTransaction.TransactionStatus.SUGGESTED)
+        self.assertEqual(no_account.suggestion_reason, "Rule: Zoom (Name match)")
+        confirm_rule.refresh_from_db()
+        self.assertEqual(confirm_rule.last_applied_count, 1)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        BankRule.objects.create(business=self.business, merchant_name="Acme", pattern="")
+        for i in range(1, 4):
+            invoice = Invoice.objects.create(
+                business=self.business, customer=self.customer, invoice_number=f"70{i}", total_amount=Decimal("10")
+            )
+            self._entry(Decimal(f"{i}00.00"), source=invoice)
+
+        def run(size):
+            ids = []
+            for i in range(size):
+                ids.append(self._tx("ACME supplies", "-5.00").pk)
+                ids.append(self._tx(f"Invoice 70{i % 3 + 1} paid", "1.00").pk)
+                ids.append(self._tx("Wire", f"{i % 3 + 1}00.00").pk)
+            with CaptureQueriesContext(connection) as ctx:
+                result = auto_apply_imported_transactions(ids)
+            self.assertEqual(result.suggested, size * 3)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2), run(20))
+
+    def test_only_new_transactions_are_touched(self):
+        BankRule.objects.create(business=self.business, merchant_name="Acme", pattern="")
+        excluded = self._tx("ACME", "-5.00", status=BankTransaction.TransactionStatus.EXCLUDED)
+
+        result = auto_apply_imported_transactions([excluded.pk])
+
+        self.assertEqual(result.scanned, 0)
+        excluded.refresh_from_db()
+        self.assertEqual(excluded.status, BankTransaction.TransactionStatus.EXCLUDED)
+
+    def test_statement_import_queues_auto_apply_job(self):
+        BankRule.objects.create(business=self.business, merchant_name="Acme", pattern="")
+        client = Client()
+        client.force_login(self.user)
+        csv_file = SimpleUploadedFile(
+            "statement.csv",
+            b"Date,Description,Amount\n2025-01-05,ACME SUPPLIES,-42.00\n2025-01-06,Coffee,-4.50\n",
+            content_type="text/csv",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = client.post(
+                "/bank/import/",
+                {
+                    "bank_account": self.bank_account.pk,
+                    "file_format": BankStatementImport.FileFormat.GENERIC_DATE_DESC_AMOUNT,
+                    "file": csv_file,
+                },
+            )
+            self.assertEqual(resp.status_code, 302)
+            self.assertFalse(BackgroundJob.objects.filter(kind=BANK_IMPORT_AUTO_APPLY_JOB).exists())
+        job = BackgroundJob.objects.get(kind=BANK_IMPORT_AUTO_APPLY_JOB)
+        self.assertEqual(len(job.payload["transaction_ids"]), 2)
+        self.assertFalse(BankTransaction.objects.filter(status=BankTransaction.TransactionStatus.SUGGESTED).exists())
+
+        with mock.patch("core.job_handlers.publish_job_progress") as publish:
+            self.assertEqual(run_worker(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        acme = BankTransaction.objects.get(description="ACME SUPPLIES")
+        self.assertEqual(acme.status, BankTransaction.TransactionStatus.SUGGESTED)
+        self.assertEqual(acme.suggestion_reason, "Rule: Acme (Name match)")
+        self.assertEqual(publish.call_args.kwargs["rule"], 1)
+        self.assertEqual(publish.call_args.kwargs["unmatched"], 1)
+
+    @override_settings(BANK_IMPORT_AUTO_APPLY_ASYNC=False)
+    def test_statement_import_can_auto_apply_inline(self):
+        BankRule.objects.create(business=self.business, merchant_name="Acme", pattern="")
+        client = Client()
+        client.force_login(self.user)
+        csv_file = SimpleUploadedFile(
+            "statement.csv",
+            b"Date,Description,Amount\n2025-01-05,ACME SUPPLIES,-42.00\n",
+            content_type="text/csv",
+        )
+        resp = client.post(
+            "/bank/import/",
+            {
+                "bank_account": self.bank_account.pk,
+                "file_format": BankStatementImport.FileFormat.GENERIC_DATE_DESC_AMOUNT,
+                "file": csv_file,
+            },
+        )
+
+        self.assertEqual(resp.status_code, 302)
+        self.assertFalse(BackgroundJob.objects.filter(kind=BANK_IMPORT_AUTO_APPLY_JOB).exists())
+        acme = BankTransaction.objects.get(description="ACME SUPPLIES")
+        self.assertEqual(acme.status, BankTransaction.TransactionStatus.SUGGESTED)
+
+    def test_feed_scans_unmatched_rows_only_once(self):
+        unmatched = self._tx("Unknown", "-9.99")
+        client = Client()
+        client.force_login(self.user)
+        url = f"/api/bank-accounts/{self.bank_account.pk}/reconciliation/transactions/"
+
+        with mock.patch(
+            "core.views_reconciliation.auto_apply_imported_transactions", wraps=auto_apply_imported_transactions
+        ) as lazy:
+            self.assertEqual(client.get(url).status_code, 200)
+            self.assertEqual(client.get(url).status_code, 200)
+
+        unmatched.refresh_from_db()
+        self.assertEqual(unmatched.status, BankTransaction.TransactionStatus.NEW)
+        self.assertIsNotNone(unmatched.suggestions_scanned_at)
+        self.assertEqual([list(call.args[0]) for call in lazy.call_args_list], [[unmatched.pk], []])
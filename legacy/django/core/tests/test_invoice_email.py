@@ -1,5 +1,4 @@
 from datetime import date
-import io
 from unittest import mock
 
 from django.contrib.auth.models import User
@@ -43,10 +42,10 @@ class InvoiceEmailTests(TestCase):
         resp = self.client.post(f"/api/invoices/{self.invoice.pk}/send_email/", {})
         self.assertEqual(resp.status_code, 400)
 
-    @mock.patch("core.views.EmailMultiAlternatives")
-    @mock.patch("core.views.generate_invoice_pdf")
+    @mock.patch("core.invoice_email_outbox.EmailMultiAlternatives")
+    @mock.patch("core.invoice_email_outbox.get_invoice_pdf_bytes")
     def test_send_email_logs_success_and_attaches_pdf(self, mock_generate_pdf, mock_email_cls):
-        mock_generate_pdf.return_value = io.BytesIO(b"pdf")
+        mock_generate_pdf.return_value = b"pdf"
 
         msg_mock = mock.Mock()
         msg_mock.attachments = []
@@ -93,8 +92,8 @@ class InvoiceEmailTests(TestCase):
 
     @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
     def test_send_email_includes_pdf_attachment(self):
-        with mock.patch("core.views.generate_invoice_pdf") as mock_generate_pdf:
-            mock_generate_pdf.return_value = io.BytesIO(b"pdf-data")
+        with mock.patch("core.invoice_email_outbox.get_invoice_pdf_bytes") as mock_generate_pdf:
+            mock_generate_pdf.return_value = b"pdf-data"
 
             resp = self.client.post(f"/api/invoices/{self.invoice.pk}/send_email/", {})
             self.assertEqual(resp.status_code, 200)
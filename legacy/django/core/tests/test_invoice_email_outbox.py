@@ -0,0 +1,175 @@
+import smtplib
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.invoice_email_outbox import (
+    dispatch_invoice_emails,
+    drain_invoice_email_outbox,
+    queue_invoice_email,
+    recover_stale_invoice_emails,
+)
+from core.jobs import INVOICE_EMAILS_JOB, enqueue_job, run_worker
+from core.models import BackgroundJob, Business, Customer, Invoice, InvoiceEmailLog
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    INVOICE_EMAIL_BACKEND="",
+    INVOICE_EMAIL_MAX_ATTEMPTS=2,
+)
+class InvoiceEmailOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pass")
+        self.business = Business.objects.create(
+            name="Acme Co", currency="USD", owner_user=self.user, email_from="billing@acme.example.com"
+        )
+        self.invoices = []
+        for i in range(3):
+            customer = Customer.objects.create(business=self.business, name=f"C{i}", email=f"c{i}@example.com")
+            self.invoices.append(
+                Invoice.objects.create(
+                    business=self.business,
+                    customer=customer,
+                    invoice_number=f"INV-{i}",
+                    issue_date=date.today(),
+                    total_amount=10,
+                    status=Invoice.Status.SENT,
+                )
+            )
+        self.client.force_login(self.user)
+        pdf_patch = mock.patch("core.invoice_email_outbox.get_invoice_pdf_bytes", return_value=b"%PDF-test")
+        pdf_patch.start()
+        self.addCleanup(pdf_patch.stop)
+
+    def _queue(self, invoice):
+        return queue_invoice_email(
+            invoice,
+            to_email=invoice.customer.email,
+            public_url="http://testserver/public",
+            tracking_url_for=lambda token: f"http://testserver/open/{token}.gif",
+        )
+
+    def test_batch_is_sent_over_one_connection_and_status_bulk_updated(self):
+        logs = [self._queue(invoice) for invoice in self.invoices]
+        self.assertTrue(all(log.status == InvoiceEmailLog.STATUS_QUEUED for log in logs))
+
+        from django.core.mail import get_connection as real_get_connection
+
+        with mock.patch("core.invoice_email_outbox.get_connection", wraps=real_get_connection) as get_conn:
+            result = dispatch_invoice_emails()
+
+        self.assertEqual(get_conn.call_count, 1)
+        self.assertEqual(sorted(result.sent), sorted(log.pk for log in logs))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn(str(logs[0].open_token), mail.outbox[0].alternatives[0][0])
+        self.assertEqual(mail.outbox[0].attachments[0][0], "Invoice-INV-0.pdf")
+        for log in InvoiceEmailLog.objects.all():
+            self.assertEqual(log.status, InvoiceEmailLog.STATUS_SENT)
+            self.assertIsNotNone(log.sent_at)
+        invoice = Invoice.objects.get(pk=self.invoices[1].pk)
+        self.assertEqual(invoice.email_to, "c1@example.com")
+        self.assertIsNotNone(invoice.email_sent_at)
+
+    def test_transient_failure_is_requeued_until_max_attempts(self):
+        log = self._queue(self.invoices[0])
+        failing = mock.MagicMock()
+        failing.send_messages.side_effect = smtplib.SMTPResponseException(451, b"try later")
+
+        with mock.patch("core.invoice_email_outbox.get_connection", return_value=failing):
+            first = dispatch_invoice_emails()
+            log.refresh_from_db()
+            self.assertEqual(first.retrying, [log.pk])
+            self.assertEqual(log.status, InvoiceEmailLog.STATUS_QUEUED)
+            self.assertIsNotNone(log.next_attempt_at)
+
+            # Not due yet: nothing is claimed.
+            self.assertEqual(dispatch_invoice_emails().retrying, [])
+
+            InvoiceEmailLog.objects.filter(pk=log.pk).update(next_attempt_at=None)
+            second = dispatch_invoice_emails()
+
+        log.refresh_from_db()
+        self.assertEqual(second.failed, [log.pk])
+        self.assertEqual(log.status, InvoiceEmailLog.STATUS_ERROR)
+        self.assertEqual(log.attempts, 2)
+        self.assertIn("try later", Invoice.objects.get(pk=self.invoices[0].pk).email_last_error)
+
+    def test_permanent_failure_is_not_retried(self):
+        log = self._queue(self.invoices[0])
+        failing = mock.MagicMock()
+        failing.send_messages.side_effect = smtplib.SMTPRecipientsRefused({"c0@example.com": (550, b"no such user")})
+        with mock.patch("core.invoice_email_outbox.get_connection", return_value=failing):
+            result = dispatch_invoice_emails()
+        self.assertEqual(result.failed, [log.pk])
+
+    def test_bulk_endpoint_queues_and_worker_sends(self):
+        no_email = Customer.objects.create(business=self.business, name="No Email")
+        skipped = Invoice.objects.create(
+            business=self.business, customer=no_email, invoice_number="INV-X", total_amount=5
+        )
+        ids = [invoice.pk for invoice in self.invoices] + [skipped.pk]
+        resp = self.client.post("/api/invoices/send_emails/", {"invoice_ids": ids})
+        self.assertEqual(resp.status_code, 202)
+        data = resp.json()
+        self.assertEqual(data["queued"], 3)
+        self.assertEqual(data["skipped_invoice_ids"], [skipped.pk])
+        self.assertEqual(len(mail.outbox), 0)
+
+        run_worker(once=True)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(InvoiceEmailLog.objects.exclude(status=InvoiceEmailLog.STATUS_SENT).exists())
+
+    def test_single_send_can_be_queued(self):
+        resp = self.client.post(f"/api/invoices/{self.invoices[0].pk}/send_email/", {"background": "1"})
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(InvoiceEmailLog.objects.get(pk=resp.json()["log_id"]).status, InvoiceEmailLog.STATUS_QUEUED)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def _crash_mid_send(self, log, *, minutes_ago, attempts=1):
+        InvoiceEmailLog.objects.filter(pk=log.pk).update(
+            status=InvoiceEmailLog.STATUS_SENDING,
+            attempts=attempts,
+            claimed_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    @override_settings(INVOICE_EMAIL_SENDING_TIMEOUT_SECONDS=600)
+    def test_stale_sending_rows_are_requeued_or_failed(self):
+        retry, exhausted, in_flight = [self._queue(invoice) for invoice in self.invoices]
+        self._crash_mid_send(retry, minutes_ago=30)
+        self._crash_mid_send(exhausted, minutes_ago=30, attempts=2)
+        self._crash_mid_send(in_flight, minutes_ago=1)
+
+        result = drain_invoice_email_outbox()
+
+        self.assertEqual(result.sent, [retry.pk])
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, InvoiceEmailLog.STATUS_ERROR)
+        self.assertIn("Dispatcher stopped", exhausted.error_message)
+        in_flight.refresh_from_db()  # another dispatcher may still be sending it
+        self.assertEqual(in_flight.status, InvoiceEmailLog.STATUS_SENDING)
+        self.assertEqual(recover_stale_invoice_emails(), (0, 0))
+
+    def test_failed_dispatch_job_releases_its_rows(self):
+        log = self._queue(self.invoices[0])
+        job = enqueue_job(INVOICE_EMAILS_JOB, {"log_ids": [log.pk]}, business=self.business)
+
+        def crash(log_ids=None, **kwargs):
+            self._crash_mid_send(log, minutes_ago=0)
+            raise RuntimeError("worker lost its database connection")
+
+        with mock.patch("core.invoice_email_outbox.drain_invoice_email_outbox", side_effect=crash):
+            self.assertEqual(run_worker(once=True, max_jobs=1), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        log.refresh_from_db()
+        self.assertEqual(log.status, InvoiceEmailLog.STATUS_QUEUED)
+        self.assertEqual(run_worker(once=True), 1)  # the dispatch queued on failure
+        log.refresh_from_db()
+        self.assertEqual(log.status, InvoiceEmailLog.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import metrics
+from core.metrics import DomainMetrics, build_central_books_metrics, collect_metrics
+from core.models import Account, BankAccount, BankTransaction, Business, Customer, JournalEntry, JournalLine
+
+User = get_user_model()
+
+
+class MonitoringMetricsFixtures:
+    def _make_business(self, i):
+        user = User.objects.create_user(username=f"metrics{i}", password="pass")
+        business = Business.objects.create(name=f"Metrics {i}", currency="USD", owner_user=user)
+        cash = Account.objects.create(business=business, code=f"10{i}9", name="Cash", type=Account.AccountType.ASSET)
+        revenue = Account.objects.create(business=business, code=f"40{i}9", name="Sales", type=Account.AccountType.INCOME)
+        entry = JournalEntry.objects.create(
+            business=business, date=timezone.localdate() + timedelta(days=3), description="Future"
+        )
+        # Deliberately unbalanced by 10.
+        JournalLine.objects.create(journal_entry=entry, account=cash, debit=Decimal("100"), credit=Decimal("0"))
+        JournalLine.objects.create(journal_entry=entry, account=revenue, debit=Decimal("0"), credit=Decimal("90"))
+        bank = BankAccount.objects.create(business=business, name="Operating", account=cash)
+        BankTransaction.objects.create(
+            bank_account=bank,
+            date=timezone.localdate() - timedelta(days=45),
+            description="Old deposit",
+            amount=Decimal("25"),
+        )
+        Customer.objects.create(business=business, name=f"Customer {i}")
+        return business
+
+
+class MonitoringMetricsTests(MonitoringMetricsFixtures, TestCase):
+    def setUp(self):
+        self.businesses = [self._make_business(i) for i in range(2)]
+
+    def test_every_business_is_covered_and_fleet_totals_add_up(self):
+        run = collect_metrics(workers=1)
+        self.assertEqual(set(run.business_names), {b.id for b in self.businesses})
+
+        for business in self.businesses:
+            ledger = run.domains["ledger_accounting"].businesses[business.id]
+            self.assertEqual(ledger["journal_entries"]["unbalanced_count"], 1)
+            self.assertEqual(ledger["journal_entries"]["future_dated_count"], 1)
+            banking = run.domains["banking_reconciliation"].businesses[business.id]
+            [account] = banking["bank_accounts"]
+            self.assertEqual(account["bank_feed_balance"], 25.0)
+            self.assertEqual(account["ledger_balance"], 100.0)
+            self.assertEqual(account["unreconciled_older_than_days"], {"30d": 1, "60d": 0, "90d": 0})
+            customers = run.domains["business_revenue"].businesses[business.id]["customers"]
+            self.assertGreaterEqual(customers["total_customers"], 1)
+
+        fleet = build_central_books_metrics(workers=1)
+        self.assertEqual(fleet["ledger_accounting"]["journal_entries"]["unbalanced_count"], 2)
+        banking = fleet["banking_reconciliation"]
+        self.assertEqual(banking["bank_accounts_summary"]["total"], 2)
+        self.assertEqual([a["business_id"] for a in banking["bank_accounts"]], [b.id for b in self.businesses])
+        cash_balances = [
+            (row["business_id"], row["current_balance"])
+            for row in fleet["ledger_accounting"]["accounts"]["balances"]
+            if row["account_name"] == "Cash" and row["account_code"].startswith("10")
+        ]
+        self.assertEqual(cash_balances, [(b.id, 100.0) for b in self.businesses])
+        self.assertEqual(fleet["tax_fx"]["tax_rates"]["by_code"], {})
+        self.assertEqual(fleet["meta"]["business_count"], 2)
+        self.assertEqual(set(fleet["meta"]["collector_timings_ms"]), set(metrics.COLLECTORS))
+
+    def test_fleet_lists_are_capped_but_per_business_lists_are_not(self):
+        for i in range(2, 5):
+            self._make_business(i)
+
+        with mock.patch.object(metrics, "FLEET_TOP_N", 2):
+            fleet = build_central_books_metrics(workers=1)
+            run = collect_metrics(workers=1)
+
+        self.assertEqual(fleet["meta"]["business_count"], 5)
+        self.assertEqual(len(fleet["meta"]["businesses_included"]), 2)
+        self.assertEqual(len(fleet["banking_reconciliation"]["bank_accounts"]), 2)
+        self.assertEqual(fleet["banking_reconciliation"]["bank_accounts_summary"]["total"], 5)
+        self.assertEqual(
+            [row["current_balance"] for row in fleet["ledger_accounting"]["accounts"]["balances"]], [100.0, 100.0]
+        )
+        self.assertEqual(len(run.meta["businesses_included"]), 5)
+        self.assertEqual(
+            sum(len(b["bank_accounts"]) for b in run.domains["banking_reconciliation"].businesses.values()), 5
+        )
+
+    def test_query_count_does_not_grow_with_businesses(self):
+        collect_metrics(workers=1)  # warm-up (request metrics flush/prune)
+        with CaptureQueriesContext(connection) as two:
+            collect_metrics(workers=1)
+        for i in range(2, 5):
+            self._make_business(i)
+        with CaptureQueriesContext(connection) as five:
+            run = collect_metrics(workers=1)
+        self.assertEqual(len(run.business_names), 5)
+        self.assertEqual(len(two.captured_queries), len(five.captured_queries))
+
+    def test_collectors_run_concurrently(self):
+        threads = set()
+
+        def slow_collector(scope):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+            return DomainMetrics(fleet={"ok": True})
+
+        fake = {f"domain_{i}": slow_collector for i in range(3)}
+        with mock.patch.object(metrics, "COLLECTORS", fake):
+            run = collect_metrics(workers=3)
+        self.assertEqual(len(threads), 3)
+        self.assertEqual(run.meta["collector_workers"], 3)
+        self.assertEqual(set(run.meta["collector_timings_ms"]), set(fake))
+        self.assertTrue(all(ms >= 40 for ms in run.meta["collector_timings_ms"].values()))
+
+    def test_export_metrics_streams_ndjson(self):
+        out = StringIO()
+        call_command("export_metrics", "--workers", "1", "--business", "Metrics 0", stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["meta", "fleet", "business"])
+        self.assertEqual(lines[0]["businesses_included"], ["Metrics 0"])
+        self.assertIn("ledger_accounting", lines[0]["collector_timings_ms"])
+        self.assertEqual(lines[2]["business_id"], self.businesses[0].id)
+        self.assertEqual(lines[2]["ledger_accounting"]["journal_entries"]["unbalanced_count"], 1)
+
+
+class ConcurrentCollectorsTests(MonitoringMetricsFixtures, TransactionTestCase):
+    """Pool threads use their own connections, so the data has to be committed."""
+
+    def test_real_collectors_on_a_pool_match_a_sequential_run(self):
+        for i in range(2):
+            self._make_business(i)
+
+        def payload(workers):
+            run = collect_metrics(workers=workers, window_end=now)
+            return {name: (domain.fleet, domain.businesses) for name, domain in run.domains.items()}, run.meta
+
+        now = timezone.now()
+        sequential, _ = payload(1)
+        concurrent, meta = payload(len(metrics.COLLECTORS))
+
+        self.assertEqual(meta["collector_workers"], len(metrics.COLLECTORS))
+        self.assertEqual(set(meta["collector_timings_ms"]), set(metrics.COLLECTORS))
+        self.assertEqual(concurrent, sequential)
+        fleet = concurrent["ledger_accounting"][0]
+        self.assertEqual(fleet["journal_entries"]["unbalanced_count"], 2)
@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.ocr_pipeline import OcrDocument, call_vision_with_retry, extract_documents_concurrently
+
+
+FILES = {
+    "a.jpg": b"receipt-a",
+    "b.jpg": b"receipt-b",
+    "c.jpg": b"receipt-c",
+    "dup.jpg": b"receipt-a",
+}
+
+
+@override_settings(OCR_MAX_CONCURRENCY=4, OCR_REQUESTS_PER_SECOND=0, OCR_RETRY_BASE_DELAY_SECONDS=0)
+class OcrPipelineTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("core.ocr_pipeline._read_bytes", side_effect=lambda key: FILES.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_keep_input_order_and_run_concurrently(self):
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def extract(file_bytes, filename, storage_key):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            # Earlier documents finish last.
+            time.sleep({"a.jpg": 0.06, "b.jpg": 0.03}.get(storage_key, 0.0))
+            with lock:
+                in_flight -= 1
+            return {"vendor": storage_key}
+
+        docs = [OcrDocument(key) for key in ("a.jpg", "b.jpg", "c.jpg")]
+        outcomes = extract_documents_concurrently(docs, extract, kind="receipt")
+
+        self.assertEqual([o.data["vendor"] for o in outcomes], ["a.jpg", "b.jpg", "c.jpg"])
+        self.assertGreater(peak, 1)
+
+    def test_identical_bytes_are_extracted_once(self):
+        calls = []
+
+        def extract(file_bytes, filename, storage_key):
+            calls.append(storage_key)
+            time.sleep(0.02)
+            return {"vendor": file_bytes.decode()}
+
+        docs = [OcrDocument("a.jpg"), OcrDocument("dup.jpg"), OcrDocument("b.jpg")]
+        first = extract_documents_concurrently(docs, extract, kind="receipt")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(first[1].data, {"vendor": "receipt-a"})
+        self.assertTrue(first[1].cache_hit)
+
+        second = extract_documents_concurrently([OcrDocument("b.jpg")], extract, kind="receipt")
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(second[0].cache_hit)
+
+        # Cache is namespaced per document kind.
+        extract_documents_concurrently([OcrDocument("b.jpg")], extract, kind="invoice")
+        self.assertEqual(len(calls), 3)
+
+    def test_unreadable_file_and_extractor_errors_are_reported_per_document(self):
+        def extract(file_bytes, filename, storage_key):
+            raise RuntimeError("boom")
+
+        outcomes = extract_documents_concurrently(
+            [OcrDocument("missing.jpg"), OcrDocument("c.jpg")], extract, kind="receipt"
+        )
+        self.assertIsNone(outcomes[0].data)
+        self.assertIsNone(outcomes[0].error)
+        self.assertEqual(outcomes[1].error, "boom")
+
+    @override_settings(OPENAI_API_KEY="test-key", OCR_MAX_ATTEMPTS=3)
+    def test_vision_call_retries_empty_responses(self):
+        call = mock.Mock(side_effect=[None, RuntimeError("429"), '{"vendor": "ok"}'])
+        self.assertEqual(call_vision_with_retry(call, prompt="p"), '{"vendor": "ok"}')
+        self.assertEqual(call.call_count, 3)
+
+    @override_settings(OPENAI_API_KEY="", OCR_MAX_ATTEMPTS=3)
+    def test_unconfigured_provider_is_not_retried(self):
+        call = mock.Mock(return_value=None)
+        self.assertIsNone(call_vision_with_retry(call, prompt="p"))
+        self.assertEqual(call.call_count, 1)
@@ -0,0 +1,106 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+
+from core.models import Business, Customer, Invoice
+from core.pdf_cache import INVOICE_PDF, build_pdf_job, get_invoice_pdf_bytes, render_pdf_jobs, stream_pdf_zip
+
+
+class PdfCacheTests(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir, ignore_errors=True)
+        self.storage = FileSystemStorage(location=self.media_dir)
+        self.user = User.objects.create_user(username="pdf", password="pass")
+        self.business = Business.objects.create(name="Acme", currency="USD", owner_user=self.user)
+        self.customer = Customer.objects.create(business=self.business, name="Customer", email="c@example.com")
+        self.invoices = [
+            Invoice.objects.create(
+                business=self.business,
+                customer=self.customer,
+                invoice_number=f"INV-{i}",
+                issue_date=date(2025, 1, 15),
+                total_amount=Decimal("100.00"),
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def _reload(self, invoice):
+        return Invoice.objects.select_related("business", "customer").get(pk=invoice.pk)
+
+    def test_unchanged_invoice_is_served_from_cache(self):
+        invoice = self._reload(self.invoices[0])
+        first = get_invoice_pdf_bytes(invoice, storage=self.storage)
+        self.assertTrue(first.startswith(b"%PDF"))
+
+        # Overwrite the cached file: a second request must not re-render.
+        key = build_pdf_job(INVOICE_PDF, invoice).storage_key
+        self.storage.delete(key)
+        self.storage.save(key, ContentFile(b"cached"))
+        self.assertEqual(get_invoice_pdf_bytes(self._reload(invoice), storage=self.storage), b"cached")
+
+    def test_version_changes_with_rendered_fields_and_branding(self):
+        invoice = self._reload(self.invoices[0])
+        original = build_pdf_job(INVOICE_PDF, invoice).storage_key
+
+        invoice.notes = "Net 30"
+        self.assertNotEqual(build_pdf_job(INVOICE_PDF, invoice).storage_key, original)
+
+        invoice = self._reload(self.invoices[0])
+        invoice.business.name = "Acme Renamed"
+        self.assertNotEqual(build_pdf_job(INVOICE_PDF, invoice).storage_key, original)
+
+    def test_new_version_replaces_the_previous_one(self):
+        invoice = self._reload(self.invoices[0])
+        old_key = build_pdf_job(INVOICE_PDF, invoice).storage_key
+        get_invoice_pdf_bytes(invoice, storage=self.storage)
+        other_key = build_pdf_job(INVOICE_PDF, self._reload(self.invoices[1])).storage_key
+        get_invoice_pdf_bytes(self._reload(self.invoices[1]), storage=self.storage)
+
+        Invoice.objects.filter(pk=invoice.pk).update(notes="Net 30")
+        edited = self._reload(invoice)
+        get_invoice_pdf_bytes(edited, storage=self.storage)
+
+        new_key = build_pdf_job(INVOICE_PDF, edited).storage_key
+        self.assertTrue(self.storage.exists(new_key))
+        self.assertFalse(self.storage.exists(old_key))
+        self.assertTrue(self.storage.exists(other_key))
+
+    @override_settings(PDF_EXPORT_MIN_PARALLEL=2)
+    def test_batch_render_keeps_order_and_fills_cache(self):
+        jobs = [build_pdf_job(INVOICE_PDF, self._reload(inv)) for inv in self.invoices]
+        results = list(render_pdf_jobs(INVOICE_PDF, jobs, storage=self.storage, max_workers=2))
+        self.assertEqual([job.filename for job, _ in results], ["Invoice-INV-0.pdf", "Invoice-INV-1.pdf", "Invoice-INV-2.pdf"])
+        for job, _ in results:
+            self.assertTrue(self.storage.exists(job.storage_key))
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(stream_pdf_zip(results))))
+        self.assertEqual(archive.namelist(), [job.filename for job, _ in results])
+        self.assertTrue(archive.read("Invoice-INV-1.pdf").startswith(b"%PDF"))
+
+    def test_export_endpoint_streams_zip_scoped_to_business(self):
+        other_user = User.objects.create_user(username="other", password="pass")
+        other_business = Business.objects.create(name="Other", currency="USD", owner_user=other_user)
+        other_customer = Customer.objects.create(business=other_business, name="X")
+        foreign = Invoice.objects.create(
+            business=other_business, customer=other_customer, invoice_number="FOREIGN", total_amount=Decimal("5.00")
+        )
+        ids = f"{self.invoices[0].pk},{self.invoices[2].pk},{foreign.pk}"
+        with mock.patch("core.pdf_cache.default_storage", self.storage):
+            resp = self.client.get(f"/invoices/pdf-export/?ids={ids}")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp["Content-Type"], "application/zip")
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+        self.assertEqual(archive.namelist(), ["Invoice-INV-0.pdf", "Invoice-INV-2.pdf"])
+
+        self.assertEqual(self.client.get("/invoices/pdf-export/?ids=abc").status_code, 400)
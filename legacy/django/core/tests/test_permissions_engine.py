@@ -1,8 +1,16 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from core.models import BankAccount, Business, RoleDefinition, UserPermissionOverride, WorkspaceMembership
-from core.permissions_engine import evaluate_permission
+from core.permissions_engine import can, evaluate_permission, get_effective_permission_matrix, permissions_changed
 from core.rbac_seeding import ensure_builtin_role_definitions
 from core.sod import validate_role_permissions
 
@@ -103,3 +111,136 @@ class PermissionsEngineTests(TestCase):
         warnings = validate_role_permissions(permissions)
         warning_ids = {w["id"] for w in warnings}
         self.assertIn("vendor_fraud", warning_ids)
+
+
+# A cache every process sees, like Redis in production.
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "minibooks-test-permission-cache"),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PermissionPolicyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pass")
+        self.ap = User.objects.create_user(username="ap", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business = Business.objects.create(name="Biz", currency="USD", owner_user=self.owner)
+            ensure_builtin_role_definitions(self.business)
+            self.ap_membership = WorkspaceMembership.objects.create(
+                user=self.ap,
+                business=self.business,
+                role="AP_SPECIALIST",
+                role_definition=RoleDefinition.objects.get(business=self.business, key="AP_SPECIALIST"),
+            )
+
+    def _request_user(self):
+        # A fresh instance per "request", as request.user would be.
+        return User.objects.get(pk=self.ap.pk)
+
+    def test_cached_policy_answers_checks_without_queries(self):
+        evaluate_permission(self._request_user(), self.business, "expenses.view")  # warm
+        user = self._request_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(can(user, self.business, "expenses.view"))
+            self.assertFalse(can(user, self.business, "bank.reconcile"))
+            matrix = get_effective_permission_matrix(user, self.business)
+        self.assertTrue(matrix["expenses.view"]["allowed_unscoped"])
+
+    def test_override_and_membership_changes_invalidate_policy(self):
+        user = self._request_user()
+        self.assertFalse(can(user, self.business, "bank.reconcile"))
+        with self.captureOnCommitCallbacks(execute=True):
+            UserPermissionOverride.objects.create(
+                membership=self.ap_membership,
+                action="bank.reconcile",
+                effect=UserPermissionOverride.Effect.ALLOW,
+            )
+        self.assertTrue(can(user, self.business, "bank.reconcile"))
+        self.assertTrue(can(self._request_user(), self.business, "bank.reconcile"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ap_membership.is_active = False
+            self.ap_membership.save()
+        self.assertFalse(can(user, self.business, "expenses.view"))
+        self.assertEqual(get_effective_permission_matrix(self._request_user(), self.business), {})
+
+    def test_role_permission_update_via_api_invalidates_policy(self):
+        role = RoleDefinition.objects.get(business=self.business, key="AP_SPECIALIST")
+        self.assertFalse(can(self._request_user(), self.business, "bank.reconcile"))
+        with self.captureOnCommitCallbacks(execute=True):
+            permissions = dict(role.permissions, **{"bank.reconcile": {"level": "edit", "scope": {"type": "all"}}})
+            RoleDefinition.objects.filter(id=role.id).update(permissions=permissions)
+            permissions_changed(self.business.id)
+        self.assertTrue(can(self._request_user(), self.business, "bank.reconcile"))
+
+    def test_expired_membership_is_denied_even_when_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ap_membership.expires_at = timezone.now() + timedelta(hours=1)
+            self.ap_membership.save()
+        self.assertTrue(can(self._request_user(), self.business, "expenses.view"))
+        with patch("core.permissions_engine.timezone.now", return_value=timezone.now() + timedelta(hours=2)):
+            self.assertFalse(can(self._request_user(), self.business, "expenses.view"))
+
+    def test_uncommitted_changes_are_not_cached(self):
+        can(self._request_user(), self.business, "expenses.view")
+        UserPermissionOverride.objects.create(
+            membership=self.ap_membership,
+            action="expenses.view",
+            effect=UserPermissionOverride.Effect.DENY,
+        )
+        self.assertFalse(can(self._request_user(), self.business, "expenses.view"))
+        user = self._request_user()
+        with self.assertNumQueries(2):  # membership (+ role definition) and overrides, every time
+            can(user, self.business, "expenses.view")
+
+    def test_role_change_reaches_a_process_with_a_warm_cache(self):
+        other_process = caches.create_connection("default")
+        with patch("core.permissions_engine.cache", other_process):
+            self.assertFalse(can(self._request_user(), self.business, "bank.reconcile"))
+
+        role = RoleDefinition.objects.get(business=self.business, key="AP_SPECIALIST")
+        with self.captureOnCommitCallbacks(execute=True):
+            role.permissions = dict(role.permissions, **{"bank.reconcile": {"level": "edit", "scope": {"type": "all"}}})
+            role.save()
+
+        with patch("core.permissions_engine.cache", other_process):
+            self.assertTrue(can(self._request_user(), self.business, "bank.reconcile"))
+
+
+class PerProcessCachePermissionTests(TestCase):
+    """With the default local-memory cache, policies are only memoized per request."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pass")
+        self.ap = User.objects.create_user(username="ap", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business = Business.objects.create(name="Biz", currency="USD", owner_user=self.owner)
+            ensure_builtin_role_definitions(self.business)
+            WorkspaceMembership.objects.create(
+                user=self.ap,
+                business=self.business,
+                role="AP_SPECIALIST",
+                role_definition=RoleDefinition.objects.get(business=self.business, key="AP_SPECIALIST"),
+            )
+
+    def test_role_change_made_by_another_process_applies_on_next_request(self):
+        # This worker's own cache never sees the version bump made by the writer.
+        this_worker = LocMemCache("permission-test-worker", {})
+        with patch("core.permissions_engine.cache", this_worker):
+            self.assertFalse(can(User.objects.get(pk=self.ap.pk), self.business, "bank.reconcile"))
+
+        role = RoleDefinition.objects.get(business=self.business, key="AP_SPECIALIST")
+        with self.captureOnCommitCallbacks(execute=True):
+            role.permissions = dict(role.permissions, **{"bank.reconcile": {"level": "edit", "scope": {"type": "all"}}})
+            role.save()
+
+        with patch("core.permissions_engine.cache", this_worker):
+            user = User.objects.get(pk=self.ap.pk)
+            self.assertTrue(can(user, self.business, "bank.reconcile"))
+            with self.assertNumQueries(0):  # memoized for the rest of the request
+                can(user, self.business, "expenses.view")
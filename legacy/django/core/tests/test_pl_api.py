@@ -1,5 +1,7 @@
 """Tests for the P&L Report API endpoint."""
-from datetime import date
+import csv
+import io
+from datetime import date, timedelta
 from decimal import Decimal
 from django.test import TestCase, Client
 from django.urls import reverse
@@ -237,3 +239,65 @@ class PlReportApiTests(TestCase):
         # Marketing (6100) should be in EXPENSE
         expense_names = [r["name"] for r in expense_rows]
         self.assertIn("Marketing", expense_names)
+
+    def test_pl_api_supports_several_comparison_periods(self):
+        """Comma-separated compare presets add one comparison column each."""
+        today = date.today()
+        this_month = today.replace(day=1)
+        last_year = this_month.replace(year=this_month.year - 1)
+        self._create_journal_entry(self.income_account, Decimal("1000"), is_income=True, entry_date=this_month)
+        self._create_journal_entry(self.income_account, Decimal("400"), is_income=True, entry_date=last_year)
+        self._create_journal_entry(self.cogs_account, Decimal("100"), entry_date=last_year)
+
+        response = self.client.get(
+            reverse("pl_report_api"),
+            {"period_preset": "this_month", "compare_preset": "previous_period,previous_year"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["compare_label"], "Previous period")
+        self.assertEqual([c["preset"] for c in data["comparisons"]], ["previous_period", "previous_year"])
+        self.assertEqual(data["comparisons"][1]["kpi"]["income"], 400.0)
+        self.assertEqual(data["comparisons"][1]["kpi"]["cogs"], 100.0)
+        self.assertEqual(data["comparisons"][1]["kpi"]["change_income_pct"], 150.0)
+
+        # COGS only had activity in the comparison period, so it has no row.
+        self.assertEqual([r["group"] for r in data["rows"]], ["INCOME"])
+        self.assertEqual(data["rows"][0]["compare_amounts"], [0.0, 400.0])
+
+    def test_pl_report_reads_all_periods_in_one_query(self):
+        from core.services.pl_report import build_pl_report
+
+        today = date.today()
+        self._create_journal_entry(self.income_account, Decimal("300"), is_income=True, entry_date=today)
+        with self.assertNumQueries(1):
+            report = build_pl_report(
+                self.business,
+                today,
+                today,
+                [
+                    ("Last week", today - timedelta(days=7), today - timedelta(days=7)),
+                    ("Last month", today - timedelta(days=30), today - timedelta(days=30)),
+                ],
+            )
+        self.assertEqual([r.amounts for r in report.rows], [(Decimal("300"), Decimal("0"), Decimal("0"))])
+        self.assertEqual(report.rows[0].variance(1), Decimal("300"))
+
+    def test_pl_export_csv_has_period_and_variance_columns(self):
+        self._create_journal_entry(self.income_account, Decimal("1000"), is_income=True)
+        self._create_journal_entry(self.cogs_account, Decimal("250"))
+
+        response = self.client.get(
+            reverse("pl_export_csv"),
+            {"period_preset": "this_month", "compare_preset": "previous_period"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(response.content.decode())))
+        self.assertEqual(rows[0][:3], ["Group", "Code", "Account"])
+        self.assertTrue(rows[0][-1].startswith("Variance vs "))
+        self.assertIn(["INCOME", "4000", "Sales Revenue", "1000.00", "0.00", "1000.00"], rows)
+        self.assertIn(["COGS", "5000", "Cost of Goods Sold", "250.00", "0.00", "250.00"], rows)
+        self.assertIn(["TOTAL", "", "Net income", "750.00", "0.00", "750.00"], rows)
@@ -14,6 +14,7 @@ from core.models import (
     BankReconciliationMatch,
     BankTransaction,
     Business,
+    Category,
     JournalEntry,
     JournalLine,
     ReconciliationSession,
@@ -673,3 +674,206 @@ class ReconciliationV1APITests(TestCase):
         resp = self.client.post(reverse("reconciliation-reopen-session", args=[session.id]))
         self.assertEqual(resp.status_code, 403)
         self.assertIn("permission", resp.json().get("error", "").lower())
+
+    def test_session_summaries_are_batched(self):
+        from core.services.reconciliation_summary import summarize_sessions
+
+        sessions = []
+        for month in (1, 2, 3):
+            start = date(2024, month, 1)
+            end = date(2024, month, calendar.monthrange(2024, month)[1])
+            session = ReconciliationSession.objects.create(
+                business=self.business,
+                bank_account=self.bank_account,
+                statement_start_date=start,
+                statement_end_date=end,
+                opening_balance=Decimal("10.00"),
+                closing_balance=Decimal("50.00"),
+            )
+            BankTransaction.objects.create(
+                bank_account=self.bank_account,
+                date=start,
+                description="Cleared",
+                amount=Decimal("40.00") * month,
+                reconciliation_session=session,
+                status=BankTransaction.TransactionStatus.MATCHED_SINGLE,
+            )
+            BankTransaction.objects.create(
+                bank_account=self.bank_account,
+                date=start,
+                description="Open",
+                amount=Decimal("-5.00"),
+                reconciliation_session=session,
+                status=BankTransaction.TransactionStatus.NEW,
+            )
+            self._post_bank_entry(Decimal("100.00"), entry_date=start)
+            sessions.append(session)
+
+        sessions = list(
+            ReconciliationSession.objects.filter(pk__in=[s.pk for s in sessions])
+            .select_related("bank_account")
+            .order_by("statement_start_date")
+        )
+        with self.assertNumQueries(2):
+            summaries = summarize_sessions(sessions)
+
+        march = summaries[sessions[-1].pk]
+        self.assertEqual(march.total_count, 2)
+        self.assertEqual(march.reconciled_count, 1)
+        self.assertEqual(march.uncleared_sum, Decimal("-5.00"))
+        self.assertEqual(march.cleared_balance, Decimal("130.00"))
+        self.assertEqual(march.difference, Decimal("-80.00"))
+        self.assertEqual(march.ledger_balance, Decimal("300.00"))
+        self.assertEqual(summaries[sessions[0].pk].ledger_balance, Decimal("100.00"))
+
+    def test_accounts_endpoint_includes_reconciliation_summary(self):
+        savings = BankAccount.objects.create(
+            business=self.business,
+            name="Savings",
+            usage_role=BankAccount.UsageRole.OPERATING,
+        )
+        start = date(2024, 1, 1)
+        end = date(2024, 1, 31)
+        session = ReconciliationSession.objects.create(
+            business=self.business,
+            bank_account=self.bank_account,
+            statement_start_date=start,
+            statement_end_date=end,
+            opening_balance=Decimal("0.00"),
+            closing_balance=Decimal("75.00"),
+        )
+        BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=start,
+            description="Deposit",
+            amount=Decimal("75.00"),
+            reconciliation_session=session,
+            status=BankTransaction.TransactionStatus.MATCHED_SINGLE,
+        )
+        self._make_bank_tx(Decimal("20.00"), tx_date=date(2024, 2, 3))
+        self._post_bank_entry(Decimal("75.00"), entry_date=start)
+
+        resp = self.client.get(reverse("api_reco_accounts_v1"))
+
+        self.assertEqual(resp.status_code, 200)
+        data = {row["id"]: row for row in resp.json()}
+        operating = data[self.bank_account.id]
+        self.assertEqual(operating["book_balance"], "75.00")
+        self.assertEqual(operating["reconciled_count"], 1)
+        self.assertEqual(operating["unreconciled_count"], 1)
+        self.assertEqual(operating["unreconciled_amount"], "20.00")
+        self.assertEqual(operating["latest_session"]["id"], session.id)
+        self.assertEqual(operating["latest_session"]["difference"], "0.00")
+        self.assertIsNone(data[savings.id]["latest_session"])
+        self.assertEqual(data[savings.id]["total_transactions"], 0)
+
+    def _bulk(self, session_id: int, operations: list):
+        return self.client.post(
+            reverse("api_reco_bulk_v1", args=[session_id]),
+            data=json.dumps({"operations": operations}),
+            content_type="application/json",
+        )
+
+    def test_bulk_actions_apply_match_exclude_and_categorize(self):
+        start = date(2024, 1, 1)
+        end = date(2024, 1, 31)
+        session = self._make_session(start, end)
+        category = Category.objects.create(
+            business=self.business,
+            name="Office",
+            type=Category.CategoryType.EXPENSE,
+            account=self.defaults["opex"],
+        )
+        tx_match = self._make_bank_tx(Decimal("120.00"), tx_date=date(2024, 1, 5))
+        je = self._post_bank_entry(Decimal("120.00"), entry_date=date(2024, 1, 5))
+        tx_exclude = self._make_bank_tx(Decimal("15.00"), tx_date=date(2024, 1, 6))
+        tx_categorize = self._make_bank_tx(Decimal("-40.00"), tx_date=date(2024, 1, 7))
+        tx_late = self._make_bank_tx(Decimal("9.00"), tx_date=date(2024, 2, 2))
+
+        resp = self._bulk(
+            session.id,
+            [
+                {"op": "match", "transaction_id": tx_match.id, "journal_entry_id": je.id},
+                {"op": "exclude", "transaction_id": tx_exclude.id},
+                {"op": "categorize", "transaction_id": tx_categorize.id, "category_id": category.id},
+                {"op": "exclude", "transaction_id": tx_late.id},
+                {"op": "match", "transaction_id": tx_match.id, "journal_entry_id": je.id},
+                {"op": "delete", "transaction_id": tx_exclude.id},
+            ],
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([r["status"] for r in data["results"]], ["ok", "ok", "ok", "error", "error", "error"])
+        self.assertEqual(data["applied_count"], 3)
+        self.assertEqual(data["failed_count"], 3)
+        self.assertEqual(data["results"][0]["journal_entry_id"], je.id)
+        self.assertIn("out of period", data["results"][3]["error"])
+        self.assertEqual(data["session"]["reconciled_count"], 3)
+        self.assertEqual(data["session"]["excluded_count"], 1)
+
+        tx_match.refresh_from_db()
+        self.assertEqual(tx_match.status, BankTransaction.TransactionStatus.MATCHED_SINGLE)
+        self.assertTrue(tx_match.is_reconciled)
+        self.assertEqual(tx_match.posted_journal_entry_id, je.id)
+        self.assertTrue(je.lines.get(account=self.bank_account.account).is_reconciled)
+
+        tx_exclude.refresh_from_db()
+        self.assertEqual(tx_exclude.status, BankTransaction.TransactionStatus.EXCLUDED)
+        self.assertFalse(tx_exclude.matches.exists())
+
+        tx_categorize.refresh_from_db()
+        self.assertEqual(tx_categorize.category_id, category.id)
+        entry = tx_categorize.posted_journal_entry
+        entry.check_balance()
+        self.assertEqual(entry.lines.get(account=self.defaults["opex"]).debit, Decimal("40.00"))
+        self.assertEqual(tx_categorize.matches.get().journal_entry_id, entry.id)
+
+        tx_late.refresh_from_db()
+        self.assertEqual(tx_late.status, BankTransaction.TransactionStatus.NEW)
+
+    def test_bulk_categorize_rejects_posted_transactions(self):
+        session = self._make_session(date(2024, 1, 1), date(2024, 1, 31))
+        tx = self._make_bank_tx(Decimal("-40.00"), tx_date=date(2024, 1, 7))
+        self.assertEqual(self._bulk(session.id, [{"op": "categorize", "transaction_id": tx.id}]).status_code, 200)
+        tx.refresh_from_db()
+        posted_id = tx.posted_journal_entry_id
+
+        resp = self._bulk(session.id, [{"op": "categorize", "transaction_id": tx.id}])
+
+        results = resp.json()["results"]
+        self.assertEqual(results[0]["status"], "error")
+        self.assertIn("already posted or reconciled", results[0]["error"])
+        tx.refresh_from_db()
+        self.assertEqual(tx.posted_journal_entry_id, posted_id)
+        self.assertEqual(JournalEntry.objects.filter(business=self.business, description=tx.description).count(), 1)
+
+    def test_bulk_actions_query_count_does_not_grow_with_batch(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        session = self._make_session(date(2024, 1, 1), date(2024, 1, 31))
+
+        def run(count):
+            txs = [self._make_bank_tx(Decimal("10.00"), tx_date=date(2024, 1, 10)) for _ in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self._bulk(session.id, [{"op": "categorize", "transaction_id": tx.id} for tx in txs])
+            self.assertEqual(resp.json()["applied_count"], count)
+            return len(ctx.captured_queries), resp.json()["session"]["total_transactions"]
+
+        run(1)  # creates the suspense account and story state once
+        small, _ = run(2)
+        large, total = run(10)
+        self.assertEqual(total, 13)
+        self.assertEqual(large, small)
+
+    def test_bulk_actions_reject_completed_session(self):
+        session = self._make_session(date(2024, 1, 1), date(2024, 1, 31))
+        session.status = ReconciliationSession.Status.COMPLETED
+        session.save(update_fields=["status"])
+        tx = self._make_bank_tx(Decimal("10.00"), tx_date=date(2024, 1, 10))
+
+        resp = self._bulk(session.id, [{"op": "exclude", "transaction_id": tx.id}])
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json().get("code"), "session_completed")
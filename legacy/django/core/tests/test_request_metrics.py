@@ -0,0 +1,108 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch
+from django.utils import timezone
+
+from core.middleware import RequestTimingMiddleware
+from core.models import Business, RequestLatencySample
+from core.request_metrics import (
+    UNMATCHED_ROUTE,
+    LatencyHistogram,
+    bucket_bounds,
+    bucket_index,
+    get_recorder,
+    summarize_request_metrics,
+)
+from internal_admin.services import compute_overview_metrics
+
+
+class LatencyHistogramTests(TestCase):
+    def test_buckets_cover_values_with_bounded_error(self):
+        for ms in [0, 1, 15, 16, 17, 100, 999, 1234, 65_000]:
+            low, high = bucket_bounds(bucket_index(ms))
+            self.assertLessEqual(low, ms)
+            self.assertLess(ms, high)
+            if ms >= 16:
+                self.assertLessEqual((high - low) / low, 0.125)
+
+    def test_percentiles_and_merge(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms)
+        self.assertEqual(histogram.percentile(50), 52.0)
+        self.assertEqual(histogram.percentile(99), 104.0)
+
+        merged = LatencyHistogram()
+        merged.merge(histogram.to_json())
+        merged.merge(histogram.to_json())
+        self.assertEqual(merged.total, 200)
+        self.assertEqual(merged.percentile(50), histogram.percentile(50))
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_FLUSH_SECONDS=3600)
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("core.request_metrics._recorder", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def _request(self, status=200, route="api/things/<int:pk>/", ms=None):
+        def view(request):
+            Business.objects.count()
+            return HttpResponse(status=status)
+
+        request = self.factory.get("/api/things/1/")
+        if route:
+            request.resolver_match = ResolverMatch(view, (), {}, route=route)
+        clock = [0.0, (ms or 0) / 1000]
+        with mock.patch("core.middleware.time.perf_counter", side_effect=clock):
+            return RequestTimingMiddleware(view)(request)
+
+    def test_records_route_status_latency_and_queries(self):
+        for _ in range(18):
+            self._request(ms=20)
+        self._request(status=500, ms=400)
+        self._request(status=404, route=None, ms=5)
+
+        self.assertFalse(RequestLatencySample.objects.exists())  # buffered until flush
+        summary = summarize_request_metrics(since=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(summary["total"], 20)
+        self.assertEqual(summary["by_status"], {"2xx": 18, "3xx": 0, "4xx": 1, "5xx": 1})
+        self.assertEqual(summary["error_rate_pct"], 5.0)
+        self.assertEqual(summary["p50_ms"], 22.0)
+        self.assertEqual(summary["p99_ms"], 416.0)
+        routes = {e["route"]: e for e in summary["endpoints"]}
+        self.assertEqual(set(routes), {"/api/things/<int:pk>/", UNMATCHED_ROUTE})
+        self.assertEqual(routes["/api/things/<int:pk>/"]["requests"], 19)
+        self.assertEqual(routes["/api/things/<int:pk>/"]["avg_queries"], 1.0)
+
+    def test_requests_do_not_write_metrics(self):
+        self._request(ms=20)  # first request starts the flush thread
+        with self.assertNumQueries(1):  # the view's own query
+            self._request(ms=20)
+        recorder = get_recorder()
+        self.assertTrue(recorder._flusher.is_alive())
+        self.assertFalse(RequestLatencySample.objects.exists())
+
+        with mock.patch("core.request_metrics.prune_request_metrics") as prune:
+            self.assertEqual(recorder.flush(), 1)
+        prune.assert_not_called()  # pruning waits an hour after start-up
+
+    def test_overview_reports_last_hour(self):
+        self._request(ms=30)
+        self._request(status=503, ms=900)
+        get_recorder().flush()
+        RequestLatencySample.objects.create(
+            minute=timezone.now() - timedelta(hours=3), route="/old/", method="GET",
+            request_count=1, status_5xx=1, histogram={str(bucket_index(5000)): 1},
+        )
+
+        metrics = compute_overview_metrics()
+        self.assertEqual(metrics["api_requests_1h"], 2)
+        self.assertEqual(metrics["api_error_rate_1h_pct"], 50.0)
+        self.assertEqual(metrics["api_p95_response_ms_1h"], 960.0)
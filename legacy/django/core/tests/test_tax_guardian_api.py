@@ -3,13 +3,17 @@ from unittest.mock import patch
 from decimal import Decimal
 import csv
 import io
+import json
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 
 from core.models import Business, Account, BankAccount
+from core.views_tax_guardian import api_tax_period_anomalies, api_tax_period_detail, api_tax_periods
 from taxes.models import TaxPeriodSnapshot, TaxAnomaly, TaxPayment
 from taxes.services import compute_tax_anomalies, compute_tax_period_snapshot
 from taxes.models import TaxComponent, TaxGroup, TransactionLineTaxDetail
@@ -582,3 +586,96 @@ class TaxGuardianApiTests(TestCase):
         self.assertEqual(data["due_date"], "2025-05-30")
         self.assertTrue(data["is_overdue"])
         self.assertFalse(data["is_due_soon"])
+
+    def _add_period(self, period_key: str):
+        self.period_key = period_key
+        self._make_snapshot()
+        TaxAnomaly.objects.create(
+            business=self.business,
+            period_key=period_key,
+            code="T6_NEGATIVE_BALANCE",
+            severity=TaxAnomaly.AnomalySeverity.HIGH,
+            status=TaxAnomaly.AnomalyStatus.OPEN,
+            description="Negative",
+            task_code="T2",
+        )
+
+    def _call_view(self, view, *args):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return view(request, *args)
+
+    def _count_list_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._call_view(api_tax_periods)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_period_list_query_count_does_not_grow_with_periods(self):
+        self._add_period("2025-01")
+        self._count_list_queries()  # first call seeds permissions/roles
+        one_period = self._count_list_queries()
+        self._add_period("2025-02")
+        self._add_period("2025-03")
+        three_periods = self._count_list_queries()
+        self.assertEqual(one_period, three_periods)
+
+        periods = json.loads(self._call_view(api_tax_periods).content)["periods"]
+        self.assertEqual([p["anomaly_counts"]["high"] for p in periods], [1, 1, 1])
+
+    def test_period_list_reports_payment_status(self):
+        snapshot = self._make_snapshot(net_tax=200.0)
+        TaxPayment.objects.create(
+            business=self.business,
+            period_key=self.period_key,
+            snapshot=snapshot,
+            amount=Decimal("250.00"),
+            currency="CAD",
+            payment_date=date(2025, 1, 12),
+            created_by=self.user,
+        )
+
+        periods = json.loads(self._call_view(api_tax_periods).content)["periods"]
+
+        row = next(p for p in periods if p["period_key"] == self.period_key)
+        self.assertEqual(row["payment_status"], "OVERPAID")
+        self.assertAlmostEqual(row["remaining_balance"], -50.0)
+
+    def test_period_detail_counts_anomalies_and_blockers(self):
+        self._add_period("2025-01")
+        data = json.loads(self._call_view(api_tax_period_detail, "2025-01").content)
+        self.assertEqual(data["anomaly_counts"], {"low": 0, "medium": 0, "high": 1})
+        self.assertTrue(data["has_high_severity_blockers"])
+
+    def test_period_detail_without_snapshot_queues_refresh(self):
+        from core.jobs import TAX_PERIOD_REFRESH_JOB, run_worker
+        from core.models import BackgroundJob
+
+        resp = self._call_view(api_tax_period_detail, self.period_key)
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(json.loads(resp.content)["status"], "PENDING")
+        self.assertFalse(TaxPeriodSnapshot.objects.filter(business=self.business).exists())
+
+        # Polling again does not queue a second refresh.
+        again = self._call_view(api_tax_period_detail, self.period_key)
+        self.assertEqual(json.loads(again.content)["job_id"], json.loads(resp.content)["job_id"])
+        self.assertEqual(BackgroundJob.objects.filter(kind=TAX_PERIOD_REFRESH_JOB).count(), 1)
+
+        run_worker(once=True, kinds=[TAX_PERIOD_REFRESH_JOB])
+        self.assertTrue(
+            TaxPeriodSnapshot.objects.filter(business=self.business, period_key=self.period_key).exists()
+        )
+        self.assertEqual(self._call_view(api_tax_period_detail, self.period_key).status_code, 200)
+
+    def test_anomaly_contexts_are_prefetched(self):
+        self._create_rate_mismatch_anomaly()
+        TaxAnomaly.objects.filter(business=self.business, code="T1_RATE_MISMATCH").update(
+            linked_transaction_ct=ContentType.objects.get_for_model(Business),
+            linked_transaction_id=self.business.id,
+        )
+        resp = self._call_view(api_tax_period_anomalies, self.period_key)
+        self.assertEqual(resp.status_code, 200)
+        target = next(a for a in json.loads(resp.content)["anomalies"] if a["code"] == "T1_RATE_MISMATCH")
+        self.assertEqual(target["jurisdiction_code"], "CA-ON")
+        self.assertEqual(target["expected_tax_amount"], 5.0)
+        self.assertEqual(target["actual_tax_amount"], 1.0)
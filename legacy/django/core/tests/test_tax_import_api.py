@@ -3,9 +3,13 @@ from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 
 from core.models import Account, Business
+from core.views_tax_import import _apply, _parse_payload_rows, _preview
+from taxes.jurisdiction_catalog import get_jurisdiction_catalog
 from taxes.models import TaxComponent, TaxJurisdiction, TaxProductRule, TaxRate
 
 User = get_user_model()
@@ -96,6 +100,24 @@ class TaxImportApiTests(TestCase):
         self.assertEqual(seeded.country_code, "US")
         self.assertEqual(seeded.jurisdiction_type, "STATE")
 
+    def test_apply_jurisdictions_refreshes_jurisdiction_catalog(self):
+        TaxJurisdiction.objects.get_or_create(
+            code="US",
+            defaults={"name": "United States", "jurisdiction_type": "FEDERAL", "country_code": "US", "region_code": ""},
+        )
+        self.assertFalse(get_jurisdiction_catalog().exists("US-ZQ"))
+        content = b"code,name,jurisdiction_type,country_code,region_code,parent_code\nUS-ZQ,Test State,STATE,US,ZQ,US\n"
+        upload = SimpleUploadedFile("jur.csv", content, content_type="text/csv")
+        _fmt, rows, _err = _parse_payload_rows(upload)
+        preview_rows = _preview("jurisdictions", business=None, rows=rows)
+        self.assertFalse([r.messages for r in preview_rows if r.status == "error"])
+        with self.captureOnCommitCallbacks(execute=True):
+            created, _updated, _skipped, _warnings = _apply("jurisdictions", business=None, preview_rows=preview_rows)
+        self.assertEqual(created, 1)
+        catalog = get_jurisdiction_catalog()
+        self.assertTrue(catalog.exists("US-ZQ"))
+        self.assertEqual(catalog.children("US"), ("US-ZQ",))
+
     def test_preview_rates_detects_overlap(self):
         ca_on, _ = TaxJurisdiction.objects.get_or_create(
             code="CA-ON",
@@ -161,3 +183,65 @@ class TaxImportApiTests(TestCase):
         resp = self.client.post("/api/tax/catalog/import/apply/", data={"import_type": "product_rules", "file": upload})
         self.assertEqual(resp.status_code, 400)
         self.assertFalse(TaxProductRule.objects.filter(jurisdiction=ca_on, product_code="FOOD").exists())
+
+    def _hst_component(self, name="HST_BULK"):
+        ca_on, _ = TaxJurisdiction.objects.get_or_create(
+            code="CA-ON",
+            defaults={"name": "Ontario", "jurisdiction_type": "PROVINCIAL", "country_code": "CA", "region_code": "ON"},
+        )
+        account = Account.objects.get(business=self.business, code="2300")
+        return TaxComponent.objects.create(
+            business=self.business,
+            name=name,
+            rate_percentage=Decimal("0.13"),
+            authority="CRA",
+            is_recoverable=False,
+            effective_start_date=date(2025, 1, 1),
+            default_coa_account=account,
+            jurisdiction=ca_on,
+        )
+
+    def test_preview_rates_detects_overlap_within_file(self):
+        self._hst_component()
+        content = (
+            b"jurisdiction_code,tax_name,rate_decimal,valid_from,valid_to\n"
+            b"CA-ON,HST_BULK,0.13,2024-01-01,2024-06-30\n"
+            b"CA-ON,HST_BULK,0.13,2024-06-30,2024-12-31\n"
+            b"CA-ON,HST_BULK,0.13,2025-01-01,\n"
+        )
+        fmt, rows, err = _parse_payload_rows(SimpleUploadedFile("rates.csv", content, content_type="text/csv"))
+        self.assertEqual((fmt, err), ("csv", None))
+        statuses = [row.status for row in _preview("rates", business=self.business, rows=rows)]
+        self.assertEqual(statuses, ["error", "error", "ok"])
+
+    def test_apply_rates_bulk_uses_constant_queries(self):
+        component = self._hst_component()
+        existing = TaxRate.objects.create(
+            component=component,
+            rate_decimal=Decimal("0.10"),
+            effective_from=date(1990, 1, 1),
+            effective_to=date(1990, 12, 31),
+        )
+
+        def run(count):
+            lines = ["id,jurisdiction_code,tax_name,rate_decimal,valid_from,valid_to"]
+            lines.append(f"{existing.id},CA-ON,HST_BULK,0.11,1990-01-01,1990-12-31")
+            for year in range(2000, 2000 + count):
+                lines.append(f",CA-ON,HST_BULK,0.13,{year}-01-01,{year}-12-31")
+            upload = SimpleUploadedFile("rates.csv", ("\n".join(lines) + "\n").encode(), content_type="text/csv")
+            with CaptureQueriesContext(connection) as ctx:
+                _fmt, rows, _err = _parse_payload_rows(upload)
+                preview_rows = _preview("rates", business=self.business, rows=rows)
+                self.assertFalse([r.messages for r in preview_rows if r.status == "error"])
+                result = _apply("rates", business=self.business, preview_rows=preview_rows)
+            return result, len(ctx.captured_queries)
+
+        (created, updated, _skipped, _warnings), small_queries = run(3)
+        self.assertEqual((created, updated), (3, 1))
+
+        TaxRate.objects.filter(component=component).exclude(id=existing.id).delete()
+        (created, updated, _skipped, _warnings), large_queries = run(60)
+        self.assertEqual((created, updated), (60, 1))
+        self.assertEqual(large_queries, small_queries)
+        existing.refresh_from_db()
+        self.assertEqual(existing.rate_decimal, Decimal("0.110000"))
@@ -37,6 +37,7 @@ from .views_reports import (
     cashflow_report_print_view,
     pl_report_print_view,
     pl_report_api,
+    pl_export_csv,
 )
 from .views_accounts import (
     account_detail_view,
@@ -130,6 +131,7 @@ urlpatterns = [
     path("invoices/<int:pk>/delete/", views.invoice_delete, name="invoice_delete"),
     path("invoices/<int:pk>/status/", views.invoice_status_update, name="invoice_status_update"),
     path("invoices/<int:pk>/pdf/", views.invoice_pdf_view, name="invoice_pdf"),
+    path("invoices/pdf-export/", views.invoice_pdf_export_view, name="invoice_pdf_export"),
     path("invoices/public/<uuid:token>/", views.invoice_public_view, name="invoice_public_view"),
     path("invoices/email/open/<uuid:token>.gif", views.invoice_email_open_view, name="invoice_email_open"),
     # Invoice List API (Option B)
@@ -141,6 +143,7 @@ urlpatterns = [
     path("expenses/<int:pk>/delete/", views.expense_delete, name="expense_delete"),
     path("expenses/<int:pk>/status/", views.expense_status_update, name="expense_status_update"),
     path("expenses/<int:pk>/pdf/", views.expense_pdf_view, name="expense_pdf"),
+    path("expenses/pdf-export/", views.expense_pdf_export_view, name="expense_pdf_export"),
     # Expense List API (Option B)
     path("api/expenses/list/", views_list_apis.api_expense_list, name="api_expense_list"),
     path("api/expenses/<int:expense_id>/", views_list_apis.api_expense_detail, name="api_expense_detail"),
@@ -161,7 +164,7 @@ urlpatterns = [
     path("profit-loss/", views.report_pnl, name="report_pnl"),
     path("reports/cashflow/", views.cashflow_report_view, name="cashflow_report"),
     path("reports/pl-shadow/", views.pl_shadow_view, name="pl_shadow"),
-    path("reports/pl-export/", views.pl_export_csv, name="pl_export_csv"),
+    path("reports/pl-export/", pl_export_csv, name="pl_export_csv"),
     path(
         "reconciliation/<int:session_id>/report/",
         reconciliation_report_view,
@@ -217,6 +220,7 @@ urlpatterns = [
     path("api/reconciliation/session/<int:session_id>/match/", views_reconciliation.api_reconciliation_match_v1, name="api_reco_match_v1"),
     path("api/reconciliation/session/<int:session_id>/unmatch/", views_reconciliation.api_reconciliation_unmatch_v1, name="api_reco_unmatch_v1"),
     path("api/reconciliation/session/<int:session_id>/exclude/", views_reconciliation.api_reconciliation_exclude_v1, name="api_reco_exclude_v1"),
+    path("api/reconciliation/session/<int:session_id>/bulk/", views_reconciliation.api_reconciliation_bulk_v1, name="api_reco_bulk_v1"),
     path("api/reconciliation/session/<int:session_id>/complete/", views_reconciliation.api_reconciliation_complete_v1, name="api_reco_complete_v1"),
     path(
         "api/reconciliation/sessions/<int:session_id>/complete/",
@@ -242,6 +246,7 @@ urlpatterns = [
     path("api/reconciliation/rules/", api_reconciliation_create_rule, name="api_reco_rule"),
     path("api/ledger/search/", api_ledger_search, name="api_ledger_search"),
     path("api/invoices/<int:pk>/send_email/", views.invoice_send_email_view, name="invoice_send_email"),
+    path("api/invoices/send_emails/", views.invoice_send_emails_bulk_view, name="invoice_send_emails_bulk"),
     path("bank/import/", views.BankStatementImportView.as_view(), name="bank_import"),
     path(
         "bank-feeds/new/",
@@ -447,6 +452,8 @@ def _is_api_or_service_route(route: str) -> bool:
         "agentic/demo/receipts-run/",
         "invoices/<int:pk>/pdf/",
         "expenses/<int:pk>/pdf/",
+        "invoices/pdf-export/",
+        "expenses/pdf-export/",
         "invoices/email/open/<uuid:token>.gif",
         "reports/pl-export/",
     }:
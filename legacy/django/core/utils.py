@@ -2,6 +2,9 @@ import re
 from decimal import Decimal
 from functools import wraps
 
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.db.models import Sum
 from django.shortcuts import redirect
 
@@ -99,3 +102,13 @@ def is_empty_workspace(business) -> bool:
     has_customer = Customer.objects.filter(business=business).exists()
     has_bank = BankAccount.objects.filter(business=business).exists()
     return not has_customer and not has_bank
+
+
+def shared_cache_configured(alias: str = "default") -> bool:
+    """
+    Whether the cache `alias` is seen by every process (Redis, memcached,
+    database, file). The local-memory and dummy backends are per process, so
+    cross-request caches invalidated by a version bump must not rely on them:
+    the bump would only reach the process that made the write.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
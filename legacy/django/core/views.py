@@ -3,6 +3,7 @@ import logging
 import hashlib
 import io
 import json
+from bisect import bisect_left, bisect_right
 from collections import OrderedDict
 from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
@@ -16,11 +17,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction as db_transaction
-from django.db.models import Count, Max, Q, Sum, Avg
-from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, HttpResponseBadRequest
+from django.db.models import Count, F, Max, Q, Sum, Avg, Window
+from django.db.models.functions import RowNumber
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, HttpResponseBadRequest, StreamingHttpResponse
 from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
@@ -32,7 +33,17 @@ from django.views.decorators.http import require_POST, require_http_methods
 from django.views.generic import ListView, TemplateView, CreateView, UpdateView, View
 from django.urls import reverse, reverse_lazy, NoReverseMatch
 from django.utils.dateparse import parse_date
-from .pdf_utils import generate_invoice_pdf
+from .invoice_email_outbox import dispatch_invoice_emails, queue_invoice_email
+from .jobs import INVOICE_EMAILS_JOB, enqueue_job
+from .pdf_cache import (
+    EXPENSE_PDF,
+    INVOICE_PDF,
+    build_pdf_job,
+    get_expense_pdf_bytes,
+    get_invoice_pdf_bytes,
+    render_pdf_jobs,
+    stream_pdf_zip,
+)
 from django.utils.text import slugify
 
 from .forms import (
@@ -73,6 +84,7 @@ from .models import (
 from .ledger_services import compute_ledger_pl
 from .ledger_reports import account_balances_for_business
 from .utils import get_current_business, is_empty_workspace
+from .services.import_matching import schedule_auto_apply
 from .services.ledger_metrics import (
     PLPeriod,
     calculate_ledger_income,
@@ -229,22 +241,33 @@ def _parse_import_date(value: str | None):
 def _build_transaction_suggestions(transactions, business):
     """
     Return mapping of transaction id -> suggested expenses/invoices for quick matching.
+
+    Candidates for the whole batch come from one expense query (covering the
+    batch's date span) and one invoice query (top 5 per amount via a window
+    function); each transaction is then matched in memory by bisecting the
+    candidates sorted by amount.
     """
-    cutoff_date = timezone.localdate() - timedelta(days=60)
-    prefetched_expenses = list(
-        Expense.objects.filter(
-            business=business,
-            status__in=[Expense.Status.UNPAID, Expense.Status.PARTIAL],
-            date__gte=cutoff_date,
-        ).order_by("-date")[:100]
-    )
     expense_map = {}
     invoice_map = {}
     tolerance = Decimal("5.00")
     date_window = 15
 
-    for tx in transactions:
-        if tx.amount < 0:
+    outflows = [tx for tx in transactions if tx.amount < 0]
+    inflows = [tx for tx in transactions if tx.amount > 0]
+
+    if outflows:
+        expenses = Expense.objects.filter(
+            business=business,
+            status__in=[Expense.Status.UNPAID, Expense.Status.PARTIAL],
+            date__gte=min(tx.date for tx in outflows) - timedelta(days=date_window),
+            date__lte=max(tx.date for tx in outflows) + timedelta(days=date_window),
+        )
+        by_amount = sorted(
+            ((exp.grand_total or (exp.amount or Decimal("0.00")), exp) for exp in expenses),
+            key=lambda item: item[0],
+        )
+        amounts = [amount for amount, _ in by_amount]
+        for tx in outflows:
             amount = abs(tx.amount)
             lower = max(Decimal("0.00"), amount - tolerance)
             upper = amount + tolerance
@@ -252,22 +275,34 @@ def _build_transaction_suggestions(transactions, business):
             end = tx.date + timedelta(days=date_window)
             matches = [
                 exp
-                for exp in prefetched_expenses
+                for _, exp in by_amount[bisect_left(amounts, lower):bisect_right(amounts, upper)]
                 if start <= exp.date <= end
-                and lower <= (exp.grand_total or (exp.amount or Decimal("0.00"))) <= upper
-            ][:8]
-            expense_map[tx.id] = matches
-        elif tx.amount > 0:
-            matches = list(
-                Invoice.objects.filter(
-                    business=business,
-                    status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL],
-                    grand_total=tx.amount,
+            ]
+            matches.sort(key=lambda exp: (exp.date, exp.id), reverse=True)
+            expense_map[tx.id] = matches[:8]
+
+    if inflows:
+        invoices_by_total = {}
+        for inv in (
+            Invoice.objects.filter(
+                business=business,
+                status__in=[Invoice.Status.SENT, Invoice.Status.PARTIAL],
+                grand_total__in={tx.amount for tx in inflows},
+            )
+            .annotate(
+                total_rank=Window(
+                    RowNumber(),
+                    partition_by=F("grand_total"),
+                    order_by=[F("issue_date").desc(), F("id").desc()],
                 )
-                .select_related("customer")
-                .order_by("-issue_date")[:5]
             )
-            invoice_map[tx.id] = matches
+            .filter(total_rank__lte=5)
+            .select_related("customer")
+            .order_by("-issue_date", "-id")
+        ):
+            invoices_by_total.setdefault(inv.grand_total, []).append(inv)
+        for tx in inflows:
+            invoice_map[tx.id] = invoices_by_total.get(tx.amount, [])
     return expense_map, invoice_map
 
 
@@ -2585,8 +2620,6 @@ def invoice_email_open_view(request, token):
 @login_required
 def invoice_pdf_view(request, pk):
     """Secure PDF download view for internal users, scoped to their business."""
-    from .pdf_utils import generate_invoice_pdf
-    
     business = get_current_business(request.user)
     if business is None:
         return JsonResponse({"error": "No business context"}, status=400)
@@ -2599,15 +2632,25 @@ def invoice_pdf_view(request, pk):
     )
     
     try:
-        pdf_buffer = generate_invoice_pdf(invoice)
+        pdf_content = get_invoice_pdf_bytes(invoice)
         safe_number = getattr(invoice, "invoice_number", None) or f"{invoice.pk}"
-        response = HttpResponse(pdf_buffer.read(), content_type="application/pdf")
+        response = HttpResponse(pdf_content, content_type="application/pdf")
         response["Content-Disposition"] = f'attachment; filename="Invoice-{safe_number}.pdf"'
         return response
     except Exception as exc:
         return JsonResponse({"error": f"PDF generation failed: {str(exc)}"}, status=400)
 
 
+def _queue_invoice_email_for_request(request, invoice, to_email, cc_me_flag):
+    return queue_invoice_email(
+        invoice,
+        to_email=to_email,
+        public_url=request.build_absolute_uri(reverse("invoice_public_view", args=[invoice.email_token])),
+        tracking_url_for=lambda token: request.build_absolute_uri(reverse("invoice_email_open", args=[token])),
+        cc_me=cc_me_flag,
+    )
+
+
 @login_required
 @require_POST
 def invoice_send_email_view(request, pk):
@@ -2630,117 +2673,65 @@ def invoice_send_email_view(request, pk):
         invoice.save(update_fields=["email_last_error"])
         return JsonResponse({"ok": False, "error": error_msg}, status=400)
 
-    # Determine from_email and reply_to from business or settings/user fallback
-    from_email = business.email_from
-    reply_to_email = business.reply_to_email or from_email
-
-    public_url = request.build_absolute_uri(reverse("invoice_public_view", args=[invoice.email_token]))
-    business_name = getattr(invoice.business, "name", "Our Company")
-    customer_name = getattr(invoice.customer, "name", "")
-    amount = (
-        getattr(invoice, "grand_total", None)
-        or getattr(invoice, "net_total", None)
-        or getattr(invoice, "total_amount", None)
-        or getattr(invoice, "total", None)
-    )
-
-    default_subject = f"Invoice {getattr(invoice, 'invoice_number', None) or invoice.pk} from {business_name}"
-    default_body_text = (
-        f"Hi {customer_name},\n\n"
-        f"You have a new invoice from {business_name}.\n"
-        f"Total: {amount}\n\n"
-        f"You can view it here: {public_url}\n\n"
-        f"Thank you."
-    )
-    default_body_html = f"""
-        <p>Hi {customer_name},</p>
-        <p>You have a new invoice from <strong>{business_name}</strong>.</p>
-        <p><strong>Total:</strong> {amount}</p>
-        <p><a href="{public_url}">View your invoice</a></p>
-        <p>Thank you.</p>
-    """
-
-    ctx = {
-        "invoice": invoice,
-        "business": invoice.business,
-        "customer": invoice.customer,
-        "public_url": public_url,
-    }
-    template = getattr(invoice.business, "invoice_email_template", None)
-    if template:
-        subject = template.render_subject(ctx, default_subject)
-        text_body = template.render_body(ctx, default_body_text)
-        html_body = template.render_body(ctx, default_body_html)
-    else:
-        subject = default_subject
-        text_body = default_body_text
-        html_body = default_body_html
-
     # Optional CC flag from caller
     cc_me_flag = request.POST.get("cc_me") in {"1", "true", "on", "yes"}
 
-    # Render PDF attachment using reportlab
-    pdf_content = None
-    try:
-        pdf_io = generate_invoice_pdf(invoice)
-        pdf_content = pdf_io.read()
-    except Exception as pdf_exc:  # pragma: no cover - avoid blocking send on PDF errors
-        invoice.email_last_error = str(pdf_exc)
-        invoice.save(update_fields=["email_last_error"])
-        logger = logging.getLogger(__name__)
-        logger.info("Skipping invoice PDF attachment because rendering failed: %s", pdf_exc)
-
-    log = InvoiceEmailLog.objects.create(
-        invoice=invoice,
-        to_email=to_email,
-        subject=subject,
-        status=InvoiceEmailLog.STATUS_SENT,
-        message_preview=text_body[:500],
-        cc_me=bool(cc_me_flag),
-    )
+    log = _queue_invoice_email_for_request(request, invoice, to_email, cc_me_flag)
 
-    tracking_url = request.build_absolute_uri(reverse("invoice_email_open", args=[log.open_token]))
-    tracking_img = (
-        f'<img src="{tracking_url}" alt="" width="1" height="1" style="display:none;border:0;" />'
-    )
+    background_raw = (request.POST.get("background") or "").strip().lower()
+    background = background_raw in {"1", "true", "yes"} if background_raw else getattr(settings, "INVOICE_EMAIL_ASYNC", False)
+    if background:
+        job = enqueue_job(INVOICE_EMAILS_JOB, {"log_ids": [log.pk]}, business=business)
+        return JsonResponse({"status": "queued", "log_id": log.pk, "job_id": job.id}, status=202)
 
-    try:
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=text_body,
-            from_email=from_email,
-            to=[to_email],
-            cc=[invoice.business.owner_user.email] if cc_me_flag and getattr(invoice.business, "owner_user", None) else None,
-            reply_to=[reply_to_email] if reply_to_email else None,
-        )
-        if pdf_content:
-            msg.attach(
-                filename=f"Invoice-{getattr(invoice, 'invoice_number', None) or invoice.pk}.pdf",
-                content=pdf_content,
-                mimetype="application/pdf",
-            )
-        msg.attach_alternative(html_body + tracking_img, "text/html")
-        msg.send()
-        invoice.mark_email_sent(to_email)
+    # Synchronous send: same pipeline, one attempt, errors reported to the caller.
+    result = dispatch_invoice_emails([log.pk], retry=False)
+    exc = result.errors.get(log.pk)
+    if exc is None:
         return JsonResponse({"status": "ok", "sent_to": to_email})
-    except (smtplib.SMTPException, OSError) as exc:
+    if isinstance(exc, (smtplib.SMTPException, OSError)):
         # Map connection errors to friendly messages
-        error_message = str(exc)
         friendly_message = "Email delivery failed: unable to connect to email server. Check your email settings."
-        invoice.email_last_error = error_message
-        invoice.save(update_fields=["email_last_error"])
-        log.status = InvoiceEmailLog.STATUS_ERROR
-        log.error_message = error_message
-        log.save(update_fields=["status", "error_message"])
         return JsonResponse({"ok": False, "error": friendly_message}, status=502)
-    except Exception as exc:  # pragma: no cover - other unexpected errors
-        error_message = str(exc)
-        invoice.email_last_error = error_message
-        invoice.save(update_fields=["email_last_error"])
-        log.status = InvoiceEmailLog.STATUS_ERROR
-        log.error_message = error_message
-        log.save(update_fields=["status", "error_message"])
-        return JsonResponse({"ok": False, "error": error_message}, status=500)
+    return JsonResponse({"ok": False, "error": str(exc)}, status=500)
+
+
+@login_required
+@require_POST
+def invoice_send_emails_bulk_view(request):
+    """Queue emails for many invoices (e.g. a reminder run); sent in batches by the job worker."""
+    business = get_current_business(request.user)
+    if business is None:
+        return JsonResponse({"error": "No business context"}, status=400)
+    if not business.email_from:
+        return JsonResponse(
+            {"ok": False, "error": "No sender email is configured. Add a business email in Account settings before sending invoices."},
+            status=400,
+        )
+
+    raw_ids = request.POST.getlist("invoice_ids") or (request.POST.get("ids") or "").split(",")
+    try:
+        invoice_ids = [int(value) for value in raw_ids if str(value).strip()]
+    except ValueError:
+        return JsonResponse({"error": "invoice_ids must be integers"}, status=400)
+    if not invoice_ids:
+        return JsonResponse({"error": "No invoices selected"}, status=400)
+
+    cc_me_flag = request.POST.get("cc_me") in {"1", "true", "on", "yes"}
+    invoices = Invoice.objects.filter(business=business, pk__in=invoice_ids).select_related("business", "customer")
+    queued, skipped = [], []
+    for invoice in invoices:
+        to_email = getattr(invoice.customer, "email", None)
+        if not to_email:
+            skipped.append(invoice.pk)
+            continue
+        queued.append(_queue_invoice_email_for_request(request, invoice, to_email, cc_me_flag).pk)
+
+    job = enqueue_job(INVOICE_EMAILS_JOB, {"log_ids": queued}, business=business) if queued else None
+    return JsonResponse(
+        {"status": "queued", "queued": len(queued), "skipped_invoice_ids": skipped, "job_id": job.id if job else None},
+        status=202,
+    )
 
 
 @login_required
@@ -2859,8 +2850,6 @@ def expense_delete(request, pk):
 @login_required
 def expense_pdf_view(request, pk):
     """Secure PDF download view for expenses, scoped to user's business."""
-    from .pdf_utils import generate_expense_pdf
-    
     business = get_current_business(request.user)
     if business is None:
         return JsonResponse({"error": "No business context"}, status=400)
@@ -2873,15 +2862,74 @@ def expense_pdf_view(request, pk):
     )
     
     try:
-        pdf_buffer = generate_expense_pdf(expense)
+        pdf_content = get_expense_pdf_bytes(expense)
         safe_desc = slugify(expense.description or "expense")[:30] or "expense"
-        response = HttpResponse(pdf_buffer.read(), content_type="application/pdf")
+        response = HttpResponse(pdf_content, content_type="application/pdf")
         response["Content-Disposition"] = f'attachment; filename="Expense-{expense.pk}-{safe_desc}.pdf"'
         return response
     except Exception as exc:
         return JsonResponse({"error": f"PDF generation failed: {str(exc)}"}, status=400)
 
 
+def _parse_export_ids(request) -> list[int] | None:
+    raw = request.GET.get("ids") or request.POST.get("ids") or ""
+    if not raw.strip():
+        return None
+    return [int(part) for part in raw.split(",") if part.strip()]
+
+
+def _pdf_export_response(request, kind, queryset, archive_name):
+    """Stream the PDFs for `queryset` (optionally narrowed by ?ids=1,2,3) as a ZIP."""
+    try:
+        ids = _parse_export_ids(request)
+    except ValueError:
+        return JsonResponse({"error": "ids must be a comma-separated list of integers"}, status=400)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    status_filter = request.GET.get("status")
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    limit = int(getattr(settings, "PDF_EXPORT_MAX_DOCUMENTS", 500))
+    objects = list(queryset.order_by("pk")[: limit + 1])
+    if not objects:
+        return JsonResponse({"error": "Nothing to export"}, status=404)
+    if len(objects) > limit:
+        return JsonResponse({"error": f"Too many documents; export at most {limit} at a time"}, status=400)
+
+    # Contexts are built here, while the request still owns the DB connection;
+    # the streamed body only touches storage and the render pool.
+    jobs = [build_pdf_job(kind, obj) for obj in objects]
+    response = StreamingHttpResponse(
+        stream_pdf_zip(render_pdf_jobs(kind, jobs)),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{archive_name}"'
+    return response
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def invoice_pdf_export_view(request):
+    """Download many invoice PDFs as one ZIP, scoped to the user's business."""
+    business = get_current_business(request.user)
+    if business is None:
+        return JsonResponse({"error": "No business context"}, status=400)
+    queryset = Invoice.objects.filter(business=business).select_related("business", "customer")
+    return _pdf_export_response(request, INVOICE_PDF, queryset, f"Invoices-{timezone.localdate():%Y-%m-%d}.zip")
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def expense_pdf_export_view(request):
+    """Download many expense PDFs as one ZIP, scoped to the user's business."""
+    business = get_current_business(request.user)
+    if business is None:
+        return JsonResponse({"error": "No business context"}, status=400)
+    queryset = Expense.objects.filter(business=business).select_related("business", "supplier", "category")
+    return _pdf_export_response(request, EXPENSE_PDF, queryset, f"Expenses-{timezone.localdate():%Y-%m-%d}.zip")
+
+
 @login_required
 def journal_entries(request):
     business = get_current_business(request.user)
@@ -3224,7 +3272,7 @@ class BankStatementImportView(LoginRequiredMixin, View):
         bank_import.save()
 
         try:
-            created, duplicates = self._process_import(bank_import)
+            created_ids, duplicates = self._process_import(bank_import)
         except Exception as exc:  # pragma: no cover - safety net for unexpected CSV formats
             bank_import.status = BankStatementImport.ImportStatus.FAILED
             bank_import.error_message = str(exc)
@@ -3234,23 +3282,29 @@ class BankStatementImportView(LoginRequiredMixin, View):
                 "Import failed. Check the CSV structure and try again.",
             )
         else:
+            created = len(created_ids)
             bank_import.status = BankStatementImport.ImportStatus.COMPLETED
             bank_import.error_message = (
                 f"Imported {created} new transaction{'s' if created != 1 else ''}. "
                 f"Skipped {duplicates} duplicates."
             ).strip()
             bank_import.save(update_fields=["status", "error_message"])
+            try:
+                schedule_auto_apply(business, created_ids, user=request.user)
+            except Exception:  # suggestions are recomputed lazily by the feed
+                logger.exception("Auto-apply failed for bank import %s", bank_import.pk)
             messages.success(request, "Bank transactions imported successfully.")
 
         return redirect("bank_feeds_overview")
 
-    def _process_import(self, bank_import: BankStatementImport) -> tuple[int, int]:
+    def _process_import(self, bank_import: BankStatementImport) -> tuple[list[int], int]:
+        """Create the statement's new transactions; returns (created ids, duplicate count)."""
         bank_account = bank_import.bank_account
         with bank_import.file.open("rb") as fh:
             data = fh.read().decode("utf-8", errors="ignore")
         reader = csv.DictReader(io.StringIO(data))
 
-        created_count = 0
+        created_ids = []
         duplicate_count = 0
         with db_transaction.atomic():
             for row in reader:
@@ -3297,7 +3351,7 @@ class BankStatementImportView(LoginRequiredMixin, View):
                     normalized_amount_str,
                 )
 
-                _, created_flag = BankTransaction.objects.get_or_create(
+                tx, created_flag = BankTransaction.objects.get_or_create(
                     bank_account=bank_account,
                     external_id=external_id,
                     defaults={
@@ -3308,11 +3362,11 @@ class BankStatementImportView(LoginRequiredMixin, View):
                     },
                 )
                 if created_flag:
-                    created_count += 1
+                    created_ids.append(tx.pk)
                 else:
                     duplicate_count += 1
 
-        return created_count, duplicate_count
+        return created_ids, duplicate_count
 
 @login_required
 def bank_feeds_overview(request):
@@ -3722,6 +3776,22 @@ def api_banking_overview(request):
     return JsonResponse({"accounts": account_payload, "summary": summary})
 
 
+BANK_FEED_PAGE_SIZE = 200
+BANK_FEED_MAX_PAGE_SIZE = 500
+
+
+def _parse_feed_cursor(cursor: str):
+    """`<date>_<id>` of the last row on the previous page, or None if malformed."""
+    date_part, _, id_part = cursor.partition("_")
+    try:
+        parsed_date = parse_date(date_part)
+    except ValueError:
+        return None
+    if parsed_date is None or not id_part.isdigit():
+        return None
+    return parsed_date, int(id_part)
+
+
 @login_required
 def api_banking_feed_transactions(request):
     business = get_current_business(request.user)
@@ -3749,10 +3819,27 @@ def api_banking_feed_transactions(request):
         return JsonResponse({"detail": "Bank account not found"}, status=404)
 
     status_filter = request.GET.get("status") or "ALL"
+    # Callers that do not page (no limit or cursor) still get the full feed.
+    limit = None
+    if request.GET.get("limit") or request.GET.get("cursor"):
+        try:
+            limit = min(max(int(request.GET.get("limit") or BANK_FEED_PAGE_SIZE), 1), BANK_FEED_MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return JsonResponse({"detail": "Invalid limit"}, status=400)
 
-    transactions = list(
-        BankTransaction.objects.filter(bank_account=bank_account)
-        .select_related(
+    transactions_qs = BankTransaction.objects.filter(bank_account=bank_account)
+    if status_filter != "ALL":
+        transactions_qs = transactions_qs.filter(status=status_filter)
+    cursor = request.GET.get("cursor")
+    if cursor:
+        after = _parse_feed_cursor(cursor)
+        if after is None:
+            return JsonResponse({"detail": "Invalid cursor"}, status=400)
+        after_date, after_id = after
+        transactions_qs = transactions_qs.filter(Q(date__lt=after_date) | Q(date=after_date, id__lt=after_id))
+
+    transactions_qs = (
+        transactions_qs.select_related(
             "posted_journal_entry",
             "category",
             "customer",
@@ -3765,11 +3852,12 @@ def api_banking_feed_transactions(request):
         .prefetch_related("posted_journal_entry__lines__account")
         .order_by("-date", "-id")
     )
-
-    if status_filter != "ALL":
-        transactions = [
-            tx for tx in transactions if tx.status == status_filter
-        ]
+    transactions = list(transactions_qs if limit is None else transactions_qs[: limit + 1])
+    next_cursor = None
+    if limit is not None and len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = f"{last.date.isoformat()}_{last.id}"
 
     expense_map, invoice_map = _build_transaction_suggestions(transactions, business)
 
@@ -3867,6 +3955,8 @@ def api_banking_feed_transactions(request):
             "balance": float(bank_account.current_balance) if can_view_balance else None,
             "status_counts": status_counts,
             "transactions": tx_payload,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
         }
     )
 
@@ -4758,13 +4848,6 @@ def bank_feed_match_expense(request, bank_account_id, tx_id):
     return redirect("bank_feed_review", bank_account_id=bank_account.id)
 
 
-@login_required
-def pl_export_csv(request):
-    """Placeholder endpoint for future CSV exports."""
-
-    return HttpResponse("Export coming soon.", content_type="text/plain")
-
-
 @login_required
 def bank_feed_spa(request):
     return render(request, "bank_feed.html")
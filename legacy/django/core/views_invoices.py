@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 
 from .agentic_invoices import InvoiceInputDocument, run_invoices_workflow
+from .jobs import INVOICES_RUN_JOB, background_runs_requested, enqueue_job
 from .ledger_services import post_journal_entry_from_proposal
 from .models import InvoiceDocument, InvoiceRun
 from .permissions import has_permission
@@ -77,6 +78,109 @@ def _serialize_doc(doc: InvoiceDocument) -> dict:
     }
 
 
+def _parse_iso_date(raw: str | None):
+    return timezone.datetime.fromisoformat(raw).date() if raw else None
+
+
+def _apply_document_result(doc_model: InvoiceDocument, doc_result) -> None:
+    doc_model.extracted_payload = doc_result.extracted_payload
+    doc_model.proposed_journal_payload = doc_result.proposed_journal_payload
+    doc_model.audit_flags = doc_result.audit_flags
+    doc_model.audit_score = doc_result.audit_score
+    doc_model.audit_explanations = getattr(doc_result, "audit_explanations", [])
+    if doc_result.status == "PROCESSED":
+        doc_model.status = InvoiceDocument.DocumentStatus.PROCESSED
+    else:
+        doc_model.status = InvoiceDocument.DocumentStatus.ERROR
+        doc_model.error_message = doc_result.error or ""
+    doc_model.save()
+
+
+def execute_invoices_run(run: InvoiceRun, *, hints: dict, user_id: int, on_progress=None) -> list[InvoiceDocument]:
+    """
+    Run the invoices workflow for a run's PENDING documents and persist results.
+
+    Each document is saved as soon as the workflow finishes it; `on_progress`
+    (completed, total, document) is called after each save. Used both inline
+    by api_invoices_run and by the "invoices.run" background job.
+    """
+    business = run.business
+    doc_models = list(run.documents.order_by("id"))
+    docs_by_id = {d.id: d for d in doc_models}
+    default_issue_date = _parse_iso_date(hints.get("default_issue_date"))
+    default_due_date = _parse_iso_date(hints.get("default_due_date"))
+    documents = [
+        InvoiceInputDocument(
+            document_id=doc.id,
+            storage_key=doc.storage_key,
+            original_filename=doc.original_filename,
+            currency_hint=hints.get("default_currency"),
+            issue_date_hint=default_issue_date,
+            due_date_hint=default_due_date,
+            category_hint=hints.get("default_category"),
+            vendor_hint=hints.get("default_vendor"),
+        )
+        for doc in doc_models
+    ]
+    completed = 0
+
+    def _persist(doc_result) -> None:
+        nonlocal completed
+        doc_model = docs_by_id.get(doc_result.document_id)
+        if doc_model is None:
+            return
+        _apply_document_result(doc_model, doc_result)
+        completed += 1
+        if on_progress is not None:
+            on_progress(completed, len(doc_models), doc_model)
+
+    workflow_result = run_invoices_workflow(
+        business_id=business.id,
+        documents=documents,
+        default_currency=hints.get("default_currency"),
+        default_issue_date=default_issue_date,
+        default_due_date=default_due_date,
+        default_category=hints.get("default_category"),
+        default_vendor=hints.get("default_vendor"),
+        triggered_by_user_id=user_id,
+        ai_companion_enabled=business.ai_companion_enabled,
+        on_document_result=_persist,
+    )
+
+    success_count = 0
+    error_count = 0
+    warning_count = 0
+    high_risk_count = 0
+    for doc_result in workflow_result.documents:
+        if doc_result.audit_score is not None and Decimal(doc_result.audit_score) >= RISK_HIGH_THRESHOLD:
+            high_risk_count += 1
+        if doc_result.status == "PROCESSED":
+            success_count += 1
+            if getattr(doc_result, "audit_status", None) == "warning":
+                warning_count += 1
+        else:
+            error_count += 1
+
+    with transaction.atomic():
+        run.status = InvoiceRun.RunStatus.COMPLETED
+        run.success_count = success_count
+        run.error_count = error_count
+        run.warning_count = warning_count
+        run.engine_run_id = workflow_result.engine_run_id
+        run.trace_id = workflow_result.trace_id
+        run.metrics = {
+            **workflow_result.metrics,
+            "documents_high_risk": high_risk_count or workflow_result.metrics.get("documents_high_risk", 0),
+            "documents_total": workflow_result.metrics.get("documents_total", len(doc_models)),
+        }
+        run.llm_explanations = workflow_result.llm_explanations
+        run.llm_ranked_documents = workflow_result.llm_ranked_documents
+        run.llm_suggested_classifications = workflow_result.llm_suggested_classifications
+        run.llm_suggested_followups = workflow_result.llm_suggested_followups
+        run.save()
+    return doc_models
+
+
 @login_required
 @require_POST
 def api_invoices_run(request):
@@ -110,92 +214,50 @@ def api_invoices_run(request):
             except Exception:
                 return JsonResponse({"error": f"Invalid default_{target}_date"}, status=400)
 
+    background = background_runs_requested(request)
     run = InvoiceRun.objects.create(
         business=business,
         created_by=request.user,
-        status=InvoiceRun.RunStatus.RUNNING,
+        status=InvoiceRun.RunStatus.PENDING if background else InvoiceRun.RunStatus.RUNNING,
         total_documents=len(files),
     )
+    hints = {
+        "default_currency": default_currency,
+        "default_category": default_category,
+        "default_vendor": default_vendor,
+        "default_issue_date": default_issue_date.isoformat() if default_issue_date else None,
+        "default_due_date": default_due_date.isoformat() if default_due_date else None,
+    }
 
-    documents: list[InvoiceInputDocument] = []
-    doc_models: list[InvoiceDocument] = []
     try:
         for f in files:
             path = _build_storage_path(business.id, run.id, f.name)
             storage_key = default_storage.save(path, f)
-            doc = InvoiceDocument.objects.create(
+            InvoiceDocument.objects.create(
                 business=business,
                 run=run,
                 storage_key=storage_key,
                 original_filename=f.name,
                 status=InvoiceDocument.DocumentStatus.PENDING,
             )
-            doc_models.append(doc)
-            documents.append(
-                InvoiceInputDocument(
-                    document_id=doc.id,
-                    storage_key=storage_key,
-                    original_filename=f.name,
-                    currency_hint=default_currency,
-                    issue_date_hint=default_issue_date,
-                    due_date_hint=default_due_date,
-                    category_hint=default_category,
-                    vendor_hint=default_vendor,
-                )
-            )
 
-        workflow_result = run_invoices_workflow(
-            business_id=business.id,
-            documents=documents,
-            default_currency=default_currency,
-            default_issue_date=default_issue_date,
-            default_due_date=default_due_date,
-            default_category=default_category,
-            default_vendor=default_vendor,
-            triggered_by_user_id=request.user.id,
-            ai_companion_enabled=business.ai_companion_enabled,
-        )
+        if background:
+            job = enqueue_job(
+                INVOICES_RUN_JOB,
+                {"run_id": run.id, "hints": hints, "user_id": request.user.id},
+                business=business,
+            )
+            return JsonResponse(
+                {
+                    "run_id": run.id,
+                    "status": run.status,
+                    "job_id": job.id,
+                    "progress_trace_id": job.trace_id,
+                },
+                status=202,
+            )
 
-        success_count = 0
-        error_count = 0
-        warning_count = 0
-        high_risk_count = 0
-        with transaction.atomic():
-            for doc_model, doc_result in zip(doc_models, workflow_result.documents):
-                doc_model.extracted_payload = doc_result.extracted_payload
-                doc_model.proposed_journal_payload = doc_result.proposed_journal_payload
-                doc_model.audit_flags = doc_result.audit_flags
-                doc_model.audit_score = doc_result.audit_score
-                doc_model.audit_explanations = getattr(doc_result, "audit_explanations", [])
-                if doc_result.audit_score is not None and Decimal(doc_result.audit_score) >= RISK_HIGH_THRESHOLD:
-                    high_risk_count += 1
-                if doc_result.status == "PROCESSED":
-                    doc_model.status = InvoiceDocument.DocumentStatus.PROCESSED
-                    success_count += 1
-                    if getattr(doc_result, "audit_status", None) == "warning":
-                        warning_count += 1
-                else:
-                    doc_model.status = InvoiceDocument.DocumentStatus.ERROR
-                    doc_model.error_message = doc_result.error or ""
-                    error_count += 1
-                doc_model.save()
-
-            run.status = InvoiceRun.RunStatus.COMPLETED
-            run.success_count = success_count
-            run.error_count = error_count
-            run.warning_count = warning_count
-            run.engine_run_id = workflow_result.engine_run_id
-            run.trace_id = workflow_result.trace_id
-            run.metrics = {
-                **workflow_result.metrics,
-                "documents_high_risk": high_risk_count or workflow_result.metrics.get("documents_high_risk", 0),
-                "documents_total": workflow_result.metrics.get("documents_total", len(doc_models)),
-            }
-            run.llm_explanations = workflow_result.llm_explanations
-            run.llm_ranked_documents = workflow_result.llm_ranked_documents
-            run.llm_suggested_classifications = workflow_result.llm_suggested_classifications
-            run.llm_suggested_followups = workflow_result.llm_suggested_followups
-            run.save()
+        doc_models = execute_invoices_run(run, hints=hints, user_id=request.user.id)
     except Exception as exc:  # pragma: no cover - defensive
         run.status = InvoiceRun.RunStatus.FAILED
         run.error_count = run.total_documents
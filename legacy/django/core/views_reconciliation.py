@@ -2,6 +2,7 @@ from datetime import date, timedelta
 import logging
 from decimal import Decimal, ROUND_HALF_UP
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.http import JsonResponse, HttpRequest, HttpResponse
@@ -9,7 +10,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from core.utils import get_current_business
 from core.permissions import has_permission
@@ -17,10 +18,14 @@ from core.services.periods import resolve_comparison, resolve_period
 from core.services.reconciliation_engine import ReconciliationEngine
 from core.services.bank_reconciliation import (
     BankReconciliationService,
+    RECONCILED_STATE_FIELDS,
     RECONCILED_STATUSES,
+    assign_reconciled_state,
     set_reconciled_state,
 )
 from core.services.bank_matching import BankMatchingEngine
+from core.services.import_matching import AutoApplyResult, auto_apply_imported_transactions, schedule_auto_apply
+from core.services.reconciliation_summary import ledger_balances, summarize_bank_accounts, summarize_sessions
 from core.reconciliation import recompute_bank_transaction_status
 from core.llm_reasoning import audit_high_risk_transaction
 from core.models import (
@@ -30,12 +35,18 @@ from core.models import (
     BankReconciliationMatch,
     Account,
     BankRule,
+    Category,
     ReconciliationSession,
     JournalEntry,
 )
 
 logger = logging.getLogger(__name__)
 
+# Bank lines above this absolute amount go through the high-risk critic.
+HIGH_RISK_AUDIT_AMOUNT = Decimal("5000")
+
+BULK_OPERATIONS = ("match", "exclude", "categorize")
+
 
 def _require_reconciliation_permission(request, business, *, action="view"):
     """
@@ -268,24 +279,7 @@ def _account_balance_as_of(account: Account | None, as_of: date) -> Decimal:
     """
     if not account or not as_of:
         return Decimal("0.00")
-
-    agg = (
-        JournalLine.objects.filter(
-            account=account,
-            journal_entry__business=account.business,
-            journal_entry__is_void=False,
-            journal_entry__date__lte=as_of,
-        ).aggregate(
-            debit_sum=models.Sum("debit"),
-            credit_sum=models.Sum("credit"),
-        )
-    )
-    debit = agg["debit_sum"] or Decimal("0.00")
-    credit = agg["credit_sum"] or Decimal("0.00")
-
-    if account.type in (Account.AccountType.ASSET, Account.AccountType.EXPENSE):
-        return debit - credit
-    return credit - debit
+    return ledger_balances([(account.pk, as_of)])[(account.pk, as_of)]
 
 
 def _periods_for_account_v1(bank_account: BankAccount) -> list[dict]:
@@ -383,7 +377,9 @@ def _serialize_tx(tx: BankTransaction, session: ReconciliationSession | None = N
     latest_audit = None
     audits_rel = getattr(tx, "high_risk_audits", None)
     try:
-        audit_obj = audits_rel.order_by("-created_at").first() if audits_rel is not None else None
+        # .all() so a prefetch_related("high_risk_audits") is reused.
+        audits = list(audits_rel.all()) if audits_rel is not None else []
+        audit_obj = max(audits, key=lambda a: a.created_at) if audits else None
     except Exception:
         audit_obj = None
     if audit_obj:
@@ -418,7 +414,7 @@ def _session_feed(session: ReconciliationSession) -> dict:
             date__lte=session.statement_end_date,
         )
         .filter(Q(reconciliation_session__isnull=True) | Q(reconciliation_session=session))
-        .select_related("customer", "supplier")
+        .select_related("customer", "supplier", "bank_account__business")
         .prefetch_related("high_risk_audits")
         .order_by("-date", "-id")
     )
@@ -444,34 +440,15 @@ def _session_feed(session: ReconciliationSession) -> dict:
     return buckets
 
 
-def _session_transactions_queryset(session: ReconciliationSession):
-    return BankTransaction.objects.filter(
-        reconciliation_session=session,
-    )
-
-
-def _cleared_sum_for_session(session: ReconciliationSession) -> Decimal:
-    cleared_qs = _session_transactions_queryset(session).filter(status__in=RECONCILED_STATUSES)
-    total = Decimal("0.00")
-    for tx in cleared_qs:
-        signed_amount = tx.amount or Decimal("0.00")
-        if tx.status == BankTransaction.TransactionStatus.PARTIAL and tx.allocated_amount is not None:
-            signed_amount = tx.allocated_amount
-            if tx.amount and tx.amount < 0:
-                signed_amount = -signed_amount
-        elif tx.status == BankTransaction.TransactionStatus.EXCLUDED:
-            signed_amount = Decimal("0.00")
-        total += signed_amount
-    return _quantize_money(total)
-
-
 def _get_or_create_session(business, bank_account: BankAccount, start_date: date, end_date: date):
     """
     Ensure a reconciliation session exists for a period.
     Seeds opening/statement balance from the ledger on first creation.
     """
-    start_opening = _account_balance_as_of(bank_account.account, start_date - timedelta(days=1))
-    end_ledger = _account_balance_as_of(bank_account.account, end_date)
+    opening_date = start_date - timedelta(days=1)
+    balances = ledger_balances([(bank_account.account_id, opening_date), (bank_account.account_id, end_date)])
+    start_opening = balances.get((bank_account.account_id, opening_date), Decimal("0.00"))
+    end_ledger = balances.get((bank_account.account_id, end_date), Decimal("0.00"))
     session, created = ReconciliationSession.objects.get_or_create(
         business=business,
         bank_account=bank_account,
@@ -498,19 +475,9 @@ def _get_or_create_session(business, bank_account: BankAccount, start_date: date
 
 
 def _session_payload(session: ReconciliationSession, include_periods: bool = False) -> dict:
-    ledger_end = _account_balance_as_of(session.bank_account.account, session.statement_end_date)
+    summary = summarize_sessions([session])[session.id]
     feed = _session_feed(session)
 
-    session_txs = _session_transactions_queryset(session)
-    total_txs = session_txs.count()
-    reconciled_count = session_txs.filter(status__in=RECONCILED_STATUSES).count()
-    excluded_count = session_txs.filter(status=BankTransaction.TransactionStatus.EXCLUDED).count()
-    reconciled_percent = float(round((reconciled_count / total_txs * 100), 2)) if total_txs else 0.0
-    unreconciled_count = total_txs - reconciled_count
-    cleared_sum = _cleared_sum_for_session(session)
-    cleared_balance = _quantize_money((session.opening_balance or Decimal("0.00")) + cleared_sum)
-    difference = _quantize_money((session.closing_balance or Decimal("0.00")) - cleared_balance)
-
     payload = {
         "session": {
             "id": session.id,
@@ -519,16 +486,16 @@ def _session_payload(session: ReconciliationSession, include_periods: bool = Fal
             "period_end": session.statement_end_date.isoformat(),
             "opening_balance": _decimal_to_str(session.opening_balance),
             "statement_ending_balance": _decimal_to_str(session.closing_balance),
-            "ledger_ending_balance": _decimal_to_str(ledger_end),
-            "cleared_balance": _decimal_to_str(cleared_balance),
-            "difference": _decimal_to_str(difference),
+            "ledger_ending_balance": _decimal_to_str(summary.ledger_balance),
+            "cleared_balance": _decimal_to_str(summary.cleared_balance),
+            "difference": _decimal_to_str(summary.difference),
             "status": session.status,
             "completed_at": session.completed_at.isoformat() if session.completed_at else None,
-            "reconciled_percent": reconciled_percent,
-            "total_transactions": total_txs,
-            "unreconciled_count": unreconciled_count,
-            "reconciled_count": reconciled_count,
-            "excluded_count": excluded_count,
+            "reconciled_percent": summary.reconciled_percent,
+            "total_transactions": summary.total_count,
+            "unreconciled_count": summary.unreconciled_count,
+            "reconciled_count": summary.reconciled_count,
+            "excluded_count": summary.excluded_count,
         },
         "feed": feed,
         "bank_account": {
@@ -657,7 +624,7 @@ def _maybe_audit_high_risk_transaction(bank_tx: BankTransaction, *, is_bulk_adju
         linked_accounts.append(bank_tx.category.account.code)
 
     amount_val = abs(bank_tx.amount or Decimal("0"))
-    if amount_val <= Decimal("5000") and not is_bulk_adjustment:
+    if amount_val <= HIGH_RISK_AUDIT_AMOUNT and not is_bulk_adjustment:
         return None
 
     return audit_high_risk_transaction(
@@ -720,15 +687,41 @@ def api_reconciliation_accounts_v1(request: HttpRequest):
     if error:
         return error
 
-    accounts = (
+    accounts = list(
         BankAccount.objects.filter(business=business, is_active=True)
         .select_related("account")
         .order_by("name")
     )
-    data = [
-        {"id": acc.id, "name": acc.name, "currency": business.currency or "USD"}
-        for acc in accounts
-    ]
+    summaries = summarize_bank_accounts(business, bank_accounts=accounts)
+    data = []
+    for acc in accounts:
+        summary = summaries[acc.id]
+        latest = summary.latest_session
+        data.append(
+            {
+                "id": acc.id,
+                "name": acc.name,
+                "currency": business.currency or "USD",
+                "book_balance": _decimal_to_str(summary.book_balance),
+                "total_transactions": summary.totals.total_count,
+                "reconciled_count": summary.totals.reconciled_count,
+                "unreconciled_count": summary.totals.unreconciled_count,
+                "unreconciled_amount": _decimal_to_str(summary.totals.unreconciled_sum),
+                "progress_percent": summary.totals.progress_percent,
+                "latest_session": {
+                    "id": latest.session_id,
+                    "status": latest.status,
+                    "period_start": latest.period_start.isoformat(),
+                    "period_end": latest.period_end.isoformat(),
+                    "ledger_ending_balance": _decimal_to_str(latest.ledger_balance),
+                    "cleared_balance": _decimal_to_str(latest.cleared_balance),
+                    "difference": _decimal_to_str(latest.difference),
+                    "unreconciled_count": latest.unreconciled_count,
+                }
+                if latest
+                else None,
+            }
+        )
     return JsonResponse(data, safe=False)
 
 
@@ -952,6 +945,242 @@ def api_reconciliation_exclude_v1(request: HttpRequest, session_id: int):
     return JsonResponse(_session_payload(session))
 
 
+def _int_or_none(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _apply_bulk_operations(session: ReconciliationSession, operations: list, user) -> tuple[list[dict], list[BankTransaction]]:
+    """
+    Apply match / exclude / categorize operations to many transactions of a session.
+
+    Must run inside a transaction. Bank transactions are locked in id order;
+    journal entries, lines and matches are bulk-created and transaction flags
+    bulk-updated, so the per-row save signals are replaced by one story and
+    cashflow invalidation. Invalid items are reported and skipped, the rest
+    are applied. Returns per-item results and the applied transactions.
+    """
+    business = session.business
+    bank_ledger = session.bank_account.account
+
+    results: list[dict] = []
+    planned: list[tuple[dict, dict]] = []
+    tx_ids: set[int] = set()
+    for index, item in enumerate(operations):
+        item = dict(item) if isinstance(item, dict) else {}
+        tx_id = _int_or_none(item.get("transaction_id"))
+        item["journal_entry_id"] = _int_or_none(item.get("journal_entry_id"))
+        item["category_id"] = _int_or_none(item.get("category_id"))
+        result = {"index": index, "op": item.get("op"), "transaction_id": tx_id, "status": "error"}
+        results.append(result)
+        if item.get("op") not in BULK_OPERATIONS:
+            result["error"] = "op must be one of: " + ", ".join(BULK_OPERATIONS)
+        elif tx_id is None:
+            result["error"] = "transaction_id is required"
+        elif tx_id in tx_ids:
+            result["error"] = "Transaction appears more than once in this request."
+        else:
+            tx_ids.add(tx_id)
+            planned.append((result, item))
+
+    txs = {
+        tx.pk: tx
+        for tx in BankTransaction.objects.select_for_update()
+        .filter(pk__in=tx_ids, bank_account=session.bank_account)
+        .order_by("id")
+    }
+    entries = JournalEntry.objects.filter(business=business).in_bulk(
+        {item["journal_entry_id"] for _, item in planned if item["op"] == "match" and item["journal_entry_id"]}
+    )
+    category_ids = {item["category_id"] for _, item in planned if item["op"] == "categorize" and item["category_id"]}
+    category_ids |= {tx.category_id for tx in txs.values() if tx.category_id}
+    categories = Category.objects.filter(business=business).select_related("account").in_bulk(category_ids)
+
+    ts = timezone.now()
+    applied: list[tuple[dict, dict, BankTransaction]] = []
+    for result, item in planned:
+        tx = txs.get(result["transaction_id"])
+        op = item["op"]
+        try:
+            if tx is None:
+                raise ValidationError("Transaction not found for this session's bank account.")
+            if tx.reconciliation_session_id not in (None, session.id):
+                raise ValidationError("Transaction belongs to another reconciliation session.")
+            _assert_tx_in_session_period(tx, session)
+            if op == "match":
+                entry = entries.get(item["journal_entry_id"])
+                if entry is None:
+                    raise ValidationError("journal_entry_id is required and must belong to this business.")
+                _assert_entry_in_session_period(entry, session)
+                item["_entry"] = entry
+            elif op == "categorize":
+                if tx.posted_journal_entry_id or tx.is_reconciled:
+                    raise ValidationError("Transaction is already posted or reconciled; unmatch it first.")
+                if not bank_ledger:
+                    raise ValidationError(f"Bank account {session.bank_account.name} has no linked ledger account")
+                if item["category_id"]:
+                    if item["category_id"] not in categories:
+                        raise ValidationError("Category not found.")
+                    tx.category_id = item["category_id"]
+            if op == "exclude" and not item.get("excluded", True):
+                unexcluded = tx.status == BankTransaction.TransactionStatus.EXCLUDED
+                assign_reconciled_state(
+                    tx,
+                    reconciled=False,
+                    session=session,
+                    status=BankTransaction.TransactionStatus.NEW if unexcluded else tx.status,
+                )
+            else:
+                assign_reconciled_state(
+                    tx,
+                    reconciled=True,
+                    session=session,
+                    status=(
+                        BankTransaction.TransactionStatus.EXCLUDED
+                        if op == "exclude"
+                        else BankTransaction.TransactionStatus.MATCHED_SINGLE
+                    ),
+                    reconciled_at=ts,
+                )
+        except ValidationError as exc:
+            result["error"] = "; ".join(exc.messages)
+            continue
+        applied.append((result, item, tx))
+
+    if not applied:
+        return results, []
+
+    # Categorized lines get a new journal entry against their category (or suspense) account.
+    to_categorize = [(item, tx) for _, item, tx in applied if item["op"] == "categorize"]
+    if to_categorize:
+        suspense = None
+        new_entries = JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(
+                    business=business,
+                    date=tx.date or timezone.localdate(),
+                    description=tx.description or "Bank transaction",
+                )
+                for _, tx in to_categorize
+            ]
+        )
+        lines = []
+        for (item, tx), entry in zip(to_categorize, new_entries):
+            category = categories.get(tx.category_id)
+            offset_account = category.account if category and category.account else None
+            if offset_account is None:
+                suspense = suspense or _get_or_create_suspense_account(business)
+                offset_account = suspense
+            abs_amount = abs(tx.amount or Decimal("0.00"))
+            memo = f"Auto-matched: {tx.description or 'Bank transaction'}"
+            debit_account, credit_account = (
+                (offset_account, bank_ledger) if (tx.amount or 0) < 0 else (bank_ledger, offset_account)
+            )
+            lines.append(JournalLine(journal_entry=entry, account=debit_account, debit=abs_amount, description=memo))
+            lines.append(JournalLine(journal_entry=entry, account=credit_account, credit=abs_amount, description=memo))
+            item["_entry"] = entry
+        JournalLine.objects.bulk_create(lines)
+
+    cleared = [(item, tx) for _, item, tx in applied if item["op"] != "exclude" or item.get("excluded", True)]
+    BankReconciliationMatch.objects.filter(bank_transaction_id__in=[tx.pk for _, tx in cleared]).delete()
+    BankReconciliationMatch.objects.bulk_create(
+        [
+            BankReconciliationMatch(
+                bank_transaction=tx,
+                journal_entry=item["_entry"],
+                match_type="ONE_TO_ONE",
+                match_confidence=Decimal("1.00"),
+                matched_amount=abs(tx.amount or Decimal("0.00")),
+                reconciled_by=user,
+            )
+            for item, tx in cleared
+            if item["op"] != "exclude"
+        ]
+    )
+
+    # Reconciliation flags were assigned while validating; only the posting fields remain.
+    for result, item, tx in applied:
+        if item["op"] == "exclude":
+            if item.get("excluded", True):
+                tx.allocated_amount = Decimal("0.0000")
+                tx.posted_journal_entry = None
+        else:
+            tx.allocated_amount = abs(tx.amount or Decimal("0.00"))
+            tx.posted_journal_entry = item["_entry"]
+            result["journal_entry_id"] = item["_entry"].pk
+        result["status"] = "ok"
+        result.pop("error", None)
+
+    applied_txs = [tx for _, _, tx in applied]
+    BankTransaction.objects.bulk_update(
+        applied_txs,
+        ["category", "allocated_amount", "posted_journal_entry", *RECONCILED_STATE_FIELDS],
+    )
+    if bank_ledger:
+        JournalLine.objects.filter(
+            journal_entry_id__in=[item["_entry"].pk for item, _ in cleared if "_entry" in item],
+            account=bank_ledger,
+        ).update(is_reconciled=True, reconciled_at=ts, reconciliation_session=session)
+
+    # bulk_update skips post_save, which is what marks these caches dirty per row.
+    from core.companion_story import mark_story_dirty
+    from core.services.cashflow import cashflow_changed
+
+    mark_story_dirty(business)
+    cashflow_changed(business.id)
+    return results, applied_txs
+
+
+@login_required
+@require_POST
+def api_reconciliation_bulk_v1(request: HttpRequest, session_id: int):
+    """
+    Apply a list of operations to a session in one request:
+
+        {"operations": [
+            {"op": "match", "transaction_id": 1, "journal_entry_id": 10},
+            {"op": "exclude", "transaction_id": 2, "excluded": true},
+            {"op": "categorize", "transaction_id": 3, "category_id": 7}
+        ]}
+
+    Returns the session payload plus a per-item "results" list.
+    """
+    business, error = _ensure_business(request)
+    if error:
+        return error
+
+    session = get_object_or_404(
+        ReconciliationSession.objects.select_related("bank_account__account", "business"),
+        pk=session_id,
+        business=business,
+    )
+    if (resp := _session_mutable_or_error(session)):
+        return resp
+    body = _parse_json(request) or {}
+    operations = body.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return _json_error("operations must be a non-empty list")
+    limit = settings.RECONCILIATION_BULK_MAX_OPERATIONS
+    if len(operations) > limit:
+        return _json_error(f"At most {limit} operations are allowed per request.")
+
+    with transaction.atomic():
+        results, applied = _apply_bulk_operations(session, operations, request.user)
+
+    if business.ai_companion_enabled:
+        for bank_tx in applied:
+            if abs(bank_tx.amount or Decimal("0")) > HIGH_RISK_AUDIT_AMOUNT:
+                _maybe_audit_high_risk_transaction(bank_tx)
+
+    payload = _session_payload(session)
+    payload["results"] = results
+    payload["applied_count"] = len(applied)
+    payload["failed_count"] = len(results) - len(applied)
+    return JsonResponse(payload)
+
+
 @login_required
 @require_GET
 def api_reconciliation_session_report(request: HttpRequest, session_id: int):
@@ -1253,7 +1482,7 @@ def api_bank_import(request: HttpRequest):
     from datetime import datetime
     
     reader = csv.DictReader(io.StringIO(csv_content))
-    created_count = 0
+    created_ids = []
     errors = []
     
     for row in reader:
@@ -1294,17 +1523,27 @@ def api_bank_import(request: HttpRequest):
                 normalized_hash=normalized_hash,
                 status=BankTransaction.TransactionStatus.NEW
             )
-            
-            # Run suggestion engine
-            BankMatchingEngine.apply_suggestions(tx)
-            created_count += 1
+            created_ids.append(tx.id)
             
         except Exception as e:
             errors.append(str(e))
-            
+
+    # Suggestion engine + auto-confirm rules over the whole batch
+    auto_apply_payload = None
+    try:
+        auto_apply = schedule_auto_apply(business, created_ids, user=request.user)
+    except Exception:  # suggestions are recomputed lazily by the feed
+        logger.exception("Auto-apply failed for bank account %s", bank_account.pk)
+    else:
+        if isinstance(auto_apply, AutoApplyResult):
+            auto_apply_payload = auto_apply.as_dict()
+        elif auto_apply is not None:
+            auto_apply_payload = {"job_id": auto_apply.id}
+
     return JsonResponse({
-        "created": created_count,
-        "errors": errors
+        "created": len(created_ids),
+        "errors": errors,
+        "auto_apply": auto_apply_payload,
     })
 
 
@@ -1363,6 +1602,19 @@ def api_reconciliation_transactions(request: HttpRequest, pk: int):
         qs = qs.filter(is_reconciled=False).exclude(
             status=BankTransaction.TransactionStatus.EXCLUDED
         )
+    # Rows the auto-apply stage never scanned (older imports, or a job that
+    # has not run yet) get one lazy pass; scanned rows are not locked again.
+    unscanned = qs.filter(
+        is_reconciled=False,
+        status=BankTransaction.TransactionStatus.NEW,
+        suggestions_scanned_at__isnull=True,
+    )
+    try:
+        auto_apply_imported_transactions(unscanned.values_list("id", flat=True), auto_confirm=False)
+    except Exception:
+        # If suggestion engine fails, continue without suggestions
+        logger.exception("Suggestion engine failed for bank account %s", bank_account.pk)
+
     data = []
     for tx in qs:
         try:
@@ -1378,17 +1630,6 @@ def api_reconciliation_transactions(request: HttpRequest, pk: int):
             # Use stored suggestion data
             match_confidence = tx.suggestion_confidence
             engine_reason = tx.suggestion_reason
-            
-            # If no stored suggestion but status is NEW, try running engine (lazy load)
-            if not tx.is_reconciled and tx.status == "NEW" and not match_confidence:
-                try:
-                    BankMatchingEngine.apply_suggestions(tx)
-                    tx.refresh_from_db()
-                    match_confidence = tx.suggestion_confidence
-                    engine_reason = tx.suggestion_reason
-                except Exception:
-                    # If suggestion engine fails, continue without suggestions
-                    pass
 
             data.append(
                 {
@@ -1890,11 +2131,11 @@ def api_reconciliation_session(request: HttpRequest):
         # AND we should probably include previous sessions? 
         # Usually "cleared balance" = Opening Balance + Sum of Cleared Transactions in this period.
         
-        cleared_txs = BankTransaction.objects.filter(
+        cleared = BankTransaction.objects.filter(
             reconciliation_session=session,
             is_reconciled=True
-        )
-        cleared_sum = cleared_txs.aggregate(total=models.Sum("amount"))["total"] or Decimal("0")
+        ).aggregate(total=models.Sum("amount"), count=models.Count("id"))
+        cleared_sum = cleared["total"] or Decimal("0")
         
         cleared_balance = session.opening_balance + cleared_sum
         difference = session.closing_balance - cleared_balance
@@ -1905,10 +2146,7 @@ def api_reconciliation_session(request: HttpRequest):
         ).count()
         
         # Reconciled count in this session
-        reconciled_count = BankTransaction.objects.filter(
-            reconciliation_session=session,
-            is_reconciled=True
-        ).count()
+        reconciled_count = cleared["count"]
         
         unreconciled_count = total_txs_count - reconciled_count
         reconciled_percent = (reconciled_count / total_txs_count * 100) if total_txs_count > 0 else 0
@@ -2055,6 +2293,7 @@ def api_reconciliation_feed(request: HttpRequest):
             date__gte=start_date,
             date__lte=end_date,
         )
+        .select_related("customer", "supplier")
         .order_by("-date", "-id")
     )
 
@@ -2088,7 +2327,10 @@ def api_reconciliation_feed(request: HttpRequest):
             "includedInSession": True,
         }
 
+    cleared_sum = Decimal("0")
     for tx in qs:
+        if tx.is_reconciled:
+            cleared_sum += tx.amount or Decimal("0")
         payload = _tx_payload(tx)
         if tx.status == BankTransaction.TransactionStatus.EXCLUDED:
             buckets["excluded"].append(payload)
@@ -2105,10 +2347,6 @@ def api_reconciliation_feed(request: HttpRequest):
         else:
             buckets["new"].append(payload)
 
-    cleared_sum = (
-        qs.filter(is_reconciled=True).aggregate(total=models.Sum("amount"))["total"] or Decimal("0")
-    )
-
     opening_balance = float(session.opening_balance or Decimal("0"))
     statement_ending_balance = float(session.closing_balance or Decimal("0"))
     difference = statement_ending_balance - float(cleared_sum) - opening_balance
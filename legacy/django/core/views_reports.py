@@ -1,11 +1,10 @@
-from collections import OrderedDict
 from datetime import date, timedelta
+import io
 import json
 from decimal import Decimal
 
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from django.utils.safestring import mark_safe
@@ -13,10 +12,12 @@ from django.utils.text import slugify
 from django.urls import reverse
 
 from .ledger_reports import ledger_pnl_for_period
-from .ledger_services import compute_ledger_pl
 from .services.ledger_metrics import get_pl_period_dates, PLPeriod, build_pl_diagnostics
+from .services.cashflow import compute_cashflow
+from .services.pl_report import COGS as PL_COGS, EXPENSE as PL_EXPENSE, GROUPS as PL_GROUPS, INCOME as PL_INCOME
+from .services.pl_report import build_pl_report
 from .services.periods import resolve_comparison, resolve_period
-from .models import Account, BankTransaction, ReconciliationSession
+from .models import Account, ReconciliationSession
 from .utils import get_current_business
 
 
@@ -46,13 +47,6 @@ def pnl_ledger_debug(request):
 
 # --- Shared helpers for report print payloads ---
 
-def _add_months_local(d: date, months: int) -> date:
-    month_index = (d.month - 1) + months
-    year = d.year + month_index // 12
-    month = month_index % 12 + 1
-    return date(year, month, 1)
-
-
 def build_cashflow_payload(
     business,
     period_info: dict | None = None,
@@ -64,54 +58,30 @@ def build_cashflow_payload(
     start_date = period["start"]
     end_date = period["end"]
 
-    qs = (
-        BankTransaction.objects.filter(
-            bank_account__business=business,
-            date__gte=start_date,
-            date__lte=end_date,
-        )
-        .select_related("category")
-        .order_by("date")
+    report = compute_cashflow(
+        business,
+        start_date,
+        end_date,
+        compare_start=comparison.get("compare_start"),
+        compare_end=comparison.get("compare_end"),
     )
+    current = report.current
 
-    periods: OrderedDict[tuple[int, int], dict[str, Decimal]] = OrderedDict()
-    cursor = start_date.replace(day=1)
-    final_month_start = end_date.replace(day=1)
-    while cursor <= final_month_start:
-        key = (cursor.year, cursor.month)
-        periods[key] = {"inflows": Decimal("0.00"), "outflows": Decimal("0.00")}
-        cursor = _add_months_local(cursor, 1)
-
-    for tx in qs:
-        key = (tx.date.year, tx.date.month)
-        if key not in periods:
-            continue
-        amount = tx.amount or Decimal("0.00")
-        if amount >= 0:
-            periods[key]["inflows"] += amount
-        else:
-            periods[key]["outflows"] += abs(amount)
-
-    total_inflows = Decimal("0.00")
-    total_outflows = Decimal("0.00")
-    trend: list[dict[str, object]] = []
-    for (year, month), aggregates in periods.items():
-        inflows = aggregates["inflows"]
-        outflows = aggregates["outflows"]
-        net = inflows - outflows
-        total_inflows += inflows
-        total_outflows += outflows
-        label = date(year, month, 1).strftime("%b %Y")
-        trend.append(
+    def _trend(months):
+        return [
             {
-                "periodLabel": label,
-                "inflows": float(inflows),
-                "outflows": float(outflows),
-                "net": float(net),
+                "periodLabel": m.month.strftime("%b %Y"),
+                "inflows": float(m.inflows),
+                "outflows": float(m.outflows),
+                "net": float(m.net),
             }
-        )
+            for m in months
+        ]
 
-    net_change = total_inflows - total_outflows
+    trend = _trend(current.months)
+    total_inflows = current.total_inflows
+    total_outflows = current.total_outflows
+    net_change = current.net_change
 
     activities = {
         "operating": float(net_change),
@@ -119,15 +89,10 @@ def build_cashflow_payload(
         "financing": 0.0,
     }
 
-    driver_rows = (
-        qs.values("category__name")
-        .annotate(net=Sum("amount"))
-        .order_by("-net")[:5]
-    )
     drivers: list[dict[str, object]] = []
-    for row in driver_rows:
-        label = row["category__name"] or "Uncategorized"
-        amount = row["net"] or Decimal("0.00")
+    for driver in current.drivers:
+        label = driver.label or "Uncategorized"
+        amount = driver.amount
         driver_id = slugify(label) or f"driver-{len(drivers) + 1}"
         drivers.append(
             {
@@ -138,16 +103,11 @@ def build_cashflow_payload(
             }
         )
 
-    current_cash = (
-        BankTransaction.objects.filter(bank_account__business=business).aggregate(total=Sum("amount"))[
-            "total"
-        ]
-        or Decimal("0.00")
-    )
-
+    current_cash = report.current_cash
+    month_count = len(current.months)
     avg_monthly_burn = (
-        (total_outflows - total_inflows) / Decimal(len(periods))
-        if total_outflows > total_inflows and len(periods) > 0
+        (total_outflows - total_inflows) / Decimal(month_count)
+        if total_outflows > total_inflows and month_count > 0
         else Decimal("0.00")
     )
     runway_label = None
@@ -159,27 +119,16 @@ def build_cashflow_payload(
         return value.isoformat() if hasattr(value, "isoformat") else value
 
     compare_summary = None
-    if comparison.get("compare_start") and comparison.get("compare_end"):
-        comp_qs = BankTransaction.objects.filter(
-            bank_account__business=business,
-            date__gte=comparison["compare_start"],
-            date__lte=comparison["compare_end"],
-        )
-        comp_inflows = Decimal("0.00")
-        comp_outflows = Decimal("0.00")
-        for tx in comp_qs:
-            amt = tx.amount or Decimal("0.00")
-            if amt >= 0:
-                comp_inflows += amt
-            else:
-                comp_outflows += abs(amt)
+    if report.comparison is not None:
+        comp = report.comparison
         compare_summary = {
             "label": comparison.get("compare_label"),
             "start": _iso_or_none(comparison.get("compare_start")),
             "end": _iso_or_none(comparison.get("compare_end")),
-            "totalInflows": float(comp_inflows),
-            "totalOutflows": float(comp_outflows),
-            "netChange": float(comp_inflows - comp_outflows),
+            "totalInflows": float(comp.total_inflows),
+            "totalOutflows": float(comp.total_outflows),
+            "netChange": float(comp.net_change),
+            "trend": _trend(comp.months),
         }
 
     payload = {
@@ -202,6 +151,7 @@ def build_cashflow_payload(
             "netChange": float(net_change),
             "totalInflows": float(total_inflows),
             "totalOutflows": float(total_outflows),
+            "openingBalance": float(report.opening_balance),
             "runwayLabel": runway_label,
         },
         "trend": trend,
@@ -229,34 +179,40 @@ def build_pl_payload(
 ) -> dict:
     period_info = resolve_period(period, start_date, end_date, fiscal_year_start)
     comparison_info = resolve_comparison(period_info["start"], period_info["end"], compare_to)
-    ledger_pl = compute_ledger_pl(business, period_info["start"], period_info["end"])
+    has_comparison = bool(comparison_info["compare_start"] and comparison_info["compare_end"])
+    report = build_pl_report(
+        business,
+        period_info["start"],
+        period_info["end"],
+        [(comparison_info.get("compare_label"), comparison_info["compare_start"], comparison_info["compare_end"])]
+        if has_comparison
+        else [],
+        label=period_info.get("label"),
+    )
 
-    comparison_pl = {
+    def _iso_or_none(value):
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def _totals(column):
+        income = report.total(PL_INCOME, column)
+        expense = report.total(PL_COGS, column) + report.total(PL_EXPENSE, column)
+        return {"total_income": income, "total_expense": expense, "net": income - expense}
+
+    ledger_pl = _totals(0)
+    comparison_pl = _totals(1) if has_comparison else {
         "total_income": Decimal("0.00"),
         "total_expense": Decimal("0.00"),
         "net": Decimal("0.00"),
     }
-    def _iso_or_none(value):
-        return value.isoformat() if hasattr(value, "isoformat") else value
-
-    if comparison_info["compare_start"] and comparison_info["compare_end"]:
-        comparison_pl = compute_ledger_pl(
-            business, comparison_info["compare_start"], comparison_info["compare_end"]
-        )
 
     income_items = [
-        {
-            "category": row.get("account__name") or row.get("account__code") or "Revenue",
-            "amount": float(row.get("total") or Decimal("0.00")),
-        }
-        for row in ledger_pl.get("income_accounts", [])
+        {"category": row.name or row.code or "Revenue", "amount": float(row.amounts[0])}
+        for row in report.rows_for(PL_INCOME)
     ]
     expense_items = [
-        {
-            "category": row.get("account__name") or row.get("account__code") or "Expense",
-            "amount": float(row.get("total") or Decimal("0.00")),
-        }
-        for row in ledger_pl.get("expense_accounts", [])
+        {"category": row.name or row.code or "Expense", "amount": float(row.amounts[0])}
+        for row in report.rows
+        if row.group != PL_INCOME and row.active[0]
     ]
 
     payload = {
@@ -378,30 +334,41 @@ def pl_report_print_view(request):
 
 # --- P&L Report API ---
 
-def _is_cogs_account(account) -> bool:
+def _pl_comparisons(period_info: dict, compare_preset: str) -> list[dict]:
     """
-    Determine if an account should be classified as COGS.
-    Convention: accounts with code 50xx-59xx or name containing 'cost of goods'.
+    Resolve comparison periods for the P&L report.
+
+    `compare_preset` may list several presets separated by commas
+    (e.g. "previous_period,previous_year"); the first one drives the
+    top-level compare_* fields.
     """
-    if not account:
-        return False
-    code = getattr(account, "code", "") or ""
-    name = (getattr(account, "name", "") or "").lower()
-    # Check if code starts with 5 and second digit is 0-9 (5xxx range for COGS)
-    if code and len(code) >= 2:
-        if code[0] == "5" and code[1] in "0123456789":
-            # 50xx through 59xx are considered COGS
-            return True
-    # Also check name patterns
-    cogs_keywords = ["cost of goods", "cogs", "cost of sales", "direct cost"]
-    return any(kw in name for kw in cogs_keywords)
-
-
-def _pct_change(current: Decimal, previous: Decimal) -> float | None:
-    """Calculate percentage change, handling divide-by-zero safely."""
-    if previous == Decimal("0"):
-        return None
-    return float(((current - previous) / abs(previous)) * Decimal("100"))
+    comparisons = []
+    for preset in (compare_preset or "none").split(","):
+        preset = preset.strip()
+        if not preset or preset == "none":
+            continue
+        info = resolve_comparison(period_info["start"], period_info["end"], preset)
+        if info.get("compare_start") and info.get("compare_end"):
+            comparisons.append(info)
+    return comparisons
+
+
+def _pl_report_for_request(request, business):
+    period_preset = request.GET.get("period_preset") or request.GET.get("period") or "this_month"
+    start_param = request.GET.get("period_start") or request.GET.get("start_date")
+    end_param = request.GET.get("period_end") or request.GET.get("end_date")
+    compare_preset = request.GET.get("compare_preset") or request.GET.get("compare_to") or "previous_period"
+
+    period_info = resolve_period(period_preset, start_param, end_param, business.fiscal_year_start)
+    comparisons = _pl_comparisons(period_info, compare_preset)
+    report = build_pl_report(
+        business,
+        period_info["start"],
+        period_info["end"],
+        [(c["compare_label"], c["compare_start"], c["compare_end"]) for c in comparisons],
+        label=period_info.get("label"),
+    )
+    return period_preset, compare_preset, period_info, comparisons, report
 
 
 @login_required
@@ -414,127 +381,36 @@ def pl_report_api(request):
     if business is None:
         return JsonResponse({"error": "No business found"}, status=400)
 
-    # Parse query params
-    period_preset = request.GET.get("period_preset") or request.GET.get("period") or "this_month"
-    start_param = request.GET.get("period_start") or request.GET.get("start_date")
-    end_param = request.GET.get("period_end") or request.GET.get("end_date")
-    compare_preset = request.GET.get("compare_preset") or request.GET.get("compare_to") or "previous_period"
-
-    # Resolve periods
-    period_info = resolve_period(period_preset, start_param, end_param, business.fiscal_year_start)
-    comparison_info = resolve_comparison(period_info["start"], period_info["end"], compare_preset)
-
-    # Get ledger P&L data
-    ledger_pl = compute_ledger_pl(business, period_info["start"], period_info["end"])
-
-    # Separate COGS from operating expenses
-    income_rows = []
-    cogs_rows = []
-    expense_rows = []
-
-    for row in ledger_pl.get("income", []):
-        account = row.get("account")
-        income_rows.append({
-            "id": row.get("account__id") or (account.id if account else 0),
-            "name": row.get("account__name") or (account.name if account else "Revenue"),
-            "code": row.get("account__code") or (account.code if account else None),
-            "group": "INCOME",
-            "amount": float(row.get("amount") or Decimal("0")),
-            "compare_amount": None,  # Will be filled if comparison active
+    period_preset, compare_preset, period_info, comparisons, report = _pl_report_for_request(request, business)
+    has_comparison = bool(comparisons)
+
+    rows = []
+    for group in PL_GROUPS:
+        for row in report.rows_for(group):
+            rows.append({
+                "id": row.account_id,
+                "name": row.name,
+                "code": row.code,
+                "group": group,
+                "amount": float(row.amounts[0]),
+                "compare_amount": float(row.amounts[1]) if has_comparison else None,
+                "compare_amounts": [float(row.amounts[i]) for i in report.comparisons],
+            })
+
+    kpi = report.kpi()
+    if has_comparison:
+        kpi.update(report.change_pct(1))
+    else:
+        kpi.update({
+            "change_income_pct": None,
+            "change_cogs_pct": None,
+            "change_gross_profit_pct": None,
+            "change_expenses_pct": None,
+            "change_net_income_pct": None,
         })
 
-    for row in ledger_pl.get("expense", []):
-        account = row.get("account")
-        is_cogs = _is_cogs_account(account)
-        row_data = {
-            "id": row.get("account__id") or (account.id if account else 0),
-            "name": row.get("account__name") or (account.name if account else "Expense"),
-            "code": row.get("account__code") or (account.code if account else None),
-            "group": "COGS" if is_cogs else "EXPENSE",
-            "amount": float(row.get("amount") or Decimal("0")),
-            "compare_amount": None,
-        }
-        if is_cogs:
-            cogs_rows.append(row_data)
-        else:
-            expense_rows.append(row_data)
-
-    # Calculate totals
-    total_income = ledger_pl.get("total_income") or Decimal("0")
-    total_cogs = sum(Decimal(str(r["amount"])) for r in cogs_rows)
-    total_expenses = sum(Decimal(str(r["amount"])) for r in expense_rows)
-    gross_profit = total_income - total_cogs
-    net_income = gross_profit - total_expenses
-
-    # Calculate margins
-    gross_margin_pct = None
-    net_margin_pct = None
-    if total_income > Decimal("0"):
-        gross_margin_pct = float((gross_profit / total_income) * Decimal("100"))
-        net_margin_pct = float((net_income / total_income) * Decimal("100"))
-
-    # Initialize comparison values
-    compare_income = Decimal("0")
-    compare_cogs = Decimal("0")
-    compare_expenses = Decimal("0")
-    compare_gross_profit = Decimal("0")
-    compare_net_income = Decimal("0")
-    compare_label = None
-
-    # Get comparison data if active
-    if comparison_info.get("compare_start") and comparison_info.get("compare_end") and compare_preset != "none":
-        compare_label = comparison_info.get("compare_label")
-        comparison_pl = compute_ledger_pl(
-            business, comparison_info["compare_start"], comparison_info["compare_end"]
-        )
-
-        # Build lookup map for comparison amounts
-        compare_income_map = {
-            row.get("account__id"): row.get("amount") or Decimal("0")
-            for row in comparison_pl.get("income", [])
-        }
-        compare_expense_map = {}
-        for row in comparison_pl.get("expense", []):
-            account = row.get("account")
-            compare_expense_map[row.get("account__id")] = {
-                "amount": row.get("amount") or Decimal("0"),
-                "is_cogs": _is_cogs_account(account),
-            }
-
-        # Update income rows with comparison
-        for r in income_rows:
-            r["compare_amount"] = float(compare_income_map.get(r["id"]) or Decimal("0"))
-        compare_income = comparison_pl.get("total_income") or Decimal("0")
-
-        # Update COGS and expense rows
-        for r in cogs_rows:
-            comp_data = compare_expense_map.get(r["id"], {})
-            r["compare_amount"] = float(comp_data.get("amount") or Decimal("0"))
-        for r in expense_rows:
-            comp_data = compare_expense_map.get(r["id"], {})
-            r["compare_amount"] = float(comp_data.get("amount") or Decimal("0"))
-
-        # Calculate comparison totals
-        for acc_id, data in compare_expense_map.items():
-            if data.get("is_cogs"):
-                compare_cogs += data["amount"]
-            else:
-                compare_expenses += data["amount"]
-
-        compare_gross_profit = compare_income - compare_cogs
-        compare_net_income = compare_gross_profit - compare_expenses
-
-    # Calculate percentage changes
-    change_income_pct = _pct_change(total_income, compare_income) if compare_label else None
-    change_cogs_pct = _pct_change(total_cogs, compare_cogs) if compare_label else None
-    change_gross_profit_pct = _pct_change(gross_profit, compare_gross_profit) if compare_label else None
-    change_expenses_pct = _pct_change(total_expenses, compare_expenses) if compare_label else None
-    change_net_income_pct = _pct_change(net_income, compare_net_income) if compare_label else None
-
-    # Get diagnostics
     diagnostics = build_pl_diagnostics(business, period_info["start"], period_info["end"])
 
-    # Build response
     response = {
         "business_name": business.name,
         "currency": business.currency or "USD",
@@ -543,22 +419,19 @@ def pl_report_api(request):
         "period_start": period_info["start"].isoformat(),
         "period_end": period_info["end"].isoformat(),
         "compare_preset": compare_preset,
-        "compare_label": compare_label,
-        "kpi": {
-            "income": float(total_income),
-            "cogs": float(total_cogs),
-            "gross_profit": float(gross_profit),
-            "expenses": float(total_expenses),
-            "net_income": float(net_income),
-            "gross_margin_pct": gross_margin_pct,
-            "net_margin_pct": net_margin_pct,
-            "change_income_pct": change_income_pct,
-            "change_cogs_pct": change_cogs_pct,
-            "change_gross_profit_pct": change_gross_profit_pct,
-            "change_expenses_pct": change_expenses_pct,
-            "change_net_income_pct": change_net_income_pct,
-        },
-        "rows": income_rows + cogs_rows + expense_rows,
+        "compare_label": comparisons[0]["compare_label"] if has_comparison else None,
+        "kpi": kpi,
+        "comparisons": [
+            {
+                "preset": info["compare_to"],
+                "label": info["compare_label"],
+                "start": info["compare_start"].isoformat(),
+                "end": info["compare_end"].isoformat(),
+                "kpi": {**report.kpi(column), **report.change_pct(column)},
+            }
+            for column, info in zip(report.comparisons, comparisons)
+        ],
+        "rows": rows,
         "diagnostics": {
             "has_activity": diagnostics.get("has_activity", False),
             "reasons": diagnostics.get("reasons", []) if diagnostics.get("reason_message") else [],
@@ -566,3 +439,20 @@ def pl_report_api(request):
     }
 
     return JsonResponse(response)
+
+
+@login_required
+def pl_export_csv(request):
+    """CSV export of the P&L report: one column per period plus variance columns."""
+    business = get_current_business(request.user)
+    if business is None:
+        return redirect("business_setup")
+
+    _, _, period_info, _, report = _pl_report_for_request(request, business)
+
+    output = io.StringIO()
+    report.write_csv(output)
+    response = HttpResponse(output.getvalue(), content_type="text/csv")
+    filename = f"profit_loss_{slugify(business.name) or business.pk}_{period_info['start']:%Y%m%d}_{period_info['end']:%Y%m%d}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -11,6 +11,7 @@ from django.views.decorators.http import require_GET, require_http_methods
 
 from .models import RoleDefinition, WorkspaceMembership, UserPermissionOverride
 from .permissions import has_permission
+from .permissions_engine import permissions_changed
 from .sod import validate_role_permissions
 from .utils import get_current_business
 
@@ -162,6 +163,7 @@ def api_role_resource(request, role_id: int):
 
         if updates:
             RoleDefinition.objects.filter(id=role.id).update(**updates)
+            permissions_changed(business.id)
             role.refresh_from_db()
 
         return JsonResponse(
@@ -281,6 +283,7 @@ def api_settings_user_membership_update(request, user_id: int):
 
     if updates:
         WorkspaceMembership.objects.filter(id=membership.id).update(**updates)
+        permissions_changed(business.id)
         membership.refresh_from_db()
 
     if "overrides" in payload:
@@ -8,7 +8,7 @@ from django.core.cache import cache
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Sum
+from django.db.models import Count, Q, Sum
 
 from .utils import get_current_business
 from .models import BankAccount
@@ -150,15 +150,6 @@ def _business_label(business) -> str:
     return str(business.id)
 
 
-def _resolve_linked_object(anomaly: TaxAnomaly):
-    if not anomaly.linked_transaction_ct or not anomaly.linked_transaction_id:
-        return None
-    try:
-        return anomaly.linked_transaction_ct.get_object_for_this_type(pk=anomaly.linked_transaction_id)
-    except Exception:
-        return None
-
-
 def _friendly_linked_label(anomaly: TaxAnomaly) -> str | None:
     ct = anomaly.linked_transaction_ct
     if not ct:
@@ -172,9 +163,63 @@ def _friendly_linked_label(anomaly: TaxAnomaly) -> str | None:
     return model_name
 
 
-def _anomaly_context(anomaly: TaxAnomaly, business) -> dict:
-    detail = None
-    jurisdiction_code = None
+def _anomaly_key(anomaly: TaxAnomaly) -> tuple | None:
+    if not anomaly.linked_transaction_ct_id or not anomaly.linked_transaction_id:
+        return None
+    return (anomaly.linked_transaction_ct_id, anomaly.linked_transaction_id)
+
+
+def _prefetch_anomaly_contexts(anomalies, business) -> dict:
+    """
+    Load the tax details and linked objects for a batch of anomalies up front:
+    one TransactionLineTaxDetail query plus one `in_bulk` per linked model,
+    instead of two or three queries per anomaly.
+    """
+    keys = {key for key in (_anomaly_key(a) for a in anomalies) if key}
+    details: dict[tuple, list] = {}
+    linked: dict[tuple, object] = {}
+    if not keys:
+        return {"details": details, "linked": linked}
+
+    ids_by_ct: dict[int, set] = {}
+    for ct_id, object_id in keys:
+        ids_by_ct.setdefault(ct_id, set()).add(object_id)
+
+    rows = (
+        TransactionLineTaxDetail.objects.filter(
+            business=business,
+            transaction_line_content_type_id__in=list(ids_by_ct),
+            transaction_line_object_id__in={object_id for _, object_id in keys},
+        )
+        .select_related("tax_component")
+        .order_by("-transaction_date")
+    )
+    for row in rows:
+        key = (row.transaction_line_content_type_id, row.transaction_line_object_id)
+        if key in keys:
+            details.setdefault(key, []).append(row)
+
+    for ct_id, object_ids in ids_by_ct.items():
+        try:
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            if model is None:
+                continue
+            for pk, obj in model._base_manager.in_bulk(list(object_ids)).items():
+                linked[(ct_id, pk)] = obj
+        except Exception:
+            continue
+    return {"details": details, "linked": linked}
+
+
+def _anomaly_context(anomaly: TaxAnomaly, business, prefetched: dict | None = None) -> dict:
+    if prefetched is None:
+        prefetched = _prefetch_anomaly_contexts([anomaly], business)
+    key = _anomaly_key(anomaly)
+    details = prefetched["details"].get(key, []) if key else []
+    linked_obj = prefetched["linked"].get(key) if key else None
+
+    detail = details[0] if details else None
+    jurisdiction_code = detail.jurisdiction_code if detail and detail.jurisdiction_code else None
     expected_tax = None
     actual_tax = None
     difference = None
@@ -182,20 +227,6 @@ def _anomaly_context(anomaly: TaxAnomaly, business) -> dict:
     document_type = None
     document_id = None
 
-    if anomaly.linked_transaction_ct and anomaly.linked_transaction_id:
-        detail = (
-            TransactionLineTaxDetail.objects.filter(
-                business=business,
-                transaction_line_content_type=anomaly.linked_transaction_ct,
-                transaction_line_object_id=anomaly.linked_transaction_id,
-            )
-            .order_by("-transaction_date")
-            .first()
-        )
-        if detail and detail.jurisdiction_code:
-            jurisdiction_code = detail.jurisdiction_code
-
-    linked_obj = _resolve_linked_object(anomaly)
     if linked_obj:
         # Attempt to derive parent document id for ledger navigation
         if hasattr(linked_obj, "invoice_id"):
@@ -221,21 +252,11 @@ def _anomaly_context(anomaly: TaxAnomaly, business) -> dict:
         expected_tax = (base * Decimal(rate)).quantize(Decimal("0.01"))
         difference = (expected_tax - actual_tax).copy_abs()
 
-    if anomaly.code == "T4_ROUNDING_ANOMALY" and anomaly.linked_transaction_ct and anomaly.linked_transaction_id:
+    if anomaly.code == "T4_ROUNDING_ANOMALY" and key:
         doc_total = None
         if linked_obj:
             doc_total = getattr(linked_obj, "tax_total", None) or getattr(linked_obj, "tax_amount", None)
-        detail_sum = sum(
-            (
-                d.tax_amount_txn_currency or Decimal("0.00")
-                for d in TransactionLineTaxDetail.objects.filter(
-                    business=business,
-                    transaction_line_content_type=anomaly.linked_transaction_ct,
-                    transaction_line_object_id=anomaly.linked_transaction_id,
-                )
-            ),
-            Decimal("0.00"),
-        )
+        detail_sum = sum((d.tax_amount_txn_currency or Decimal("0.00") for d in details), Decimal("0.00"))
         if doc_total is not None:
             expected_tax = Decimal(str(doc_total))
             actual_tax = detail_sum
@@ -257,7 +278,7 @@ def _anomaly_context(anomaly: TaxAnomaly, business) -> dict:
     return ctx
 
 
-def _serialize_anomaly(anomaly: TaxAnomaly, business=None) -> dict:
+def _serialize_anomaly(anomaly: TaxAnomaly, business=None, prefetched: dict | None = None) -> dict:
     base = {
         "id": str(anomaly.id),
         "code": anomaly.code,
@@ -271,7 +292,7 @@ def _serialize_anomaly(anomaly: TaxAnomaly, business=None) -> dict:
         "linked_id": anomaly.linked_transaction_id,
     }
     if business:
-        base.update(_anomaly_context(anomaly, business))
+        base.update(_anomaly_context(anomaly, business, prefetched))
     return base
 
 
@@ -288,6 +309,56 @@ def _due_metadata(business, period_key: str, status: str) -> dict:
     }
 
 
+def _anomaly_counts_by_period(business, period_keys=None) -> dict[str, dict]:
+    """
+    Severity counts and open-HIGH blocker flag per period, from one grouped query.
+
+    Returns {period_key: {"anomaly_counts": {...}, "has_high_severity_blockers": bool}}.
+    """
+    qs = TaxAnomaly.objects.filter(business=business)
+    if period_keys is not None:
+        qs = qs.filter(period_key__in=list(period_keys))
+    rows = qs.values("period_key", "severity").annotate(
+        total=Count("id"),
+        open_total=Count("id", filter=Q(status=TaxAnomaly.AnomalyStatus.OPEN)),
+    )
+    result: dict[str, dict] = {}
+    for row in rows:
+        entry = result.setdefault(
+            row["period_key"],
+            {"anomaly_counts": {"low": 0, "medium": 0, "high": 0}, "has_high_severity_blockers": False},
+        )
+        if row["severity"] in entry["anomaly_counts"]:
+            entry["anomaly_counts"][row["severity"]] = row["total"]
+        if row["severity"] == TaxAnomaly.AnomalySeverity.HIGH and row["open_total"]:
+            entry["has_high_severity_blockers"] = True
+    return result
+
+
+def _empty_anomaly_counts() -> dict:
+    return {"anomaly_counts": {"low": 0, "medium": 0, "high": 0}, "has_high_severity_blockers": False}
+
+
+def _enqueue_snapshot_refresh(business, period_key: str):
+    """Queue a background snapshot/anomaly refresh unless one is already pending."""
+    from .jobs import TAX_PERIOD_REFRESH_JOB, enqueue_job
+    from .models import BackgroundJob
+
+    pending = (
+        BackgroundJob.objects.filter(
+            kind=TAX_PERIOD_REFRESH_JOB,
+            business=business,
+            payload__period_key=period_key,
+            status__in=[BackgroundJob.Status.QUEUED, BackgroundJob.Status.RUNNING],
+        )
+        .order_by("id")
+        .first()
+    )
+    if pending:
+        return pending
+    return enqueue_job(TAX_PERIOD_REFRESH_JOB, {"period_key": period_key}, business=business)
+
+
 @login_required
 def api_tax_periods(request):
     """GET /api/tax/periods/ - Returns all tax periods with payment breakdown."""
@@ -305,6 +376,8 @@ def api_tax_periods(request):
     for payment in TaxPayment.objects.filter(business=business).select_related("bank_account"):
         payments_by_period.setdefault(payment.period_key, []).append(payment)
     
+    counts_by_period = _anomaly_counts_by_period(business)
+
     periods = []
     for snap in snapshots:
         summary = snap.summary_by_jurisdiction or {}
@@ -315,7 +388,6 @@ def api_tax_periods(request):
         ref_total = Decimal(str(breakdown["payments_refund_total"]))
         status_info = _compute_payment_status_v2(net_tax, pmt_total, ref_total)
         
-        anomalies = TaxAnomaly.objects.filter(business=business, period_key=snap.period_key)
         due = _due_metadata(business, snap.period_key, snap.status)
         periods.append(
             {
@@ -331,11 +403,7 @@ def api_tax_periods(request):
                 "remaining_balance": status_info["balance"],
                 "balance": status_info["balance"],
                 "payment_status": status_info["status"],
-                "anomaly_counts": {
-                    "low": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.LOW).count(),
-                    "medium": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.MEDIUM).count(),
-                    "high": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.HIGH).count(),
-                },
+                "anomaly_counts": counts_by_period.get(snap.period_key, _empty_anomaly_counts())["anomaly_counts"],
                 **due,
             }
         )
@@ -353,21 +421,18 @@ def api_tax_period_detail(request, period_key: str):
 
     snapshot = TaxPeriodSnapshot.objects.filter(business=business, period_key=period_key).first()
     if not snapshot:
+        # Computing a snapshot scans the whole period; do it in a worker and let
+        # the client poll until the snapshot exists.
         try:
-            snapshot = compute_tax_period_snapshot(business, period_key)
+            job = _enqueue_snapshot_refresh(business, period_key)
         except Exception as exc:
-            logger.warning("Failed to compute snapshot for %s %s: %s", business.id, period_key, exc)
+            logger.warning("Failed to queue snapshot refresh for %s %s: %s", business.id, period_key, exc)
             return JsonResponse({"error": "Unable to compute snapshot"}, status=500)
+        return JsonResponse({"period_key": period_key, "status": "PENDING", "job_id": job.pk}, status=202)
 
-    anomalies = TaxAnomaly.objects.filter(business=business, period_key=period_key)
-    anomaly_counts = {
-        "low": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.LOW).count(),
-        "medium": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.MEDIUM).count(),
-        "high": anomalies.filter(severity=TaxAnomaly.AnomalySeverity.HIGH).count(),
-    }
-    has_blockers = anomalies.filter(
-        severity=TaxAnomaly.AnomalySeverity.HIGH, status=TaxAnomaly.AnomalyStatus.OPEN
-    ).exists()
+    counts = _anomaly_counts_by_period(business, [period_key]).get(period_key, _empty_anomaly_counts())
+    anomaly_counts = counts["anomaly_counts"]
+    has_blockers = counts["has_high_severity_blockers"]
 
     summary = snapshot.summary_by_jurisdiction or {}
     net_tax = _net_tax_from_summary(summary)
@@ -430,7 +495,9 @@ def api_tax_period_anomalies(request, period_key: str):
     if status:
         anomalies = anomalies.filter(status=status)
 
-    data = [_serialize_anomaly(a, business) for a in anomalies.order_by("-created_at")[:200]]
+    anomalies = list(anomalies.select_related("linked_transaction_ct").order_by("-created_at")[:200])
+    prefetched = _prefetch_anomaly_contexts(anomalies, business)
+    data = [_serialize_anomaly(a, business, prefetched) for a in anomalies]
     return JsonResponse({"anomalies": data})
 
 
@@ -1041,7 +1108,12 @@ def api_tax_anomalies_export_csv(request, period_key: str):
     if not snapshot:
         return JsonResponse({"error": "Snapshot not found for this period"}, status=404)
 
-    anomalies = TaxAnomaly.objects.filter(business=business, period_key=period_key).order_by("-created_at")
+    anomalies = list(
+        TaxAnomaly.objects.filter(business=business, period_key=period_key)
+        .select_related("linked_transaction_ct")
+        .order_by("-created_at")
+    )
+    prefetched = _prefetch_anomaly_contexts(anomalies, business)
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(
@@ -1060,7 +1132,7 @@ def api_tax_anomalies_export_csv(request, period_key: str):
         ]
     )
     for anomaly in anomalies:
-        ctx = _anomaly_context(anomaly, business)
+        ctx = _anomaly_context(anomaly, business, prefetched)
         writer.writerow(
             [
                 anomaly.period_key,
@@ -2,18 +2,21 @@ import csv
 import io
 import json
 import logging
-from dataclasses import dataclass
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.db.models import Q
 from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
 from core.utils import get_current_business
 from core.models import Business
+from taxes.jurisdiction_catalog import jurisdictions_changed
 from taxes.models import TaxComponent, TaxJurisdiction, TaxProductRule, TaxRate
 
 logger = logging.getLogger(__name__)
@@ -46,6 +49,26 @@ def _boolish(value: Any) -> bool:
     return s in ("1", "true", "t", "yes", "y", "on")
 
 
+IMPORT_QUERY_CHUNK_SIZE = 500
+IMPORT_WRITE_BATCH_SIZE = 500
+
+
+def _open_csv_text(uploaded_file):
+    """
+    Wrap the upload in a text reader without materialising it.
+
+    Large uploads are spooled to a temp file by Django; decoding through a
+    TextIOWrapper lets csv read them line by line instead of holding the bytes
+    and the decoded text in memory at the same time.
+    """
+    binary = getattr(uploaded_file, "file", uploaded_file)
+    try:
+        binary.seek(0)
+    except Exception:
+        pass
+    return io.TextIOWrapper(binary, encoding="utf-8", errors="replace", newline="")
+
+
 def _parse_payload_rows(uploaded_file) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]], Optional[str]]:
     """
     Return (format, rows, error). format is "csv" or "json".
@@ -55,7 +78,6 @@ def _parse_payload_rows(uploaded_file) -> Tuple[Optional[str], Optional[List[Dic
 
     name = (getattr(uploaded_file, "name", "") or "").lower()
     content_type = (getattr(uploaded_file, "content_type", "") or "").lower()
-    raw = uploaded_file.read()
 
     is_json = name.endswith(".json") or "json" in content_type
     is_csv = name.endswith(".csv") or "csv" in content_type
@@ -66,7 +88,7 @@ def _parse_payload_rows(uploaded_file) -> Tuple[Optional[str], Optional[List[Dic
 
     try:
         if is_json:
-            data = json.loads(raw.decode("utf-8"))
+            data = json.loads(uploaded_file.read().decode("utf-8"))
             if isinstance(data, dict) and isinstance(data.get("rows"), list):
                 data = data["rows"]
             if not isinstance(data, list):
@@ -78,44 +100,84 @@ def _parse_payload_rows(uploaded_file) -> Tuple[Optional[str], Optional[List[Dic
                 rows.append(item)
             return "json", rows, None
 
-        text = raw.decode("utf-8", errors="replace")
-        reader = csv.DictReader(io.StringIO(text))
-        if reader.fieldnames is None:
-            return "csv", None, "CSV missing header row."
-        return "csv", list(reader), None
+        text = _open_csv_text(uploaded_file)
+        try:
+            reader = csv.DictReader(text)
+            if reader.fieldnames is None:
+                return "csv", None, "CSV missing header row."
+            return "csv", list(reader), None
+        finally:
+            # Leave the underlying upload open; Django closes it with the request.
+            text.detach()
     except Exception as exc:
         logger.exception("Failed to parse import file: %s", exc)
         return None, None, "Failed to parse file. Please check the format and try again."
 
 
-def _ranges_overlap(a_from, a_to, b_from, b_to) -> bool:
-    if a_to is not None and a_to < b_from:
-        return False
-    if b_to is not None and b_to < a_from:
-        return False
-    return True
+def _chunked(values, size: int = IMPORT_QUERY_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
 
 
-def _check_rate_overlap(*, component: TaxComponent, product_category: str, effective_from, effective_to, exclude_id=None) -> bool:
-    qs = TaxRate.objects.filter(component=component, product_category=product_category)
-    if exclude_id is not None:
-        qs = qs.exclude(id=exclude_id)
-    qs = qs.filter(Q(effective_to__isnull=True) | Q(effective_to__gte=effective_from))
-    if effective_to is not None:
-        qs = qs.filter(effective_from__lte=effective_to)
-    return qs.exists()
+def _parse_uuid(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
 
+def _load_jurisdictions_by_code(codes) -> Dict[str, TaxJurisdiction]:
+    found: Dict[str, TaxJurisdiction] = {}
+    for chunk in _chunked(sorted({c for c in codes if c})):
+        for jurisdiction in TaxJurisdiction.objects.select_related("parent").filter(code__in=chunk):
+            found[jurisdiction.code] = jurisdiction
+    return found
 
-def _check_product_rule_overlap(
-    *, jurisdiction: TaxJurisdiction, product_code: str, valid_from, valid_to, exclude_id=None
-) -> bool:
-    qs = TaxProductRule.objects.filter(jurisdiction=jurisdiction, product_code=product_code)
-    if exclude_id is not None:
-        qs = qs.exclude(id=exclude_id)
-    for existing in qs.only("valid_from", "valid_to"):
-        if _ranges_overlap(valid_from, valid_to, existing.valid_from, existing.valid_to):
-            return True
-    return False
+
+def _load_by_ids(qs, ids) -> Dict[str, Any]:
+    found: Dict[str, Any] = {}
+    parsed = [u for u in (_parse_uuid(i) for i in set(ids) if i) if u is not None]
+    for chunk in _chunked(parsed):
+        for obj in qs.filter(id__in=chunk):
+            found[str(obj.id)] = obj
+    return found
+
+
+def _sweep_overlaps(intervals) -> set:
+    """
+    Return the keys of every interval that overlaps another one.
+
+    `intervals` is an iterable of (start, end, key) with end=None meaning open-ended
+    and inclusive bounds (same semantics as the single-row overlap checks). After
+    sorting by start, an interval overlaps something earlier iff it starts on or
+    before the furthest end seen so far; that furthest-reaching interval is then
+    the one it collides with.
+    """
+    flagged = set()
+    reach_key = None
+    reach_end = None
+    seen_any = False
+    for start, end, key in sorted(intervals, key=lambda iv: iv[0]):
+        if seen_any and (reach_end is None or start <= reach_end):
+            flagged.add(key)
+            flagged.add(reach_key)
+        if not seen_any or (reach_end is not None and (end is None or end > reach_end)):
+            reach_key, reach_end = key, end
+        seen_any = True
+    return flagged
+
+
+def _incoming_overlaps(existing_by_group: Dict[Any, list], incoming_by_group: Dict[Any, list]) -> set:
+    """Row indexes of incoming intervals that overlap an existing row or another incoming row."""
+    flagged_rows = set()
+    for group_key, incoming in incoming_by_group.items():
+        intervals = [(start, end, ("row", idx)) for start, end, idx in incoming]
+        intervals.extend((start, end, ("existing", pk)) for start, end, pk in existing_by_group.get(group_key, []))
+        for kind, ref in _sweep_overlaps(intervals):
+            if kind == "row":
+                flagged_rows.add(ref)
+    return flagged_rows
 
 
 @dataclass
@@ -127,6 +189,8 @@ class PreviewRow:
     would_create: bool
     would_update: bool
     target_id: Optional[str]
+    # Parsed values and resolved objects, reused by _apply_* so apply never re-queries per row.
+    resolved: Dict[str, Any] = field(default_factory=dict, repr=False)
 
     def as_dict(self):
         return {
@@ -153,6 +217,11 @@ def _summary(preview_rows: List[PreviewRow]) -> dict:
 
 
 def _preview_jurisdictions(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
+    known = _load_jurisdictions_by_code(
+        [str(raw.get("code") or "").strip().upper() for raw in rows]
+        + [str(raw.get("parent_code") or "").strip().upper() for raw in rows]
+    )
+
     results: List[PreviewRow] = []
     for idx, raw in enumerate(rows):
         messages: List[str] = []
@@ -184,12 +253,13 @@ def _preview_jurisdictions(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
             status = "error"
             messages.append("country_code is required.")
 
-        existing = TaxJurisdiction.objects.select_related("parent").filter(code=code).first() if code else None
+        existing = known.get(code) if code else None
         would_create = existing is None
         would_update = existing is not None
         target_id = str(existing.id) if existing else None
 
-        if parent_code and not TaxJurisdiction.objects.filter(code=parent_code).exists():
+        parent = known.get(parent_code) if parent_code else None
+        if parent_code and parent is None:
             status = "error"
             messages.append(f"parent_code '{parent_code}' not found.")
 
@@ -261,21 +331,55 @@ def _preview_jurisdictions(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
                 would_create=would_create,
                 would_update=would_update,
                 target_id=target_id,
+                resolved={
+                    "code": code,
+                    "name": name,
+                    "jurisdiction_type": jurisdiction_type,
+                    "country_code": country_code,
+                    "region_code": region_code,
+                    "sourcing_rule": sourcing_rule,
+                    "is_active": is_active,
+                    "existing": existing,
+                    "parent": parent,
+                },
             )
         )
     return results
 
 
 def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
+    parsed_rows = []
+    for raw in rows:
+        parsed_rows.append(
+            {
+                "provided_id": str(raw.get("id") or "").strip(),
+                "jurisdiction_code": str(raw.get("jurisdiction_code") or "").strip().upper(),
+                "tax_name": str(raw.get("tax_name") or "").strip(),
+                "product_category": str(raw.get("product_category") or TaxRate.ProductCategory.STANDARD).strip().upper(),
+            }
+        )
+
+    # Load every reference the file can touch up front: a handful of queries
+    # regardless of row count.
+    jurisdictions = _load_jurisdictions_by_code(p["jurisdiction_code"] for p in parsed_rows)
+    components = {
+        c.name: c for c in TaxComponent.objects.filter(business=business).select_related("jurisdiction")
+    }
+    targets = _load_by_ids(
+        TaxRate.objects.filter(component__business=business).select_related("component"),
+        (p["provided_id"] for p in parsed_rows),
+    )
+
     results: List[PreviewRow] = []
+    incoming_by_group: Dict[Tuple[Any, str], list] = defaultdict(list)
     for idx, raw in enumerate(rows):
         messages: List[str] = []
         status = "ok"
 
-        provided_id = str(raw.get("id") or "").strip()
-        jurisdiction_code = str(raw.get("jurisdiction_code") or "").strip().upper()
-        tax_name = str(raw.get("tax_name") or "").strip()
-        product_category = str(raw.get("product_category") or TaxRate.ProductCategory.STANDARD).strip().upper()
+        provided_id = parsed_rows[idx]["provided_id"]
+        jurisdiction_code = parsed_rows[idx]["jurisdiction_code"]
+        tax_name = parsed_rows[idx]["tax_name"]
+        product_category = parsed_rows[idx]["product_category"]
         is_compound = raw.get("is_compound", False)
         meta_data_raw = raw.get("meta_data")
 
@@ -306,7 +410,7 @@ def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
         if not jurisdiction_code:
             status = "error"
             messages.append("jurisdiction_code is required.")
-        jurisdiction = TaxJurisdiction.objects.filter(code=jurisdiction_code).first() if jurisdiction_code else None
+        jurisdiction = jurisdictions.get(jurisdiction_code) if jurisdiction_code else None
         if jurisdiction_code and not jurisdiction:
             status = "error"
             messages.append("Unknown jurisdiction_code.")
@@ -314,11 +418,7 @@ def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
         if not tax_name:
             status = "error"
             messages.append("tax_name is required (must match an existing TaxComponent.name).")
-        component = (
-            TaxComponent.objects.filter(business=business, name=tax_name).select_related("jurisdiction").first()
-            if tax_name
-            else None
-        )
+        component = components.get(tax_name) if tax_name else None
         if tax_name and not component:
             status = "error"
             messages.append("Tax component not found for this business.")
@@ -331,22 +431,25 @@ def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
             status = "error"
             messages.append("Invalid product_category.")
 
+        meta_data = {}
         if meta_data_raw not in (None, ""):
             if isinstance(meta_data_raw, dict):
-                pass
+                meta_data = meta_data_raw
             else:
                 try:
                     parsed = json.loads(str(meta_data_raw))
                     if not isinstance(parsed, dict):
                         status = "error"
                         messages.append("meta_data must be a JSON object.")
+                    else:
+                        meta_data = parsed
                 except Exception:
                     status = "error"
                     messages.append("meta_data must be valid JSON.")
 
         target_rate = None
         if provided_id:
-            target_rate = TaxRate.objects.filter(id=provided_id, component__business=business).select_related("component").first()
+            target_rate = targets.get(provided_id)
             if not target_rate:
                 status = "error"
                 messages.append("Rate id not found for this business.")
@@ -356,21 +459,7 @@ def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
         target_id = str(target_rate.id) if target_rate else None
 
         if status != "error" and component and effective_from:
-            overlap = _check_rate_overlap(
-                component=component,
-                product_category=product_category,
-                effective_from=effective_from,
-                effective_to=effective_to,
-                exclude_id=target_rate.id if target_rate else None,
-            )
-            if overlap:
-                status = "error"
-                messages.append("Overlapping rate ranges for this jurisdiction/tax_name/product_category.")
-
-        if would_update:
-            messages.append("Would update existing rate row (by id).")
-        else:
-            messages.append("Would create a new rate row.")
+            incoming_by_group[(component.id, product_category)].append((effective_from, effective_to, idx))
 
         results.append(
             PreviewRow(
@@ -381,13 +470,53 @@ def _preview_rates(*, business, rows: List[Dict[str, Any]]) -> List[PreviewRow]:
                 would_create=would_create,
                 would_update=would_update,
                 target_id=target_id,
+                resolved={
+                    "rate_decimal": rate_decimal,
+                    "effective_from": effective_from,
+                    "effective_to": effective_to,
+                    "product_category": product_category,
+                    "is_compound": _boolish(is_compound),
+                    "meta_data": meta_data,
+                    "jurisdiction": jurisdiction,
+                    "component": component,
+                    "target": target_rate,
+                },
             )
         )
+
+    # Rows updated by id replace their old interval, so drop those from the existing set.
+    replaced_ids = {r.resolved["target"].id for r in results if r.resolved["target"] is not None}
+    existing_by_group: Dict[Tuple[Any, str], list] = defaultdict(list)
+    component_ids = sorted({group[0] for group in incoming_by_group})
+    for chunk in _chunked(component_ids):
+        existing = TaxRate.objects.filter(component_id__in=chunk).values_list(
+            "id", "component_id", "product_category", "effective_from", "effective_to"
+        )
+        for pk, component_id, category, start, end in existing:
+            if pk not in replaced_ids:
+                existing_by_group[(component_id, category)].append((start, end, pk))
+
+    overlapping = _incoming_overlaps(existing_by_group, incoming_by_group)
+    for pr in results:
+        if pr.index in overlapping:
+            pr.status = "error"
+            pr.messages.append("Overlapping rate ranges for this jurisdiction/tax_name/product_category.")
+        if pr.would_update:
+            pr.messages.append("Would update existing rate row (by id).")
+        else:
+            pr.messages.append("Would create a new rate row.")
     return results
 
 
 def _preview_product_rules(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
+    jurisdictions = _load_jurisdictions_by_code(str(raw.get("jurisdiction_code") or "").strip().upper() for raw in rows)
+    targets = _load_by_ids(
+        TaxProductRule.objects.select_related("jurisdiction"),
+        (str(raw.get("id") or "").strip() for raw in rows),
+    )
+
     results: List[PreviewRow] = []
+    incoming_by_group: Dict[Tuple[Any, str], list] = defaultdict(list)
     for idx, raw in enumerate(rows):
         messages: List[str] = []
         status = "ok"
@@ -418,7 +547,7 @@ def _preview_product_rules(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
         if not jurisdiction_code:
             status = "error"
             messages.append("jurisdiction_code is required.")
-        jurisdiction = TaxJurisdiction.objects.filter(code=jurisdiction_code).first() if jurisdiction_code else None
+        jurisdiction = jurisdictions.get(jurisdiction_code) if jurisdiction_code else None
         if jurisdiction_code and not jurisdiction:
             status = "error"
             messages.append("Unknown jurisdiction_code.")
@@ -443,7 +572,7 @@ def _preview_product_rules(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
 
         target_rule = None
         if provided_id:
-            target_rule = TaxProductRule.objects.filter(id=provided_id).select_related("jurisdiction").first()
+            target_rule = targets.get(provided_id)
             if not target_rule:
                 status = "error"
                 messages.append("Rule id not found.")
@@ -453,21 +582,7 @@ def _preview_product_rules(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
         target_id = str(target_rule.id) if target_rule else None
 
         if status != "error" and jurisdiction and valid_from:
-            overlap = _check_product_rule_overlap(
-                jurisdiction=jurisdiction,
-                product_code=product_code,
-                valid_from=valid_from,
-                valid_to=valid_to,
-                exclude_id=target_rule.id if target_rule else None,
-            )
-            if overlap:
-                status = "error"
-                messages.append("Overlapping rule ranges for this jurisdiction/product_code.")
-
-        if would_update:
-            messages.append("Would update existing product rule row (by id).")
-        else:
-            messages.append("Would create a new product rule row.")
+            incoming_by_group[(jurisdiction.id, product_code)].append((valid_from, valid_to, idx))
 
         results.append(
             PreviewRow(
@@ -478,8 +593,39 @@ def _preview_product_rules(rows: List[Dict[str, Any]]) -> List[PreviewRow]:
                 would_create=would_create,
                 would_update=would_update,
                 target_id=target_id,
+                resolved={
+                    "product_code": product_code,
+                    "rule_type": rule_type,
+                    "special_rate": special_rate,
+                    "valid_from": valid_from,
+                    "valid_to": valid_to,
+                    "notes": notes,
+                    "jurisdiction": jurisdiction,
+                    "target": target_rule,
+                },
             )
         )
+
+    replaced_ids = {r.resolved["target"].id for r in results if r.resolved["target"] is not None}
+    existing_by_group: Dict[Tuple[Any, str], list] = defaultdict(list)
+    jurisdiction_ids = sorted({group[0] for group in incoming_by_group})
+    for chunk in _chunked(jurisdiction_ids):
+        existing = TaxProductRule.objects.filter(jurisdiction_id__in=chunk).values_list(
+            "id", "jurisdiction_id", "product_code", "valid_from", "valid_to"
+        )
+        for pk, jurisdiction_id, product_code, start, end in existing:
+            if pk not in replaced_ids:
+                existing_by_group[(jurisdiction_id, product_code)].append((start, end, pk))
+
+    overlapping = _incoming_overlaps(existing_by_group, incoming_by_group)
+    for pr in results:
+        if pr.index in overlapping:
+            pr.status = "error"
+            pr.messages.append("Overlapping rule ranges for this jurisdiction/product_code.")
+        if pr.would_update:
+            pr.messages.append("Would update existing product rule row (by id).")
+        else:
+            pr.messages.append("Would create a new product rule row.")
     return results
 
 
@@ -498,168 +644,163 @@ def _preview(import_type: str, *, business, rows: List[Dict[str, Any]]) -> List[
 def _apply_jurisdictions(preview_rows: List[PreviewRow]) -> Tuple[int, int, int, List[str]]:
     created = updated = skipped = 0
     warnings: List[str] = []
+    to_create: Dict[str, TaxJurisdiction] = {}
+    to_update: Dict[Any, TaxJurisdiction] = {}
     for pr in preview_rows:
-        raw = pr.raw
-        code = str(raw.get("code") or "").strip().upper()
-        name = str(raw.get("name") or "").strip()
-        jurisdiction_type = str(raw.get("jurisdiction_type") or "").strip().upper()
-        country_code = str(raw.get("country_code") or "").strip().upper()
-        region_code = str(raw.get("region_code") or "").strip().upper()
-        sourcing_rule = str(raw.get("sourcing_rule") or "").strip().upper()
-        parent_code = str(raw.get("parent_code") or "").strip().upper()
-        is_active = raw.get("is_active")
-        if is_active in (None, ""):
-            is_active = True
-        else:
-            is_active = _boolish(is_active)
-
-        existing = TaxJurisdiction.objects.select_related("parent").filter(code=code).first()
+        values = pr.resolved
+        code = values["code"]
+        name = values["name"]
+        sourcing_rule = values["sourcing_rule"]
+        is_active = values["is_active"]
+
+        # A code repeated in the file updates the row queued by its first occurrence.
+        existing = values["existing"] or to_create.get(code)
         if existing:
             is_custom = bool((existing.metadata or {}).get("is_custom"))
-            update_fields = []
+            changed = False
             if name and name != existing.name:
                 existing.name = name
-                update_fields.append("name")
+                changed = True
             if is_active != existing.is_active:
                 existing.is_active = is_active
-                update_fields.append("is_active")
+                changed = True
             if is_custom and sourcing_rule and sourcing_rule in TaxJurisdiction.SourcingRule.values and sourcing_rule != existing.sourcing_rule:
                 existing.sourcing_rule = sourcing_rule
-                update_fields.append("sourcing_rule")
-            if update_fields:
-                existing.save(update_fields=update_fields)
+                changed = True
+            if changed:
+                if existing.pk and code not in to_create:
+                    to_update[existing.pk] = existing
                 updated += 1
             else:
                 skipped += 1
             continue
 
-        parent = TaxJurisdiction.objects.filter(code=parent_code).first() if parent_code else None
         metadata = {"is_custom": True, "created_via": "import"}
         if sourcing_rule and sourcing_rule not in TaxJurisdiction.SourcingRule.values:
             sourcing_rule = TaxJurisdiction.SourcingRule.DESTINATION
-        TaxJurisdiction.objects.create(
+        to_create[code] = TaxJurisdiction(
             code=code,
             name=name,
-            jurisdiction_type=jurisdiction_type,
-            country_code=country_code,
-            region_code=region_code,
+            jurisdiction_type=values["jurisdiction_type"],
+            country_code=values["country_code"],
+            region_code=values["region_code"],
             sourcing_rule=sourcing_rule or TaxJurisdiction.SourcingRule.DESTINATION,
-            parent=parent,
+            parent=values["parent"],
             is_active=is_active,
             metadata=metadata,
         )
         created += 1
+
+    if to_update:
+        TaxJurisdiction.objects.bulk_update(
+            list(to_update.values()), ["name", "is_active", "sourcing_rule"], batch_size=IMPORT_WRITE_BATCH_SIZE
+        )
+    if to_create:
+        TaxJurisdiction.objects.bulk_create(list(to_create.values()), batch_size=IMPORT_WRITE_BATCH_SIZE)
+    if to_update or to_create:
+        # bulk_update/bulk_create skip the TaxJurisdiction signals.
+        jurisdictions_changed()
     return created, updated, skipped, warnings
 
 
 def _apply_rates(preview_rows: List[PreviewRow], *, business) -> Tuple[int, int, int, List[str]]:
     created = updated = skipped = 0
     warnings: List[str] = []
+    now = timezone.now()
+    enriched: Dict[Any, TaxComponent] = {}
+    to_update: Dict[Any, TaxRate] = {}
+    to_create: List[TaxRate] = []
     for pr in preview_rows:
-        raw = pr.raw
-        provided_id = str(raw.get("id") or "").strip()
-        jurisdiction_code = str(raw.get("jurisdiction_code") or "").strip().upper()
-        tax_name = str(raw.get("tax_name") or "").strip()
-        product_category = str(raw.get("product_category") or TaxRate.ProductCategory.STANDARD).strip().upper()
-        rate_decimal = Decimal(str(raw.get("rate_decimal")))
-        effective_from = parse_date(str(raw.get("valid_from") or raw.get("effective_from") or ""))
-        valid_to_raw = raw.get("valid_to") or raw.get("effective_to")
-        effective_to = None
-        if valid_to_raw not in (None, "", "null"):
-            effective_to = parse_date(str(valid_to_raw))
-
-        is_compound = _boolish(raw.get("is_compound", False))
-        meta_data_raw = raw.get("meta_data")
-        meta_data = {}
-        if isinstance(meta_data_raw, dict):
-            meta_data = meta_data_raw
-        elif meta_data_raw not in (None, ""):
-            meta_data = json.loads(str(meta_data_raw))
-        jurisdiction = TaxJurisdiction.objects.filter(code=jurisdiction_code).first()
-        component = TaxComponent.objects.filter(business=business, name=tax_name).select_related("jurisdiction").first()
+        values = pr.resolved
+        jurisdiction = values["jurisdiction"]
+        component = values["component"]
 
         # Safe enrichment: attach jurisdiction to component if missing.
         if component and jurisdiction and component.jurisdiction_id is None:
             component.jurisdiction = jurisdiction
-            component.save(update_fields=["jurisdiction"])
-
-        if provided_id:
-            target = TaxRate.objects.filter(id=provided_id, component__business=business).select_related("component").first()
-        else:
-            target = None
+            component.updated_at = now
+            enriched[component.id] = component
 
+        target = values["target"]
         if target:
-            target.rate_decimal = rate_decimal
-            target.effective_from = effective_from
-            target.effective_to = effective_to
-            target.product_category = product_category
-            target.is_compound = is_compound
-            target.meta_data = meta_data
-            target.save()
+            target.rate_decimal = values["rate_decimal"]
+            target.effective_from = values["effective_from"]
+            target.effective_to = values["effective_to"]
+            target.product_category = values["product_category"]
+            target.is_compound = values["is_compound"]
+            target.meta_data = values["meta_data"]
+            target.updated_at = now
+            to_update[target.id] = target
             updated += 1
         else:
-            TaxRate.objects.create(
-                component=component,
-                rate_decimal=rate_decimal,
-                effective_from=effective_from,
-                effective_to=effective_to,
-                product_category=product_category,
-                is_compound=is_compound,
-                meta_data=meta_data,
+            to_create.append(
+                TaxRate(
+                    component=component,
+                    rate_decimal=values["rate_decimal"],
+                    effective_from=values["effective_from"],
+                    effective_to=values["effective_to"],
+                    product_category=values["product_category"],
+                    is_compound=values["is_compound"],
+                    meta_data=values["meta_data"],
+                )
             )
             created += 1
+
+    if enriched:
+        TaxComponent.objects.bulk_update(
+            list(enriched.values()), ["jurisdiction", "updated_at"], batch_size=IMPORT_WRITE_BATCH_SIZE
+        )
+    if to_update:
+        TaxRate.objects.bulk_update(
+            list(to_update.values()),
+            ["rate_decimal", "effective_from", "effective_to", "product_category", "is_compound", "meta_data", "updated_at"],
+            batch_size=IMPORT_WRITE_BATCH_SIZE,
+        )
+    if to_create:
+        TaxRate.objects.bulk_create(to_create, batch_size=IMPORT_WRITE_BATCH_SIZE)
     return created, updated, skipped, warnings
 
 
 def _apply_product_rules(preview_rows: List[PreviewRow]) -> Tuple[int, int, int, List[str]]:
     created = updated = skipped = 0
     warnings: List[str] = []
+    to_update: Dict[Any, TaxProductRule] = {}
+    to_create: List[TaxProductRule] = []
     for pr in preview_rows:
-        raw = pr.raw
-        provided_id = str(raw.get("id") or "").strip()
-        jurisdiction_code = str(raw.get("jurisdiction_code") or "").strip().upper()
-        product_code = str(raw.get("product_code") or "").strip().upper()
-        rule_type = str(raw.get("rule_type") or "").strip().upper()
-        notes = str(raw.get("notes") or "").strip()
-
-        valid_from = parse_date(str(raw.get("valid_from") or ""))
-        valid_to_raw = raw.get("valid_to")
-        valid_to = None
-        if valid_to_raw not in (None, "", "null"):
-            valid_to = parse_date(str(valid_to_raw))
-
-        special_rate = None
-        if rule_type == TaxProductRule.RuleType.REDUCED:
-            special_rate = Decimal(str(raw.get("special_rate")))
-
-        jurisdiction = TaxJurisdiction.objects.filter(code=jurisdiction_code).first()
-        if provided_id:
-            target = TaxProductRule.objects.filter(id=provided_id).first()
-        else:
-            target = None
-
+        values = pr.resolved
+        target = values["target"]
         if target:
             # Keep jurisdiction fixed on update (v1 guardrail).
-            if target.product_code != product_code:
-                target.product_code = product_code
-            target.rule_type = rule_type
-            target.special_rate = special_rate
-            target.valid_from = valid_from
-            target.valid_to = valid_to
-            target.notes = notes
-            target.save()
+            target.product_code = values["product_code"]
+            target.rule_type = values["rule_type"]
+            target.special_rate = values["special_rate"]
+            target.valid_from = values["valid_from"]
+            target.valid_to = values["valid_to"]
+            target.notes = values["notes"]
+            to_update[target.id] = target
             updated += 1
         else:
-            TaxProductRule.objects.create(
-                jurisdiction=jurisdiction,
-                product_code=product_code,
-                rule_type=rule_type,
-                special_rate=special_rate,
-                valid_from=valid_from,
-                valid_to=valid_to,
-                notes=notes,
+            to_create.append(
+                TaxProductRule(
+                    jurisdiction=values["jurisdiction"],
+                    product_code=values["product_code"],
+                    rule_type=values["rule_type"],
+                    special_rate=values["special_rate"],
+                    valid_from=values["valid_from"],
+                    valid_to=values["valid_to"],
+                    notes=values["notes"],
+                )
             )
             created += 1
+
+    if to_update:
+        TaxProductRule.objects.bulk_update(
+            list(to_update.values()),
+            ["product_code", "rule_type", "special_rate", "valid_from", "valid_to", "notes"],
+            batch_size=IMPORT_WRITE_BATCH_SIZE,
+        )
+    if to_create:
+        TaxProductRule.objects.bulk_create(to_create, batch_size=IMPORT_WRITE_BATCH_SIZE)
     return created, updated, skipped, warnings
 
 
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0064_requestlatencysample"),
+        ("internal_admin", "0013_staffprofile_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkspaceOpsMetrics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("unreconciled_count", models.PositiveIntegerField(default=0)),
+                ("unreconciled_older_30d", models.PositiveIntegerField(default=0)),
+                ("unreconciled_older_60d", models.PositiveIntegerField(default=0)),
+                ("stale_bank_feeds", models.PositiveIntegerField(default=0)),
+                ("open_tax_anomalies", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "business",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ops_metrics",
+                        to="core.business",
+                    ),
+                ),
+            ],
+        ),
+    ]
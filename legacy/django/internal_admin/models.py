@@ -261,6 +261,32 @@ class OverviewMetricsSnapshot(models.Model):
         ordering = ["-created_at"]
 
 
+class WorkspaceOpsMetrics(models.Model):
+    """
+    Per-workspace counters behind the admin overview pages.
+
+    Materialized by `refresh_internal_admin_metrics` from grouped aggregates
+    (see internal_admin.services.refresh_workspace_ops_metrics); only rows
+    whose counters changed are written. Workspaces without a row have all
+    counters at zero.
+    """
+
+    business = models.OneToOneField(
+        "core.Business",
+        on_delete=models.CASCADE,
+        related_name="ops_metrics",
+    )
+    unreconciled_count = models.PositiveIntegerField(default=0)
+    unreconciled_older_30d = models.PositiveIntegerField(default=0)
+    unreconciled_older_60d = models.PositiveIntegerField(default=0)
+    stale_bank_feeds = models.PositiveIntegerField(default=0)
+    open_tax_anomalies = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"Ops metrics for {self.business_id}"
+
+
 class SupportTicket(models.Model):
     class Status(models.TextChoices):
         OPEN = "OPEN", "Open"
@@ -3,37 +3,122 @@ from __future__ import annotations
 from datetime import timedelta
 from typing import Any, Dict
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 
-from core.models import BankTransaction, Business
+from core.models import BankAccount, BankTransaction, Business
+from core.request_metrics import summarize_request_metrics
+from internal_admin.models import OverviewMetricsSnapshot, WorkspaceOpsMetrics
+from taxes.models import TaxAnomaly
 
 User = get_user_model()
 
+_OPS_COUNTERS = (
+    "unreconciled_count",
+    "unreconciled_older_30d",
+    "unreconciled_older_60d",
+    "stale_bank_feeds",
+    "open_tax_anomalies",
+)
+
+
+def refresh_workspace_ops_metrics(now=None) -> int:
+    """
+    Recompute per-workspace ops counters with one grouped query per source
+    table and write only the rows that changed. Returns the number of rows
+    created, updated or cleared.
+    """
+    now = now or timezone.now()
+    today = now.date()
+    counters: dict[int, dict[str, int]] = {}
+
+    def bump(business_id, **values):
+        row = counters.setdefault(business_id, dict.fromkeys(_OPS_COUNTERS, 0))
+        row.update(values)
+
+    for row in (
+        BankTransaction.objects.filter(is_reconciled=False)
+        .values("bank_account__business_id")
+        .annotate(
+            total=Count("id"),
+            older_30d=Count("id", filter=Q(date__lt=today - timedelta(days=30))),
+            older_60d=Count("id", filter=Q(date__lte=today - timedelta(days=60))),
+        )
+    ):
+        bump(
+            row["bank_account__business_id"],
+            unreconciled_count=row["total"],
+            unreconciled_older_30d=row["older_30d"],
+            unreconciled_older_60d=row["older_60d"],
+        )
+
+    for row in (
+        BankAccount.objects.filter(is_active=True)
+        .filter(Q(last_imported_at__isnull=True) | Q(last_imported_at__lt=now - timedelta(days=7)))
+        .values("business_id")
+        .annotate(total=Count("id"))
+    ):
+        bump(row["business_id"], stale_bank_feeds=row["total"])
+
+    for row in (
+        TaxAnomaly.objects.filter(status=TaxAnomaly.AnomalyStatus.OPEN).values("business_id").annotate(total=Count("id"))
+    ):
+        bump(row["business_id"], open_tax_anomalies=row["total"])
+
+    existing = {m.business_id: m for m in WorkspaceOpsMetrics.objects.all()}
+    to_create = []
+    to_update = []
+    for business_id, values in counters.items():
+        current = existing.pop(business_id, None)
+        if current is None:
+            to_create.append(WorkspaceOpsMetrics(business_id=business_id, updated_at=now, **values))
+        elif any(getattr(current, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(current, name, value)
+            current.updated_at = now
+            to_update.append(current)
+    # Rows left in `existing` dropped out of every group: their counters are zero now.
+    for current in existing.values():
+        if any(getattr(current, name) for name in _OPS_COUNTERS):
+            for name in _OPS_COUNTERS:
+                setattr(current, name, 0)
+            current.updated_at = now
+            to_update.append(current)
+
+    WorkspaceOpsMetrics.objects.bulk_create(to_create, batch_size=500)
+    WorkspaceOpsMetrics.objects.bulk_update(to_update, [*_OPS_COUNTERS, "updated_at"], batch_size=500)
+    return len(to_create) + len(to_update)
+
 
 def compute_overview_metrics() -> Dict[str, Any]:
     """
-    Pure function that returns the overview metrics payload used by the internal admin UI.
+    Returns the overview metrics payload used by the internal admin UI.
+
+    Ledger counters are read from WorkspaceOpsMetrics, which this refreshes
+    first with grouped aggregates instead of scanning per workspace. That
+    refresh still reads every unreconciled bank transaction, so this only runs
+    from the refresh_internal_admin_metrics command or the background job that
+    `get_overview_snapshot()` queues, never inside an admin request.
     """
     now = timezone.now()
+    refresh_workspace_ops_metrics(now)
     users_qs = User.objects.all()
     active_30d = users_qs.filter(last_login__gte=now - timedelta(days=30)).count()
-    unreconciled_tx = BankTransaction.objects.filter(is_reconciled=False).count()
-    unreconciled_over_60 = BankTransaction.objects.filter(
-        is_reconciled=False, date__lte=now.date() - timedelta(days=60)
-    ).count()
+    totals = WorkspaceOpsMetrics.objects.aggregate(
+        unreconciled=Sum("unreconciled_count"),
+        unreconciled_over_60=Sum("unreconciled_older_60d"),
+    )
     unbalanced_journal_entries = 0
-    error_rate_pct = 0.0
-    p95_ms = 0
+    requests_1h = summarize_request_metrics(since=now - timedelta(hours=1), until=now, top_routes=0)
     ai_issues = 0
     failed_invoice_emails = 0
 
     workspace_health = []
-    business_qs = Business.objects.select_related("owner_user").all()
+    business_qs = Business.objects.select_related("owner_user", "ops_metrics").all()
     for business in business_qs[:10]:
-        unreconciled_count = business.bank_accounts.filter(
-            bank_transactions__is_reconciled=False
-        ).count()
+        ops = getattr(business, "ops_metrics", None)
         ledger_status = "balanced"
         if unbalanced_journal_entries > 0:
             ledger_status = "attention"
@@ -43,7 +128,7 @@ def compute_overview_metrics() -> Dict[str, Any]:
                 "name": business.name,
                 "owner_email": business.owner_user.email if business.owner_user else "",
                 "plan": business.plan,
-                "unreconciled_count": unreconciled_count,
+                "unreconciled_count": ops.unreconciled_count if ops else 0,
                 "ledger_status": ledger_status,
             }
         )
@@ -51,12 +136,65 @@ def compute_overview_metrics() -> Dict[str, Any]:
     return {
         "active_users_30d": active_30d,
         "active_users_30d_change_pct": 0.0,
-        "unreconciled_transactions": unreconciled_tx,
-        "unreconciled_transactions_older_60d": unreconciled_over_60,
+        "unreconciled_transactions": totals["unreconciled"] or 0,
+        "unreconciled_transactions_older_60d": totals["unreconciled_over_60"] or 0,
         "unbalanced_journal_entries": unbalanced_journal_entries,
-        "api_error_rate_1h_pct": error_rate_pct,
-        "api_p95_response_ms_1h": p95_ms,
+        "api_requests_1h": requests_1h["total"],
+        "api_error_rate_1h_pct": requests_1h["error_rate_pct"],
+        "api_p50_response_ms_1h": requests_1h["p50_ms"],
+        "api_p95_response_ms_1h": requests_1h["p95_ms"],
+        "api_p99_response_ms_1h": requests_1h["p99_ms"],
         "ai_flagged_open_issues": ai_issues,
         "failed_invoice_emails_24h": failed_invoice_emails,
         "workspaces_health": workspace_health,
     }
+
+
+def refresh_overview_snapshot() -> OverviewMetricsSnapshot:
+    """Store a new overview snapshot and prune all but the most recent ones."""
+    snapshot = OverviewMetricsSnapshot.objects.create(payload=compute_overview_metrics())
+    keep = max(1, getattr(settings, "INTERNAL_ADMIN_METRICS_SNAPSHOTS_KEPT", 3))
+    kept_ids = list(OverviewMetricsSnapshot.objects.values_list("pk", flat=True)[:keep])
+    OverviewMetricsSnapshot.objects.exclude(pk__in=kept_ids).delete()
+    return snapshot
+
+
+def _enqueue_overview_refresh():
+    """Queue a background snapshot refresh unless one is already pending."""
+    from core.jobs import ADMIN_OVERVIEW_REFRESH_JOB, enqueue_job
+    from core.models import BackgroundJob
+
+    pending = (
+        BackgroundJob.objects.filter(
+            kind=ADMIN_OVERVIEW_REFRESH_JOB,
+            status__in=[BackgroundJob.Status.QUEUED, BackgroundJob.Status.RUNNING],
+        )
+        .order_by("id")
+        .first()
+    )
+    if pending:
+        return pending
+    return enqueue_job(ADMIN_OVERVIEW_REFRESH_JOB, {})
+
+
+def get_overview_snapshot(max_age_minutes: int | None = None) -> OverviewMetricsSnapshot | None:
+    """
+    Latest snapshot (None before the first refresh). When it is missing or
+    older than `max_age_minutes`, a background refresh is queued and the
+    current one is still served.
+    """
+    if max_age_minutes is None:
+        max_age_minutes = getattr(settings, "INTERNAL_ADMIN_METRICS_MAX_AGE_MINUTES", 5)
+    latest = OverviewMetricsSnapshot.objects.first()
+    if latest is None or (timezone.now() - latest.created_at).total_seconds() >= max_age_minutes * 60:
+        _enqueue_overview_refresh()
+    return latest
+
+
+def snapshot_freshness(snapshot: OverviewMetricsSnapshot | None) -> Dict[str, Any]:
+    if snapshot is None:
+        return {"snapshot_generated_at": None, "snapshot_age_seconds": None, "snapshot_pending": True}
+    return {
+        "snapshot_generated_at": snapshot.created_at.isoformat(),
+        "snapshot_age_seconds": int((timezone.now() - snapshot.created_at).total_seconds()),
+    }
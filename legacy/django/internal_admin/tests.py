@@ -1,14 +1,16 @@
 from datetime import timedelta
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from core.models import BankAccount, BankTransaction, Business
+from core.jobs import ADMIN_OVERVIEW_REFRESH_JOB, run_worker
+from core.models import BackgroundJob, BankAccount, BankTransaction, Business
 from allauth.socialaccount.models import SocialAccount
 from internal_admin.models import (
     AdminAuditLog,
@@ -21,8 +23,13 @@ from internal_admin.models import (
     StaffProfile,
     SupportTicket,
     SupportTicketNote,
+    WorkspaceOpsMetrics,
+)
+from internal_admin.services import (
+    compute_overview_metrics,
+    refresh_overview_snapshot,
+    refresh_workspace_ops_metrics,
 )
-from internal_admin.services import compute_overview_metrics
 
 
 User = get_user_model()
@@ -260,6 +267,7 @@ class InternalAdminAPITests(TestCase):
         self.assertGreaterEqual(len(resp.data["results"]), 1)
 
     def test_metrics_endpoint_requires_admin(self):
+        refresh_overview_snapshot()
         self.client.force_authenticate(user=self.normal_user)
         resp = self.client.get("/api/internal-admin/overview-metrics/")
         self.assertEqual(resp.status_code, 403)
@@ -276,6 +284,21 @@ class InternalAdminAPITests(TestCase):
             self.assertIn(key, resp.data)
         self.assertEqual(OverviewMetricsSnapshot.objects.count(), 1)
 
+    def test_metrics_endpoint_queues_first_snapshot_instead_of_computing_it(self):
+        self.client.force_authenticate(user=self.support_user)
+        resp = self.client.get("/api/internal-admin/overview-metrics/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data["snapshot_pending"])
+        self.assertIsNone(resp.data["snapshot_generated_at"])
+        self.assertFalse(OverviewMetricsSnapshot.objects.exists())
+        self.client.get("/api/internal-admin/operations-overview/")
+        self.assertEqual(BackgroundJob.objects.filter(kind=ADMIN_OVERVIEW_REFRESH_JOB).count(), 1)
+
+        self.assertEqual(run_worker(once=True), 1)
+        resp = self.client.get("/api/internal-admin/overview-metrics/")
+        self.assertEqual(resp.data["unreconciled_transactions"], 1)
+        self.assertNotIn("snapshot_pending", resp.data)
+
     def test_metrics_endpoint_uses_cached_snapshot(self):
         self.client.force_authenticate(user=self.support_user)
         OverviewMetricsSnapshot.objects.create(payload={"cached": True})
@@ -292,11 +315,32 @@ class InternalAdminAPITests(TestCase):
         )
         resp = self.client.get("/api/internal-admin/overview-metrics/")
         self.assertEqual(resp.status_code, 200)
+        # The stale snapshot is served while a refresh runs in the background.
+        self.assertEqual(resp.data.get("cached"), True)
+        self.assertEqual(OverviewMetricsSnapshot.objects.count(), 1)
+        self.client.get("/api/internal-admin/overview-metrics/")
+        self.assertEqual(BackgroundJob.objects.filter(kind=ADMIN_OVERVIEW_REFRESH_JOB).count(), 1)
+
+        self.assertEqual(run_worker(once=True), 1)
         self.assertEqual(OverviewMetricsSnapshot.objects.count(), 2)
         latest = OverviewMetricsSnapshot.objects.first()
         self.assertIsNotNone(latest)
         self.assertNotEqual(latest.payload, {"cached": True})
 
+    @override_settings(INTERNAL_ADMIN_METRICS_SNAPSHOTS_KEPT=2)
+    def test_refresh_prunes_old_snapshots(self):
+        for minutes in (30, 20, 10):
+            old = OverviewMetricsSnapshot.objects.create(payload={"cached": True})
+            OverviewMetricsSnapshot.objects.filter(pk=old.pk).update(
+                created_at=timezone.now() - timedelta(minutes=minutes)
+            )
+
+        latest = refresh_overview_snapshot()
+
+        self.assertEqual(OverviewMetricsSnapshot.objects.count(), 2)
+        self.assertEqual(OverviewMetricsSnapshot.objects.first(), latest)
+        self.assertTrue(OverviewMetricsSnapshot.objects.filter(pk=old.pk).exists())
+
     def test_compute_overview_metrics_keys(self):
         metrics = compute_overview_metrics()
         for key in [
@@ -309,6 +353,55 @@ class InternalAdminAPITests(TestCase):
         ]:
             self.assertIn(key, metrics)
 
+    def test_workspace_ops_metrics_refresh_writes_only_changed_rows(self):
+        old = BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=timezone.localdate() - timedelta(days=90),
+            description="Old deposit",
+            amount=50,
+        )
+        self.assertEqual(refresh_workspace_ops_metrics(), 1)
+        ops = WorkspaceOpsMetrics.objects.get(business=self.business)
+        self.assertEqual(ops.unreconciled_count, 2)
+        self.assertEqual(ops.unreconciled_older_60d, 2)
+        self.assertEqual(ops.stale_bank_feeds, 1)
+
+        # Nothing changed: no writes.
+        self.assertEqual(refresh_workspace_ops_metrics(), 0)
+
+        BankTransaction.objects.filter(bank_account__business=self.business).update(is_reconciled=True)
+        BankAccount.objects.filter(pk=self.bank_account.pk).update(last_imported_at=timezone.now())
+        self.assertEqual(refresh_workspace_ops_metrics(), 1)
+        ops.refresh_from_db()
+        self.assertEqual((ops.unreconciled_count, ops.unreconciled_older_60d, ops.stale_bank_feeds), (0, 0, 0))
+        self.assertTrue(BankTransaction.objects.filter(pk=old.pk, is_reconciled=True).exists())
+
+    def test_metrics_endpoint_reports_snapshot_freshness(self):
+        call_command("refresh_internal_admin_metrics", stdout=StringIO())
+        self.client.force_authenticate(user=self.support_user)
+        resp = self.client.get("/api/internal-admin/overview-metrics/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("snapshot_generated_at", resp.data)
+        self.assertLess(resp.data["snapshot_age_seconds"], 60)
+        self.assertEqual(resp.data["unreconciled_transactions"], 1)
+        self.assertNotIn("snapshot_generated_at", OverviewMetricsSnapshot.objects.get().payload)
+
+    def test_operations_overview_reads_workspace_ops_metrics(self):
+        BankTransaction.objects.create(
+            bank_account=self.bank_account,
+            date=timezone.localdate() - timedelta(days=90),
+            description="Old deposit",
+            amount=50,
+        )
+        refresh_overview_snapshot()
+        self.client.force_authenticate(user=self.support_user)
+        resp = self.client.get("/api/internal-admin/operations-overview/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["metrics"]["failingBankFeeds"], 1)
+        self.assertEqual(resp.data["metrics"]["reconciliationBacklog"], 2)
+        self.assertIn("snapshot_generated_at", resp.data)
+        self.assertTrue(WorkspaceOpsMetrics.objects.filter(business=self.business).exists())
+
     def test_management_command_refresh_internal_admin_metrics(self):
         OverviewMetricsSnapshot.objects.all().delete()
         call_command("refresh_internal_admin_metrics")
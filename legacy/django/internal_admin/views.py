@@ -5,7 +5,7 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Count, Prefetch, Sum
 from django.http import QueryDict
 from django.urls import reverse
 from django.utils import timezone
@@ -38,12 +38,11 @@ from internal_admin.models import (
     FeatureFlag,
     ImpersonationToken,
     InternalAdminProfile,
-    OverviewMetricsSnapshot,
     StaffProfile,
     SupportTicket,
     SupportTicketNote,
 )
-from internal_admin.services import compute_overview_metrics
+from internal_admin.services import get_overview_snapshot, snapshot_freshness
 from companion.models import AIIntegrityReport
 from companion.serializers_v2 import AIIntegrityReportSerializer, WorkspaceAISettingsSerializer
 from companion.v2.guardrails import ensure_ai_settings, global_ai_enabled
@@ -1037,14 +1036,9 @@ class OverviewMetricsView(APIView):
     throttle_scope = "internal_admin"
 
     def get(self, request, *args, **kwargs):
-        max_age_minutes = getattr(settings, "INTERNAL_ADMIN_METRICS_MAX_AGE_MINUTES", 5)
-        latest = OverviewMetricsSnapshot.objects.first()
-        if latest and (timezone.now() - latest.created_at).total_seconds() < max_age_minutes * 60:
-            return Response(latest.payload)
-
-        payload = compute_overview_metrics()
-        OverviewMetricsSnapshot.objects.create(payload=payload)
-        return Response(payload)
+        snapshot = get_overview_snapshot()
+        payload = snapshot.payload if snapshot else {}
+        return Response({**payload, **snapshot_freshness(snapshot)})
 
     def get_min_role(self, request=None):
         return AdminRole.SUPPORT
@@ -1064,9 +1058,7 @@ class OperationsOverviewView(APIView):
         return AdminRole.SUPPORT
 
     def get(self, request, *args, **kwargs):
-        from django.db.models import Sum, Count, Avg
-        from core.models import BankTransaction
-        from internal_admin.models import AdminApprovalRequest, AdminAuditLog
+        from internal_admin.models import AdminApprovalRequest, AdminAuditLog, WorkspaceOpsMetrics
 
         env = request.query_params.get("env", "prod")
         window_hours = int(request.query_params.get("window_hours", 24))
@@ -1085,27 +1077,20 @@ class OperationsOverviewView(APIView):
             status="PENDING"
         ).count()
 
-        # Bank feeds with sync errors
-        failing_bank_feeds = BankAccount.objects.filter(
-            is_active=True
-        ).filter(
-            Q(last_imported_at__isnull=True) |
-            Q(last_imported_at__lt=now - timedelta(days=7))
-        ).values("business_id").distinct().count()
-
+        # Ledger-wide counters come from the per-workspace snapshot rather than
+        # scanning bank transactions across every tenant on each page load.
+        snapshot = get_overview_snapshot()
+        ops_totals = WorkspaceOpsMetrics.objects.aggregate(
+            failing_bank_feeds=Count("id", filter=Q(stale_bank_feeds__gt=0)),
+            recon_backlog=Sum("unreconciled_older_30d"),
+            tax_issues=Sum("open_tax_anomalies"),
+        )
+        # Workspaces with bank feeds not imported in 7 days
+        failing_bank_feeds = ops_totals["failing_bank_feeds"] or 0
         # Reconciliation backlog: unreconciled items older than 30 days
-        recon_backlog = BankTransaction.objects.filter(
-            is_reconciled=False,
-            date__lt=now - timedelta(days=30)
-        ).count()
-
+        recon_backlog = ops_totals["recon_backlog"] or 0
         # Open tax issues
-        tax_issues = 0
-        try:
-            from core.models import TaxAnomaly
-            tax_issues = TaxAnomaly.objects.filter(resolved=False).count()
-        except Exception:
-            pass
+        tax_issues = ops_totals["tax_issues"] or 0
 
         metrics = {
             "openTickets": open_tickets,
@@ -1186,17 +1171,17 @@ class OperationsOverviewView(APIView):
             })
 
         # Backlog: old unreconciled by workspace
-        for item in BankTransaction.objects.filter(
-            is_reconciled=False,
-            date__lt=now - timedelta(days=60)
-        ).values("bank_account__business__name").annotate(count=Count("id")).order_by("-count")[:5]:
+        for item in WorkspaceOpsMetrics.objects.filter(
+            unreconciled_older_60d__gt=0
+        ).select_related("business").order_by("-unreconciled_older_60d")[:5]:
+            count = item.unreconciled_older_60d
             backlog_tasks.append({
-                "id": f"recon-{item['bank_account__business__name']}",
+                "id": f"recon-{item.business.name}",
                 "kind": "recon",
-                "title": f"{item['count']} unreconciled items",
-                "workspace": item["bank_account__business__name"] or "Unknown",
+                "title": f"{count} unreconciled items",
+                "workspace": item.business.name or "Unknown",
                 "age": ">60d",
-                "priority": "low" if item["count"] < 50 else "medium",
+                "priority": "low" if count < 50 else "medium",
                 "slaBreached": True,
             })
 
@@ -1245,6 +1230,7 @@ class OperationsOverviewView(APIView):
             "buckets": buckets,
             "systems": systems,
             "activity": activity,
+            **snapshot_freshness(snapshot),
         })
 
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from core.accounting_defaults import ensure_default_accounts
+from core.accounting_defaults import ensure_default_accounts, get_accounts_by_code
 from core.models import Account
 
 
@@ -29,20 +29,23 @@ def ensure_inventory_accounts(workspace):
     Ensure required inventory system accounts exist for the workspace.
     """
     ensure_default_accounts(workspace)
+    existing = get_accounts_by_code(workspace)
     accounts: dict[str, Account] = {}
     for code, name, type_ in INVENTORY_DEFAULT_ACCOUNTS:
-        acc, _ = Account.objects.get_or_create(
-            business=workspace,
-            code=code,
-            defaults={"name": name, "type": type_},
-        )
+        acc = existing.get(code)
+        if acc is None:
+            acc, _ = Account.objects.get_or_create(
+                business=workspace,
+                code=code,
+                defaults={"name": name, "type": type_},
+            )
         accounts[code] = acc
     return accounts
 
 
 def get_account_by_code(*, workspace, code: str) -> Account:
     ensure_default_accounts(workspace)
-    acct = Account.objects.filter(business=workspace, code=code).first()
+    acct = get_accounts_by_code(workspace).get(code)
     if acct:
         return acct
     created = ensure_inventory_accounts(workspace)
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import json
+
 from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from rest_framework import permissions, status
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
 from core.permissions_engine import can
@@ -24,6 +28,7 @@ from inventory.serializers import (
 )
 from inventory.services.adjustments import adjust_stock_to_physical_count
 from inventory.services.commitment import commit_stock, uncommit_stock
+from inventory.services.event_stream import cursor_for_event, events_after, events_before
 from inventory.services.landed_cost import apply_landed_cost, create_landed_cost_batch
 from inventory.services.receiving import receive_stock
 from inventory.services.shipping import ship_stock
@@ -164,11 +169,14 @@ class InventoryEventsView(APIView):
         # if denied:
         #     return denied
 
-        qs = InventoryEvent.objects.filter(workspace=workspace).select_related("item", "location").order_by("-created_at", "-id")
+        qs = InventoryEvent.objects.filter(workspace=workspace).select_related("item", "location")
 
         item_id = request.query_params.get("item_id")
         location_id = request.query_params.get("location_id")
         limit_raw = request.query_params.get("limit")
+        cursor = request.query_params.get("cursor")
+        since = request.query_params.get("since")
+        stream = request.query_params.get("stream")
 
         if item_id:
             try:
@@ -182,6 +190,13 @@ class InventoryEventsView(APIView):
             except Exception:
                 return Response({"detail": "Invalid location_id."}, status=status.HTTP_400_BAD_REQUEST)
 
+        if cursor and since:
+            return Response({"detail": "Use either cursor or since, not both."}, status=status.HTTP_400_BAD_REQUEST)
+        if stream and stream != "ndjson":
+            return Response({"detail": "Invalid stream format."}, status=status.HTTP_400_BAD_REQUEST)
+        if stream and cursor:
+            return Response({"detail": "Streaming resumes from since, not cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
         limit = 100
         if limit_raw:
             try:
@@ -190,7 +205,45 @@ class InventoryEventsView(APIView):
                 return Response({"detail": "Invalid limit."}, status=status.HTTP_400_BAD_REQUEST)
         limit = max(1, min(limit, 200))
 
-        return Response({"results": InventoryEventSerializer(qs[:limit], many=True).data})
+        try:
+            if since or stream:
+                qs = events_after(qs, since)
+            else:
+                qs = events_before(qs, cursor)
+        except DomainError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if stream:
+            # Backfill: walk the whole ascending slice with a server-side cursor
+            # instead of materialising it. Each line carries its own resume cursor.
+            response = StreamingHttpResponse(_iter_events_ndjson(qs), content_type="application/x-ndjson")
+            response["Cache-Control"] = "no-store"
+            return response
+
+        page = list(qs[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        if since:
+            # Incremental mode always hands back a cursor so the caller can poll again.
+            next_cursor = cursor_for_event(page[-1]) if page else since
+        else:
+            next_cursor = cursor_for_event(page[-1]) if has_more else None
+
+        return Response(
+            {
+                "results": InventoryEventSerializer(page, many=True).data,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            }
+        )
+
+
+def _iter_events_ndjson(qs, *, chunk_size: int = 500):
+    for event in qs.iterator(chunk_size=chunk_size):
+        row = dict(InventoryEventSerializer(event).data)
+        row["cursor"] = cursor_for_event(event)
+        yield json.dumps(row, cls=JSONEncoder) + "\n"
 
 
 class InventoryReceiveView(APIView):
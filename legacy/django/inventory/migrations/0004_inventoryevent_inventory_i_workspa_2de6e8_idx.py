@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_inventoryevent_event_type_landedcostbatch_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryevent',
+            index=models.Index(fields=['workspace', 'created_at', 'id'], name='inventory_i_workspa_2de6e8_idx'),
+        ),
+    ]
@@ -279,6 +279,7 @@ class InventoryEvent(models.Model):
         indexes = [
             models.Index(fields=["workspace", "item", "location", "created_at"]),
             models.Index(fields=["workspace", "event_type", "created_at"]),
+            models.Index(fields=["workspace", "created_at", "id"]),
         ]
         constraints = [
             models.CheckConstraint(
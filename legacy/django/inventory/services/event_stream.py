@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from inventory.exceptions import DomainError
+from inventory.models import InventoryEvent
+
+
+def encode_event_cursor(created_at: datetime, event_id: int) -> str:
+    """
+    Opaque keyset cursor over (created_at, id).
+
+    Clients must treat the value as opaque; the format only needs to round-trip
+    through `decode_event_cursor`.
+    """
+    raw = f"{created_at.isoformat()}|{int(event_id)}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_event_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_raw, id_raw = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_raw)
+        event_id = int(id_raw)
+    except Exception:
+        raise DomainError("Invalid cursor.")
+    if created_at is None:
+        raise DomainError("Invalid cursor.")
+    return created_at, event_id
+
+
+def cursor_for_event(event: InventoryEvent) -> str:
+    return encode_event_cursor(event.created_at, event.id)
+
+
+def events_after(qs, cursor: str | None):
+    """
+    Ascending keyset slice: events strictly after `cursor`, oldest first.
+
+    Used for incremental sync — a mirror stores the cursor of the last event it
+    applied and resumes from there without rescanning the log.
+    """
+    qs = qs.order_by("created_at", "id")
+    if not cursor:
+        return qs
+    created_at, event_id = decode_event_cursor(cursor)
+    return qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=event_id))
+
+
+def events_before(qs, cursor: str | None):
+    """Descending keyset slice: events strictly before `cursor`, newest first."""
+    qs = qs.order_by("-created_at", "-id")
+    if not cursor:
+        return qs
+    created_at, event_id = decode_event_cursor(cursor)
+    return qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=event_id))
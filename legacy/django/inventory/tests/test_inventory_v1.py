@@ -1,3 +1,4 @@
+import json
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
@@ -249,6 +250,75 @@ class InventoryV1Tests(TestCase):
         self.assertTrue(all(ev.get("item") == self.item.id for ev in events))
         self.assertTrue(all(ev.get("workspace") == self.workspace.id for ev in events))
 
+    def _receive_batch(self, count):
+        for idx in range(count):
+            receive_stock(
+                workspace=self.workspace,
+                item=self.item,
+                location=self.location,
+                quantity=Decimal("1.0000"),
+                unit_cost=Decimal("2.0000"),
+                po_reference=f"PO-CURSOR-{idx}",
+                created_by=self.user,
+            )
+
+    def test_inventory_api_events_cursor_pagination(self):
+        self._receive_batch(5)
+
+        seen = []
+        params = {"workspace_id": self.workspace.id, "limit": 2}
+        while True:
+            res = self.client.get(reverse("inventory:events"), data=params)
+            self.assertEqual(res.status_code, 200)
+            body = res.json()
+            seen.extend(ev["id"] for ev in body["results"])
+            if not body["next_cursor"]:
+                self.assertFalse(body["has_more"])
+                break
+            params["cursor"] = body["next_cursor"]
+
+        expected = list(
+            InventoryEvent.objects.filter(workspace=self.workspace).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_inventory_api_events_since_cursor_incremental_sync(self):
+        self._receive_batch(3)
+
+        first = self.client.get(
+            reverse("inventory:events"),
+            data={"workspace_id": self.workspace.id, "stream": "ndjson"},
+        )
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(first.streaming_content).decode().splitlines() if line]
+        self.assertEqual(len(lines), 3)
+        ids = [row["id"] for row in lines]
+        self.assertEqual(ids, sorted(ids))
+        checkpoint = lines[-1]["cursor"]
+
+        res = self.client.get(reverse("inventory:events"), data={"workspace_id": self.workspace.id, "since": checkpoint})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["results"], [])
+        self.assertEqual(res.json()["next_cursor"], checkpoint)
+
+        self._receive_batch(2)
+        res = self.client.get(reverse("inventory:events"), data={"workspace_id": self.workspace.id, "since": checkpoint})
+        body = res.json()
+        self.assertEqual(len(body["results"]), 2)
+        self.assertTrue(all(ev["id"] > ids[-1] for ev in body["results"]))
+        self.assertNotEqual(body["next_cursor"], checkpoint)
+
+    def test_inventory_api_events_rejects_invalid_cursor(self):
+        res = self.client.get(reverse("inventory:events"), data={"workspace_id": self.workspace.id, "cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.get(
+            reverse("inventory:events"),
+            data={"workspace_id": self.workspace.id, "cursor": "abc", "since": "abc"},
+        )
+        self.assertEqual(res.status_code, 400)
+
     def test_inventory_api_workspace_scoping_enforced(self):
         other_user = User.objects.create_user(username="other", email="other@example.com", password="pass12345")
         other_ws = Business.objects.create(name="Other Co", owner_user=other_user, currency="USD")
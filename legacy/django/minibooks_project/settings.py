@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -170,6 +171,7 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "core.middleware.RequestIDMiddleware",
+    "core.middleware.RequestTimingMiddleware",
     "core.middleware.CorsMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -276,6 +278,8 @@ CSRF_COOKIE_DOMAIN = _optional_env("CSRF_COOKIE_DOMAIN") or SESSION_COOKIE_DOMAI
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 INTERNAL_ADMIN_METRICS_MAX_AGE_MINUTES = 5
+# Overview snapshots kept by each refresh; readers only use the latest one.
+INTERNAL_ADMIN_METRICS_SNAPSHOTS_KEPT = 3
 
 try:
     import environ  # type: ignore
@@ -325,6 +329,94 @@ COMPANION_AI_GLOBAL_ENABLED = env.bool("COMPANION_AI_GLOBAL_ENABLED", default=Tr
 # OpenAI API (for vision OCR with gpt-4o-mini, falls back when DeepSeek doesn't support vision)
 OPENAI_API_KEY = env.str("OPENAI_API_KEY", default="")
 
+# Receipt/invoice OCR stage (core.ocr_pipeline)
+OCR_MAX_CONCURRENCY = env.int("OCR_MAX_CONCURRENCY", default=4)
+OCR_REQUESTS_PER_SECOND = env.int("OCR_REQUESTS_PER_SECOND", default=5)
+OCR_MAX_ATTEMPTS = env.int("OCR_MAX_ATTEMPTS", default=3)
+OCR_RETRY_BASE_DELAY_SECONDS = 1.0
+OCR_CACHE_TTL_SECONDS = env.int("OCR_CACHE_TTL_SECONDS", default=7 * 24 * 60 * 60)
+
+# Agentic receipts/invoices runs: when true, run endpoints enqueue a
+# BackgroundJob (processed by `manage.py run_jobs`) and return 202.
+# Clients can override per request with the `background` form field.
+AGENTIC_RUNS_IN_BACKGROUND = env.bool("AGENTIC_RUNS_IN_BACKGROUND", default=False)
+
+# Agentic tracing (agentic.logging.tracing). Records are buffered in memory
+# and exported from a background thread; exporters: stdout, jsonl, sqlite,
+# channels (pushes to the trace_<id> websocket group).
+AGENTIC_TRACING_ENABLED = env.bool("AGENTIC_TRACING_ENABLED", default=True)
+AGENTIC_TRACE_EXPORTERS = _get_list_env("AGENTIC_TRACE_EXPORTERS") or ["stdout"]
+AGENTIC_TRACE_SAMPLE_RATE = float(os.getenv("AGENTIC_TRACE_SAMPLE_RATE", "1.0"))
+AGENTIC_TRACE_BUFFER_SIZE = env.int("AGENTIC_TRACE_BUFFER_SIZE", default=10_000)
+AGENTIC_TRACE_JSONL_PATH = BASE_DIR / "agentic" / "logging" / "logs" / "traces.jsonl"
+AGENTIC_TRACE_SQLITE_PATH = BASE_DIR / "agentic" / "logging" / "logs" / "traces.sqlite3"
+
+# Invoice/expense PDFs: cached in default_storage under a content hash
+# (core.pdf_cache); batch ZIP exports render cache misses on a process pool.
+PDF_CACHE_PREFIX = "pdf-cache"
+PDF_EXPORT_MAX_WORKERS = env.int("PDF_EXPORT_MAX_WORKERS", default=4)
+PDF_EXPORT_MIN_PARALLEL = 4
+PDF_EXPORT_MAX_DOCUMENTS = env.int("PDF_EXPORT_MAX_DOCUMENTS", default=500)
+
+# Invoice email outbox (core.invoice_email_outbox). INVOICE_EMAIL_BACKEND
+# overrides EMAIL_BACKEND for invoice mail only, e.g. the filebased backend
+# for throughput tests.
+INVOICE_EMAIL_ASYNC = env.bool("INVOICE_EMAIL_ASYNC", default=False)
+INVOICE_EMAIL_BACKEND = env.str("INVOICE_EMAIL_BACKEND", default="")
+INVOICE_EMAIL_BATCH_SIZE = env.int("INVOICE_EMAIL_BATCH_SIZE", default=50)
+INVOICE_EMAIL_MAX_ATTEMPTS = env.int("INVOICE_EMAIL_MAX_ATTEMPTS", default=3)
+# SENDING rows claimed longer ago than this belong to a dead dispatcher.
+INVOICE_EMAIL_SENDING_TIMEOUT_SECONDS = env.int("INVOICE_EMAIL_SENDING_TIMEOUT_SECONDS", default=600)
+INVOICE_EMAIL_RETRY_BASE_SECONDS = 60
+
+# Fleet refresh runner (core.fleet_refresh) for nightly per-business tasks.
+FLEET_REFRESH_MAX_WORKERS = env.int("FLEET_REFRESH_MAX_WORKERS", default=1)
+
+# Request latency/error telemetry (core.request_metrics): per-route histograms
+# flushed to RequestLatencySample every REQUEST_METRICS_FLUSH_SECONDS by a
+# background thread. Off by default under `manage.py test`/pytest so its
+# queries never show up in query-count assertions.
+_RUNNING_TESTS = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+REQUEST_METRICS_ENABLED = env.bool("REQUEST_METRICS_ENABLED", default=not _RUNNING_TESTS)
+REQUEST_METRICS_FLUSH_SECONDS = env.int("REQUEST_METRICS_FLUSH_SECONDS", default=30)
+REQUEST_METRICS_RETENTION_HOURS = env.int("REQUEST_METRICS_RETENTION_HOURS", default=48)
+
+# Monitoring metrics (core.metrics): domain collectors run on a thread pool.
+METRICS_COLLECTOR_WORKERS = env.int("METRICS_COLLECTOR_WORKERS", default=4)
+
+# Per-business chart-of-accounts snapshot (core.accounting_defaults), seconds. Shared cache only.
+ACCOUNT_CACHE_TIMEOUT = env.int("ACCOUNT_CACHE_TIMEOUT", default=3600)
+
+# In-process tax jurisdiction catalog (taxes.jurisdiction_catalog): how often a
+# process checks the shared version stamp for edits made elsewhere, seconds.
+JURISDICTION_CATALOG_CHECK_SECONDS = env.int("JURISDICTION_CATALOG_CHECK_SECONDS", default=30)
+
+# Shared cache. Cross-request caches invalidated by a version bump (permission
+# policies, ...) are only used when every process sees the same cache; without
+# CACHE_REDIS_URL each process has its own local-memory cache and they are
+# bypassed (core.utils.shared_cache_configured).
+_cache_redis_url = _optional_env("CACHE_REDIS_URL")
+if _cache_redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": _cache_redis_url,
+        }
+    }
+
+# Per-user permission policies (core.permissions_engine), seconds. Shared cache only.
+PERMISSION_CACHE_TIMEOUT = env.int("PERMISSION_CACHE_TIMEOUT", default=3600)
+
+# Cached cashflow reports (core.services.cashflow), seconds. Shared cache only.
+CASHFLOW_CACHE_TIMEOUT = env.int("CASHFLOW_CACHE_TIMEOUT", default=900)
+
+# Maximum operations accepted by one bulk reconciliation request.
+RECONCILIATION_BULK_MAX_OPERATIONS = env.int("RECONCILIATION_BULK_MAX_OPERATIONS", default=1000)
+
+# Post-import matching/rules stage (core.services.import_matching): bank
+# imports enqueue a BackgroundJob after commit; false runs it in-request.
+BANK_IMPORT_AUTO_APPLY_ASYNC = env.bool("BANK_IMPORT_AUTO_APPLY_ASYNC", default=True)
+
 # --- Sentry & production security hardening ---
 
 SENTRY_DSN = os.getenv("SENTRY_DSN", "")
@@ -3,7 +3,7 @@ from __future__ import annotations
 from decimal import Decimal
 
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Sum
+from django.db.models import Q, Sum
 
 from reversals.models import Allocation, CustomerRefund
 
@@ -84,3 +84,108 @@ def invoice_open_amount(invoice) -> Decimal:
     applied = sum_active_allocations_for_target(business=invoice.business, target_obj=invoice)
     remaining = (base_open or Decimal("0.00")) - applied
     return max(Decimal("0.00"), remaining)
+
+
+# ---------------------------------------------------------------------------
+# Batched variants
+#
+# The helpers above answer one document at a time. List endpoints serialize up
+# to a few hundred memos/deposits per customer, so these compute the same
+# figures for a whole set of ids with one grouped query each.
+# ---------------------------------------------------------------------------
+
+
+def active_allocations_by_source(*, business, source_model, source_ids) -> dict[int, dict]:
+    """
+    Group ACTIVE allocations for many sources in one query.
+
+    Returns {source_id: {"total": Decimal, "targets": {(target_ct_id, target_id): Decimal}}}.
+    """
+    source_ids = list(source_ids)
+    if not source_ids:
+        return {}
+    ct = ContentType.objects.get_for_model(source_model)
+    rows = (
+        Allocation.objects.filter(
+            business=business,
+            status=Allocation.Status.ACTIVE,
+            source_content_type=ct,
+            source_object_id__in=source_ids,
+        )
+        .values("source_object_id", "target_content_type_id", "target_object_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    grouped: dict[int, dict] = {}
+    for row in rows:
+        entry = grouped.setdefault(row["source_object_id"], {"total": Decimal("0.00"), "targets": {}})
+        amount = Decimal(row["total"] or Decimal("0.00"))
+        entry["total"] += amount
+        key = (row["target_content_type_id"], row["target_object_id"])
+        entry["targets"][key] = entry["targets"].get(key, Decimal("0.00")) + amount
+    return grouped
+
+
+def active_allocation_totals_by_target(*, business, target_model, target_ids) -> dict[int, Decimal]:
+    target_ids = list(target_ids)
+    if not target_ids:
+        return {}
+    ct = ContentType.objects.get_for_model(target_model)
+    rows = (
+        Allocation.objects.filter(
+            business=business,
+            status=Allocation.Status.ACTIVE,
+            target_content_type=ct,
+            target_object_id__in=target_ids,
+        )
+        .values("target_object_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    return {row["target_object_id"]: Decimal(row["total"] or Decimal("0.00")) for row in rows}
+
+
+def posted_refund_totals(*, business, credit_memo_ids=(), deposit_ids=()) -> tuple[dict[int, Decimal], dict[int, Decimal]]:
+    """Return ({credit_memo_id: total}, {deposit_id: total}) of POSTED refunds."""
+    credit_memo_ids = list(credit_memo_ids)
+    deposit_ids = list(deposit_ids)
+    by_memo: dict[int, Decimal] = {}
+    by_deposit: dict[int, Decimal] = {}
+    if not credit_memo_ids and not deposit_ids:
+        return by_memo, by_deposit
+
+    scope = Q()
+    if credit_memo_ids:
+        scope |= Q(credit_memo_id__in=credit_memo_ids)
+    if deposit_ids:
+        scope |= Q(deposit_id__in=deposit_ids)
+    rows = (
+        CustomerRefund.objects.filter(scope, business=business, status=CustomerRefund.Status.POSTED)
+        .values("credit_memo_id", "deposit_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    for row in rows:
+        total = Decimal(row["total"] or Decimal("0.00"))
+        if row["credit_memo_id"] is not None:
+            by_memo[row["credit_memo_id"]] = by_memo.get(row["credit_memo_id"], Decimal("0.00")) + total
+        if row["deposit_id"] is not None:
+            by_deposit[row["deposit_id"]] = by_deposit.get(row["deposit_id"], Decimal("0.00")) + total
+    return by_memo, by_deposit
+
+
+def invoice_open_amounts(invoices, *, business) -> dict[int, Decimal]:
+    """Batched `invoice_open_amount` for invoices of one business."""
+    invoices = list(invoices)
+    applied_by_invoice = active_allocation_totals_by_target(
+        business=business,
+        target_model=invoices[0].__class__ if invoices else None,
+        target_ids=[inv.pk for inv in invoices],
+    )
+    result: dict[int, Decimal] = {}
+    for invoice in invoices:
+        total = invoice.grand_total or (invoice.net_total + invoice.tax_total)
+        base_open = (total or Decimal("0.00")) - (invoice.amount_paid or Decimal("0.00"))
+        remaining = (base_open or Decimal("0.00")) - applied_by_invoice.get(invoice.pk, Decimal("0.00"))
+        result[invoice.pk] = max(Decimal("0.00"), remaining)
+    return result
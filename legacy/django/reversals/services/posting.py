@@ -8,7 +8,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
-from core.accounting_defaults import ensure_default_accounts
+from core.accounting_defaults import ensure_default_accounts, get_account_by_code
 from core.models import Account, Invoice, JournalEntry, JournalLine
 from taxes.models import TransactionLineTaxDetail
 from taxes.postings import add_sales_tax_lines
@@ -26,7 +26,7 @@ from reversals.services.tax_inheritance import (
 
 
 def _get_account(business, code: str) -> Account:
-    return Account.objects.get(business=business, code=code)
+    return get_account_by_code(business, code)
 
 
 def _create_entry(*, business, source, date_value, description: str, allocation_operation_id: str | None = None) -> JournalEntry:
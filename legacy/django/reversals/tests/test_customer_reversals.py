@@ -2,14 +2,16 @@ from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from core.accounting_defaults import ensure_default_accounts
 from core.models import BankAccount, BankTransaction, Business, Customer, Invoice, JournalEntry
 from core.reconciliation import Allocation as BankAllocation
 from core.reconciliation import allocate_bank_transaction
-from reversals.models import CustomerCreditMemo, CustomerDeposit, CustomerRefund
+from reversals.models import Allocation, CustomerCreditMemo, CustomerDeposit, CustomerRefund
 from reversals.services.posting import (
     apply_customer_deposit_to_invoices,
     post_customer_credit_memo,
@@ -240,3 +242,98 @@ class CustomerReversalsTests(TestCase):
         dep_entry.refresh_from_db()
         self.assertEqual(deposit.status, CustomerDeposit.Status.VOIDED)
         self.assertTrue(dep_entry.is_void)
+
+    def _seed_customer_documents(self, count: int, *, bank_account, invoice) -> None:
+        memos = CustomerCreditMemo.objects.bulk_create(
+            [
+                CustomerCreditMemo(
+                    business=self.business,
+                    customer=self.customer,
+                    status=CustomerCreditMemo.Status.POSTED,
+                    net_total=Decimal("10.00"),
+                    grand_total=Decimal("10.00"),
+                )
+                for _ in range(count)
+            ]
+        )
+        deposits = CustomerDeposit.objects.bulk_create(
+            [
+                CustomerDeposit(
+                    business=self.business,
+                    customer=self.customer,
+                    bank_account=bank_account,
+                    status=CustomerDeposit.Status.POSTED,
+                    amount=Decimal("20.00"),
+                    currency=self.business.currency,
+                )
+                for _ in range(count)
+            ]
+        )
+        invoice_ct = ContentType.objects.get_for_model(Invoice)
+        allocations = []
+        for source in memos + deposits:
+            allocations.append(
+                Allocation(
+                    business=self.business,
+                    ledger_side=Allocation.LedgerSide.CUSTOMER,
+                    source_content_type=ContentType.objects.get_for_model(source.__class__),
+                    source_object_id=source.pk,
+                    target_content_type=invoice_ct,
+                    target_object_id=invoice.pk,
+                    amount=Decimal("1.00"),
+                    currency=self.business.currency,
+                )
+            )
+        Allocation.objects.bulk_create(allocations)
+        CustomerRefund.objects.bulk_create(
+            [
+                CustomerRefund(
+                    business=self.business,
+                    customer=self.customer,
+                    bank_account=bank_account,
+                    status=CustomerRefund.Status.POSTED,
+                    amount=Decimal("2.00"),
+                    currency=self.business.currency,
+                    credit_memo=memo,
+                )
+                for memo in memos
+            ]
+        )
+
+    def test_reversal_list_endpoints_use_constant_queries(self):
+        bank_account = BankAccount.objects.create(
+            business=self.business,
+            name="Main",
+            usage_role=BankAccount.UsageRole.OPERATING,
+            account=self.defaults["cash"],
+        )
+        invoice = self._create_invoice(invoice_number="INV-BATCH", net=Decimal("1000.00"))
+        self.client.force_login(self.user)
+        urls = [
+            f"/api/reversals/customers/{self.customer.id}/credit-memos/",
+            f"/api/reversals/customers/{self.customer.id}/deposits/",
+            f"/api/reversals/customers/{self.customer.id}/summary/",
+        ]
+
+        self._seed_customer_documents(2, bank_account=bank_account, invoice=invoice)
+        baseline = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            baseline[url] = len(ctx.captured_queries)
+
+        self._seed_customer_documents(150, bank_account=bank_account, invoice=invoice)
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(ctx.captured_queries), baseline[url], url)
+
+        memos = self.client.get(urls[0]).json()["credit_memos"]
+        self.assertEqual(len(memos), 152)
+        self.assertEqual(memos[0]["available_amount"], "7.00")
+        self.assertEqual(memos[0]["refunded_total"], "2.00")
+        self.assertEqual(memos[0]["linked_invoices"], [{"invoice_id": invoice.id, "invoice_number": "INV-BATCH", "amount": "1.00"}])
+        deposits = self.client.get(urls[1]).json()["deposits"]
+        self.assertEqual(deposits[0]["available_amount"], "19.00")
@@ -6,7 +6,6 @@ from decimal import Decimal, InvalidOperation
 
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Sum
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
@@ -16,11 +15,9 @@ from core.models import Customer, Invoice
 from core.utils import get_current_business
 from reversals.models import Allocation, CustomerCreditMemo, CustomerDeposit, CustomerRefund
 from reversals.services.allocations import (
-    credit_memo_available_amount,
-    deposit_available_amount,
-    invoice_open_amount,
-    sum_posted_refunds_for_credit_memo,
-    sum_posted_refunds_for_deposit,
+    active_allocations_by_source,
+    invoice_open_amounts,
+    posted_refund_totals,
 )
 from reversals.services.posting import (
     allocate_credit_memo_to_invoices,
@@ -57,98 +54,106 @@ def _serialize_money(value: Decimal | None) -> str:
     return f"{Decimal(value or Decimal('0.00')):.2f}"
 
 
-def _serialize_credit_memo(business, memo: CustomerCreditMemo) -> dict:
-    available = credit_memo_available_amount(memo)
-    refunded = sum_posted_refunds_for_credit_memo(credit_memo=memo)
-
+def _linked_invoices_by_source(business, allocations_by_source: dict) -> dict[int, list[dict]]:
     invoice_ct = ContentType.objects.get_for_model(Invoice)
-    memo_ct = ContentType.objects.get_for_model(CustomerCreditMemo)
-    allocations_by_invoice = (
-        Allocation.objects.filter(
-            business=business,
-            status=Allocation.Status.ACTIVE,
-            source_content_type=memo_ct,
-            source_object_id=memo.pk,
-            target_content_type=invoice_ct,
+    pairs_by_source = {
+        source_id: sorted(
+            (target_id, amount)
+            for (target_ct_id, target_id), amount in entry["targets"].items()
+            if target_ct_id == invoice_ct.id
         )
-        .values("target_object_id")
-        .annotate(total=Sum("amount"))
-    )
-    invoice_ids = [row["target_object_id"] for row in allocations_by_invoice]
-    invoices = {
-        inv.id: inv
-        for inv in Invoice.objects.filter(business=business, id__in=invoice_ids).only("id", "invoice_number")
+        for source_id, entry in allocations_by_source.items()
     }
-    linked = [
-        {
-            "invoice_id": row["target_object_id"],
-            "invoice_number": getattr(invoices.get(row["target_object_id"]), "invoice_number", ""),
-            "amount": _serialize_money(row["total"]),
-        }
-        for row in allocations_by_invoice
-    ]
-
+    invoice_ids = {target_id for pairs in pairs_by_source.values() for target_id, _ in pairs}
+    invoice_numbers = dict(
+        Invoice.objects.filter(business=business, id__in=invoice_ids).values_list("id", "invoice_number")
+    ) if invoice_ids else {}
     return {
-        "id": memo.id,
-        "credit_memo_number": memo.credit_memo_number,
-        "posting_date": memo.posting_date.isoformat() if memo.posting_date else None,
-        "status": memo.status,
-        "memo": memo.memo or "",
-        "net_total": _serialize_money(memo.net_total),
-        "tax_total": _serialize_money(memo.tax_total),
-        "grand_total": _serialize_money(memo.grand_total),
-        "available_amount": _serialize_money(max(Decimal("0.00"), available)),
-        "refunded_total": _serialize_money(refunded),
-        "source_invoice_id": memo.source_invoice_id,
-        "source_invoice_number": getattr(memo.source_invoice, "invoice_number", None) if memo.source_invoice_id else None,
-        "linked_invoices": linked,
+        source_id: [
+            {
+                "invoice_id": target_id,
+                "invoice_number": invoice_numbers.get(target_id, ""),
+                "amount": _serialize_money(amount),
+            }
+            for target_id, amount in pairs
+        ]
+        for source_id, pairs in pairs_by_source.items()
     }
 
 
-def _serialize_deposit(business, deposit: CustomerDeposit) -> dict:
-    available = deposit_available_amount(deposit)
-    refunded = sum_posted_refunds_for_deposit(deposit=deposit)
+def _serialize_credit_memos(business, memos) -> list[dict]:
+    """
+    Serialize many credit memos with a fixed number of queries: one grouped
+    allocation query, one grouped refund query and one invoice-number lookup.
+    """
+    memos = list(memos)
+    memo_ids = [m.pk for m in memos]
+    allocations = active_allocations_by_source(business=business, source_model=CustomerCreditMemo, source_ids=memo_ids)
+    refunds_by_memo, _ = posted_refund_totals(business=business, credit_memo_ids=memo_ids)
+    linked_by_memo = _linked_invoices_by_source(business, allocations)
+
+    results = []
+    for memo in memos:
+        allocated = allocations.get(memo.pk, {}).get("total", Decimal("0.00"))
+        refunded = refunds_by_memo.get(memo.pk, Decimal("0.00"))
+        available = (memo.grand_total or Decimal("0.00")) - allocated - refunded
+        results.append(
+            {
+                "id": memo.id,
+                "credit_memo_number": memo.credit_memo_number,
+                "posting_date": memo.posting_date.isoformat() if memo.posting_date else None,
+                "status": memo.status,
+                "memo": memo.memo or "",
+                "net_total": _serialize_money(memo.net_total),
+                "tax_total": _serialize_money(memo.tax_total),
+                "grand_total": _serialize_money(memo.grand_total),
+                "available_amount": _serialize_money(max(Decimal("0.00"), available)),
+                "refunded_total": _serialize_money(refunded),
+                "source_invoice_id": memo.source_invoice_id,
+                "source_invoice_number": getattr(memo.source_invoice, "invoice_number", None) if memo.source_invoice_id else None,
+                "linked_invoices": linked_by_memo.get(memo.pk, []),
+            }
+        )
+    return results
 
-    invoice_ct = ContentType.objects.get_for_model(Invoice)
-    deposit_ct = ContentType.objects.get_for_model(CustomerDeposit)
-    allocations_by_invoice = (
-        Allocation.objects.filter(
-            business=business,
-            status=Allocation.Status.ACTIVE,
-            source_content_type=deposit_ct,
-            source_object_id=deposit.pk,
-            target_content_type=invoice_ct,
+
+def _serialize_credit_memo(business, memo: CustomerCreditMemo) -> dict:
+    return _serialize_credit_memos(business, [memo])[0]
+
+
+def _serialize_deposits(business, deposits) -> list[dict]:
+    """Batch counterpart of `_serialize_credit_memos` for customer deposits."""
+    deposits = list(deposits)
+    deposit_ids = [d.pk for d in deposits]
+    allocations = active_allocations_by_source(business=business, source_model=CustomerDeposit, source_ids=deposit_ids)
+    _, refunds_by_deposit = posted_refund_totals(business=business, deposit_ids=deposit_ids)
+    linked_by_deposit = _linked_invoices_by_source(business, allocations)
+
+    results = []
+    for deposit in deposits:
+        allocated = allocations.get(deposit.pk, {}).get("total", Decimal("0.00"))
+        refunded = refunds_by_deposit.get(deposit.pk, Decimal("0.00"))
+        available = (deposit.amount or Decimal("0.00")) - allocated - refunded
+        results.append(
+            {
+                "id": deposit.id,
+                "posting_date": deposit.posting_date.isoformat() if deposit.posting_date else None,
+                "status": deposit.status,
+                "memo": deposit.memo or "",
+                "amount": _serialize_money(deposit.amount),
+                "currency": deposit.currency,
+                "available_amount": _serialize_money(max(Decimal("0.00"), available)),
+                "refunded_total": _serialize_money(refunded),
+                "bank_account_id": deposit.bank_account_id,
+                "bank_account_name": getattr(deposit.bank_account, "name", ""),
+                "linked_invoices": linked_by_deposit.get(deposit.pk, []),
+            }
         )
-        .values("target_object_id")
-        .annotate(total=Sum("amount"))
-    )
-    invoice_ids = [row["target_object_id"] for row in allocations_by_invoice]
-    invoices = {
-        inv.id: inv
-        for inv in Invoice.objects.filter(business=business, id__in=invoice_ids).only("id", "invoice_number")
-    }
-    linked = [
-        {
-            "invoice_id": row["target_object_id"],
-            "invoice_number": getattr(invoices.get(row["target_object_id"]), "invoice_number", ""),
-            "amount": _serialize_money(row["total"]),
-        }
-        for row in allocations_by_invoice
-    ]
+    return results
 
-    return {
-        "id": deposit.id,
-        "posting_date": deposit.posting_date.isoformat() if deposit.posting_date else None,
-        "status": deposit.status,
-        "memo": deposit.memo or "",
-        "amount": _serialize_money(deposit.amount),
-        "currency": deposit.currency,
-        "available_amount": _serialize_money(max(Decimal("0.00"), available)),
-        "refunded_total": _serialize_money(refunded),
-        "bank_account_id": deposit.bank_account_id,
-        "bank_account_name": getattr(deposit.bank_account, "name", ""),
-        "linked_invoices": linked,
-    }
+
+def _serialize_deposit(business, deposit: CustomerDeposit) -> dict:
+    return _serialize_deposits(business, [deposit])[0]
 
 
 def _serialize_refund(refund: CustomerRefund) -> dict:
@@ -182,21 +187,48 @@ def api_customer_reversals_summary(request, customer_id: int):
         .only("id", "balance", "grand_total", "net_total", "tax_total", "amount_paid", "status")
         .order_by("-issue_date")[:200]
     )
-    open_ar = sum((invoice_open_amount(inv) for inv in invoices if inv.status in (Invoice.Status.SENT, Invoice.Status.PARTIAL)), Decimal("0.00"))
+    open_invoices = [inv for inv in invoices if inv.status in (Invoice.Status.SENT, Invoice.Status.PARTIAL)]
+    open_ar = sum(invoice_open_amounts(open_invoices, business=business).values(), Decimal("0.00"))
 
     credit_memos = list(
         CustomerCreditMemo.objects.filter(
             business=business, customer=customer, status=CustomerCreditMemo.Status.POSTED
         ).only("id", "grand_total", "customer_id", "status")
     )
-    open_credits = sum((max(Decimal("0.00"), credit_memo_available_amount(cm)) for cm in credit_memos), Decimal("0.00"))
-
     deposits = list(
         CustomerDeposit.objects.filter(
             business=business, customer=customer, status=CustomerDeposit.Status.POSTED
         ).only("id", "amount", "currency", "customer_id", "status")
     )
-    deposit_balance = sum((max(Decimal("0.00"), deposit_available_amount(dep)) for dep in deposits), Decimal("0.00"))
+    memo_allocations = active_allocations_by_source(
+        business=business, source_model=CustomerCreditMemo, source_ids=[cm.pk for cm in credit_memos]
+    )
+    deposit_allocations = active_allocations_by_source(
+        business=business, source_model=CustomerDeposit, source_ids=[dep.pk for dep in deposits]
+    )
+    refunds_by_memo, refunds_by_deposit = posted_refund_totals(
+        business=business,
+        credit_memo_ids=[cm.pk for cm in credit_memos],
+        deposit_ids=[dep.pk for dep in deposits],
+    )
+
+    open_credits = Decimal("0.00")
+    for cm in credit_memos:
+        available = (
+            (cm.grand_total or Decimal("0.00"))
+            - memo_allocations.get(cm.pk, {}).get("total", Decimal("0.00"))
+            - refunds_by_memo.get(cm.pk, Decimal("0.00"))
+        )
+        open_credits += max(Decimal("0.00"), available)
+
+    deposit_balance = Decimal("0.00")
+    for dep in deposits:
+        available = (
+            (dep.amount or Decimal("0.00"))
+            - deposit_allocations.get(dep.pk, {}).get("total", Decimal("0.00"))
+            - refunds_by_deposit.get(dep.pk, Decimal("0.00"))
+        )
+        deposit_balance += max(Decimal("0.00"), available)
 
     return JsonResponse(
         {
@@ -227,7 +259,7 @@ def api_customer_credit_memos(request, customer_id: int):
     )
     return JsonResponse(
         {
-            "credit_memos": [_serialize_credit_memo(business, m) for m in memos],
+            "credit_memos": _serialize_credit_memos(business, memos),
             "currency": business.currency,
         }
     )
@@ -429,7 +461,7 @@ def api_customer_deposits(request, customer_id: int):
     )
     return JsonResponse(
         {
-            "deposits": [_serialize_deposit(business, d) for d in deposits],
+            "deposits": _serialize_deposits(business, deposits),
             "currency": business.currency,
         }
     )
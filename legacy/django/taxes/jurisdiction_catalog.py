@@ -0,0 +1,178 @@
+"""
+Process-wide, read-only catalog of tax jurisdictions.
+
+Jurisdictions are global reference data that change only through the tax
+catalog import and staff catalog edits, yet invoice sourcing looked them up
+with a query per check. `get_jurisdiction_catalog()` returns an immutable
+snapshot (codes, sourcing rules, parent/child index) loaded with one query and
+shared by every thread of the process.
+
+Freshness is tracked with the `TaxJurisdictionCatalogVersion` row, which every
+process reads from the database:
+
+- `TaxJurisdiction` post_save/post_delete and the catalog import call
+  `jurisdictions_changed()`, which bumps the version inside the writing
+  transaction and drops this process's snapshot (again on commit);
+- other processes compare their snapshot's version with the row at most
+  every JURISDICTION_CATALOG_CHECK_SECONDS and reload when it moved;
+- while the current transaction has uncommitted jurisdiction writes, reads get
+  a private snapshot that is never shared, so a rollback cannot leak rows.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from taxes.models import TaxJurisdiction, TaxJurisdictionCatalogVersion
+
+
+@dataclass(frozen=True)
+class Jurisdiction:
+    code: str
+    name: str
+    jurisdiction_type: str
+    country_code: str
+    region_code: str
+    sourcing_rule: str
+    parent_code: Optional[str]
+    is_active: bool
+
+
+class JurisdictionCatalog:
+    """Immutable snapshot of TaxJurisdiction rows indexed by code."""
+
+    __slots__ = ("stamp", "_by_code", "_children")
+
+    def __init__(self, jurisdictions, *, stamp=None):
+        by_code = {j.code: j for j in jurisdictions}
+        children: dict[str, list[str]] = {}
+        for j in by_code.values():
+            if j.parent_code:
+                children.setdefault(j.parent_code, []).append(j.code)
+        self.stamp = stamp
+        self._by_code: Mapping[str, Jurisdiction] = MappingProxyType(by_code)
+        self._children: Mapping[str, tuple[str, ...]] = MappingProxyType(
+            {code: tuple(sorted(kids)) for code, kids in children.items()}
+        )
+
+    @classmethod
+    def load(cls, *, stamp=None) -> "JurisdictionCatalog":
+        rows = TaxJurisdiction.objects.order_by().values_list(
+            "code",
+            "name",
+            "jurisdiction_type",
+            "country_code",
+            "region_code",
+            "sourcing_rule",
+            "parent__code",
+            "is_active",
+        )
+        return cls((Jurisdiction(*row) for row in rows), stamp=stamp)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def __contains__(self, code) -> bool:
+        return code in self._by_code
+
+    def get(self, code: str | None) -> Optional[Jurisdiction]:
+        return self._by_code.get(code) if code else None
+
+    def exists(self, code: str | None) -> bool:
+        return bool(code) and code in self._by_code
+
+    def children(self, code: str) -> tuple[str, ...]:
+        return self._children.get(code, ())
+
+    def ancestors(self, code: str) -> tuple[str, ...]:
+        """Parent chain of `code`, nearest first (e.g. US-CA-SF -> ("US-CA", "US"))."""
+        chain = []
+        current = self.get(code)
+        while current is not None and current.parent_code and current.parent_code not in chain:
+            chain.append(current.parent_code)
+            current = self.get(current.parent_code)
+        return tuple(chain)
+
+    def state_sourcing_rule(self, state_code: str | None) -> str:
+        """Sourcing rule of a STATE jurisdiction; DESTINATION when unknown."""
+        j = self.get(state_code)
+        if j is None or j.jurisdiction_type != TaxJurisdiction.JurisdictionType.STATE:
+            return TaxJurisdiction.SourcingRule.DESTINATION
+        return j.sourcing_rule or TaxJurisdiction.SourcingRule.DESTINATION
+
+
+_lock = threading.Lock()
+_catalog: Optional[JurisdictionCatalog] = None
+_checked_at = 0.0
+
+
+def _current_stamp() -> int:
+    version = TaxJurisdictionCatalogVersion.objects.order_by("pk").values_list("version", flat=True).first()
+    return version or 0
+
+
+def _bump_stamp() -> None:
+    if not TaxJurisdictionCatalogVersion.objects.update(version=F("version") + 1):
+        TaxJurisdictionCatalogVersion.objects.create(version=1)
+
+
+def invalidate_jurisdiction_catalog() -> None:
+    """Drop this process's snapshot; the next read reloads it."""
+    global _catalog
+    with _lock:
+        _catalog = None
+
+
+# Per-thread flag: this thread's transaction wrote jurisdictions that are not
+# committed yet. Set by jurisdictions_changed() and cleared by its on_commit
+# callback. A rollback discards the callback, so the flag is also dropped as
+# soon as the thread is seen outside a transaction; until then (e.g. after a
+# rolled-back savepoint) reads just keep using private snapshots.
+_pending = threading.local()
+
+
+def _on_commit() -> None:
+    _pending.writes = False
+    invalidate_jurisdiction_catalog()
+
+
+def _has_uncommitted_writes() -> bool:
+    if not connection.in_atomic_block:
+        _pending.writes = False
+        return False
+    return getattr(_pending, "writes", False)
+
+
+def get_jurisdiction_catalog() -> JurisdictionCatalog:
+    global _catalog, _checked_at
+    if _has_uncommitted_writes():
+        return JurisdictionCatalog.load()
+
+    catalog = _catalog
+    now = time.monotonic()
+    check_seconds = float(getattr(settings, "JURISDICTION_CATALOG_CHECK_SECONDS", 30))
+    if catalog is not None and now - _checked_at < check_seconds:
+        return catalog
+
+    stamp = _current_stamp()
+    with _lock:
+        if _catalog is None or _catalog.stamp != stamp:
+            _catalog = JurisdictionCatalog.load(stamp=stamp)
+        _checked_at = now
+        return _catalog
+
+
+def jurisdictions_changed() -> None:
+    """Call after writing TaxJurisdiction rows (signals cover save/delete)."""
+    _bump_stamp()
+    invalidate_jurisdiction_catalog()
+    if connection.in_atomic_block:
+        _pending.writes = True
+        transaction.on_commit(_on_commit)
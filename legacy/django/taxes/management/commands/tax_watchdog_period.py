@@ -1,19 +1,27 @@
 from django.core.management.base import BaseCommand, CommandError
 
+from core.fleet_refresh import Outcome, run_fleet_refresh
 from core.models import Business
 from taxes.services import compute_tax_anomalies, compute_tax_period_snapshot
 
 
 class Command(BaseCommand):
-    help = "Run deterministic tax anomaly checks for a business/period."
+    help = "Run deterministic tax anomaly checks for a business/period, or for every active business."
 
     def add_arguments(self, parser):
-        parser.add_argument("--business-id", required=True, help="Business UUID/ID")
-        parser.add_argument("--period", required=True, help="Period key, e.g., 2025Q2 or 2025-04")
+        parser.add_argument("--business-id", help="Business UUID/ID (omit to run for all active businesses)")
+        parser.add_argument("--period", help="Period key, e.g., 2025Q2 or 2025-04 (default: current month)")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes for fleet runs.")
+        parser.add_argument("--run-id", default=None, help="Resume an interrupted fleet run.")
+        parser.add_argument("--force", action="store_true", help="Re-check businesses whose period data is unchanged.")
 
     def handle(self, *args, **options):
         business_id = options["business_id"]
         period_key = options["period"]
+        if not business_id:
+            return self._handle_fleet(period_key, options)
+        if not period_key:
+            raise CommandError("--period is required with --business-id")
         try:
             business = Business.objects.get(pk=business_id)
         except Business.DoesNotExist:
@@ -28,3 +36,26 @@ class Command(BaseCommand):
                 f"Watchdog complete for business={business.id} period={period_key}. Anomalies: {codes or 'none'}"
             )
         )
+
+    def _handle_fleet(self, period_key, options):
+        def on_result(result):
+            if result.outcome == Outcome.ERROR:
+                self.stderr.write(f"[tax] Watchdog failed for business {result.business_id}: {result.error}")
+            elif options["verbosity"] >= 2:
+                self.stdout.write(f"business={result.business_id} {result.outcome} {result.duration_ms}ms")
+
+        report = run_fleet_refresh(
+            "tax_watchdog",
+            workers=options["workers"],
+            run_id=options["run_id"],
+            force=options["force"],
+            options={"period": period_key} if period_key else {},
+            on_result=on_result,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Watchdog complete for {len(report.results)} businesses | checked={report.count(Outcome.REFRESHED)} "
+                f"| unchanged={report.count(Outcome.SKIPPED)} | resumed={report.resumed} "
+                f"| errors={report.count(Outcome.ERROR)} | {report.duration_ms}ms | run_id={report.run_id}"
+            )
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    apps.get_model("taxes", "TaxJurisdictionCatalogVersion").objects.create(version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taxes", "0020_transactionlinetaxdetail_document_side"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaxJurisdictionCatalogVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -355,6 +355,20 @@ class TaxJurisdiction(models.Model):
         return f"{self.code} – {self.name}"
 
 
+class TaxJurisdictionCatalogVersion(models.Model):
+    """
+    Single-row counter bumped with every TaxJurisdiction write.
+
+    Processes compare it with the version of their cached jurisdiction catalog;
+    the bump commits (or rolls back) together with the write.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Jurisdiction catalog v{self.version}"
+
+
 class TaxProductRule(models.Model):
     """
     Taxability rule for a product category within a jurisdiction.
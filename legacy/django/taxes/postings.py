@@ -2,7 +2,8 @@ from collections import defaultdict
 from decimal import Decimal
 from typing import Iterable, Tuple
 
-from core.models import JournalEntry, JournalLine, Account
+from core.accounting_defaults import get_accounts_by_code
+from core.models import JournalEntry, JournalLine
 from .models import TransactionLineTaxDetail
 
 
@@ -21,10 +22,7 @@ def add_sales_tax_lines(
         account = detail.tax_component.default_coa_account
         if detail.tax_component.is_recoverable:
             # On sales/output, credit liability even if component is recoverable on purchases.
-            account = (
-                Account.objects.filter(business=detail.business, code="2300").first()
-                or account
-            )
+            account = get_accounts_by_code(detail.business).get("2300") or account
         if account is None:
             continue
         totals_by_account[account.id] += detail.tax_amount_home_currency_cad
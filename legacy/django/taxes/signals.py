@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from core.models import Business
 from .bootstrap import seed_canadian_defaults
+from .jurisdiction_catalog import jurisdictions_changed
+from .models import TaxJurisdiction
 
 
 @receiver(post_save, sender=Business)
@@ -11,3 +13,8 @@ def seed_tax_defaults_on_business_create(sender, instance, created, raw, **kwarg
         return
     seed_canadian_defaults(instance)
 
+
+@receiver(post_save, sender=TaxJurisdiction)
+@receiver(post_delete, sender=TaxJurisdiction)
+def refresh_jurisdiction_catalog(sender, instance, **kwargs):
+    jurisdictions_changed()
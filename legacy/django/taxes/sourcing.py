@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 
+from taxes.jurisdiction_catalog import get_jurisdiction_catalog
 from taxes.models import TaxJurisdiction
 
 
@@ -100,12 +101,7 @@ def resolve_ca_jurisdiction_for_invoice(invoice, business) -> str:
 def _get_us_state_sourcing_rule(state_code: str | None) -> str:
     if not state_code or not state_code.startswith("US-"):
         return TaxJurisdiction.SourcingRule.DESTINATION
-    row = (
-        TaxJurisdiction.objects.filter(code=state_code, jurisdiction_type=TaxJurisdiction.JurisdictionType.STATE)
-        .only("sourcing_rule")
-        .first()
-    )
-    return (row.sourcing_rule if row else TaxJurisdiction.SourcingRule.DESTINATION) or TaxJurisdiction.SourcingRule.DESTINATION
+    return get_jurisdiction_catalog().state_sourcing_rule(state_code)
 
 
 _LOCAL_DISTRICT_HINTS: dict[str, list[str]] = {
@@ -115,7 +111,7 @@ _LOCAL_DISTRICT_HINTS: dict[str, list[str]] = {
 
 
 def _jurisdiction_exists(code: str) -> bool:
-    return TaxJurisdiction.objects.filter(code=code).exists()
+    return get_jurisdiction_catalog().exists(code)
 
 
 def resolve_us_jurisdictions_for_invoice(invoice, business) -> list[str]:
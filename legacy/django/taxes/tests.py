@@ -5,8 +5,10 @@ from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from core.models import (
@@ -25,7 +27,9 @@ from taxes.reporting import (
     net_tax_position,
     get_us_sales_tax_summary,
 )
+from . import jurisdiction_catalog
 from .bootstrap import seed_canadian_defaults
+from .jurisdiction_catalog import get_jurisdiction_catalog
 from .models import (
     TaxComponent,
     TaxGroup,
@@ -39,6 +43,7 @@ from .models import (
 )
 from .services import TaxEngine, compute_tax_anomalies, compute_tax_period_snapshot
 from .services import compute_tax_due_date
+from .sourcing import _get_us_state_sourcing_rule, _jurisdiction_exists
 
 
 class TaxSeedingTests(TestCase):
@@ -1641,3 +1646,93 @@ class TaxObserverPipelineTests(TestCase):
         snap.refresh_from_db()
         self.assertIn("Stable net tax", snap.llm_summary)
         self.assertIn("Review open anomalies", snap.llm_notes)
+
+
+class JurisdictionCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.state = TaxJurisdiction.objects.create(
+                code="US-ZQ",
+                name="Test State",
+                jurisdiction_type=TaxJurisdiction.JurisdictionType.STATE,
+                country_code="US",
+                region_code="ZQ",
+                sourcing_rule=TaxJurisdiction.SourcingRule.HYBRID,
+            )
+            TaxJurisdiction.objects.create(
+                code="US-ZQ-CTY",
+                name="Test City",
+                jurisdiction_type=TaxJurisdiction.JurisdictionType.CITY,
+                country_code="US",
+                region_code="ZQ",
+                parent=self.state,
+            )
+
+    def _city(self, code):
+        return TaxJurisdiction.objects.create(
+            code=code,
+            name=code,
+            jurisdiction_type=TaxJurisdiction.JurisdictionType.CITY,
+            country_code="US",
+            region_code="ZQ",
+            parent=self.state,
+        )
+
+    def test_warm_catalog_answers_sourcing_lookups_without_queries(self):
+        get_jurisdiction_catalog()  # warm
+        with self.assertNumQueries(0):
+            self.assertTrue(_jurisdiction_exists("US-ZQ-CTY"))
+            self.assertFalse(_jurisdiction_exists("US-ZQ-NOPE"))
+            self.assertEqual(_get_us_state_sourcing_rule("US-ZQ"), TaxJurisdiction.SourcingRule.HYBRID)
+            self.assertEqual(_get_us_state_sourcing_rule("US-ZQ-CTY"), TaxJurisdiction.SourcingRule.DESTINATION)
+            catalog = get_jurisdiction_catalog()
+            self.assertEqual(catalog.ancestors("US-ZQ-CTY"), ("US-ZQ",))
+            self.assertEqual(catalog.children("US-ZQ"), ("US-ZQ-CTY",))
+
+    def test_committed_edits_refresh_the_catalog(self):
+        get_jurisdiction_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.state.sourcing_rule = TaxJurisdiction.SourcingRule.ORIGIN
+            self.state.save(update_fields=["sourcing_rule"])
+            self._city("US-ZQ-OAK")
+        self.assertEqual(_get_us_state_sourcing_rule("US-ZQ"), TaxJurisdiction.SourcingRule.ORIGIN)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_jurisdiction_catalog().children("US-ZQ"), ("US-ZQ-CTY", "US-ZQ-OAK"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TaxJurisdiction.objects.get(code="US-ZQ-OAK").delete()
+        self.assertFalse(_jurisdiction_exists("US-ZQ-OAK"))
+
+    def test_uncommitted_edits_are_read_fresh_not_shared(self):
+        get_jurisdiction_catalog()
+        self._city("US-ZQ-AUS")  # no commit
+        with self.assertNumQueries(1):
+            self.assertTrue(_jurisdiction_exists("US-ZQ-AUS"))
+        self.assertIsNone(jurisdiction_catalog._catalog)
+
+    def test_rolled_back_write_does_not_keep_reads_private(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self._city("US-ZQ-TMP")
+                raise RuntimeError("rolled back")
+            self._city("US-ZQ-OAK")
+        get_jurisdiction_catalog()
+        with self.assertNumQueries(0):
+            self.assertFalse(_jurisdiction_exists("US-ZQ-TMP"))
+            self.assertTrue(_jurisdiction_exists("US-ZQ-OAK"))
+
+    @override_settings(JURISDICTION_CATALOG_CHECK_SECONDS=0)
+    def test_write_from_another_process_is_seen_without_a_shared_cache(self):
+        get_jurisdiction_catalog()
+        cache.clear()
+        # Another process commits a write: the version row moves, but this
+        # process's snapshot and local cache are never told about it.
+        with patch.object(jurisdiction_catalog, "invalidate_jurisdiction_catalog"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self._city("US-ZQ-REN")
+        self.assertIsNotNone(jurisdiction_catalog._catalog)
+
+        self.assertTrue(_jurisdiction_exists("US-ZQ-REN"))
+        with self.assertNumQueries(1):
+            self.assertEqual(get_jurisdiction_catalog().children("US-ZQ"), ("US-ZQ-CTY", "US-ZQ-REN"))
@@ -0,0 +1,49 @@
+import { renderHook, waitFor } from "@testing-library/react";
+import { vi, describe, it, expect, afterEach } from "vitest";
+
+import { SNAPSHOT_POLL_INTERVAL_MS, useTaxGuardian } from "./useTaxGuardian";
+
+const json = (body: unknown, status = 200) =>
+  Promise.resolve(new Response(JSON.stringify(body), { status, headers: { "Content-Type": "application/json" } }));
+
+describe("useTaxGuardian", () => {
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    vi.useRealTimers();
+  });
+
+  it("polls a pending snapshot until the worker has computed it", async () => {
+    vi.useFakeTimers({ shouldAdvanceTime: true });
+    const snapshot = {
+      period_key: "2025-04",
+      country: "CA",
+      status: "REVIEWED",
+      summary_by_jurisdiction: {},
+      line_mappings: {},
+      anomaly_counts: { low: 0, medium: 0, high: 0 },
+      has_high_severity_blockers: false,
+    };
+    let snapshotCalls = 0;
+    const fetchMock = vi.fn((input: RequestInfo | URL) => {
+      const url = String(input);
+      if (url === "/api/tax/periods/2025-04/") {
+        snapshotCalls += 1;
+        return snapshotCalls === 1 ? json({ period_key: "2025-04", status: "PENDING", job_id: 7 }, 202) : json(snapshot);
+      }
+      if (url.startsWith("/api/tax/periods/2025-04/anomalies/")) return json({ anomalies: [] });
+      if (url === "/api/tax/periods/") return json({ periods: [] });
+      return json([]);
+    });
+    vi.stubGlobal("fetch", fetchMock);
+
+    const { result } = renderHook(() => useTaxGuardian("2025-04"));
+
+    await waitFor(() => expect(snapshotCalls).toBe(1));
+    expect(result.current.snapshot).toBeNull();
+    await vi.advanceTimersByTimeAsync(SNAPSHOT_POLL_INTERVAL_MS);
+
+    await waitFor(() => expect(result.current.snapshot?.status).toBe("REVIEWED"));
+    expect(snapshotCalls).toBe(2);
+    expect(result.current.error).toBeNull();
+  });
+});